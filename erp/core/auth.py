@@ -3,19 +3,35 @@ Gestionnaire d'authentification et de sessions
 """
 from typing import Optional
 import uuid
-import os
+import time
 from datetime import datetime, timedelta
+from erp.core.constants import SESSION_PURGE_INTERVAL
 from erp.core.models import User
+from erp.core.session_store import SessionStore, get_session_store
+from erp.core.tenant import current_tenant, get_client_id
 
 
 class SessionManager:
-    """Gestion des sessions utilisateur"""
+    """Gestion des sessions utilisateur
     
-    def __init__(self):
-        self.sessions = {}  # session_id -> {'user_id': str, 'expires_at': datetime}
+    Les sessions et tokens de réinitialisation sont conservés dans un
+    SessionStore (base de données par défaut, voir erp.core.session_store),
+    ce qui les rend persistants et partagés entre processus. En mode
+    multi-tenant, les jetons sont préfixés par le tenant : un jeton n'est
+    valable que pour le tenant qui l'a émis, quel que soit le stockage.
+    """
+    
+    def __init__(self, store: Optional[SessionStore] = None):
+        self.store = store if store is not None else get_session_store()
         self.session_duration = timedelta(hours=24)  # Durée de session par défaut
-        self.reset_tokens = {}  # reset_token -> {'user_id': str, 'expires_at': datetime}
         self.reset_token_duration = timedelta(hours=1)  # Durée de validité du token de réinitialisation
+        self._last_purge = time.monotonic()
+    
+    @staticmethod
+    def _key(token: str) -> str:
+        """Clé de stockage d'un jeton (préfixée par le tenant courant)"""
+        tenant_id = current_tenant()
+        return token if tenant_id is None else f"{tenant_id}/{token}"
     
     def create_session(self, user_id: str) -> str:
         """Crée une nouvelle session pour un utilisateur
@@ -29,10 +45,11 @@ class SessionManager:
         session_id = str(uuid.uuid4())
         expires_at = datetime.now() + self.session_duration
         
-        self.sessions[session_id] = {
-            'user_id': user_id,
-            'expires_at': expires_at
-        }
+        self.store.put('session', self._key(session_id), user_id, expires_at)
+        
+        # Purge périodique des sessions expirées
+        if time.monotonic() - self._last_purge > SESSION_PURGE_INTERVAL:
+            self.cleanup_expired_sessions()
         
         return session_id
     
@@ -45,31 +62,18 @@ class SessionManager:
         Returns:
             Optional[str]: user_id si la session est valide, None sinon
         """
-        if session_id not in self.sessions:
-            return None
-        
-        session = self.sessions[session_id]
-        
-        # Vérifier si la session n'a pas expiré
-        if datetime.now() > session['expires_at']:
-            del self.sessions[session_id]
+        if not session_id:
             return None
-        
-        return session['user_id']
+        return self.store.get('session', self._key(session_id))
     
     def delete_session(self, session_id: str):
         """Supprime une session (logout)"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        self.store.delete('session', self._key(session_id))
     
-    def cleanup_expired_sessions(self):
-        """Nettoie les sessions expirées"""
-        now = datetime.now()
-        expired = [sid for sid, session in self.sessions.items() 
-                   if now > session['expires_at']]
-        
-        for sid in expired:
-            del self.sessions[sid]
+    def cleanup_expired_sessions(self) -> int:
+        """Nettoie les sessions et tokens expirés"""
+        self._last_purge = time.monotonic()
+        return self.store.purge_expired()
     
     def create_reset_token(self, user_id: str) -> str:
         """Crée un token de réinitialisation de mot de passe
@@ -83,10 +87,7 @@ class SessionManager:
         reset_token = str(uuid.uuid4())
         expires_at = datetime.now() + self.reset_token_duration
         
-        self.reset_tokens[reset_token] = {
-            'user_id': user_id,
-            'expires_at': expires_at
-        }
+        self.store.put('reset', self._key(reset_token), user_id, expires_at)
         
         return reset_token
     
@@ -99,22 +100,13 @@ class SessionManager:
         Returns:
             Optional[str]: user_id si le token est valide, None sinon
         """
-        if reset_token not in self.reset_tokens:
-            return None
-        
-        token_data = self.reset_tokens[reset_token]
-        
-        # Vérifier si le token n'a pas expiré
-        if datetime.now() > token_data['expires_at']:
-            del self.reset_tokens[reset_token]
+        if not reset_token:
             return None
-        
-        return token_data['user_id']
+        return self.store.get('reset', self._key(reset_token))
     
     def delete_reset_token(self, reset_token: str):
         """Supprime un token de réinitialisation après utilisation"""
-        if reset_token in self.reset_tokens:
-            del self.reset_tokens[reset_token]
+        self.store.delete('reset', self._key(reset_token))
 
 
 class AuthManager:
@@ -139,9 +131,7 @@ class AuthManager:
         from erp.utils.logger import get_logger
         logger = get_logger(__name__)
         
-        user = self.dm.get_user_by_username(username)
-        if user is None:
-            user = self.dm.get_user_by_email(username)
+        user = self.dm.get_user_by_login(username)
         
         if user is None:
             logger.warning(f"Authentification échouée: utilisateur '{username}' non trouvé")
@@ -167,12 +157,12 @@ class AuthManager:
         from erp.services.subscription_service import get_subscription_service
         subscription_service = get_subscription_service()
         
-        # Récupérer le client_id depuis les variables d'environnement ou depuis l'utilisateur
+        # Récupérer le client_id depuis l'utilisateur ou la configuration du tenant
         client_id_to_check = user.client_id
         if not client_id_to_check:
-            # Utiliser CLIENT_ID depuis les variables d'environnement
-            client_id_to_check = os.getenv('CLIENT_ID')
-            logger.debug(f"Utilisation de CLIENT_ID depuis l'environnement: {client_id_to_check}")
+            # CLIENT_ID du tenant courant (variable d'environnement en mono-tenant)
+            client_id_to_check = get_client_id()
+            logger.debug(f"Utilisation du CLIENT_ID configuré: {client_id_to_check}")
         
         logger.debug(f"client_id pour vérification d'abonnement: {client_id_to_check}")
         
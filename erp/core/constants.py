@@ -68,6 +68,100 @@ PDF_COLOR_HEADER = (200, 76, 60)  # Accent color
 PDF_COLOR_TEXT = (44, 62, 80)
 PDF_COLOR_LIGHT_GRAY = (220, 220, 220)
 
+# Rendering pool
+PDF_RENDER_WORKERS = None  # None : un processus par cœur
+PDF_RENDER_MAX_QUEUE = 32  # Rendus simultanés au-delà desquels les demandes sont refusées
+PDF_EXPORT_CONCURRENCY = 8  # Rendus simultanés d'un export par lot (laisse de la place aux rendus unitaires)
+PDF_EXPORT_MAX_AGE_HOURS = 24  # Archives ZIP d'export supprimées au-delà de ce délai
+PDF_CACHE_MAX_BYTES = 500 * 1024 * 1024  # Taille du cache disque des PDF, au-delà les moins récemment servis sont supprimés
+PDF_CACHE_MAX_AGE_DAYS = 30  # PDF du cache non servis depuis ce délai supprimés
+
+# Modèles de devis (éditeur)
+TEMPLATE_CACHE_CHECK_INTERVAL = 30  # Secondes entre deux vérifications des modifications faites par d'autres instances
+
+
+# =============================================================================
+# List Constants
+# =============================================================================
+
+# Listes paginées côté serveur (articles, ouvrages, clients, devis)
+LIST_PAGE_SIZE = 50  # Lignes chargées et envoyées au navigateur par page
+LIST_PAGE_SIZE_OPTIONS = (25, 50, 100)  # Choix proposés dans le pied de tableau
+
+# Chiffres des chantiers (cards du tableau et détail prévisionnel / réel)
+PROJET_CACHE_TTL = 600  # Secondes ; les modifications locales invalident l'entrée immédiatement
+PROJET_CACHE_MAX_ENTRIES = 2048
+
+
+# =============================================================================
+# Dashboard Constants
+# =============================================================================
+
+# Nombre maximal de rendus Pygwalker conservés en mémoire (tous tenants)
+DASHBOARD_CACHE_MAX_ENTRIES = 8
+# Processus dédiés à la génération du HTML Pygwalker
+DASHBOARD_RENDER_WORKERS = 1
+
+
+# =============================================================================
+# Authentication Constants
+# =============================================================================
+
+# Intervalle minimal entre deux purges des sessions expirées (secondes)
+SESSION_PURGE_INTERVAL = 600
+
+# Cache des utilisateurs authentifiés (évite une requête par page)
+USER_CACHE_TTL = 60  # Secondes
+USER_CACHE_MAX_ENTRIES = 1024
+
+# Base des abonnements (distante)
+SUBSCRIPTION_DB_POOL_SIZE = 5  # Connexions maximales du pool
+SUBSCRIPTION_CACHE_TTL = 300  # Secondes avant rafraîchissement en arrière-plan du statut d'un client
+SUBSCRIPTION_CACHE_MAX_STALE = 86400  # Au-delà, le statut est revérifié avant d'être servi
+SUBSCRIPTION_CHECK_TIMEOUT = 2.0  # Attente maximale d'une première vérification (secondes)
+
+# Journal des connexions (écriture groupée en arrière-plan)
+AUDIT_LOG_QUEUE_SIZE = 10000  # Événements en attente au maximum (au-delà : fichier de secours)
+AUDIT_LOG_BATCH_SIZE = 200  # Événements par INSERT multi-lignes
+AUDIT_LOG_FLUSH_INTERVAL = 2.0  # Délai maximal avant l'envoi d'un lot incomplet (secondes)
+AUDIT_LOG_RETRY_INTERVAL = 30.0  # Délai entre deux tentatives de rejeu du fichier de secours (secondes)
+
+# File d'envoi des emails
+EMAIL_MAX_ATTEMPTS = 8  # Tentatives avant abandon d'un email
+EMAIL_RETRY_BASE_DELAY = 30.0  # Délai avant la première nouvelle tentative, doublé ensuite (secondes)
+EMAIL_RETRY_MAX_DELAY = 3600.0  # Délai maximal entre deux tentatives (secondes)
+EMAIL_SMTP_IDLE_TIMEOUT = 60.0  # Fermeture de la connexion SMTP inutilisée (secondes)
+EMAIL_CLAIM_TIMEOUT = 600.0  # Email pris en charge par un processus arrêté : rendu à la file après ce délai (secondes)
+
+# Webhooks Stripe (traitement en arrière-plan)
+STRIPE_EVENT_MAX_ATTEMPTS = 5  # Tentatives de traitement avant abandon d'un événement
+STRIPE_EVENT_RETRY_DELAY = 30.0  # Délai avant la première nouvelle tentative, doublé ensuite (secondes)
+STRIPE_EVENT_CLAIM_TIMEOUT = 600.0  # Événement en cours de traitement par un processus arrêté : repris après ce délai (secondes)
+
+# Métriques (/metrics)
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Secondes
+METRICS_SLOW_REQUEST_THRESHOLD = 1.0  # Au-delà, une requête (ex. construction de page) est comptée comme lente
+
+# Mode multi-tenant (un processus, un schéma PostgreSQL par tenant)
+TENANT_DB_POOL_SIZE = 20  # Connexions permanentes du pool partagé par tous les tenants
+TENANT_DB_MAX_OVERFLOW = 10  # Connexions supplémentaires possibles en pointe
+TENANT_SCHEMA_PREFIX = 'tenant_'  # Schéma d'un tenant : préfixe + identifiant
+
+# Réglages quasi statiques (organisation) : cache mémoire, changements diffusés aux autres processus
+SETTINGS_NOTIFY_CHANNEL = 'erp_settings'  # Canal PostgreSQL LISTEN/NOTIFY
+SETTINGS_LISTEN_TIMEOUT = 1.0  # Secondes d'attente d'une notification avant de vérifier l'arrêt
+SETTINGS_LISTEN_RETRY_DELAY = 5.0  # Secondes avant de rouvrir une connexion d'écoute perdue
+
+# Journalisation : écriture (console, fichier) par un thread dédié
+LOG_QUEUE_SIZE = 10000  # Enregistrements en attente ; au-delà, les nouveaux sont abandonnés (comptés)
+LOG_RATE_LIMIT = None  # Messages INFO/DEBUG par ligne de code et par fenêtre, tous loggers ; None = illimité
+LOG_RATE_WINDOW = 60.0  # Secondes
+# Loggers limités par défaut (messages émis à chaque requête) : messages par ligne et par fenêtre
+LOG_RATE_LIMITED_LOGGERS = {
+    'erp.services.subscription_service': 20,  # Vérification d'abonnement, journal des connexions
+    'erp.services.dashboard_service': 20,  # Tableau de bord servi depuis le cache
+}
+
 
 # =============================================================================
 # Data Validation Constants
@@ -82,6 +176,9 @@ PHONE_PATTERN = r'^(\+33|0)[1-9](\d{2}){4}$'
 # SIRET pattern (French business ID)
 SIRET_PATTERN = r'^\d{14}$'
 
+# Identifiant de tenant (utilisé dans les noms d'hôte et de schéma)
+TENANT_ID_PATTERN = r'^[a-z0-9][a-z0-9_]{0,19}$'  # 20 caractères : préfixe des jetons de session (64 max)
+
 # Minimum lengths
 MIN_CLIENT_NAME_LENGTH = 2
 MIN_ARTICLE_REFERENCE_LENGTH = 1
@@ -0,0 +1,448 @@
+"""
+Interface commune des gestionnaires de données
+
+Implémentations :
+- DataManagerPostgres : base SQLAlchemy (PostgreSQL, ou SQLite pour une
+  installation mono-poste, voir storage_config)
+- DataManagerMemory : dictionnaires en mémoire, sans base de données, pour les
+  tests et comme référence sans E/S des benchmarks
+
+Les deux respectent les mêmes règles : objets retournés en copie, erreur
+ResourceNotFoundError sur la mise à jour ou la suppression d'un élément absent,
+identifiants des articles et ouvrages attribués à l'ajout.
+"""
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from erp.core.models import (
+    Client, Fournisseur, Article, Ouvrage, ComposantOuvrage,
+    Devis, LigneDevis, Organisation, Projet, User
+)
+from erp.core.tenant import current_tenant
+from erp.utils.exceptions import ResourceNotFoundError
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Dossier data du projet (logo, PDF, exports)
+DEFAULT_DATA_DIR = Path(__file__).parent.parent.parent / 'data'
+
+
+def tenant_data_dir(base_dir: Path = DEFAULT_DATA_DIR, tenant_id: Optional[str] = None) -> Path:
+    """Dossier des fichiers d'un tenant (base_dir lui-même hors multi-tenant), créé au besoin"""
+    if tenant_id is None:
+        return base_dir
+    tenant_dir = base_dir / 'tenants' / tenant_id
+    tenant_dir.mkdir(parents=True, exist_ok=True)
+    return tenant_dir
+
+
+# Listes paginées : champs de la recherche texte, champs triables (le premier
+# est le tri par défaut). Mêmes noms pour les dataclasses et les colonnes SQL.
+PAGE_SEARCH_FIELDS = {
+    'clients': ('nom', 'prenom', 'entreprise', 'ville', 'email'),
+    'articles': ('reference', 'designation'),
+    'ouvrages': ('reference', 'designation'),
+    'devis': ('numero', 'objet'),
+}
+PAGE_SORT_FIELDS = {
+    'clients': ('nom', 'prenom', 'entreprise', 'ville', 'email', 'telephone'),
+    'articles': ('reference', 'designation', 'type_article', 'categorie', 'unite', 'prix_unitaire'),
+    'ouvrages': ('reference', 'designation', 'categorie'),
+    'devis': ('date', 'numero', 'objet', 'statut'),
+}
+
+
+def sort_field(table: str, order_by: Optional[str]) -> str:
+    """Champ de tri autorisé (tri par défaut de la liste sinon)"""
+    fields = PAGE_SORT_FIELDS[table]
+    return order_by if order_by in fields else fields[0]
+
+
+def paginate(items: Sequence, table: str, offset: int, limit: int, search: Optional[str] = None,
+             order_by: Optional[str] = None, descending: bool = False) -> Tuple[list, int]:
+    """Recherche, tri et découpage d'une liste en mémoire
+
+    Returns:
+        (éléments de la page, nombre total d'éléments correspondant à la recherche)
+    """
+    if search:
+        term = search.lower()
+        fields = PAGE_SEARCH_FIELDS[table]
+        items = [i for i in items if any(term in (getattr(i, f) or '').lower() for f in fields)]
+    field = sort_field(table, order_by)
+
+    def key(item):
+        value = getattr(item, field)
+        return value.lower() if isinstance(value, str) else value
+
+    items = sorted(items, key=key, reverse=descending)
+    return items[offset:offset + limit], len(items)
+
+
+class DataManager(ABC):
+    """Gestionnaire de données : organisation, clients, catalogue, devis, projets, utilisateurs"""
+
+    # Dossier des fichiers hors multi-tenant (renseigné par l'implémentation)
+    base_data_dir: Path = DEFAULT_DATA_DIR
+
+    @property
+    def data_dir(self) -> Path:
+        """Dossier des fichiers du tenant courant (logo, PDF, exports)"""
+        return tenant_data_dir(self.base_data_dir, current_tenant())
+
+    @staticmethod
+    def _organisation_changed():
+        """L'organisation en cache et les styles et logo PDF compilés sont à recharger"""
+        from erp.services.settings_service import get_settings_service
+        get_settings_service().changed()
+
+    @staticmethod
+    def _projets_changed(projet_id: Optional[int] = None, devis_numero: Optional[str] = None):
+        """Les chiffres de chantier en cache dépendent des chantiers, des devis rattachés et des articles
+
+        Sans argument (article modifié), tout le cache est vidé.
+        """
+        from erp.services.projet_summary_service import get_projet_summary_service
+        service = get_projet_summary_service()
+        if projet_id is not None:
+            service.invalidate_projet(projet_id)
+        elif devis_numero is not None:
+            service.invalidate_devis(devis_numero)
+        else:
+            service.clear()
+
+    # ==================== ORGANISATION ====================
+
+    @property
+    @abstractmethod
+    def organisation(self) -> Organisation:
+        """Informations de l'organisation (par défaut si non renseignées)"""
+
+    @organisation.setter
+    @abstractmethod
+    def organisation(self, org: Organisation):
+        """Enregistre les informations de l'organisation"""
+
+    # ==================== CLIENTS ====================
+
+    @property
+    @abstractmethod
+    def clients(self) -> List[Client]:
+        """Tous les clients"""
+
+    @abstractmethod
+    def get_client_by_id(self, client_id: int) -> Optional[Client]: ...
+
+    @abstractmethod
+    def add_client(self, client: Client): ...
+
+    @abstractmethod
+    def update_client(self, client: Client): ...
+
+    @abstractmethod
+    def delete_client(self, client_id: int): ...
+
+    # ==================== FOURNISSEURS ====================
+
+    @property
+    @abstractmethod
+    def fournisseurs(self) -> List[Fournisseur]:
+        """Tous les fournisseurs"""
+
+    @abstractmethod
+    def get_fournisseur_by_id(self, fournisseur_id: int) -> Optional[Fournisseur]: ...
+
+    @abstractmethod
+    def add_fournisseur(self, fournisseur: Fournisseur): ...
+
+    @abstractmethod
+    def update_fournisseur(self, fournisseur: Fournisseur): ...
+
+    @abstractmethod
+    def delete_fournisseur(self, fournisseur_id: int): ...
+
+    # ==================== ARTICLES ====================
+
+    @property
+    @abstractmethod
+    def articles(self) -> List[Article]:
+        """Tous les articles"""
+
+    @abstractmethod
+    def get_articles_by_categories(self, categories: Iterable[str]) -> List[Article]:
+        """Articles des catégories données (sans catégorie = « general »)"""
+
+    @abstractmethod
+    def get_article_by_id(self, article_id: int) -> Optional[Article]: ...
+
+    @abstractmethod
+    def add_article(self, article: Article):
+        """Ajoute un article ; son id est attribué et reporté sur l'objet"""
+
+    @abstractmethod
+    def update_article(self, article: Article): ...
+
+    @abstractmethod
+    def delete_article(self, article_id: int): ...
+
+    # ==================== OUVRAGES ====================
+
+    @property
+    @abstractmethod
+    def ouvrages(self) -> List[Ouvrage]:
+        """Tous les ouvrages"""
+
+    @abstractmethod
+    def get_ouvrage_by_id(self, ouvrage_id: int) -> Optional[Ouvrage]: ...
+
+    @abstractmethod
+    def add_ouvrage(self, ouvrage: Ouvrage):
+        """Ajoute un ouvrage ; son id est attribué et reporté sur l'objet"""
+
+    @abstractmethod
+    def update_ouvrage(self, ouvrage: Ouvrage): ...
+
+    @abstractmethod
+    def delete_ouvrage(self, ouvrage_id: int): ...
+
+    @abstractmethod
+    def get_next_ouvrage_id(self) -> int: ...
+
+    # ==================== DEVIS ====================
+
+    @property
+    @abstractmethod
+    def devis_list(self) -> List[Devis]:
+        """Tous les devis"""
+
+    @abstractmethod
+    def get_devis_by_numero(self, numero: str) -> Optional[Devis]: ...
+
+    @abstractmethod
+    def add_devis(self, devis: Devis): ...
+
+    @abstractmethod
+    def update_devis(self, devis: Devis): ...
+
+    def update_devis_lignes(self, numero: str, lignes: List[LigneDevis]):
+        """Remplace uniquement les lignes d'un devis (réorganisation dans l'éditeur)
+
+        Implémentation par défaut : relecture puis mise à jour complète.
+        """
+        devis = self.get_devis_by_numero(numero)
+        if devis is None:
+            raise ResourceNotFoundError(f"Devis not found: {numero}")
+        devis.lignes = list(lignes)
+        self.update_devis(devis)
+
+    @abstractmethod
+    def delete_devis(self, numero: str): ...
+
+    @abstractmethod
+    def get_next_devis_number(self) -> str:
+        """Numéro DEV-<année>-<n°> du prochain devis de l'année"""
+
+    # ==================== PROJETS ====================
+
+    @property
+    @abstractmethod
+    def projets(self) -> List[Projet]:
+        """Tous les projets"""
+
+    @abstractmethod
+    def get_projet_by_id(self, projet_id: int) -> Optional[Projet]: ...
+
+    @abstractmethod
+    def get_projet_by_numero(self, numero: str) -> Optional[Projet]: ...
+
+    @abstractmethod
+    def add_projet(self, projet: Projet): ...
+
+    @abstractmethod
+    def update_projet(self, projet: Projet): ...
+
+    @abstractmethod
+    def delete_projet(self, projet_id: int): ...
+
+    @abstractmethod
+    def get_next_projet_number(self) -> str:
+        """Numéro PROJ-<année>-<n°> du prochain projet de l'année"""
+
+    # ==================== USERS ====================
+
+    @property
+    @abstractmethod
+    def users(self) -> List[User]:
+        """Tous les utilisateurs"""
+
+    @abstractmethod
+    def get_user_by_id(self, user_id: str) -> Optional[User]: ...
+
+    @abstractmethod
+    def get_user_by_username(self, username: str) -> Optional[User]: ...
+
+    @abstractmethod
+    def get_user_by_email(self, email: str) -> Optional[User]: ...
+
+    @abstractmethod
+    def get_user_by_login(self, login: str) -> Optional[User]:
+        """Utilisateur par nom d'utilisateur ou email (nom d'utilisateur prioritaire)"""
+
+    @abstractmethod
+    def add_user(self, user: User):
+        """Ajoute un utilisateur (ValueError si le nom ou l'email existe déjà)"""
+
+    @abstractmethod
+    def update_user(self, user: User): ...
+
+    # ==================== LISTES PAGINÉES ====================
+    # Implémentations génériques sur les listes complètes ; les backends les
+    # remplacent par une requête ne lisant que la page demandée.
+
+    def page_clients(self, offset: int, limit: int, search: Optional[str] = None,
+                     order_by: Optional[str] = None, descending: bool = False) -> Tuple[List[Client], int]:
+        """Une page de clients et le nombre total de clients correspondant à la recherche"""
+        return paginate(self.clients, 'clients', offset, limit, search, order_by, descending)
+
+    def page_articles(self, offset: int, limit: int, categories: Optional[Iterable[str]] = None,
+                      type_article: Optional[str] = None, search: Optional[str] = None,
+                      order_by: Optional[str] = None, descending: bool = False) -> Tuple[List[Article], int]:
+        """Une page d'articles filtrés par catégories (voir get_articles_by_categories) et type"""
+        articles = self.articles if categories is None else self.get_articles_by_categories(categories)
+        if type_article is not None:
+            articles = [a for a in articles if a.type_article == type_article]
+        return paginate(articles, 'articles', offset, limit, search, order_by, descending)
+
+    def count_articles_by_type(self) -> Dict[str, int]:
+        """Nombre d'articles par type"""
+        counts: Dict[str, int] = {}
+        for article in self.articles:
+            counts[article.type_article] = counts.get(article.type_article, 0) + 1
+        return counts
+
+    def page_ouvrages(self, offset: int, limit: int, categories: Optional[Iterable[str]] = None,
+                      search: Optional[str] = None, order_by: Optional[str] = None,
+                      descending: bool = False) -> Tuple[List[Ouvrage], int]:
+        """Une page d'ouvrages, filtrés par catégories exactes"""
+        ouvrages = self.ouvrages
+        if categories is not None:
+            categories = set(categories)
+            ouvrages = [o for o in ouvrages if o.categorie in categories]
+        return paginate(ouvrages, 'ouvrages', offset, limit, search, order_by, descending)
+
+    def page_devis(self, offset: int, limit: int, search: Optional[str] = None,
+                   order_by: Optional[str] = None, descending: bool = True) -> Tuple[List[Devis], int]:
+        """Une page de devis (par défaut les plus récents d'abord)"""
+        return paginate(self.devis_list, 'devis', offset, limit, search, order_by, descending)
+
+    # ==================== MÉTHODES DE COMPATIBILITÉ ====================
+
+    def save_data(self):
+        """
+        Méthode de compatibilité (ne fait rien car les données sont automatiquement sauvegardées)
+        """
+        pass
+
+    def load_data(self):
+        """
+        Méthode de compatibilité (ne fait rien car les données sont chargées à la demande)
+        """
+        pass
+
+    def init_demo_data(self):
+        """Initialise des données de démonstration si le stockage est vide"""
+        if not self.clients and not self.articles:
+            logger.info(f"Initializing demo data ({type(self).__name__})")
+
+            # Ajouter des fournisseurs
+            fournisseurs = [
+                Fournisseur(id=1, nom="Placo France", specialite="Plâtrerie", telephone="0140506070", email="contact@placo.fr", remise=0.0),
+                Fournisseur(id=2, nom="Bois & Menuiserie", specialite="Menuiserie", telephone="0145678901", email="contact@boisetmenu.fr", remise=0.0),
+            ]
+            for f in fournisseurs:
+                self.add_fournisseur(f)
+
+            # Ajouter des articles
+            articles = [
+                Article(id=1, reference="BA13-STD", designation="Plaque BA13 standard", unite="m²", prix_unitaire=8.50, type_article="materiau", fournisseur_id=1, description="Plaque de plâtre standard", categorie="platrerie"),
+                Article(id=2, reference="RAIL-M48", designation="Rail métallique 48mm", unite="ml", prix_unitaire=2.20, type_article="materiau", fournisseur_id=1, categorie="platrerie"),
+                Article(id=10, reference="VIS-PLACO", designation="Vis pour placo (boîte de 1000)", unite="u", prix_unitaire=8.50, type_article="fourniture", fournisseur_id=1, categorie="platrerie"),
+                Article(id=100, reference="MO-PLAT-QUAL", designation="Main d'œuvre plâtrier qualifié", unite="h", prix_unitaire=45.00, type_article="main_oeuvre", fournisseur_id=0, categorie="platrerie"),
+            ]
+            for a in articles:
+                self.add_article(a)
+
+            # Ajouter des clients
+            clients = [
+                Client(id=1, nom="Dupont", prenom="Jean", entreprise="Maison Dupont", adresse="12 rue de la Paix", cp="75001", ville="Paris", telephone="0612345678", email="j.dupont@email.com"),
+                Client(id=2, nom="Martin", prenom="Sophie", entreprise="SARL Martin Rénovation", adresse="45 avenue des Champs", cp="69000", ville="Lyon", telephone="0698765432", email="s.martin@email.com"),
+            ]
+            for c in clients:
+                self.add_client(c)
+
+            # Ajouter un ouvrage
+            ouvrage = Ouvrage(
+                id=1,
+                reference="CLO-BA13-SIMPLE",
+                designation="Cloison BA13 simple face sur rail 48",
+                description="Cloison séparative légère, plaque BA13 simple face avec isolation acoustique",
+                categorie="platrerie",
+                unite="m²",
+                composants=[
+                    ComposantOuvrage(article_id=1, quantite=1.05, designation="Plaque BA13", unite="m²", prix_unitaire=8.50),
+                    ComposantOuvrage(article_id=2, quantite=0.6, designation="Rail métallique", unite="ml", prix_unitaire=2.20),
+                    ComposantOuvrage(article_id=100, quantite=0.45, designation="MO plâtrier", unite="h", prix_unitaire=45.00),
+                ]
+            )
+            self.add_ouvrage(ouvrage)
+
+            # Créer une organisation par défaut
+            org = Organisation(
+                id=1,
+                nom="POCKO construction",
+                siret="",
+                adresse="1 Rue des Grands Champs",
+                cp="00000",
+                ville="VILLE",
+                telephone="00.00.00.00.00",
+                email="",
+                site_web="",
+                logo_path="",
+                date_debut_exercice="",
+                date_fin_exercice=""
+            )
+            self.organisation = org
+
+            logger.info("Demo data initialized successfully")
+
+    def get_company_info(self) -> dict:
+        """Retourne les informations de l'entreprise (pour compatibilité)"""
+        org = self.organisation
+        return {
+            'name': org.nom,
+            'address': f"{org.adresse}\n{org.cp} {org.ville}",
+            'phone': org.telephone
+        }
+
+    def save_company_info(self, info: dict):
+        """Sauvegarde les informations de l'entreprise (pour compatibilité)"""
+        org = self.organisation
+        org.nom = info.get('name', org.nom)
+
+        # Parse address
+        address = info.get('address', '')
+        if '\n' in address:
+            parts = address.split('\n')
+            org.adresse = parts[0]
+            if len(parts) > 1:
+                cp_ville = parts[1].split(' ', 1)
+                if len(cp_ville) == 2:
+                    org.cp = cp_ville[0]
+                    org.ville = cp_ville[1]
+        else:
+            org.adresse = address
+
+        org.telephone = info.get('phone', org.telephone)
+        self.organisation = org
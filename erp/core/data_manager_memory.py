@@ -0,0 +1,572 @@
+"""
+Gestionnaire de données en mémoire
+
+Implémentation de référence de DataManager, sans base de données : chaque
+table est un dictionnaire indexé par sa clé primaire, avec des index sur les
+colonnes uniques (référence, numéro, nom d'utilisateur, email). Les objets
+sont copiés à l'écriture et à la lecture, comme une ligne relue en base.
+
+Usage : tests rapides sans PostgreSQL, et référence sans E/S des benchmarks
+pour mesurer le coût du stockage (ERP_STORAGE_BACKEND=memory). Les données
+sont perdues à l'arrêt du processus.
+"""
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from erp.core.models import (
+    Client, Fournisseur, Article, Ouvrage, Devis, LigneDevis, Organisation, Projet, User
+)
+from erp.core.data_manager_base import DEFAULT_DATA_DIR, DataManager, paginate
+from erp.core.tenant import current_tenant
+from erp.utils.logger import get_logger
+from erp.utils.exceptions import DuplicateResourceError, ResourceNotFoundError
+
+logger = get_logger(__name__)
+
+
+class _Store:
+    """Tables d'un tenant"""
+
+    def __init__(self):
+        self.organisation: Optional[Organisation] = None
+        self.clients: Dict[int, Client] = {}
+        self.fournisseurs: Dict[int, Fournisseur] = {}
+        self.articles: Dict[int, Article] = {}
+        self.ouvrages: Dict[int, Ouvrage] = {}
+        self.devis: Dict[str, Devis] = {}
+        self.projets: Dict[int, Projet] = {}
+        self.users: Dict[str, User] = {}
+        # Index des colonnes uniques : valeur -> clé primaire
+        self.article_refs: Dict[str, int] = {}
+        self.ouvrage_refs: Dict[str, int] = {}
+        self.projet_numeros: Dict[str, int] = {}
+        self.usernames: Dict[str, str] = {}
+        self.emails: Dict[str, str] = {}
+        # Séquences des identifiants attribués à l'ajout (jamais réutilisés)
+        self.article_seq = 0
+        self.ouvrage_seq = 0
+
+
+def _clone(obj):
+    """Copie d'un objet du modèle : champs recopiés, listes d'objets clonées
+
+    Équivaut à copy.deepcopy pour les dataclasses du modèle (listes de
+    ComposantOuvrage, LigneDevis, DepenseReelle ; chaînes et nombres immuables),
+    en bien moins de temps sur les gros devis. Le constructeur est appelé pour
+    que la copie garde un accès aux attributs aussi rapide que l'original.
+    """
+    state = obj.__dict__.copy()
+    for name, value in state.items():
+        if type(value) is list:
+            state[name] = [_clone(v) if hasattr(v, '__dict__') else v.copy() if type(v) is dict else v
+                           for v in value]
+    return obj.__class__(**state)
+
+
+def _next_key(table: dict) -> int:
+    return max(table, default=0) + 1
+
+
+def _reindex(index: Dict, old_value, new_value, key, label: str):
+    """Met à jour un index unique (DuplicateResourceError si la valeur est prise)"""
+    owner = index.get(new_value)
+    if owner is not None and owner != key:
+        raise DuplicateResourceError(f"{label} already exists: {new_value}")
+    if old_value is not None and index.get(old_value) == key:
+        del index[old_value]
+    index[new_value] = key
+
+
+class DataManagerMemory(DataManager):
+    """Gestionnaire de données en mémoire (un jeu de tables par tenant)"""
+
+    def __init__(self, data_dir: Optional[Path] = None):
+        """
+        Args:
+            data_dir: Dossier des fichiers (logo, PDF) ; par défaut le dossier data du projet
+        """
+        self.base_data_dir = Path(data_dir) if data_dir is not None else DEFAULT_DATA_DIR
+        self.base_data_dir.mkdir(parents=True, exist_ok=True)
+        self._stores: Dict[Optional[str], _Store] = {}
+        self._lock = threading.RLock()
+        logger.info("DataManagerMemory initialized (données non persistées)")
+
+    @property
+    def _store(self) -> _Store:
+        """Tables du tenant courant"""
+        tenant_id = current_tenant()
+        store = self._stores.get(tenant_id)
+        if store is None:
+            with self._lock:
+                store = self._stores.setdefault(tenant_id, _Store())
+        return store
+
+    def load_from(self, source: DataManager):
+        """Remplace les données du tenant courant par une copie de celles d'un autre gestionnaire
+
+        Les identifiants sont conservés (composants d'ouvrages, devis des projets).
+        """
+        store = _Store()
+        store.organisation = source.organisation
+        store.clients = {c.id: c for c in source.clients}
+        store.fournisseurs = {f.id: f for f in source.fournisseurs}
+        store.articles = {a.id: self._article_row(a) for a in source.articles}
+        store.ouvrages = {o.id: o for o in source.ouvrages}
+        store.devis = {d.numero: d for d in source.devis_list}
+        store.projets = {p.id: self._projet_row(p) for p in source.projets}
+        store.users = {u.id: u for u in source.users}
+        store.article_refs = {a.reference: a.id for a in store.articles.values()}
+        store.ouvrage_refs = {o.reference: o.id for o in store.ouvrages.values()}
+        store.projet_numeros = {p.numero: p.id for p in store.projets.values()}
+        store.usernames = {u.username: u.id for u in store.users.values()}
+        for u in store.users.values():
+            store.emails.setdefault(u.email, u.id)
+        with self._lock:
+            self._stores[current_tenant()] = store
+        logger.info(f"DataManagerMemory: {len(store.articles)} articles, {len(store.devis)} devis chargés")
+
+    # ==================== ORGANISATION ====================
+
+    @property
+    def organisation(self) -> Organisation:
+        """Récupère les informations de l'organisation"""
+        org = self._store.organisation
+        return _clone(org) if org is not None else Organisation()
+
+    @organisation.setter
+    def organisation(self, org: Organisation):
+        """Met à jour les informations de l'organisation"""
+        self._store.organisation = _clone(org)
+        self._organisation_changed()
+
+    # ==================== CLIENTS ====================
+
+    @property
+    def clients(self) -> List[Client]:
+        """Récupère tous les clients"""
+        return [_clone(c) for c in self._store.clients.values()]
+
+    def get_client_by_id(self, client_id: int) -> Optional[Client]:
+        """Récupère un client par son ID"""
+        c = self._store.clients.get(client_id)
+        if c is None:
+            logger.warning(f"Client not found: {client_id}")
+            return None
+        return _clone(c)
+
+    def add_client(self, client: Client):
+        """Ajoute un nouveau client"""
+        store = self._store
+        with self._lock:
+            if client.id is None:
+                client.id = _next_key(store.clients)
+            elif client.id in store.clients:
+                raise DuplicateResourceError(f"Client already exists: {client.id}")
+            store.clients[client.id] = _clone(client)
+        logger.info(f"Client added: {client.nom} {client.prenom}")
+
+    def update_client(self, client: Client):
+        """Met à jour un client existant"""
+        store = self._store
+        with self._lock:
+            if client.id not in store.clients:
+                raise ResourceNotFoundError(f"Client not found: {client.id}")
+            store.clients[client.id] = _clone(client)
+        logger.info(f"Client updated: {client.id}")
+
+    def delete_client(self, client_id: int):
+        """Supprime un client"""
+        with self._lock:
+            if self._store.clients.pop(client_id, None) is None:
+                raise ResourceNotFoundError(f"Client not found: {client_id}")
+        logger.info(f"Client deleted: {client_id}")
+
+    # ==================== FOURNISSEURS ====================
+
+    @property
+    def fournisseurs(self) -> List[Fournisseur]:
+        """Récupère tous les fournisseurs"""
+        return [_clone(f) for f in self._store.fournisseurs.values()]
+
+    def get_fournisseur_by_id(self, fournisseur_id: int) -> Optional[Fournisseur]:
+        """Récupère un fournisseur par son ID"""
+        f = self._store.fournisseurs.get(fournisseur_id)
+        return _clone(f) if f is not None else None
+
+    def add_fournisseur(self, fournisseur: Fournisseur):
+        """Ajoute un nouveau fournisseur"""
+        store = self._store
+        with self._lock:
+            if fournisseur.id is None:
+                fournisseur.id = _next_key(store.fournisseurs)
+            elif fournisseur.id in store.fournisseurs:
+                raise DuplicateResourceError(f"Fournisseur already exists: {fournisseur.id}")
+            store.fournisseurs[fournisseur.id] = _clone(fournisseur)
+        logger.info(f"Fournisseur added: {fournisseur.nom}")
+
+    def update_fournisseur(self, fournisseur: Fournisseur):
+        """Met à jour un fournisseur existant"""
+        store = self._store
+        with self._lock:
+            if fournisseur.id not in store.fournisseurs:
+                raise ResourceNotFoundError(f"Fournisseur not found: {fournisseur.id}")
+            store.fournisseurs[fournisseur.id] = _clone(fournisseur)
+        logger.info(f"Fournisseur updated: {fournisseur.id}")
+
+    def delete_fournisseur(self, fournisseur_id: int):
+        """Supprime un fournisseur"""
+        with self._lock:
+            if self._store.fournisseurs.pop(fournisseur_id, None) is None:
+                raise ResourceNotFoundError(f"Fournisseur not found: {fournisseur_id}")
+        logger.info(f"Fournisseur deleted: {fournisseur_id}")
+
+    # ==================== ARTICLES ====================
+
+    @staticmethod
+    def _article_row(article: Article) -> Article:
+        """Copie stockée : sans catégorie = « general », comme à la relecture en base"""
+        row = _clone(article)
+        row.categorie = row.categorie or "general"
+        return row
+
+    @property
+    def articles(self) -> List[Article]:
+        """Récupère tous les articles"""
+        return [_clone(a) for a in self._store.articles.values()]
+
+    def get_articles_by_categories(self, categories: Iterable[str]) -> List[Article]:
+        """Récupère les articles dont la catégorie est dans la liste"""
+        categories = set(categories)
+        return [_clone(a) for a in self._store.articles.values() if a.categorie in categories]
+
+    def get_article_by_id(self, article_id: int) -> Optional[Article]:
+        """Récupère un article par son ID"""
+        a = self._store.articles.get(article_id)
+        return _clone(a) if a is not None else None
+
+    def add_article(self, article: Article):
+        """Ajoute un nouvel article (ID attribué par la séquence, comme en base)"""
+        store = self._store
+        with self._lock:
+            store.article_seq = max(store.article_seq, _next_key(store.articles) - 1) + 1
+            _reindex(store.article_refs, None, article.reference, store.article_seq, 'Article')
+            article.id = store.article_seq
+            store.articles[article.id] = self._article_row(article)
+        logger.info(f"Article added: {article.reference}")
+
+    def update_article(self, article: Article):
+        """Met à jour un article existant"""
+        store = self._store
+        with self._lock:
+            current = store.articles.get(article.id)
+            if current is None:
+                raise ResourceNotFoundError(f"Article not found: {article.id}")
+            _reindex(store.article_refs, current.reference, article.reference, article.id, 'Article')
+            store.articles[article.id] = self._article_row(article)
+        self._projets_changed()
+        logger.info(f"Article updated: {article.id}")
+
+    def delete_article(self, article_id: int):
+        """Supprime un article"""
+        store = self._store
+        with self._lock:
+            a = store.articles.pop(article_id, None)
+            if a is None:
+                raise ResourceNotFoundError(f"Article not found: {article_id}")
+            store.article_refs.pop(a.reference, None)
+        self._projets_changed()
+        logger.info(f"Article deleted: {article_id}")
+
+    # ==================== OUVRAGES ====================
+
+    @property
+    def ouvrages(self) -> List[Ouvrage]:
+        """Récupère tous les ouvrages"""
+        return [_clone(o) for o in self._store.ouvrages.values()]
+
+    def get_ouvrage_by_id(self, ouvrage_id: int) -> Optional[Ouvrage]:
+        """Récupère un ouvrage par son ID"""
+        o = self._store.ouvrages.get(ouvrage_id)
+        return _clone(o) if o is not None else None
+
+    def add_ouvrage(self, ouvrage: Ouvrage):
+        """Ajoute un nouvel ouvrage (ID attribué par la séquence, comme en base)"""
+        store = self._store
+        with self._lock:
+            store.ouvrage_seq = max(store.ouvrage_seq, _next_key(store.ouvrages) - 1) + 1
+            _reindex(store.ouvrage_refs, None, ouvrage.reference, store.ouvrage_seq, 'Ouvrage')
+            ouvrage.id = store.ouvrage_seq
+            store.ouvrages[ouvrage.id] = _clone(ouvrage)
+        logger.info(f"Ouvrage added: {ouvrage.reference}")
+
+    def update_ouvrage(self, ouvrage: Ouvrage):
+        """Met à jour un ouvrage existant"""
+        store = self._store
+        with self._lock:
+            current = store.ouvrages.get(ouvrage.id)
+            if current is None:
+                raise ResourceNotFoundError(f"Ouvrage not found: {ouvrage.id}")
+            _reindex(store.ouvrage_refs, current.reference, ouvrage.reference, ouvrage.id, 'Ouvrage')
+            store.ouvrages[ouvrage.id] = _clone(ouvrage)
+        logger.info(f"Ouvrage updated: {ouvrage.id}")
+
+    def delete_ouvrage(self, ouvrage_id: int):
+        """Supprime un ouvrage"""
+        store = self._store
+        with self._lock:
+            o = store.ouvrages.pop(ouvrage_id, None)
+            if o is None:
+                raise ResourceNotFoundError(f"Ouvrage not found: {ouvrage_id}")
+            store.ouvrage_refs.pop(o.reference, None)
+        logger.info(f"Ouvrage deleted: {ouvrage_id}")
+
+    def get_next_ouvrage_id(self) -> int:
+        """Génère le prochain ID d'ouvrage"""
+        return _next_key(self._store.ouvrages)
+
+    # ==================== DEVIS ====================
+
+    @property
+    def devis_list(self) -> List[Devis]:
+        """Récupère tous les devis"""
+        return [_clone(d) for d in self._store.devis.values()]
+
+    def get_devis_by_numero(self, numero: str) -> Optional[Devis]:
+        """Récupère un devis par son numéro"""
+        d = self._store.devis.get(numero)
+        if d is None:
+            logger.warning(f"Devis not found: {numero}")
+            return None
+        return _clone(d)
+
+    def add_devis(self, devis: Devis):
+        """Ajoute un nouveau devis"""
+        store = self._store
+        with self._lock:
+            if devis.numero in store.devis:
+                raise DuplicateResourceError(f"Devis already exists: {devis.numero}")
+            store.devis[devis.numero] = _clone(devis)
+        logger.info(f"Devis added: {devis.numero}")
+
+    def update_devis(self, devis: Devis):
+        """Met à jour un devis existant"""
+        store = self._store
+        with self._lock:
+            if devis.numero not in store.devis:
+                raise ResourceNotFoundError(f"Devis not found: {devis.numero}")
+            store.devis[devis.numero] = _clone(devis)
+        self._projets_changed(devis_numero=devis.numero)
+        logger.info(f"Devis updated: {devis.numero}")
+
+    def update_devis_lignes(self, numero: str, lignes: List[LigneDevis]):
+        """Remplace uniquement les lignes d'un devis"""
+        with self._lock:
+            devis = self._store.devis.get(numero)
+            if devis is None:
+                raise ResourceNotFoundError(f"Devis not found: {numero}")
+            devis.lignes = [_clone(ligne) for ligne in lignes]
+        self._projets_changed(devis_numero=numero)
+        logger.info(f"Devis lines updated: {numero}")
+
+    def delete_devis(self, numero: str):
+        """Supprime un devis"""
+        with self._lock:
+            if self._store.devis.pop(numero, None) is None:
+                raise ResourceNotFoundError(f"Devis not found: {numero}")
+        self._projets_changed(devis_numero=numero)
+        logger.info(f"Devis deleted: {numero}")
+
+    def get_next_devis_number(self) -> str:
+        """Génère le prochain numéro de devis"""
+        year = datetime.now().year
+        count = sum(1 for d in self._store.devis.values() if str(d.date).startswith(str(year)))
+        return f"DEV-{year}-{count + 1:04d}"
+
+    # ==================== PROJETS ====================
+
+    @staticmethod
+    def _projet_row(projet: Projet) -> Projet:
+        """Copie stockée : sans dépenses = liste vide, comme à la relecture en base"""
+        row = _clone(projet)
+        row.devis_numeros = row.devis_numeros or []
+        row.depenses_reelles = row.depenses_reelles or []
+        return row
+
+    @property
+    def projets(self) -> List[Projet]:
+        """Récupère tous les projets"""
+        return [_clone(p) for p in self._store.projets.values()]
+
+    def get_projet_by_id(self, projet_id: int) -> Optional[Projet]:
+        """Récupère un projet par son ID"""
+        p = self._store.projets.get(projet_id)
+        return _clone(p) if p is not None else None
+
+    def get_projet_by_numero(self, numero: str) -> Optional[Projet]:
+        """Récupère un projet par son numéro"""
+        projet_id = self._store.projet_numeros.get(numero)
+        return self.get_projet_by_id(projet_id) if projet_id is not None else None
+
+    def add_projet(self, projet: Projet):
+        """Ajoute un nouveau projet"""
+        store = self._store
+        with self._lock:
+            if projet.id is None:
+                projet.id = _next_key(store.projets)
+            elif projet.id in store.projets:
+                raise DuplicateResourceError(f"Projet already exists: {projet.id}")
+            _reindex(store.projet_numeros, None, projet.numero, projet.id, 'Projet')
+            store.projets[projet.id] = self._projet_row(projet)
+        logger.info(f"Projet added: {projet.numero}")
+
+    def update_projet(self, projet: Projet):
+        """Met à jour un projet existant"""
+        store = self._store
+        with self._lock:
+            current = store.projets.get(projet.id)
+            if current is None:
+                raise ResourceNotFoundError(f"Projet not found: {projet.id}")
+            _reindex(store.projet_numeros, current.numero, projet.numero, projet.id, 'Projet')
+            store.projets[projet.id] = self._projet_row(projet)
+        self._projets_changed(projet_id=projet.id)
+        logger.info(f"Projet updated: {projet.id}")
+
+    def delete_projet(self, projet_id: int):
+        """Supprime un projet"""
+        store = self._store
+        with self._lock:
+            p = store.projets.pop(projet_id, None)
+            if p is None:
+                raise ResourceNotFoundError(f"Projet not found: {projet_id}")
+            store.projet_numeros.pop(p.numero, None)
+        self._projets_changed(projet_id=projet_id)
+        logger.info(f"Projet deleted: {projet_id}")
+
+    def get_next_projet_number(self) -> str:
+        """Génère le prochain numéro de projet"""
+        year = datetime.now().year
+        count = sum(1 for p in self._store.projets.values() if str(p.date_creation).startswith(str(year)))
+        return f"PROJ-{year}-{count + 1:04d}"
+
+    # ==================== LISTES PAGINÉES ====================
+    # Filtre et tri sur les lignes stockées : seule la page est copiée
+
+    def page_clients(self, offset: int, limit: int, search: Optional[str] = None,
+                     order_by: Optional[str] = None, descending: bool = False) -> Tuple[List[Client], int]:
+        """Une page de clients"""
+        rows, total = paginate(list(self._store.clients.values()), 'clients', offset, limit,
+                               search, order_by, descending)
+        return [_clone(c) for c in rows], total
+
+    def page_articles(self, offset: int, limit: int, categories: Optional[Iterable[str]] = None,
+                      type_article: Optional[str] = None, search: Optional[str] = None,
+                      order_by: Optional[str] = None, descending: bool = False) -> Tuple[List[Article], int]:
+        """Une page d'articles"""
+        rows = list(self._store.articles.values())
+        if categories is not None:
+            categories = set(categories)
+            rows = [a for a in rows if a.categorie in categories]
+        if type_article is not None:
+            rows = [a for a in rows if a.type_article == type_article]
+        rows, total = paginate(rows, 'articles', offset, limit, search, order_by, descending)
+        return [_clone(a) for a in rows], total
+
+    def count_articles_by_type(self) -> Dict[str, int]:
+        """Nombre d'articles par type"""
+        counts: Dict[str, int] = {}
+        for article in self._store.articles.values():
+            counts[article.type_article] = counts.get(article.type_article, 0) + 1
+        return counts
+
+    def page_ouvrages(self, offset: int, limit: int, categories: Optional[Iterable[str]] = None,
+                      search: Optional[str] = None, order_by: Optional[str] = None,
+                      descending: bool = False) -> Tuple[List[Ouvrage], int]:
+        """Une page d'ouvrages"""
+        rows = list(self._store.ouvrages.values())
+        if categories is not None:
+            categories = set(categories)
+            rows = [o for o in rows if o.categorie in categories]
+        rows, total = paginate(rows, 'ouvrages', offset, limit, search, order_by, descending)
+        return [_clone(o) for o in rows], total
+
+    def page_devis(self, offset: int, limit: int, search: Optional[str] = None,
+                   order_by: Optional[str] = None, descending: bool = True) -> Tuple[List[Devis], int]:
+        """Une page de devis"""
+        rows, total = paginate(list(self._store.devis.values()), 'devis', offset, limit,
+                               search, order_by, descending)
+        return [_clone(d) for d in rows], total
+
+    # ==================== USERS ====================
+
+    @property
+    def users(self) -> List[User]:
+        """Récupère tous les utilisateurs"""
+        return [_clone(u) for u in self._store.users.values()]
+
+    def get_user_by_id(self, user_id: str) -> Optional[User]:
+        """Récupère un utilisateur par son ID"""
+        u = self._store.users.get(user_id)
+        if u is None:
+            logger.warning(f"User not found: {user_id}")
+            return None
+        return _clone(u)
+
+    def get_user_by_username(self, username: str) -> Optional[User]:
+        """Récupère un utilisateur par son nom d'utilisateur"""
+        user_id = self._store.usernames.get(username)
+        if user_id is None:
+            logger.debug(f"User not found by username: {username}")
+            return None
+        return _clone(self._store.users[user_id])
+
+    def get_user_by_email(self, email: str) -> Optional[User]:
+        """Récupère un utilisateur par son email"""
+        user_id = self._store.emails.get(email)
+        if user_id is None:
+            logger.debug(f"User not found by email: {email}")
+            return None
+        return _clone(self._store.users[user_id])
+
+    def get_user_by_login(self, login: str) -> Optional[User]:
+        """Récupère un utilisateur par nom d'utilisateur ou email
+
+        Le nom d'utilisateur est prioritaire si les deux correspondent à des comptes différents.
+        """
+        store = self._store
+        user_id = store.usernames.get(login) or store.emails.get(login)
+        if user_id is None:
+            logger.debug(f"User not found by login: {login}")
+            return None
+        return _clone(store.users[user_id])
+
+    def add_user(self, user: User):
+        """Ajoute un nouvel utilisateur"""
+        store = self._store
+        with self._lock:
+            if user.username in store.usernames:
+                raise ValueError(f"Un utilisateur avec le nom '{user.username}' existe déjà")
+            if user.email in store.emails:
+                raise ValueError(f"Un utilisateur avec l'email '{user.email}' existe déjà")
+            if user.id in store.users:
+                raise DuplicateResourceError(f"User already exists: {user.id}")
+            store.users[user.id] = _clone(user)
+            store.usernames[user.username] = user.id
+            store.emails[user.email] = user.id
+        logger.info(f"User added: {user.username}")
+
+    def update_user(self, user: User):
+        """Met à jour un utilisateur existant"""
+        store = self._store
+        with self._lock:
+            current = store.users.get(user.id)
+            if current is None:
+                raise ResourceNotFoundError(f"User not found: {user.id}")
+            _reindex(store.usernames, current.username, user.username, user.id, 'User')
+            if store.emails.get(current.email) == user.id:
+                del store.emails[current.email]
+            # L'email n'est pas unique en base : le premier compte reste indexé
+            store.emails.setdefault(user.email, user.id)
+            store.users[user.id] = _clone(user)
+        logger.info(f"User updated: {user.username}")
@@ -2,21 +2,26 @@
 Gestionnaire de données avec PostgreSQL
 Version compatible avec PostgreSQL utilisant SQLAlchemy
 """
+import copy
 import json
-from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from dataclasses import asdict
 from datetime import datetime
+from sqlalchemy import String, func, or_
 
 from erp.core.models import (
     Client, Fournisseur, Article, Ouvrage, ComposantOuvrage, 
     Devis, LigneDevis, Organisation, Projet, DepenseReelle, User
 )
+from erp.core.data_manager_base import DEFAULT_DATA_DIR, PAGE_SEARCH_FIELDS, DataManager, sort_field
 from erp.core.database import db_manager
+from erp.core.tenant import current_tenant
 from erp.core.db_models import (
     OrganisationModel, ClientModel, FournisseurModel, ArticleModel,
     OuvrageModel, DevisModel, ProjetModel, UserModel, CategorieModel
 )
+from erp.core.constants import USER_CACHE_TTL, USER_CACHE_MAX_ENTRIES
+from erp.utils.cache import TTLCache
 from erp.utils.logger import get_logger
 from erp.utils.exceptions import DataPersistenceError, ResourceNotFoundError
 
@@ -26,9 +31,9 @@ logger = get_logger(__name__)
 _instance = None
 
 
-class DataManagerPostgres:
+class DataManagerPostgres(DataManager):
     """
-    Gestionnaire de données utilisant PostgreSQL.
+    Gestionnaire de données utilisant PostgreSQL (ou SQLite, voir storage_config).
     Remplace l'ancien système basé sur JSON.
     """
     
@@ -43,14 +48,18 @@ class DataManagerPostgres:
         if self._initialized:
             return
         
-        # Initialiser la connexion à la base de données
-        db_manager.initialize()
-        db_manager.create_tables()
+        # Cache des utilisateurs authentifiés (voir get_user_by_id)
+        self._user_cache = TTLCache(USER_CACHE_TTL, USER_CACHE_MAX_ENTRIES)
         
-        # Définir le dossier data pour les PDF
-        project_root = Path(__file__).parent.parent.parent
-        self.data_dir = project_root / 'data'
-        self.data_dir.mkdir(parents=True, exist_ok=True)
+        # Initialiser la connexion à la base de données (tables créées seulement si le schéma a changé),
+        # sauf si elle a déjà été ouverte sur une autre base (générateur de données, benchmarks)
+        if db_manager.engine is None:
+            db_manager.initialize(check_connection=False)
+        db_manager.ensure_schema()
+        
+        # Dossier data pour les PDF (un sous-dossier par tenant en mode multi-tenant, voir data_dir)
+        self.base_data_dir = DEFAULT_DATA_DIR
+        self.base_data_dir.mkdir(parents=True, exist_ok=True)
         
         logger.info("DataManagerPostgres initialized with PostgreSQL")
         self._initialized = True
@@ -59,7 +68,12 @@ class DataManagerPostgres:
     
     @property
     def organisation(self) -> Organisation:
-        """Récupère les informations de l'organisation"""
+        """Informations de l'organisation, en mémoire après la première lecture (voir settings_service)"""
+        from erp.services.settings_service import get_settings_service
+        return get_settings_service().get_organisation(self._load_organisation)
+    
+    def _load_organisation(self) -> Organisation:
+        """Lit l'organisation en base"""
         with db_manager.get_session() as session:
             org_model = session.query(OrganisationModel).first()
             if org_model:
@@ -113,7 +127,12 @@ class DataManagerPostgres:
                     date_fin_exercice=org.date_fin_exercice
                 )
                 session.add(org_model)
-    
+            # Prévenir les autres processus au commit de l'écriture
+            from erp.services.settings_service import get_settings_service
+            get_settings_service().publish(session)
+
+        self._organisation_changed()
+
     # ==================== CLIENTS ====================
     
     @property
@@ -121,37 +140,29 @@ class DataManagerPostgres:
         """Récupère tous les clients"""
         with db_manager.get_session() as session:
             clients_models = session.query(ClientModel).all()
-            return [
-                Client(
-                    id=c.id,
-                    nom=c.nom,
-                    prenom=c.prenom,
-                    entreprise=c.entreprise or "",
-                    adresse=c.adresse or "",
-                    cp=c.cp or "",
-                    ville=c.ville or "",
-                    telephone=c.telephone or "",
-                    email=c.email or ""
-                )
-                for c in clients_models
-            ]
-    
+            return [self._client_from_model(c) for c in clients_models]
+
+    @staticmethod
+    def _client_from_model(c: ClientModel) -> Client:
+        """Convertit une ligne de la table clients en Client"""
+        return Client(
+            id=c.id,
+            nom=c.nom,
+            prenom=c.prenom,
+            entreprise=c.entreprise or "",
+            adresse=c.adresse or "",
+            cp=c.cp or "",
+            ville=c.ville or "",
+            telephone=c.telephone or "",
+            email=c.email or ""
+        )
+
     def get_client_by_id(self, client_id: int) -> Optional[Client]:
         """Récupère un client par son ID"""
         with db_manager.get_session() as session:
             c = session.query(ClientModel).filter_by(id=client_id).first()
             if c:
-                return Client(
-                    id=c.id,
-                    nom=c.nom,
-                    prenom=c.prenom,
-                    entreprise=c.entreprise or "",
-                    adresse=c.adresse or "",
-                    cp=c.cp or "",
-                    ville=c.ville or "",
-                    telephone=c.telephone or "",
-                    email=c.email or ""
-                )
+                return self._client_from_model(c)
             logger.warning(f"Client not found: {client_id}")
             return None
     
@@ -278,37 +289,51 @@ class DataManagerPostgres:
         """Récupère tous les articles"""
         with db_manager.get_session() as session:
             articles_models = session.query(ArticleModel).all()
-            return [
-                Article(
-                    id=a.id,
-                    reference=a.reference,
-                    designation=a.designation,
-                    unite=a.unite,
-                    prix_unitaire=a.prix_unitaire,
-                    type_article=a.type_article,
-                    fournisseur_id=a.fournisseur_id if a.fournisseur_id is not None else 0,
-                    description=a.description or "",
-                    categorie=a.categorie or "general"
-                )
-                for a in articles_models
-            ]
-    
+            return [self._article_from_model(a) for a in articles_models]
+
+    @staticmethod
+    def _article_from_model(a: ArticleModel) -> Article:
+        """Convertit une ligne de la table articles en Article"""
+        return Article(
+            id=a.id,
+            reference=a.reference,
+            designation=a.designation,
+            unite=a.unite,
+            prix_unitaire=a.prix_unitaire,
+            type_article=a.type_article,
+            fournisseur_id=a.fournisseur_id if a.fournisseur_id is not None else 0,
+            description=a.description or "",
+            categorie=a.categorie or "general"
+        )
+
+    @staticmethod
+    def _article_categories_condition(categories: List[str]):
+        """Condition SQL : catégorie de l'article dans la liste"""
+        condition = ArticleModel.categorie.in_(categories)
+        if 'general' in categories:
+            # Les articles sans catégorie (NULL ou vide) sont affichés comme « general »
+            condition = or_(condition, ArticleModel.categorie.is_(None), ArticleModel.categorie == '')
+        return condition
+
+    def get_articles_by_categories(self, categories) -> List[Article]:
+        """Récupère les articles dont la catégorie est dans la liste (filtre SQL IN)
+
+        Args:
+            categories: Identifiants de catégories, par ex. CategoryTree.sql_in_list()
+        """
+        categories = list(categories)
+        with db_manager.get_session() as session:
+            articles_models = session.query(ArticleModel).filter(
+                self._article_categories_condition(categories)
+            ).all()
+            return [self._article_from_model(a) for a in articles_models]
+
     def get_article_by_id(self, article_id: int) -> Optional[Article]:
         """Récupère un article par son ID"""
         with db_manager.get_session() as session:
             a = session.query(ArticleModel).filter_by(id=article_id).first()
             if a:
-                return Article(
-                    id=a.id,
-                    reference=a.reference,
-                    designation=a.designation,
-                    unite=a.unite,
-                    prix_unitaire=a.prix_unitaire,
-                    type_article=a.type_article,
-                    fournisseur_id=a.fournisseur_id if a.fournisseur_id is not None else 0,
-                    description=a.description or "",
-                    categorie=a.categorie or "general"
-                )
+                return self._article_from_model(a)
             return None
     
     def add_article(self, article: Article):
@@ -352,6 +377,7 @@ class DataManagerPostgres:
                 logger.info(f"Article updated: {article.id}")
             else:
                 raise ResourceNotFoundError(f"Article not found: {article.id}")
+        self._projets_changed()
     
     def delete_article(self, article_id: int):
         """Supprime un article"""
@@ -362,6 +388,7 @@ class DataManagerPostgres:
                 logger.info(f"Article deleted: {article_id}")
             else:
                 raise ResourceNotFoundError(f"Article not found: {article_id}")
+        self._projets_changed()
     
     # ==================== OUVRAGES ====================
     
@@ -370,57 +397,42 @@ class DataManagerPostgres:
         """Récupère tous les ouvrages"""
         with db_manager.get_session() as session:
             ouvrages_models = session.query(OuvrageModel).all()
-            ouvrages = []
-            for o in ouvrages_models:
-                composants = []
-                if o.composants:
-                    for comp_data in o.composants:
-                        composants.append(ComposantOuvrage(
-                            article_id=comp_data['article_id'],
-                            quantite=comp_data['quantite'],
-                            designation=comp_data.get('designation', ''),
-                            unite=comp_data.get('unite', ''),
-                            prix_unitaire=comp_data.get('prix_unitaire', 0.0)
-                        ))
-                
-                ouvrages.append(Ouvrage(
-                    id=o.id,
-                    reference=o.reference,
-                    designation=o.designation,
-                    description=o.description or "",
-                    categorie=o.categorie or "",
-                    sous_categorie=o.sous_categorie or "",
-                    unite=o.unite,
-                    composants=composants
-                ))
-            return ouvrages
-    
+            return [self._ouvrage_from_model(o) for o in ouvrages_models]
+
+    @staticmethod
+    def _composants_from_json(composants_data) -> List[ComposantOuvrage]:
+        """Convertit la colonne JSON des composants en ComposantOuvrage"""
+        return [
+            ComposantOuvrage(
+                article_id=comp_data['article_id'],
+                quantite=comp_data['quantite'],
+                designation=comp_data.get('designation', ''),
+                unite=comp_data.get('unite', ''),
+                prix_unitaire=comp_data.get('prix_unitaire', 0.0)
+            )
+            for comp_data in composants_data or []
+        ]
+
+    @classmethod
+    def _ouvrage_from_model(cls, o: OuvrageModel) -> Ouvrage:
+        """Convertit une ligne de la table ouvrages en Ouvrage"""
+        return Ouvrage(
+            id=o.id,
+            reference=o.reference,
+            designation=o.designation,
+            description=o.description or "",
+            categorie=o.categorie or "",
+            sous_categorie=o.sous_categorie or "",
+            unite=o.unite,
+            composants=cls._composants_from_json(o.composants)
+        )
+
     def get_ouvrage_by_id(self, ouvrage_id: int) -> Optional[Ouvrage]:
         """Récupère un ouvrage par son ID"""
         with db_manager.get_session() as session:
             o = session.query(OuvrageModel).filter_by(id=ouvrage_id).first()
             if o:
-                composants = []
-                if o.composants:
-                    for comp_data in o.composants:
-                        composants.append(ComposantOuvrage(
-                            article_id=comp_data['article_id'],
-                            quantite=comp_data['quantite'],
-                            designation=comp_data.get('designation', ''),
-                            unite=comp_data.get('unite', ''),
-                            prix_unitaire=comp_data.get('prix_unitaire', 0.0)
-                        ))
-                
-                return Ouvrage(
-                    id=o.id,
-                    reference=o.reference,
-                    designation=o.designation,
-                    description=o.description or "",
-                    categorie=o.categorie or "",
-                    sous_categorie=o.sous_categorie or "",
-                    unite=o.unite,
-                    composants=composants
-                )
+                return self._ouvrage_from_model(o)
             return None
     
     def add_ouvrage(self, ouvrage: Ouvrage):
@@ -482,75 +494,36 @@ class DataManagerPostgres:
         """Récupère tous les devis"""
         with db_manager.get_session() as session:
             devis_models = session.query(DevisModel).all()
-            devis_list = []
-            for d in devis_models:
-                lignes = []
-                if d.lignes:
-                    for ligne_data in d.lignes:
-                        composants = []
-                        if 'composants' in ligne_data and ligne_data['composants']:
-                            for comp_data in ligne_data['composants']:
-                                composants.append(ComposantOuvrage(
-                                    article_id=comp_data['article_id'],
-                                    quantite=comp_data['quantite'],
-                                    designation=comp_data.get('designation', ''),
-                                    unite=comp_data.get('unite', ''),
-                                    prix_unitaire=comp_data.get('prix_unitaire', 0.0)
-                                ))
-                        ligne_data['composants'] = composants
-                        lignes.append(LigneDevis(**ligne_data))
-                
-                devis_list.append(Devis(
-                    numero=d.numero,
-                    date=d.date,
-                    client_id=d.client_id,
-                    objet=d.objet or "",
-                    lignes=lignes,
-                    coefficient_marge=d.coefficient_marge,
-                    remise=d.remise,
-                    tva=d.tva,
-                    validite=d.validite,
-                    notes=d.notes or "",
-                    conditions=d.conditions or "",
-                    statut=d.statut
-                ))
-            return devis_list
+            return [self._devis_from_model(d) for d in devis_models]
+
+    @classmethod
+    def _devis_from_model(cls, d: DevisModel) -> Devis:
+        """Convertit une ligne de la table devis en Devis (sans modifier le JSON chargé)"""
+        lignes = [
+            LigneDevis(**dict(ligne_data, composants=cls._composants_from_json(ligne_data.get('composants'))))
+            for ligne_data in d.lignes or []
+        ]
+        return Devis(
+            numero=d.numero,
+            date=d.date,
+            client_id=d.client_id,
+            objet=d.objet or "",
+            lignes=lignes,
+            coefficient_marge=d.coefficient_marge,
+            remise=d.remise,
+            tva=d.tva,
+            validite=d.validite,
+            notes=d.notes or "",
+            conditions=d.conditions or "",
+            statut=d.statut
+        )
     
     def get_devis_by_numero(self, numero: str) -> Optional[Devis]:
         """Récupère un devis par son numéro"""
         with db_manager.get_session() as session:
             d = session.query(DevisModel).filter_by(numero=numero).first()
             if d:
-                lignes = []
-                if d.lignes:
-                    for ligne_data in d.lignes:
-                        composants = []
-                        if 'composants' in ligne_data and ligne_data['composants']:
-                            for comp_data in ligne_data['composants']:
-                                composants.append(ComposantOuvrage(
-                                    article_id=comp_data['article_id'],
-                                    quantite=comp_data['quantite'],
-                                    designation=comp_data.get('designation', ''),
-                                    unite=comp_data.get('unite', ''),
-                                    prix_unitaire=comp_data.get('prix_unitaire', 0.0)
-                                ))
-                        ligne_data['composants'] = composants
-                        lignes.append(LigneDevis(**ligne_data))
-                
-                return Devis(
-                    numero=d.numero,
-                    date=d.date,
-                    client_id=d.client_id,
-                    objet=d.objet or "",
-                    lignes=lignes,
-                    coefficient_marge=d.coefficient_marge,
-                    remise=d.remise,
-                    tva=d.tva,
-                    validite=d.validite,
-                    notes=d.notes or "",
-                    conditions=d.conditions or "",
-                    statut=d.statut
-                )
+                return self._devis_from_model(d)
             logger.warning(f"Devis not found: {numero}")
             return None
     
@@ -610,6 +583,19 @@ class DataManagerPostgres:
                 logger.info(f"Devis updated: {devis.numero}")
             else:
                 raise ResourceNotFoundError(f"Devis not found: {devis.numero}")
+        self._projets_changed(devis_numero=devis.numero)
+    
+    def update_devis_lignes(self, numero: str, lignes: List[LigneDevis]):
+        """Remplace uniquement les lignes d'un devis (UPDATE ciblé de la colonne JSON)"""
+        with db_manager.get_session() as session:
+            updated = session.query(DevisModel).filter_by(numero=numero).update(
+                {DevisModel.lignes: [asdict(ligne) for ligne in lignes]},
+                synchronize_session=False
+            )
+            if not updated:
+                raise ResourceNotFoundError(f"Devis not found: {numero}")
+            logger.info(f"Devis lines updated: {numero}")
+        self._projets_changed(devis_numero=numero)
     
     def delete_devis(self, numero: str):
         """Supprime un devis"""
@@ -620,6 +606,7 @@ class DataManagerPostgres:
                 logger.info(f"Devis deleted: {numero}")
             else:
                 raise ResourceNotFoundError(f"Devis not found: {numero}")
+        self._projets_changed(devis_numero=numero)
     
     def get_next_devis_number(self) -> str:
         """Génère le prochain numéro de devis"""
@@ -630,6 +617,80 @@ class DataManagerPostgres:
             ).count()
         return f"DEV-{year}-{count + 1:04d}"
     
+    # ==================== LISTES PAGINÉES ====================
+
+    @staticmethod
+    def _page(query, model, table: str, offset: int, limit: int, search: Optional[str],
+              order_by: Optional[str], descending: bool, tiebreak) -> Tuple[list, int]:
+        """Applique recherche, tri et LIMIT/OFFSET à une requête
+
+        Même sémantique que paginate() : recherche insensible à la casse sur
+        PAGE_SEARCH_FIELDS, tri alphabétique insensible à la casse.
+        """
+        if search:
+            # Texte cherché littéralement : %, _ et \ échappés comme dans paginate()
+            escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            pattern = f"%{escaped}%"
+            query = query.filter(or_(*(getattr(model, f).ilike(pattern, escape='\\')
+                                       for f in PAGE_SEARCH_FIELDS[table])))
+        total = query.count()
+        column = getattr(model, sort_field(table, order_by))
+        if isinstance(column.type, String):
+            column = func.lower(column)
+        order = column.desc() if descending else column.asc()
+        tiebreak = tiebreak.desc() if descending else tiebreak.asc()
+        rows = query.order_by(order, tiebreak).offset(offset).limit(limit).all()
+        return rows, total
+
+    def page_clients(self, offset: int, limit: int, search: Optional[str] = None,
+                     order_by: Optional[str] = None, descending: bool = False) -> Tuple[List[Client], int]:
+        """Une page de clients (requête SQL limitée à la page)"""
+        with db_manager.get_session() as session:
+            rows, total = self._page(session.query(ClientModel), ClientModel, 'clients', offset, limit,
+                                     search, order_by, descending, ClientModel.id)
+            return [self._client_from_model(c) for c in rows], total
+
+    def page_articles(self, offset: int, limit: int, categories=None, type_article: Optional[str] = None,
+                      search: Optional[str] = None, order_by: Optional[str] = None,
+                      descending: bool = False) -> Tuple[List[Article], int]:
+        """Une page d'articles filtrés par catégories et type (requête SQL limitée à la page)"""
+        with db_manager.get_session() as session:
+            query = session.query(ArticleModel)
+            if categories is not None:
+                query = query.filter(self._article_categories_condition(list(categories)))
+            if type_article is not None:
+                query = query.filter(ArticleModel.type_article == type_article)
+            rows, total = self._page(query, ArticleModel, 'articles', offset, limit,
+                                     search, order_by, descending, ArticleModel.id)
+            return [self._article_from_model(a) for a in rows], total
+
+    def count_articles_by_type(self) -> Dict[str, int]:
+        """Nombre d'articles par type (GROUP BY)"""
+        with db_manager.get_session() as session:
+            rows = session.query(ArticleModel.type_article, func.count(ArticleModel.id)).group_by(
+                ArticleModel.type_article
+            ).all()
+            return {type_article: count for type_article, count in rows}
+
+    def page_ouvrages(self, offset: int, limit: int, categories=None, search: Optional[str] = None,
+                      order_by: Optional[str] = None, descending: bool = False) -> Tuple[List[Ouvrage], int]:
+        """Une page d'ouvrages filtrés par catégories exactes (requête SQL limitée à la page)"""
+        with db_manager.get_session() as session:
+            query = session.query(OuvrageModel)
+            if categories is not None:
+                query = query.filter(OuvrageModel.categorie.in_(list(categories)))
+            rows, total = self._page(query, OuvrageModel, 'ouvrages', offset, limit,
+                                     search, order_by, descending, OuvrageModel.id)
+            return [self._ouvrage_from_model(o) for o in rows], total
+
+    def page_devis(self, offset: int, limit: int, search: Optional[str] = None,
+                   order_by: Optional[str] = None, descending: bool = True) -> Tuple[List[Devis], int]:
+        """Une page de devis, les plus récents d'abord (requête SQL limitée à la page)"""
+        with db_manager.get_session() as session:
+            rows, total = self._page(session.query(DevisModel), DevisModel, 'devis', offset, limit,
+                                     search, order_by, descending, DevisModel.numero)
+            return [self._devis_from_model(d) for d in rows], total
+
     # ==================== PROJETS ====================
     
     @property
@@ -753,6 +814,7 @@ class DataManagerPostgres:
                 logger.info(f"Projet updated: {projet.id}")
             else:
                 raise ResourceNotFoundError(f"Projet not found: {projet.id}")
+        self._projets_changed(projet_id=projet.id)
     
     def delete_projet(self, projet_id: int):
         """Supprime un projet"""
@@ -763,6 +825,7 @@ class DataManagerPostgres:
                 logger.info(f"Projet deleted: {projet_id}")
             else:
                 raise ResourceNotFoundError(f"Projet not found: {projet_id}")
+        self._projets_changed(projet_id=projet_id)
     
     def get_next_projet_number(self) -> str:
         """Génère le prochain numéro de projet"""
@@ -775,46 +838,50 @@ class DataManagerPostgres:
     
     # ==================== USERS ====================
     
+    @staticmethod
+    def _user_from_model(u: UserModel) -> User:
+        """Convertit une ligne de la table users en User"""
+        return User.from_dict({
+            'id': u.id,
+            'username': u.username,
+            'password_hash': u.password_hash,
+            'salt': u.salt,
+            'role': u.role,
+            'nom': u.nom or "",
+            'prenom': u.prenom or "",
+            'email': u.email or "",
+            'client_id': u.client_id,
+            'actif': u.actif,
+            'date_creation': u.date_creation or "",
+            'derniere_connexion': u.derniere_connexion or ""
+        })
+    
     @property
     def users(self) -> List[User]:
         """Récupère tous les utilisateurs"""
         with db_manager.get_session() as session:
             users_models = session.query(UserModel).all()
-            return [
-                User.from_dict({
-                    'id': u.id,
-                    'username': u.username,
-                    'password_hash': u.password_hash,
-                    'salt': u.salt,
-                    'role': u.role,
-                    'nom': u.nom or "",
-                    'prenom': u.prenom or "",
-                    'email': u.email or "",
-                    'actif': u.actif,
-                    'date_creation': u.date_creation or "",
-                    'derniere_connexion': u.derniere_connexion or ""
-                })
-                for u in users_models
-            ]
+            return [self._user_from_model(u) for u in users_models]
     
-    def get_user_by_id(self, user_id: int) -> Optional[User]:
-        """Récupère un utilisateur par son ID"""
+    def get_user_by_id(self, user_id: str) -> Optional[User]:
+        """Récupère un utilisateur par son ID
+        
+        Appelé à chaque page authentifiée : le résultat est mis en cache
+        (USER_CACHE_TTL) et invalidé par update_user. Une copie est retournée
+        pour que les modifications non enregistrées ne polluent pas le cache.
+        """
+        # Clé par tenant : un même identifiant n'est valable que dans son schéma
+        key = (current_tenant(), user_id)
+        cached = self._user_cache.get(key, None)
+        if cached is not None:
+            return copy.copy(cached)
+        
         with db_manager.get_session() as session:
             u = session.query(UserModel).filter_by(id=user_id).first()
             if u:
-                return User.from_dict({
-                    'id': u.id,
-                    'username': u.username,
-                    'password_hash': u.password_hash,
-                    'salt': u.salt,
-                    'role': u.role,
-                    'nom': u.nom or "",
-                    'prenom': u.prenom or "",
-                    'email': u.email or "",
-                    'actif': u.actif,
-                    'date_creation': u.date_creation or "",
-                    'derniere_connexion': u.derniere_connexion or ""
-                })
+                user = self._user_from_model(u)
+                self._user_cache.set(key, user)
+                return copy.copy(user)
             logger.warning(f"User not found: {user_id}")
             return None
     
@@ -823,20 +890,7 @@ class DataManagerPostgres:
         with db_manager.get_session() as session:
             u = session.query(UserModel).filter_by(username=username).first()
             if u:
-                return User.from_dict({
-                    'id': u.id,
-                    'username': u.username,
-                    'password_hash': u.password_hash,
-                    'salt': u.salt,
-                    'role': u.role,
-                    'nom': u.nom or "",
-                    'prenom': u.prenom or "",
-                    'email': u.email or "",
-                    'client_id': u.client_id,
-                    'actif': u.actif,
-                    'date_creation': u.date_creation or "",
-                    'derniere_connexion': u.derniere_connexion or ""
-                })
+                return self._user_from_model(u)
             logger.debug(f"User not found by username: {username}")
             return None
     
@@ -845,23 +899,25 @@ class DataManagerPostgres:
         with db_manager.get_session() as session:
             u = session.query(UserModel).filter_by(email=email).first()
             if u:
-                return User.from_dict({
-                    'id': u.id,
-                    'username': u.username,
-                    'password_hash': u.password_hash,
-                    'salt': u.salt,
-                    'role': u.role,
-                    'nom': u.nom or "",
-                    'prenom': u.prenom or "",
-                    'email': u.email or "",
-                    'client_id': u.client_id,
-                    'actif': u.actif,
-                    'date_creation': u.date_creation or "",
-                    'derniere_connexion': u.derniere_connexion or ""
-                })
+                return self._user_from_model(u)
             logger.debug(f"User not found by email: {email}")
             return None
     
+    def get_user_by_login(self, login: str) -> Optional[User]:
+        """Récupère un utilisateur par nom d'utilisateur ou email, en une seule requête
+        
+        Le nom d'utilisateur est prioritaire si les deux correspondent à des comptes différents.
+        """
+        with db_manager.get_session() as session:
+            rows = (session.query(UserModel)
+                    .filter(or_(UserModel.username == login, UserModel.email == login))
+                    .limit(2).all())
+            if rows:
+                u = next((r for r in rows if r.username == login), rows[0])
+                return self._user_from_model(u)
+            logger.debug(f"User not found by login: {login}")
+            return None
+    
     def add_user(self, user: User):
         """Ajoute un nouvel utilisateur"""
         if self.get_user_by_username(user.username):
@@ -908,113 +964,4 @@ class DataManagerPostgres:
                 logger.info(f"User updated: {user.username}")
             else:
                 raise ResourceNotFoundError(f"User not found: {user.id}")
-    
-    # ==================== MÉTHODES DE COMPATIBILITÉ ====================
-    
-    def save_data(self):
-        """
-        Méthode de compatibilité (ne fait rien car les données sont automatiquement sauvegardées)
-        """
-        pass
-    
-    def load_data(self):
-        """
-        Méthode de compatibilité (ne fait rien car les données sont chargées à la demande)
-        """
-        pass
-    
-    def init_demo_data(self):
-        """Initialise des données de démonstration si la base est vide"""
-        if not self.clients and not self.articles:
-            logger.info("Initializing demo data in PostgreSQL")
-            
-            # Ajouter des fournisseurs
-            fournisseurs = [
-                Fournisseur(id=1, nom="Placo France", specialite="Plâtrerie", telephone="0140506070", email="contact@placo.fr", remise=0.0),
-                Fournisseur(id=2, nom="Bois & Menuiserie", specialite="Menuiserie", telephone="0145678901", email="contact@boisetmenu.fr", remise=0.0),
-            ]
-            for f in fournisseurs:
-                self.add_fournisseur(f)
-            
-            # Ajouter des articles
-            articles = [
-                Article(id=1, reference="BA13-STD", designation="Plaque BA13 standard", unite="m²", prix_unitaire=8.50, type_article="materiau", fournisseur_id=1, description="Plaque de plâtre standard", categorie="platrerie"),
-                Article(id=2, reference="RAIL-M48", designation="Rail métallique 48mm", unite="ml", prix_unitaire=2.20, type_article="materiau", fournisseur_id=1, categorie="platrerie"),
-                Article(id=10, reference="VIS-PLACO", designation="Vis pour placo (boîte de 1000)", unite="u", prix_unitaire=8.50, type_article="fourniture", fournisseur_id=1, categorie="platrerie"),
-                Article(id=100, reference="MO-PLAT-QUAL", designation="Main d'œuvre plâtrier qualifié", unite="h", prix_unitaire=45.00, type_article="main_oeuvre", fournisseur_id=0, categorie="platrerie"),
-            ]
-            for a in articles:
-                self.add_article(a)
-            
-            # Ajouter des clients
-            clients = [
-                Client(id=1, nom="Dupont", prenom="Jean", entreprise="Maison Dupont", adresse="12 rue de la Paix", cp="75001", ville="Paris", telephone="0612345678", email="j.dupont@email.com"),
-                Client(id=2, nom="Martin", prenom="Sophie", entreprise="SARL Martin Rénovation", adresse="45 avenue des Champs", cp="69000", ville="Lyon", telephone="0698765432", email="s.martin@email.com"),
-            ]
-            for c in clients:
-                self.add_client(c)
-            
-            # Ajouter un ouvrage
-            ouvrage = Ouvrage(
-                id=1,
-                reference="CLO-BA13-SIMPLE",
-                designation="Cloison BA13 simple face sur rail 48",
-                description="Cloison séparative légère, plaque BA13 simple face avec isolation acoustique",
-                categorie="platrerie",
-                unite="m²",
-                composants=[
-                    ComposantOuvrage(article_id=1, quantite=1.05, designation="Plaque BA13", unite="m²", prix_unitaire=8.50),
-                    ComposantOuvrage(article_id=2, quantite=0.6, designation="Rail métallique", unite="ml", prix_unitaire=2.20),
-                    ComposantOuvrage(article_id=100, quantite=0.45, designation="MO plâtrier", unite="h", prix_unitaire=45.00),
-                ]
-            )
-            self.add_ouvrage(ouvrage)
-            
-            # Créer une organisation par défaut
-            org = Organisation(
-                id=1,
-                nom="POCKO construction",
-                siret="",
-                adresse="1 Rue des Grands Champs",
-                cp="00000",
-                ville="VILLE",
-                telephone="00.00.00.00.00",
-                email="",
-                site_web="",
-                logo_path="",
-                date_debut_exercice="",
-                date_fin_exercice=""
-            )
-            self.organisation = org
-            
-            logger.info("Demo data initialized successfully")
-    
-    def get_company_info(self) -> dict:
-        """Retourne les informations de l'entreprise (pour compatibilité)"""
-        org = self.organisation
-        return {
-            'name': org.nom,
-            'address': f"{org.adresse}\n{org.cp} {org.ville}",
-            'phone': org.telephone
-        }
-    
-    def save_company_info(self, info: dict):
-        """Sauvegarde les informations de l'entreprise (pour compatibilité)"""
-        org = self.organisation
-        org.nom = info.get('name', org.nom)
-        
-        # Parse address
-        address = info.get('address', '')
-        if '\n' in address:
-            parts = address.split('\n')
-            org.adresse = parts[0]
-            if len(parts) > 1:
-                cp_ville = parts[1].split(' ', 1)
-                if len(cp_ville) == 2:
-                    org.cp = cp_ville[0]
-                    org.ville = cp_ville[1]
-        else:
-            org.adresse = address
-        
-        org.telephone = info.get('phone', org.telephone)
-        self.organisation = org
+        self._user_cache.invalidate((current_tenant(), user.id))
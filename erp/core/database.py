@@ -1,12 +1,24 @@
 """
 Module de gestion de la base de données PostgreSQL
+
+En mode multi-tenant (voir erp.core.tenant), un seul moteur et un seul pool
+de connexions servent tous les tenants : les sessions d'un tenant utilisent
+une traduction de schéma (schema_translate_map), et son schéma est créé ou
+mis à jour à la première utilisation.
 """
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, select
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.ext.declarative import declarative_base
 from contextlib import contextmanager
+from datetime import datetime
 from urllib.parse import quote
+import hashlib
 import os
+import threading
+from typing import Dict, Optional
+from erp.core.constants import TENANT_DB_MAX_OVERFLOW, TENANT_DB_POOL_SIZE
+from erp.core.tenant import MULTI_TENANT, current_tenant, schema_for
 from erp.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -24,6 +36,20 @@ DB_CONFIG = {
 }
 
 
+def schema_fingerprint(metadata) -> str:
+    """Empreinte du schéma déclaré (DDL PostgreSQL des tables et index)"""
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateIndex, CreateTable
+    
+    dialect = postgresql.dialect()
+    digest = hashlib.sha1()
+    for table in metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode('utf-8'))
+        for index in sorted(table.indexes, key=lambda i: i.name or ''):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode('utf-8'))
+    return digest.hexdigest()
+
+
 class DatabaseManager:
     """Gestionnaire de connexion à la base de données PostgreSQL"""
     
@@ -31,56 +57,144 @@ class DatabaseManager:
         self.engine = None
         self.session_factory = None
         self.Session = None
+        # Sessions par tenant (mode multi-tenant), sur le moteur partagé
+        self._tenant_sessions: Dict[str, scoped_session] = {}
+        self._tenant_lock = threading.Lock()
         
-    def initialize(self):
-        """Initialise la connexion à la base de données"""
+    def initialize(self, check_connection: bool = True, url: Optional[str] = None):
+        """Initialise la connexion à la base de données
+        
+        Args:
+            check_connection: Tester la connexion (SELECT 1). Inutile si
+                ensure_schema() est appelé ensuite : sa requête sert de test.
+            url: URL SQLAlchemy à utiliser à la place de la base PostgreSQL
+                configurée (ex. sqlite:///bench.db pour les benchmarks)
+        """
         try:
-            # Créer l'URL de connexion PostgreSQL
-            # Important: encoder les caractères spéciaux du mot de passe et du user
-            encoded_user = quote(DB_CONFIG['user'], safe='')
-            encoded_password = quote(DB_CONFIG['password'], safe='')
-            
-            db_url = (
-                f"postgresql://{encoded_user}:{encoded_password}"
-                f"@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
-            )
-            
-            # Créer le moteur SQLAlchemy
-            self.engine = create_engine(
-                db_url,
-                echo=False,  # Mettre à True pour voir les requêtes SQL
-                pool_pre_ping=True,  # Vérifier la connexion avant utilisation
-                pool_size=10,  # Taille du pool de connexions
-                max_overflow=20  # Connexions supplémentaires possibles
-            )
+            if url is None:
+                # Créer l'URL de connexion PostgreSQL
+                # Important: encoder les caractères spéciaux du mot de passe et du user
+                encoded_user = quote(DB_CONFIG['user'], safe='')
+                encoded_password = quote(DB_CONFIG['password'], safe='')
+                
+                db_url = (
+                    f"postgresql://{encoded_user}:{encoded_password}"
+                    f"@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+                )
+                
+                # Créer le moteur SQLAlchemy (en multi-tenant, pool partagé et borné pour tous les tenants)
+                self.engine = create_engine(
+                    db_url,
+                    echo=False,  # Mettre à True pour voir les requêtes SQL
+                    pool_pre_ping=True,  # Vérifier la connexion avant utilisation
+                    pool_size=TENANT_DB_POOL_SIZE if MULTI_TENANT else 10,  # Taille du pool de connexions
+                    max_overflow=TENANT_DB_MAX_OVERFLOW if MULTI_TENANT else 20  # Connexions supplémentaires possibles
+                )
+            else:
+                self.engine = create_engine(url, echo=False)
             
             # Créer la fabrique de sessions
             self.session_factory = sessionmaker(bind=self.engine)
             self.Session = scoped_session(self.session_factory)
             
             # Tester la connexion
-            with self.engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
+            if check_connection:
+                with self.engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
             
-            logger.info(f"Connexion à la base de données PostgreSQL établie: {DB_CONFIG['database']}")
+            logger.info(f"Connexion à la base de données établie: {url or DB_CONFIG['database']}")
             return True
             
         except Exception as e:
             logger.error(f"Erreur lors de l'initialisation de la base de données: {e}", exc_info=True)
             raise
     
-    def create_tables(self):
-        """Crée toutes les tables dans la base de données"""
+    def create_tables(self, engine=None):
+        """Crée toutes les tables dans la base de données
+        
+        Args:
+            engine: Moteur à utiliser (par défaut le moteur principal ; celui
+                d'un tenant crée les tables dans son schéma)
+        """
         try:
             # Importer les modèles pour que SQLAlchemy les connaisse
             from erp.core import db_models
             
-            Base.metadata.create_all(self.engine)
+            Base.metadata.create_all(engine or self.engine)
             logger.info("Tables créées avec succès")
         except Exception as e:
             logger.error(f"Erreur lors de la création des tables: {e}", exc_info=True)
             raise
     
+    def ensure_schema(self, engine=None) -> bool:
+        """Crée les tables uniquement si le schéma a changé depuis le dernier démarrage
+        
+        L'empreinte du schéma déclaré est comparée à celle enregistrée dans la
+        table schema_version : si elles sont égales, create_all (une requête
+        d'inspection par table) est évité et le démarrage ne coûte qu'une requête.
+        
+        Args:
+            engine: Moteur à utiliser (par défaut le moteur principal)
+        
+        Returns:
+            bool: True si les tables ont été (re)créées
+        """
+        from erp.core.db_models import SchemaVersionModel
+        
+        engine = engine or self.engine
+        fingerprint = schema_fingerprint(Base.metadata)
+        with engine.connect() as conn:
+            try:
+                stored = conn.execute(
+                    select(SchemaVersionModel.fingerprint).where(SchemaVersionModel.id == 1)
+                ).scalar()
+            except DBAPIError:
+                # Première exécution : la table schema_version n'existe pas encore
+                stored = None
+        
+        if stored == fingerprint:
+            logger.info("Schéma de la base à jour, création des tables ignorée")
+            return False
+        
+        self.create_tables(engine)
+        session = sessionmaker(bind=engine)()
+        try:
+            session.merge(SchemaVersionModel(id=1, fingerprint=fingerprint, updated_at=datetime.now()))
+            session.commit()
+        finally:
+            session.close()
+        logger.info(f"Version du schéma enregistrée: {fingerprint[:12]}")
+        return True
+    
+    def _session_registry(self) -> scoped_session:
+        """Fabrique de sessions du tenant courant (principale hors multi-tenant)"""
+        tenant_id = current_tenant()
+        if tenant_id is None:
+            return self.Session
+        registry = self._tenant_sessions.get(tenant_id)
+        if registry is None:
+            with self._tenant_lock:
+                registry = self._tenant_sessions.get(tenant_id)
+                if registry is None:
+                    registry = self._tenant_sessions[tenant_id] = self._create_tenant_sessions(tenant_id)
+        return registry
+    
+    def _create_tenant_sessions(self, tenant_id: str) -> scoped_session:
+        """Prépare le schéma d'un tenant et ses sessions (première utilisation)"""
+        schema = schema_for(tenant_id)
+        if self.engine.dialect.name == 'postgresql':
+            with self.engine.begin() as conn:
+                conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+        # Les tables sans schéma explicite sont traduites vers celui du tenant
+        engine = self.engine.execution_options(schema_translate_map={None: schema})
+        self.ensure_schema(engine)
+        logger.info(f"Schéma du tenant {tenant_id} prêt: {schema}")
+        return scoped_session(sessionmaker(bind=engine))
+    
+    def tenant_count(self) -> int:
+        """Nombre de tenants servis depuis le démarrage"""
+        return len(self._tenant_sessions)
+    
     def drop_tables(self):
         """Supprime toutes les tables (ATTENTION: perte de données)"""
         try:
@@ -99,7 +213,7 @@ class DatabaseManager:
             with db_manager.get_session() as session:
                 session.query(...)
         """
-        session = self.Session()
+        session = self._session_registry()()
         try:
             yield session
             session.commit()
@@ -114,6 +228,9 @@ class DatabaseManager:
         """Ferme toutes les connexions"""
         if self.Session:
             self.Session.remove()
+        for registry in self._tenant_sessions.values():
+            registry.remove()
+        self._tenant_sessions.clear()
         if self.engine:
             self.engine.dispose()
         logger.info("Connexions à la base de données fermées")
@@ -125,5 +242,5 @@ db_manager = DatabaseManager()
 
 def init_db():
     """Fonction d'initialisation de la base de données"""
-    db_manager.initialize()
-    db_manager.create_tables()
+    db_manager.initialize(check_connection=False)
+    db_manager.ensure_schema()
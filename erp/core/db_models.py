@@ -1,7 +1,7 @@
 """
 Modèles SQLAlchemy pour PostgreSQL
 """
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, JSON, Date, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, JSON, Date, DateTime, Boolean
 from sqlalchemy.orm import relationship
 from erp.core.database import Base
 
@@ -158,3 +158,47 @@ class CategorieModel(Base):
     nom = Column(String(100), nullable=False, unique=True)
     description = Column(Text)
     ordre = Column(Integer, default=0)
+
+
+class DevisTemplateModel(Base):
+    """Table Modèles de présentation des devis (éditeur)"""
+    __tablename__ = 'devis_templates'
+    
+    id = Column(Integer, primary_key=True)
+    nom = Column(String(100), nullable=False, unique=True)
+    blocks = Column(JSON, nullable=False)  # Blocs positionnés de l'éditeur
+    timestamp = Column(String(40))  # Horodatage fourni par l'éditeur (ISO)
+    version = Column(Integer, nullable=False, default=1)  # Incrémentée à chaque enregistrement
+
+
+class UserSessionModel(Base):
+    """Table Sessions utilisateur et tokens de réinitialisation"""
+    __tablename__ = 'user_sessions'
+    
+    token = Column(String(64), primary_key=True)
+    kind = Column(String(10), primary_key=True)  # session, reset
+    user_id = Column(String(36), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)  # Index pour la purge des sessions expirées
+
+
+class StripeEventModel(Base):
+    """Table Événements webhook Stripe (idempotence et traitement différé)"""
+    __tablename__ = 'stripe_events'
+    
+    id = Column(String(255), primary_key=True)  # Identifiant Stripe de l'événement (evt_...)
+    type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default='pending', index=True)  # pending, processing, done, ignored, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    received_at = Column(DateTime, nullable=False)
+    processed_at = Column(DateTime)  # Fin du traitement, ou début de la réservation (processing)
+
+
+class SchemaVersionModel(Base):
+    """Table Version du schéma (empreinte du dernier schéma créé)"""
+    __tablename__ = 'schema_version'
+    
+    id = Column(Integer, primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    updated_at = Column(DateTime, nullable=False)
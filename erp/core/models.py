@@ -454,10 +454,14 @@ class Projet:
         
         return result
     
-    def get_ecarts(self, dm) -> dict:
+    def get_ecarts(self, dm, prev: dict = None, reel: dict = None) -> dict:
         """
         Calcule les écarts entre prévisionnel et réel
         
+        Args:
+            dm: DataManager pour récupérer les devis
+            prev, reel: Résultats déjà calculés de get_previsionnel / get_reel (optionnels)
+        
         Returns:
             dict: {
                 'total_ht': {'prev': float, 'reel': float, 'ecart': float, 'ecart_pct': float},
@@ -468,8 +472,10 @@ class Projet:
                 }
             }
         """
-        prev = self.get_previsionnel(dm)
-        reel = self.get_reel()
+        if prev is None:
+            prev = self.get_previsionnel(dm)
+        if reel is None:
+            reel = self.get_reel()
         
         def calc_ecart(p, r):
             ecart = r - p
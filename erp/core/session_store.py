@@ -0,0 +1,197 @@
+"""
+Stockage des sessions utilisateur et des tokens de réinitialisation
+
+Deux implémentations de la même interface :
+- MemorySessionStore : dictionnaire + tas trié par date d'expiration, la
+  purge ne parcourt que les entrées effectivement expirées (O(log n) chacune).
+  Sessions perdues au redémarrage, non partagées entre processus.
+- SqlSessionStore : table user_sessions indexée sur expires_at, en
+  PostgreSQL (base de l'application) ou SQLite. Les sessions survivent aux
+  redémarrages et sont partagées entre processus.
+
+Le backend est choisi par la variable d'environnement SESSION_BACKEND
+(database, sqlite ou memory).
+"""
+import heapq
+import os
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from erp.core.storage_config import STORAGE_BACKEND
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'database')
+SESSION_SQLITE_PATH = os.getenv(
+    'SESSION_SQLITE_PATH', str(Path(__file__).parent.parent.parent / 'data' / 'sessions.db')
+)
+
+
+class SessionStore(ABC):
+    """Interface de stockage des jetons (sessions, réinitialisations)
+
+    Chaque jeton appartient à une catégorie (kind) : 'session' ou 'reset'.
+    """
+
+    @abstractmethod
+    def put(self, kind: str, token: str, user_id: str, expires_at: datetime):
+        """Enregistre un jeton"""
+
+    @abstractmethod
+    def get(self, kind: str, token: str, now: Optional[datetime] = None) -> Optional[str]:
+        """Retourne l'user_id d'un jeton valide (un jeton expiré est supprimé)"""
+
+    @abstractmethod
+    def delete(self, kind: str, token: str):
+        """Supprime un jeton"""
+
+    @abstractmethod
+    def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """Supprime les jetons expirés et retourne leur nombre"""
+
+
+class MemorySessionStore(SessionStore):
+    """Stockage en mémoire avec tas d'expiration"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Tuple[str, datetime]] = {}
+        self._heap: List[Tuple[datetime, str, str]] = []
+        self._lock = threading.Lock()
+
+    def put(self, kind, token, user_id, expires_at):
+        with self._lock:
+            self._entries[(kind, token)] = (user_id, expires_at)
+            heapq.heappush(self._heap, (expires_at, kind, token))
+
+    def get(self, kind, token, now=None):
+        now = now or datetime.now()
+        with self._lock:
+            entry = self._entries.get((kind, token))
+            if entry is None:
+                return None
+            user_id, expires_at = entry
+            if now > expires_at:
+                del self._entries[(kind, token)]
+                return None
+            return user_id
+
+    def delete(self, kind, token):
+        # L'entrée du tas devient orpheline et sera ignorée lors de la purge
+        with self._lock:
+            self._entries.pop((kind, token), None)
+
+    def purge_expired(self, now=None):
+        now = now or datetime.now()
+        purged = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] < now:
+                expires_at, kind, token = heapq.heappop(self._heap)
+                entry = self._entries.get((kind, token))
+                # Ignorer les entrées supprimées ou recréées avec une autre échéance
+                if entry is not None and entry[1] == expires_at:
+                    del self._entries[(kind, token)]
+                    purged += 1
+        return purged
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqlSessionStore(SessionStore):
+    """Stockage en base (table user_sessions, index sur expires_at)"""
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from erp.core.database import db_manager
+            session_factory = db_manager.get_session
+        self._session = session_factory
+
+    @classmethod
+    def sqlite(cls, path: str) -> 'SqlSessionStore':
+        """Stockage dans un fichier SQLite partagé par les processus de la machine"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from erp.core.db_models import UserSessionModel
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        engine = create_engine(f"sqlite:///{path}", connect_args={'timeout': 10})
+        UserSessionModel.__table__.create(engine, checkfirst=True)
+        factory = sessionmaker(bind=engine)
+
+        @contextmanager
+        def get_session():
+            session = factory()
+            try:
+                yield session
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+
+        return cls(get_session)
+
+    def put(self, kind, token, user_id, expires_at):
+        from erp.core.db_models import UserSessionModel
+        with self._session() as session:
+            session.merge(UserSessionModel(token=token, kind=kind, user_id=user_id, expires_at=expires_at))
+
+    def get(self, kind, token, now=None):
+        from erp.core.db_models import UserSessionModel
+        now = now or datetime.now()
+        with self._session() as session:
+            row = session.get(UserSessionModel, (token, kind))
+            if row is None:
+                return None
+            if now > row.expires_at:
+                session.delete(row)
+                return None
+            return row.user_id
+
+    def delete(self, kind, token):
+        from erp.core.db_models import UserSessionModel
+        with self._session() as session:
+            session.query(UserSessionModel).filter_by(token=token, kind=kind).delete()
+
+    def purge_expired(self, now=None):
+        from erp.core.db_models import UserSessionModel
+        now = now or datetime.now()
+        with self._session() as session:
+            return session.query(UserSessionModel).filter(UserSessionModel.expires_at < now).delete()
+
+
+def create_session_store(backend: Optional[str] = None) -> SessionStore:
+    """Crée le stockage de sessions configuré (SESSION_BACKEND)
+
+    Args:
+        backend: 'database' (PostgreSQL de l'application), 'sqlite' ou 'memory'
+    """
+    backend = (backend or SESSION_BACKEND).lower()
+    if backend == 'database' and STORAGE_BACKEND == 'memory':
+        # Pas de base de données : les sessions suivent les données, en mémoire
+        backend = 'memory'
+    if backend == 'memory':
+        return MemorySessionStore()
+    if backend == 'sqlite':
+        return SqlSessionStore.sqlite(SESSION_SQLITE_PATH)
+    if backend != 'database':
+        logger.warning(f"SESSION_BACKEND inconnu '{backend}', utilisation de la base de données")
+    return SqlSessionStore()
+
+
+# Instance singleton (partagée par tous les AuthManager du processus)
+_session_store = None
+
+
+def get_session_store() -> SessionStore:
+    """Retourne le stockage de sessions du processus"""
+    global _session_store
+    if _session_store is None:
+        _session_store = create_session_store()
+    return _session_store
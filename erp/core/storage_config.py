@@ -1,11 +1,24 @@
 """
 Configuration pour choisir le backend de stockage
-PostgreSQL est maintenant le backend unique.
+
+Backends (variable d'environnement ERP_STORAGE_BACKEND) :
+- postgres : base PostgreSQL (par défaut ; seul backend persistant du mode multi-tenant)
+- sqlite : fichier SQLite (ERP_SQLITE_PATH), pour une installation embarquée
+  ou mono-poste ; mêmes tables que PostgreSQL
+- memory : données en mémoire, perdues à l'arrêt (tests, benchmarks, démonstration)
 """
 import os
+from pathlib import Path
+
+STORAGE_BACKENDS = ('postgres', 'sqlite', 'memory')
 
-# Backend de stockage: PostgreSQL uniquement
-STORAGE_BACKEND = 'postgres'
+# Backend de stockage
+STORAGE_BACKEND = os.getenv('ERP_STORAGE_BACKEND', 'postgres').lower()
+
+# Fichier de la base SQLite (ERP_STORAGE_BACKEND=sqlite)
+SQLITE_PATH = os.getenv(
+    'ERP_SQLITE_PATH', str(Path(__file__).parent.parent.parent / 'data' / 'erp.db')
+)
 
 # Configuration PostgreSQL
 POSTGRES_CONFIG = {
@@ -16,10 +29,35 @@ POSTGRES_CONFIG = {
     'password': os.getenv('POSTGRES_PASSWORD', 'victoire')
 }
 
+# Instance du backend mémoire (DataManagerPostgres est lui-même un singleton)
+_memory_data_manager = None
+
 
-def get_data_manager():
+def get_data_manager(backend: str = None):
     """
-    Retourne l'instance du gestionnaire de données PostgreSQL
+    Retourne l'instance du gestionnaire de données du backend configuré
+
+    Args:
+        backend: 'postgres', 'sqlite' ou 'memory' (par défaut ERP_STORAGE_BACKEND)
     """
+    global _memory_data_manager
+    backend = (backend or STORAGE_BACKEND).lower()
+    if backend not in STORAGE_BACKENDS:
+        # Import local : ce module est chargé par erp.core, avant erp.utils.logger
+        from erp.utils.logger import get_logger
+        get_logger(__name__).warning(f"ERP_STORAGE_BACKEND inconnu '{backend}', utilisation de PostgreSQL")
+        backend = 'postgres'
+
+    if backend == 'memory':
+        if _memory_data_manager is None:
+            from erp.core.data_manager_memory import DataManagerMemory
+            _memory_data_manager = DataManagerMemory()
+        return _memory_data_manager
+
     from erp.core.data_manager_postgres import DataManagerPostgres
+    if backend == 'sqlite':
+        from erp.core.database import db_manager
+        if db_manager.engine is None:
+            Path(SQLITE_PATH).parent.mkdir(parents=True, exist_ok=True)
+            db_manager.initialize(check_connection=False, url=f'sqlite:///{SQLITE_PATH}')
     return DataManagerPostgres()
@@ -0,0 +1,224 @@
+"""
+Mode multi-tenant : un seul processus sert plusieurs clients
+
+Activé par MULTI_TENANT=true. Chaque tenant dispose de son propre schéma
+PostgreSQL (tenant_<id>) dans la base de l'application ; toutes les sessions
+passent par le pool de connexions partagé de DatabaseManager, qui traduit le
+schéma des tables selon le tenant courant.
+
+Le tenant d'une requête est déterminé par le nom d'hôte (hôte déclaré, ou
+premier label : dupont.erp-btp.fr -> dupont), sinon par le choix fait à la
+connexion et conservé dans le storage utilisateur. Les traitements hors
+requête (threads, tâches planifiées) l'indiquent avec use_tenant().
+
+Les tenants sont déclarés dans data/tenants.json (variable TENANTS_FILE) :
+
+    {
+        "dupont": {"client_id": "contact@dupont.fr", "hosts": ["erp.dupont.fr"]}
+    }
+
+Hors mode multi-tenant, current_tenant() retourne None : une seule base,
+CLIENT_ID lu dans l'environnement, comme auparavant.
+"""
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from erp.core.constants import TENANT_ID_PATTERN, TENANT_SCHEMA_PREFIX
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MULTI_TENANT = os.getenv('MULTI_TENANT', 'false').lower() == 'true'
+TENANTS_FILE = os.getenv(
+    'TENANTS_FILE', str(Path(__file__).parent.parent.parent / 'data' / 'tenants.json')
+)
+
+# Tenant fixé explicitement (use_tenant), prioritaire sur la requête en cours ;
+# _UNSET tant qu'aucun n'est fixé (None fixé = schéma public, même en requête)
+_UNSET = object()
+_current_tenant: ContextVar = ContextVar('current_tenant', default=_UNSET)
+
+
+def is_valid_tenant_id(tenant_id: str) -> bool:
+    """Vérifie qu'un identifiant de tenant est utilisable comme nom de schéma"""
+    return bool(tenant_id) and re.match(TENANT_ID_PATTERN, tenant_id) is not None
+
+
+def schema_for(tenant_id: str) -> str:
+    """Nom du schéma PostgreSQL d'un tenant"""
+    return TENANT_SCHEMA_PREFIX + tenant_id
+
+
+@dataclass
+class Tenant:
+    """Tenant déclaré dans le fichier des tenants"""
+    id: str
+    client_id: Optional[str] = None
+    hosts: Tuple[str, ...] = field(default_factory=tuple)
+    initial_username: Optional[str] = None
+    initial_password: Optional[str] = None
+
+    @property
+    def schema(self) -> str:
+        return schema_for(self.id)
+
+
+class TenantRegistry:
+    """Liste des tenants, rechargée quand le fichier est modifié
+
+    Args:
+        path: Fichier JSON des tenants
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or TENANTS_FILE)
+        self._tenants: Dict[str, Tenant] = {}
+        self._hosts: Dict[str, str] = {}
+        self._mtime_ns: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            mtime_ns = self.path.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if mtime_ns == self._mtime_ns:
+            return
+        with self._lock:
+            if mtime_ns == self._mtime_ns:
+                return
+            tenants: Dict[str, Tenant] = {}
+            if mtime_ns is not None:
+                try:
+                    raw = json.loads(self.path.read_text(encoding='utf-8'))
+                except (OSError, ValueError) as e:
+                    logger.error(f"Fichier des tenants illisible ({self.path}): {e}")
+                    return
+                for tenant_id, conf in raw.items():
+                    if not is_valid_tenant_id(tenant_id):
+                        logger.warning(f"Identifiant de tenant invalide ignoré: {tenant_id!r}")
+                        continue
+                    conf = conf or {}
+                    tenants[tenant_id] = Tenant(
+                        id=tenant_id,
+                        client_id=conf.get('client_id'),
+                        hosts=tuple(h.lower() for h in conf.get('hosts', [])),
+                        initial_username=conf.get('initial_username'),
+                        initial_password=conf.get('initial_password'),
+                    )
+            self._tenants = tenants
+            self._hosts = {host: t.id for t in tenants.values() for host in t.hosts}
+            self._mtime_ns = mtime_ns
+            logger.info(f"{len(tenants)} tenant(s) chargé(s) depuis {self.path}")
+
+    def get(self, tenant_id: Optional[str]) -> Optional[Tenant]:
+        """Retourne le tenant déclaré, ou None"""
+        if not tenant_id:
+            return None
+        self._refresh()
+        return self._tenants.get(tenant_id)
+
+    def all(self) -> List[Tenant]:
+        """Tous les tenants déclarés"""
+        self._refresh()
+        return list(self._tenants.values())
+
+    def resolve_host(self, host: Optional[str]) -> Optional[str]:
+        """Tenant correspondant à un nom d'hôte (port ignoré), ou None"""
+        if not host:
+            return None
+        self._refresh()
+        host = host.split(':', 1)[0].lower()
+        tenant_id = self._hosts.get(host)
+        if tenant_id is None:
+            label = host.split('.', 1)[0]
+            if label in self._tenants:
+                tenant_id = label
+        return tenant_id
+
+
+# Instance singleton du registre
+_tenant_registry = None
+
+
+def get_tenant_registry() -> TenantRegistry:
+    """Retourne le registre des tenants du processus"""
+    global _tenant_registry
+    if _tenant_registry is None:
+        _tenant_registry = TenantRegistry()
+    return _tenant_registry
+
+
+def tenant_for_request(request) -> Optional[str]:
+    """Tenant d'une requête HTTP : nom d'hôte, sinon tenant choisi à la connexion"""
+    state = getattr(request, 'state', None)
+    tenant_id = getattr(state, 'tenant', None)
+    if tenant_id is not None:
+        return tenant_id or None
+
+    tenant_id = get_tenant_registry().resolve_host(request.headers.get('host'))
+    if tenant_id is None:
+        try:
+            from nicegui import app as nicegui_app
+            tenant_id = nicegui_app.storage.user.get('tenant')
+        except (RuntimeError, AssertionError, KeyError):
+            # Storage utilisateur indisponible (route API, requête hors page)
+            tenant_id = None
+        if get_tenant_registry().get(tenant_id) is None:
+            tenant_id = None
+    if state is not None:
+        state.tenant = tenant_id or ''
+    return tenant_id
+
+
+def current_tenant() -> Optional[str]:
+    """Identifiant du tenant courant, ou None (mode mono-tenant ou hors requête)"""
+    if not MULTI_TENANT:
+        return None
+    tenant_id = _current_tenant.get()
+    if tenant_id is not _UNSET:
+        return tenant_id
+    # Requête HTTP ou événement d'interface NiceGUI en cours
+    from nicegui.storage import request_contextvar
+    request = request_contextvar.get()
+    if request is None:
+        return None
+    return tenant_for_request(request)
+
+
+@contextmanager
+def use_tenant(tenant_id: Optional[str]) -> Iterator[None]:
+    """Exécute un bloc pour un tenant donné (threads, tâches, connexion)
+
+    use_tenant(None) force le schéma public, y compris pendant une requête
+    adressée à un tenant (données communes à tous les tenants).
+
+    Usage:
+        with use_tenant('dupont'):
+            dm.clients
+    """
+    token = _current_tenant.set(tenant_id)
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+def get_client_id() -> Optional[str]:
+    """CLIENT_ID du tenant courant pour la base des abonnements
+
+    En mode multi-tenant : client_id déclaré dans le fichier des tenants ;
+    sinon la variable d'environnement CLIENT_ID.
+    """
+    tenant_id = current_tenant()
+    if tenant_id is None:
+        return os.getenv('CLIENT_ID')
+    tenant = get_tenant_registry().get(tenant_id)
+    return tenant.client_id if tenant else None
@@ -1,8 +1,25 @@
 """
 Services module - Business services
+
+Les exports sont résolus à la première utilisation (PEP 562) : importer un
+service ne charge pas ReportLab ni les autres dépendances des autres services.
 """
-from erp.services.pdf_service import generate_pdf
+import importlib
+
+_EXPORTS = {
+    'generate_pdf': 'erp.services.pdf_service',
+    'get_pdf_render_service': 'erp.services.pdf_render_service',
+    'get_template_service': 'erp.services.template_service',
+    'get_category_service': 'erp.services.category_service',
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    'generate_pdf',
-]
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,268 @@
+"""
+Journal des connexions (table connexions de la base des abonnements)
+
+Les événements de connexion/déconnexion sont placés dans une file bornée et
+écrits par un thread dédié, par lots (INSERT multi-lignes), dès qu'un lot
+est complet ou au plus tard après AUDIT_LOG_FLUSH_INTERVAL. La réponse de
+connexion n'attend donc plus la base distante.
+
+Quand la base est injoignable (ou la file pleine), les événements sont
+ajoutés à un fichier de secours (une ligne JSON par événement) et rejoués
+dès que la base répond à nouveau, y compris après un redémarrage : start()
+est appelé au démarrage de l'application et rejoue aussitôt le fichier.
+Le rejeu renomme d'abord le fichier (.replay) puis écrit en base sans
+verrou, de sorte qu'une base lente ne bloque jamais log().
+"""
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from erp.core.constants import (
+    AUDIT_LOG_BATCH_SIZE, AUDIT_LOG_FLUSH_INTERVAL, AUDIT_LOG_QUEUE_SIZE, AUDIT_LOG_RETRY_INTERVAL,
+)
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_SPOOL_PATH = PROJECT_ROOT / 'data' / 'connexions_spool.jsonl'
+
+# Messages de contrôle du thread d'écriture
+_FLUSH = 'flush'
+_STOP = 'stop'
+
+
+def insert_connexions(events: List[dict]):
+    """Écrit un lot d'événements dans la table connexions (un seul INSERT)"""
+    from psycopg2.extras import execute_values
+    from erp.services.subscription_service import get_subscription_service
+
+    rows = [(e['client_id'], e['username'], e['action'], e['timestamp']) for e in events]
+    with get_subscription_service().connection() as conn:
+        cursor = conn.cursor()
+        try:
+            execute_values(
+                cursor,
+                "INSERT INTO connexions (client_id, username, action, timestamp) VALUES %s",
+                rows,
+                page_size=len(rows)
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+class AuditLogService:
+    """File d'attente et écriture groupée du journal des connexions
+
+    Args:
+        write_batch: Fonction d'écriture d'un lot (par défaut : table connexions)
+        spool_path: Fichier de secours des événements non envoyés
+    """
+
+    def __init__(self, write_batch: Optional[Callable[[List[dict]], None]] = None,
+                 spool_path: Optional[Path] = None,
+                 max_queue: int = AUDIT_LOG_QUEUE_SIZE,
+                 batch_size: int = AUDIT_LOG_BATCH_SIZE,
+                 flush_interval: float = AUDIT_LOG_FLUSH_INTERVAL,
+                 retry_interval: float = AUDIT_LOG_RETRY_INTERVAL):
+        self._write_batch = write_batch or insert_connexions
+        self.spool_path = Path(spool_path or DEFAULT_SPOOL_PATH)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._spool_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._next_replay = 0.0
+        self.written = 0
+        self.spooled = 0
+
+    def log(self, client_id: str, username: str, action: str, timestamp: Optional[datetime] = None):
+        """Ajoute un événement au journal (ne bloque jamais)"""
+        event = {
+            'client_id': str(client_id),
+            'username': username,
+            'action': action,
+            'timestamp': timestamp or datetime.now(),
+        }
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            logger.warning("File du journal des connexions pleine, événement conservé sur disque")
+            self._spool([event])
+
+    def start(self):
+        """Démarre le thread d'écriture et rejoue le fichier de secours sans attendre"""
+        self._ensure_worker()
+        self._queue.put((_FLUSH, None))
+
+    @property
+    def queue_size(self) -> int:
+        """Nombre d'événements en attente d'écriture"""
+        return self._queue.qsize()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Envoie sans attendre les événements en file et attend la fin de l'écriture"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Envoie les événements restants puis arrête le thread d'écriture"""
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put((_STOP, None), timeout=timeout)
+        except queue.Full:
+            logger.warning("Arrêt du journal des connexions : file pleine")
+        thread.join(timeout)
+        self._thread = None
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='audit-log', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        """Boucle du thread d'écriture"""
+        batch: List[dict] = []
+        deadline = None
+        while True:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            control = item if isinstance(item, tuple) else None
+            if item is not None and control is None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (control or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._send(batch)
+                batch = []
+                deadline = None
+            elif not batch:
+                # File vide : profiter du temps libre pour rejouer le fichier de secours
+                self._replay_spool(force=control is not None)
+
+            if control is not None:
+                kind, done = control
+                if done is not None:
+                    done.set()
+                if kind == _STOP:
+                    return
+
+    def _send(self, events: List[dict]):
+        """Écrit un lot, ou le conserve sur disque si la base est indisponible"""
+        # Tant que le fichier de secours n'est pas rejoué, la base est considérée indisponible
+        if not self._replay_spool():
+            self._spool(events)
+            return
+        try:
+            self._write_batch(events)
+            self.written += len(events)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'enregistrement du journal des connexions: {e}")
+            self._next_replay = time.monotonic() + self.retry_interval
+            self._spool(events)
+
+    def _spool(self, events: List[dict]):
+        """Ajoute des événements au fichier de secours"""
+        with self._spool_lock:
+            try:
+                self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.spool_path, 'a', encoding='utf-8') as f:
+                    for event in events:
+                        f.write(json.dumps(dict(event, timestamp=event['timestamp'].isoformat())) + '\n')
+                self.spooled += len(events)
+            except OSError as e:
+                logger.error(f"Impossible d'écrire le fichier de secours du journal: {e}")
+
+    @property
+    def replay_path(self) -> Path:
+        """Fichier de secours en cours de rejeu (renommé, hors du verrou de log())"""
+        return self.spool_path.with_suffix('.replay')
+
+    def _replay_spool(self, force: bool = False) -> bool:
+        """Rejoue le fichier de secours ; retourne True s'il ne reste rien à rejouer
+
+        Appelé uniquement par le thread d'écriture. Le verrou n'est pris que
+        pour renommer le fichier : l'écriture en base se fait sans le tenir.
+        """
+        replay_path = self.replay_path
+        if not replay_path.exists() and not self.spool_path.exists():
+            return True
+        if not force and time.monotonic() < self._next_replay:
+            return False
+        # Un fichier .replay restant (échec précédent, arrêt brutal) passe en premier
+        if not replay_path.exists():
+            with self._spool_lock:
+                self.spool_path.replace(replay_path)
+
+        events = []
+        with open(replay_path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                    event['timestamp'] = datetime.fromisoformat(event['timestamp'])
+                    events.append(event)
+                except (ValueError, KeyError):
+                    logger.warning(f"Ligne invalide ignorée dans le fichier de secours: {line.strip()}")
+
+        sent = 0
+        try:
+            while sent < len(events):
+                chunk = events[sent:sent + self.batch_size]
+                self._write_batch(chunk)
+                sent += len(chunk)
+        except Exception as e:
+            logger.warning(f"Rejeu du journal des connexions impossible ({len(events) - sent} en attente): {e}")
+            self._next_replay = time.monotonic() + self.retry_interval
+            self._rewrite_spool(replay_path, events[sent:])
+            self.written += sent
+            return False
+
+        replay_path.unlink()
+        self.written += sent
+        if sent:
+            logger.info(f"{sent} événement(s) du journal des connexions rejoué(s)")
+        # Des événements ont pu être ajoutés au fichier de secours pendant le rejeu
+        return not self.spool_path.exists()
+
+    @staticmethod
+    def _rewrite_spool(path: Path, events: List[dict]):
+        """Remplace un fichier de secours par les événements restants (écriture atomique)"""
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(dict(event, timestamp=event['timestamp'].isoformat())) + '\n')
+        tmp_path.replace(path)
+
+
+# Instance singleton du service
+_audit_log_service = None
+
+
+def get_audit_log_service() -> AuditLogService:
+    """Retourne l'instance singleton du journal des connexions"""
+    global _audit_log_service
+    if _audit_log_service is None:
+        _audit_log_service = AuditLogService()
+    return _audit_log_service
@@ -0,0 +1,189 @@
+"""
+Service des catégories d'articles et d'ouvrages
+
+L'arborescence (categories.json du dossier de données du tenant :
+data/categories.json hors multi-tenant, data/tenants/<id>/categories.json
+sinon) est lue une fois puis conservée en mémoire, par fichier ; elle n'est
+relue que si le fichier change (date de modification, taille). Pour chaque
+nœud, l'ensemble de ses descendants (à toute profondeur) est précalculé : le test « appartient à la catégorie X ou à
+l'une de ses sous-catégories » est une simple recherche dans un ensemble,
+et la liste peut être passée telle quelle à une clause SQL IN.
+"""
+import copy
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from erp.core.data_manager_base import DEFAULT_DATA_DIR, tenant_data_dir
+from erp.core.tenant import current_tenant
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CATEGORIES_FILE_NAME = 'categories.json'
+
+# Arborescence par défaut tant qu'aucune catégorie n'a été enregistrée
+DEFAULT_CATEGORIES = [
+    {'id': 'general', 'label': 'Général', 'children': []},
+    {'id': 'platrerie', 'label': 'Plâtrerie', 'children': []},
+    {'id': 'menuiserie_int', 'label': 'Menuiserie Intérieure', 'children': []},
+    {'id': 'menuiserie_ext', 'label': 'Menuiserie Extérieure', 'children': []},
+    {'id': 'isolation', 'label': 'Isolation', 'children': []},
+    {'id': 'peinture', 'label': 'Peinture', 'children': []},
+]
+
+
+class CategoryTree:
+    """Arborescence indexée des catégories (lecture seule)"""
+
+    def __init__(self, nodes: List[dict], version: int = 0):
+        self.nodes = nodes
+        self.version = version
+        self._by_id: Dict[str, dict] = {}
+        self._parent: Dict[str, Optional[str]] = {}
+        self._descendants: Dict[str, FrozenSet[str]] = {}
+        for node in nodes:
+            self._index(node, None)
+
+    def _index(self, node: dict, parent_id: Optional[str]) -> FrozenSet[str]:
+        node_id = node['id']
+        self._by_id[node_id] = node
+        self._parent[node_id] = parent_id
+        ids = {node_id}
+        for child in node.get('children') or []:
+            ids |= self._index(child, node_id)
+        self._descendants[node_id] = frozenset(ids)
+        return self._descendants[node_id]
+
+    def find(self, category_id: str) -> Optional[dict]:
+        """Nœud correspondant à l'identifiant"""
+        return self._by_id.get(category_id)
+
+    def parent_of(self, category_id: str) -> Optional[dict]:
+        """Nœud parent (None pour une catégorie principale ou inconnue)"""
+        parent_id = self._parent.get(category_id)
+        return self._by_id.get(parent_id) if parent_id else None
+
+    def root_of(self, category_id: str) -> Optional[dict]:
+        """Catégorie principale dont dépend le nœud"""
+        if category_id not in self._by_id:
+            return None
+        while self._parent.get(category_id):
+            category_id = self._parent[category_id]
+        return self._by_id[category_id]
+
+    def descendants(self, category_id: str) -> FrozenSet[str]:
+        """Identifiants de la catégorie et de toutes ses sous-catégories"""
+        return self._descendants.get(category_id, frozenset((category_id,)))
+
+    def in_category(self, item_category: Optional[str], category_id: str) -> bool:
+        """Vrai si item_category est category_id ou l'une de ses sous-catégories"""
+        return (item_category or 'general') in self.descendants(category_id)
+
+    def sql_in_list(self, category_id: str) -> List[str]:
+        """Liste triée des identifiants, utilisable dans une clause SQL IN"""
+        return sorted(self.descendants(category_id))
+
+    def display_labels(self, category_id: Optional[str]) -> Tuple[str, str]:
+        """Libellés (catégorie principale, sous-catégorie ou '-') pour l'affichage"""
+        node = self._by_id.get(category_id)
+        if node is None:
+            return category_id or '', '-'
+        root = self.root_of(category_id)
+        if root is node:
+            return node['label'], '-'
+        return root['label'], node['label']
+
+
+class CategoryService:
+    """Accès en cache à l'arborescence des catégories
+
+    Args:
+        path: Fichier des catégories ; par défaut celui du dossier de données
+            du tenant courant (un cache par tenant)
+    """
+
+    def __init__(self, path: Optional[Path] = None, base_data_dir: Path = DEFAULT_DATA_DIR):
+        self._fixed_path = Path(path) if path else None
+        self.base_data_dir = Path(base_data_dir)
+        # Par fichier : (arborescence, signature du fichier lu)
+        self._trees: Dict[Path, Tuple[CategoryTree, Optional[tuple]]] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        """Fichier des catégories du tenant courant"""
+        if self._fixed_path is not None:
+            return self._fixed_path
+        return tenant_data_dir(self.base_data_dir, current_tenant()) / CATEGORIES_FILE_NAME
+
+    @staticmethod
+    def _file_signature(path: Path):
+        try:
+            stat = path.stat()
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def get_tree(self) -> CategoryTree:
+        """Arborescence courante (relue uniquement si le fichier a changé)"""
+        path = self.path
+        signature = self._file_signature(path)
+        cached = self._trees.get(path)
+        if cached is not None and cached[1] == signature:
+            return cached[0]
+
+        with self._lock:
+            cached = self._trees.get(path)
+            if cached is not None and cached[1] == signature:
+                return cached[0]
+            nodes = copy.deepcopy(DEFAULT_CATEGORIES)
+            if signature is not None:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        nodes = json.load(f)
+                except Exception as e:
+                    logger.error(f"Erreur lors du chargement des catégories ({path}): {e}")
+            self._version += 1
+            tree = CategoryTree(nodes, self._version)
+            self._trees[path] = (tree, signature)
+            logger.debug(f"Catégories chargées depuis {path} (version {self._version})")
+            return tree
+
+    def load_nodes(self) -> List[dict]:
+        """Copie modifiable de l'arborescence (pour le panneau d'édition)"""
+        return copy.deepcopy(self.get_tree().nodes)
+
+    def save_nodes(self, nodes: List[dict]) -> CategoryTree:
+        """Enregistre l'arborescence et met à jour le cache"""
+        path = self.path
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(nodes, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+            self._version += 1
+            tree = CategoryTree(copy.deepcopy(nodes), self._version)
+            self._trees[path] = (tree, self._file_signature(path))
+            return tree
+
+    def invalidate(self):
+        """Force la relecture au prochain accès (tous les tenants)"""
+        with self._lock:
+            self._trees.clear()
+
+
+# Instance singleton
+_category_service = None
+
+
+def get_category_service() -> CategoryService:
+    """Retourne l'instance singleton du service de catégories"""
+    global _category_service
+    if _category_service is None:
+        _category_service = CategoryService()
+    return _category_service
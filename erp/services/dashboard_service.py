@@ -0,0 +1,174 @@
+"""
+Service de génération du tableau de bord Pygwalker
+
+La génération HTML de Pygwalker est coûteuse (plusieurs Mo de HTML, calcul
+du noyau côté serveur). Elle est déportée dans un processus de travail pour
+ne pas bloquer la boucle d'événements NiceGUI, et le résultat est mis en
+cache par tenant et par version des données.
+"""
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from erp.core.constants import DASHBOARD_CACHE_MAX_ENTRIES, DASHBOARD_RENDER_WORKERS
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def build_devis_records(dm) -> List[Dict[str, Any]]:
+    """Construit les enregistrements du tableau de bord à partir des devis
+
+    Args:
+        dm: Gestionnaire de données
+
+    Returns:
+        Liste de dictionnaires sérialisables (un par devis)
+    """
+    records = []
+    for devis in dm.devis_list:
+        records.append({
+            'numero': devis.numero,
+            'date': devis.date,
+            'client_id': devis.client_id,
+            'statut': devis.statut,
+            'total_ht': devis.total_ht,
+            'total_ttc': devis.total_ttc,
+            'tva': devis.tva,
+            'coefficient_marge': devis.coefficient_marge,
+            'nb_lignes': len(devis.lignes) if devis.lignes else 0
+        })
+    return records
+
+
+def compute_data_version(records: List[Dict[str, Any]]) -> str:
+    """Calcule une empreinte stable des données du tableau de bord"""
+    payload = json.dumps(records, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _render_pygwalker_html(records: List[Dict[str, Any]]) -> str:
+    """Génère le HTML Pygwalker (exécuté dans un processus de travail)"""
+    import pandas as pd
+    import pygwalker as pyg
+
+    return pyg.to_html(
+        pd.DataFrame(records),
+        spec="",
+        use_kernel_calc=True,
+        default_tab='data',
+        appearance='light'
+    )
+
+
+def _default_tenant() -> str:
+    """Identifiant du tenant courant (tenant multi-tenant, CLIENT_ID, sinon nom de la base)"""
+    from erp.core.tenant import current_tenant
+    tenant = current_tenant() or os.getenv('CLIENT_ID')
+    if tenant:
+        return tenant
+    from erp.core.database import DB_CONFIG
+    return DB_CONFIG['database']
+
+
+class DashboardService:
+    """Cache LRU du HTML Pygwalker avec génération hors de la boucle d'événements"""
+
+    def __init__(self, max_entries: int = DASHBOARD_CACHE_MAX_ENTRIES,
+                 max_workers: int = DASHBOARD_RENDER_WORKERS):
+        self.max_entries = max_entries
+        self.max_workers = max_workers
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        """Crée le pool de processus à la première utilisation"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def get_cached(self, tenant: str, version: str) -> Optional[str]:
+        """Retourne le HTML en cache pour ce tenant et cette version, ou None"""
+        key = (tenant, version)
+        html = self._cache.get(key)
+        if html is not None:
+            self._cache.move_to_end(key)
+        return html
+
+    def _store(self, tenant: str, version: str, html: str):
+        """Stocke un rendu et évince les entrées obsolètes"""
+        # Les anciennes versions du même tenant ne seront plus jamais servies
+        for key in [k for k in self._cache if k[0] == tenant and k[1] != version]:
+            del self._cache[key]
+        self._cache[(tenant, version)] = html
+        self._cache.move_to_end((tenant, version))
+        while len(self._cache) > self.max_entries:
+            evicted, _ = self._cache.popitem(last=False)
+            logger.debug(f"Tableau de bord évincé du cache: {evicted[0]}")
+
+    async def get_html(self, records: List[Dict[str, Any]], tenant: Optional[str] = None) -> str:
+        """Retourne le HTML Pygwalker, en le générant dans un processus si nécessaire
+
+        Les demandes simultanées pour la même version partagent un seul rendu.
+
+        Args:
+            records: Enregistrements produits par build_devis_records
+            tenant: Identifiant du tenant (tenant courant par défaut)
+        """
+        tenant = tenant or _default_tenant()
+        version = compute_data_version(records)
+
+        html = self.get_cached(tenant, version)
+        if html is not None:
+            logger.debug(f"Tableau de bord servi depuis le cache ({tenant})")
+            return html
+
+        key = (tenant, version)
+        pending = self._pending.get(key)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            pending = loop.run_in_executor(self._get_executor(), _render_pygwalker_html, records)
+            self._pending[key] = pending
+            try:
+                html = await pending
+            finally:
+                self._pending.pop(key, None)
+            self._store(tenant, version, html)
+            logger.info(f"Tableau de bord généré pour {tenant} ({len(records)} devis)")
+            return html
+        return await asyncio.shield(pending)
+
+    def invalidate(self, tenant: Optional[str] = None):
+        """Vide le cache (pour un tenant donné ou entièrement)"""
+        if tenant is None:
+            self._cache.clear()
+        else:
+            for key in [k for k in self._cache if k[0] == tenant]:
+                del self._cache[key]
+
+    def shutdown(self):
+        """Arrête le pool de processus"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Instance singleton du service
+_dashboard_service = None
+
+
+def get_dashboard_service() -> DashboardService:
+    """Retourne l'instance singleton du service de tableau de bord"""
+    global _dashboard_service
+    if _dashboard_service is None:
+        _dashboard_service = DashboardService()
+    return _dashboard_service
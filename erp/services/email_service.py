@@ -1,11 +1,13 @@
 """
 Service d'envoi d'emails pour l'application ERP BTP
+
+Les emails sont mis en file (erp.services.mail_queue) et envoyés en
+arrière-plan : les pages qui en déclenchent n'attendent pas le serveur SMTP.
 """
-import smtplib
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
 from typing import Optional
+from erp.services.mail_queue import MailQueue, SmtpSender
 from erp.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -20,12 +22,48 @@ class EmailService:
         self.smtp_username = os.getenv('SMTP_USERNAME', '')
         self.smtp_password = os.getenv('SMTP_PASSWORD', '')
         self.smtp_from = os.getenv('SMTP_FROM', self.smtp_username)
+        self.smtp_use_tls = os.getenv('SMTP_USE_TLS', 'true').lower() not in ('0', 'false', 'no')
         self.app_url = os.getenv('APP_URL', 'http://localhost:8080')
+        self._queue: Optional[MailQueue] = None
+        self._queue_lock = threading.Lock()
+    
+    @property
+    def queue(self) -> MailQueue:
+        """File d'envoi (créée et démarrée à la première utilisation)"""
+        if self._queue is None:
+            with self._queue_lock:
+                if self._queue is None:
+                    sender = SmtpSender(
+                        self.smtp_server, self.smtp_port,
+                        self.smtp_username, self.smtp_password,
+                        use_tls=self.smtp_use_tls
+                    )
+                    queue = MailQueue(sender, self.smtp_from)
+                    queue.start()
+                    self._queue = queue
+        return self._queue
+    
+    def start(self):
+        """Démarre la file d'envoi au lancement : les emails restés sur disque repartent sans attendre"""
+        if not self.smtp_username or not self.smtp_password:
+            return
+        try:
+            self.queue  # Création et démarrage (rechargement des messages en attente)
+        except Exception as e:
+            logger.error(f"Démarrage de la file d'envoi des emails impossible: {e}", exc_info=True)
+    
+    def shutdown(self):
+        """Arrête la file d'envoi (les emails non envoyés restent sur disque)"""
+        if self._queue is not None:
+            self._queue.shutdown()
     
     def send_email(self, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None) -> bool:
         """
         Envoie un email
         
+        Le message est enregistré dans la file d'envoi puis transmis en
+        arrière-plan (avec nouvelles tentatives en cas d'échec temporaire).
+        
         Args:
             to_email: Adresse email du destinataire
             subject: Sujet de l'email
@@ -33,38 +71,19 @@ class EmailService:
             text_content: Contenu texte alternatif (optionnel)
             
         Returns:
-            bool: True si envoyé avec succès, False sinon
+            bool: True si l'email a été mis en file, False sinon (SMTP non configuré)
         """
         if not self.smtp_username or not self.smtp_password:
             logger.warning("Configuration SMTP manquante, email non envoyé")
             return False
         
         try:
-            # Créer le message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = self.smtp_from
-            msg['To'] = to_email
-            
-            # Ajouter les contenus
-            if text_content:
-                part1 = MIMEText(text_content, 'plain', 'utf-8')
-                msg.attach(part1)
-            
-            part2 = MIMEText(html_content, 'html', 'utf-8')
-            msg.attach(part2)
-            
-            # Connexion et envoi
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
-            
-            logger.info(f"Email envoyé avec succès à {to_email}")
+            self.queue.enqueue(to_email, subject, html_content, text_content)
+            logger.info(f"Email pour {to_email} mis en file d'envoi")
             return True
             
         except Exception as e:
-            logger.error(f"Erreur lors de l'envoi de l'email à {to_email}: {e}")
+            logger.error(f"Erreur lors de la mise en file de l'email à {to_email}: {e}")
             return False
     
     def send_password_reset_email(self, to_email: str, reset_token: str, username: str) -> bool:
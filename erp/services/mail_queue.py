@@ -0,0 +1,393 @@
+"""
+File d'envoi des emails
+
+Les emails sont enregistrés sur disque (un fichier JSON par message dans
+data/mail_queue) puis envoyés par un thread dédié. Ce thread garde une seule
+connexion SMTP authentifiée ouverte entre les messages et la ferme après
+EMAIL_SMTP_IDLE_TIMEOUT d'inactivité.
+
+Un échec temporaire (serveur injoignable, code 4xx) replanifie le message
+avec un délai doublé à chaque tentative ; un refus définitif (code 5xx,
+destinataire rejeté) ou EMAIL_MAX_ATTEMPTS échecs déplacent le message dans
+data/mail_queue/failed. Les messages en attente sont rechargés au démarrage.
+
+Plusieurs processus peuvent partager le répertoire : avant l'envoi, un
+message est réservé par renommage atomique (<id>.<processus>.sending), si
+bien qu'un seul processus l'envoie. Une réservation laissée par un processus
+arrêté est rendue à la file après EMAIL_CLAIM_TIMEOUT.
+
+Les messages contiennent des liens à jeton (réinitialisation de mot de
+passe) : le répertoire et les fichiers ne sont lisibles que par le
+propriétaire du processus (0700 / 0600).
+"""
+import json
+import os
+import smtplib
+import threading
+import time
+import uuid
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from pathlib import Path
+from typing import Dict, Optional
+
+from erp.core.constants import (
+    EMAIL_CLAIM_TIMEOUT, EMAIL_MAX_ATTEMPTS, EMAIL_RETRY_BASE_DELAY, EMAIL_RETRY_MAX_DELAY,
+    EMAIL_SMTP_IDLE_TIMEOUT,
+)
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_QUEUE_DIR = PROJECT_ROOT / 'data' / 'mail_queue'
+
+
+def build_message(sender: str, to_email: str, subject: str, html_content: str,
+                  text_content: Optional[str] = None) -> MIMEMultipart:
+    """Construit le message MIME (texte alternatif optionnel + HTML)"""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = to_email
+
+    if text_content:
+        msg.attach(MIMEText(text_content, 'plain', 'utf-8'))
+    msg.attach(MIMEText(html_content, 'html', 'utf-8'))
+    return msg
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """Indique si un échec SMTP est définitif (inutile de réessayer)"""
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, smtplib.SMTPNotSupportedError)):
+        return True
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        # Configuration à corriger : le message partira une fois les identifiants rétablis
+        return False
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+class SmtpSender:
+    """Connexion SMTP authentifiée conservée entre les envois"""
+
+    def __init__(self, host: str, port: int, username: str = '', password: str = '',
+                 use_tls: bool = True, timeout: float = 30,
+                 idle_timeout: float = EMAIL_SMTP_IDLE_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self.connections = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.connections += 1
+        logger.debug(f"Connexion SMTP ouverte vers {self.host}:{self.port}")
+        return server
+
+    def send(self, msg):
+        """Envoie un message, en rouvrant la connexion si le serveur l'a fermée"""
+        for attempt in (1, 2):
+            if self._server is None:
+                self._server = self._connect()
+            try:
+                self._server.send_message(msg)
+                self._last_used = time.monotonic()
+                return
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self.close()
+                if attempt == 2:
+                    raise
+
+    def close_if_idle(self):
+        """Ferme la connexion inutilisée depuis plus de idle_timeout"""
+        if self._server is not None and time.monotonic() - self._last_used >= self.idle_timeout:
+            self.close()
+
+    def close(self):
+        """Ferme la connexion (QUIT si possible)"""
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+
+class MailQueue:
+    """File persistante d'emails envoyés par un thread dédié
+
+    Args:
+        sender: Connexion SMTP utilisée pour l'envoi
+        from_address: Adresse d'expédition
+        queue_dir: Répertoire des messages en attente
+    """
+
+    def __init__(self, sender: SmtpSender, from_address: str,
+                 queue_dir: Optional[Path] = None,
+                 max_attempts: int = EMAIL_MAX_ATTEMPTS,
+                 base_delay: float = EMAIL_RETRY_BASE_DELAY,
+                 max_delay: float = EMAIL_RETRY_MAX_DELAY,
+                 claim_timeout: float = EMAIL_CLAIM_TIMEOUT):
+        self.sender = sender
+        self.from_address = from_address
+        self.queue_dir = Path(queue_dir or DEFAULT_QUEUE_DIR)
+        self.failed_dir = self.queue_dir / 'failed'
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.claim_timeout = claim_timeout
+        # Identifie les réservations de ce processus (<id>.<owner>.sending)
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._pending: Dict[str, dict] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._busy = False
+        self.sent = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def enqueue(self, to_email: str, subject: str, html_content: str,
+                text_content: Optional[str] = None) -> str:
+        """Enregistre un email à envoyer et retourne son identifiant"""
+        message_id = f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:12]}"
+        message = {
+            'id': message_id,
+            'to': to_email,
+            'subject': subject,
+            'html': html_content,
+            'text': text_content,
+            'attempts': 0,
+            'next_attempt': 0.0,
+            'last_error': None,
+        }
+        self._write(message)
+        with self._cond:
+            self._pending[message_id] = message
+            self._cond.notify_all()
+        self.start()
+        return message_id
+
+    @property
+    def pending(self) -> int:
+        """Nombre d'emails en attente d'envoi"""
+        return len(self._pending)
+
+    def start(self):
+        """Recharge les messages en attente et démarre le thread d'envoi"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._load()
+            self._thread = threading.Thread(target=self._run, name='mail-queue', daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Attend l'envoi de tous les messages dont l'échéance est passée"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._busy or self._next_due()[1] == 0:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: float = 5.0):
+        """Arrête le thread d'envoi (les messages restants sont conservés sur disque)"""
+        with self._cond:
+            thread = self._thread
+            self._stopping = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            self._thread = None
+
+    # ------------------------------------------------------------------
+    # Thread d'envoi
+    # ------------------------------------------------------------------
+
+    def _next_due(self):
+        """Retourne (message le plus urgent, délai avant son échéance) ou (None, None)"""
+        if not self._pending:
+            return None, None
+        message = min(self._pending.values(), key=lambda m: (m['next_attempt'], m['id']))
+        return message, max(0.0, message['next_attempt'] - time.time())
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    message, delay = self._next_due()
+                    if message is not None and delay == 0:
+                        break
+                    wait = self.sender.idle_timeout if delay is None else min(delay, self.sender.idle_timeout)
+                    if not self._cond.wait(wait):
+                        self.sender.close_if_idle()
+                if self._stopping:
+                    break
+                self._busy = True
+            try:
+                self._deliver(message)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+        self.sender.close()
+
+    def _claim(self, message: dict) -> Optional[dict]:
+        """Réserve un message pour ce processus et retourne son contenu à jour
+
+        Retourne None si un autre processus l'a déjà envoyé ou réservé, ou si
+        sa prochaine tentative, enregistrée par un autre processus, n'est pas due.
+        """
+        claimed = self._claimed_path(message)
+        try:
+            os.rename(self._path(message), claimed)
+        except FileNotFoundError:
+            logger.debug(f"Email {message['id']} pris en charge par un autre processus")
+            with self._cond:
+                self._pending.pop(message['id'], None)
+            return None
+        os.utime(claimed)  # Début de la réservation (voir _recover_claims)
+        try:
+            with open(claimed, encoding='utf-8') as f:
+                current = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Email en attente illisible ({claimed.name}): {e}")
+            current = message
+        if current['next_attempt'] > time.time():
+            os.rename(claimed, self._path(message))
+            with self._cond:
+                self._pending[message['id']] = current
+            return None
+        with self._cond:
+            self._pending[message['id']] = current
+        return current
+
+    def _deliver(self, message: dict):
+        """Envoie un message et met à jour la file selon le résultat"""
+        message = self._claim(message)
+        if message is None:
+            return
+        claimed = self._claimed_path(message)
+        try:
+            msg = build_message(self.from_address, message['to'], message['subject'],
+                                message['html'], message['text'])
+            self.sender.send(msg)
+        except Exception as e:
+            message['attempts'] += 1
+            message['last_error'] = str(e)
+            if is_permanent_error(e) or message['attempts'] >= self.max_attempts:
+                logger.error(f"Abandon de l'email à {message['to']} après {message['attempts']} tentative(s): {e}")
+                self._move_to_failed(message)
+                return
+            delay = min(self.base_delay * 2 ** (message['attempts'] - 1), self.max_delay)
+            message['next_attempt'] = time.time() + delay
+            logger.warning(f"Échec de l'envoi à {message['to']} (tentative {message['attempts']}), "
+                           f"nouvel essai dans {delay:.0f}s: {e}")
+            # Remis dans la file avec sa nouvelle échéance, puis réservation levée
+            self._write(message)
+            claimed.unlink(missing_ok=True)
+            return
+
+        logger.info(f"Email envoyé avec succès à {message['to']}")
+        self.sent += 1
+        with self._cond:
+            self._pending.pop(message['id'], None)
+        claimed.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    def _path(self, message: dict) -> Path:
+        return self.queue_dir / f"{message['id']}.json"
+
+    def _claimed_path(self, message: dict) -> Path:
+        return self.queue_dir / f"{message['id']}.{self.owner}.sending"
+
+    @staticmethod
+    def _make_private_dir(path: Path):
+        """Crée un répertoire accessible au seul propriétaire"""
+        path.mkdir(mode=0o700, parents=True, exist_ok=True)
+        try:
+            os.chmod(path, 0o700)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _write_private(path: Path, message: dict):
+        """Écrit un message dans un fichier lisible par le seul propriétaire (écriture atomique)"""
+        tmp_path = path.with_suffix('.tmp')
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(message, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _write(self, message: dict):
+        """Enregistre un message en attente"""
+        self._make_private_dir(self.queue_dir)
+        self._write_private(self._path(message), message)
+
+    def _recover_claims(self):
+        """Rend à la file les réservations abandonnées (processus arrêté pendant un envoi)"""
+        expired = time.time() - self.claim_timeout
+        for path in self.queue_dir.glob('*.sending'):
+            try:
+                if path.stat().st_mtime > expired:
+                    continue
+                target = self.queue_dir / f"{path.name.split('.', 1)[0]}.json"
+                if target.exists():
+                    path.unlink()  # Déjà remis dans la file avant l'arrêt
+                else:
+                    os.rename(path, target)
+                logger.warning(f"Réservation abandonnée rendue à la file d'envoi: {path.name}")
+            except OSError:
+                continue  # Reprise par un autre processus
+
+    def _load(self):
+        """Recharge les messages laissés sur disque par une exécution précédente"""
+        if not self.queue_dir.exists():
+            return
+        self._recover_claims()
+        for path in sorted(self.queue_dir.glob('*.json')):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    message = json.load(f)
+                self._pending.setdefault(message['id'], message)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Email en attente illisible ignoré ({path.name}): {e}")
+        if self._pending:
+            logger.info(f"{len(self._pending)} email(s) en attente rechargé(s)")
+
+    def _move_to_failed(self, message: dict):
+        self.failed += 1
+        with self._cond:
+            self._pending.pop(message['id'], None)
+        try:
+            self._make_private_dir(self.failed_dir)
+            self._write_private(self.failed_dir / f"{message['id']}.json", message)
+            self._claimed_path(message).unlink(missing_ok=True)
+        except OSError as e:
+            logger.error(f"Impossible d'archiver l'email en échec {message['id']}: {e}")
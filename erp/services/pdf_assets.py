@@ -0,0 +1,137 @@
+"""
+Registre des styles PDF précompilés
+
+generate_pdf reconstruisait à chaque appel la feuille de styles ReportLab et
+tous les ParagraphStyle / TableStyle. Ces objets sont désormais construits
+une fois par organisation et par processus, puis réutilisés tant que
+l'organisation est inchangée.
+
+Le logo n'est pas mis en cache : ReportLab recompresse l'image dans chaque
+document (Canvas.drawImage) et n'offre pas d'API publique pour réutiliser un
+flux déjà encodé d'un document à l'autre.
+"""
+import hashlib
+import json
+import threading
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Dict, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import TableStyle
+
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Nombre maximal d'organisations conservées dans le registre
+MAX_ENTRIES = 16
+
+
+class PdfAssets:
+    """Styles compilés pour une organisation donnée
+
+    Les TableStyle partagés ne doivent pas être modifiés : utiliser
+    table_style() pour obtenir une copie modifiable.
+    """
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.normal = styles['Normal']
+        self.devis_title = ParagraphStyle('devis_title', parent=styles['Heading1'], alignment=2, fontSize=16,
+                                          textColor=colors.HexColor('#1f2937'), spaceAfter=0)
+        self.devis_numero = ParagraphStyle('devis_numero', parent=styles['Normal'], alignment=2, fontSize=11,
+                                           textColor=colors.HexColor('#1f2937'), spaceAfter=0)
+        self.right_align = ParagraphStyle('right_align', parent=self.normal, alignment=2)
+
+        self.devis_stack_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ])
+        self.header_logo_style = TableStyle([('VALIGN', (0, 0), (-1, -1), 'TOP'), ('ALIGN', (1, 0), (1, 0), 'RIGHT')])
+        self.header_style = TableStyle([('ALIGN', (0, 0), (0, 0), 'RIGHT')])
+        self.block_style = TableStyle([
+            ('VALIGN', (0,0), (-1,-1), 'TOP'),
+            ('LEFTPADDING', (0,0), (-1,-1), 0),
+            ('RIGHTPADDING', (0,0), (-1,-1), 6),
+            ('TOPPADDING', (0,0), (-1,-1), 0),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 0),
+        ])
+        self.lines_style = TableStyle([
+            ('GRID', (0,0), (-1,-1), 0.4, colors.grey),
+            ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#f0f0f0')),
+            ('VALIGN', (0,0), (-1,-1), 'TOP'),
+            ('ALIGN', (0,0), (-1,0), 'CENTER'),
+            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+            ('ALIGN', (2,1), (2,-1), 'RIGHT'),
+            ('ALIGN', (4,1), (5,-1), 'RIGHT'),
+            ('ALIGN', (6,1), (6,-1), 'CENTER'),
+            ('LEFTPADDING', (0,0), (-1,-1), 2),
+            ('RIGHTPADDING', (0,0), (-1,-1), 2),
+            ('TOPPADDING', (0,0), (-1,-1), 2),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 2),
+        ])
+        self.totals_style = TableStyle([
+            ('ALIGN', (0,0), (0,-1), 'RIGHT'),
+            ('ALIGN', (1,0), (1,-1), 'RIGHT'),
+            ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
+        ])
+        self.footer_style = TableStyle([
+            ('VALIGN', (0,0), (-1,-1), 'TOP'),
+            ('ALIGN', (1,0), (1,0), 'RIGHT'),
+            ('LEFTPADDING', (0,0), (-1,-1), 4),
+            ('RIGHTPADDING', (0,0), (-1,-1), 4),
+        ])
+
+    @staticmethod
+    def table_style(base: TableStyle) -> TableStyle:
+        """Copie modifiable d'un style de tableau partagé"""
+        return TableStyle(parent=base)
+
+
+_registry: Dict[Tuple[str, str], PdfAssets] = {}
+_lock = threading.Lock()
+
+
+def _fingerprint(organisation) -> str:
+    """Empreinte de l'organisation"""
+    org = asdict(organisation) if is_dataclass(organisation) else organisation
+    raw = json.dumps(org, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def get_pdf_assets(data_dir, organisation=None) -> PdfAssets:
+    """Retourne les styles compilés pour cette organisation (construits au besoin)
+
+    Args:
+        data_dir: Dossier de données du tenant (une entrée par dossier)
+        organisation: Organisation courante (participe à la clé d'invalidation)
+    """
+    key = (str(Path(data_dir)), _fingerprint(organisation))
+    assets = _registry.get(key)
+    if assets is not None:
+        return assets
+
+    with _lock:
+        assets = _registry.get(key)
+        if assets is None:
+            # Une organisation modifiée remplace l'entrée précédente du même dossier
+            for stale in [k for k in _registry if k[0] == key[0]]:
+                del _registry[stale]
+            while len(_registry) >= MAX_ENTRIES:
+                del _registry[next(iter(_registry))]
+            assets = PdfAssets()
+            _registry[key] = assets
+            logger.debug(f"Styles PDF compilés pour {data_dir}")
+    return assets
+
+
+def invalidate_pdf_assets():
+    """Vide le registre (après modification de l'organisation)"""
+    with _lock:
+        _registry.clear()
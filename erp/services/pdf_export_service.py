@@ -0,0 +1,140 @@
+"""
+Export par lot des devis en PDF (archive ZIP)
+
+Les PDF sont rendus en parallèle par le service de rendu : seuls les devis
+absents du cache ou modifiés depuis le dernier rendu sont régénérés. Un devis
+en échec (file de rendu saturée, erreur de rendu) n'interrompt pas l'export :
+il est listé dans le fichier ERREURS.txt de l'archive.
+
+Les archives sont des fichiers temporaires : celles de plus de
+PDF_EXPORT_MAX_AGE_HOURS sont supprimées au début de chaque export.
+"""
+import asyncio
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from erp.core.constants import DATE_FORMAT, PDF_EXPORT_CONCURRENCY, PDF_EXPORT_MAX_AGE_HOURS
+from erp.services.pdf_render_service import PdfRenderContext, get_pdf_render_service
+from erp.utils.exceptions import PDFGenerationError
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def client_folder_name(client) -> str:
+    """Nom de dossier d'un client (convention de data/pdf/<client>)"""
+    if client:
+        if client.prenom and client.nom:
+            name = f"{client.prenom}_{client.nom}"
+        elif client.entreprise:
+            name = client.entreprise
+        else:
+            name = "Client_inconnu"
+    else:
+        name = "Client_inconnu"
+    return name.replace(" ", "_")
+
+
+def select_devis(devis_list, client_id: Optional[int] = None, statut: Optional[str] = None,
+                 date_debut: Optional[str] = None, date_fin: Optional[str] = None) -> list:
+    """Filtre les devis par client, statut et période (bornes incluses, format YYYY-MM-DD)"""
+    debut = datetime.strptime(date_debut, DATE_FORMAT).date() if date_debut else None
+    fin = datetime.strptime(date_fin, DATE_FORMAT).date() if date_fin else None
+
+    selection = []
+    for devis in devis_list:
+        if client_id is not None and devis.client_id != client_id:
+            continue
+        if statut and devis.statut != statut:
+            continue
+        if debut or fin:
+            try:
+                date_devis = datetime.strptime(devis.date, DATE_FORMAT).date()
+            except (TypeError, ValueError):
+                continue
+            if debut and date_devis < debut:
+                continue
+            if fin and date_devis > fin:
+                continue
+        selection.append(devis)
+    return selection
+
+
+def prune_exports(export_dir: Path, max_age_hours: float = PDF_EXPORT_MAX_AGE_HOURS) -> int:
+    """Supprime les archives d'export plus anciennes que max_age_hours
+
+    Returns:
+        Nombre d'archives supprimées
+    """
+    oldest_allowed = time.time() - max_age_hours * 3600
+    removed = 0
+    for path in Path(export_dir).glob('*.zip'):
+        try:
+            if path.stat().st_mtime < oldest_allowed:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.debug(f"{removed} archive(s) d'export supprimée(s) dans {export_dir}")
+    return removed
+
+
+async def export_devis_zip(dm, devis_list: list, zip_path: Path,
+                           on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """Rend les devis en parallèle et les regroupe dans une archive ZIP
+
+    Args:
+        dm: Gestionnaire de données
+        devis_list: Devis à exporter (voir select_devis)
+        zip_path: Chemin de l'archive à créer
+        on_progress: Rappel (terminés, total) appelé après chaque devis
+
+    Returns:
+        Statistiques {'total', 'rendered', 'cached', 'failed'}
+    """
+    service = get_pdf_render_service()
+    semaphore = asyncio.Semaphore(PDF_EXPORT_CONCURRENCY)
+    total = len(devis_list)
+    stats = {'total': total, 'rendered': 0, 'cached': 0, 'failed': 0}
+    entries: List[tuple] = []
+    errors: List[str] = []
+    done = 0
+
+    async def render_one(devis):
+        nonlocal done
+        context = PdfRenderContext.from_data_manager(dm, devis)
+        cached = service.is_cached(devis, context)
+        try:
+            async with semaphore:
+                pdf_path = await service.render(devis, context)
+        except PDFGenerationError as e:
+            stats['failed'] += 1
+            errors.append(f"{devis.numero}: {e.message}")
+        else:
+            stats['cached' if cached else 'rendered'] += 1
+            arcname = f"{client_folder_name(context.get_client_by_id(devis.client_id))}/{devis.numero}.pdf"
+            entries.append((pdf_path, arcname))
+        done += 1
+        if on_progress:
+            on_progress(done, total)
+
+    prune_exports(zip_path.parent)
+    await asyncio.gather(*(render_one(devis) for devis in devis_list))
+
+    def write_zip():
+        zip_path.parent.mkdir(parents=True, exist_ok=True)
+        # Les PDF sont déjà compressés : stockage sans recompression
+        with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for pdf_path, arcname in sorted(entries, key=lambda e: e[1]):
+                archive.write(pdf_path, arcname)
+            if errors:
+                archive.writestr('ERREURS.txt', "Devis non exportés :\n" + "\n".join(sorted(errors)) + "\n")
+
+    await asyncio.to_thread(write_zip)
+    logger.info(f"Export ZIP {zip_path.name}: {stats['rendered']} rendus, {stats['cached']} depuis le cache, "
+                f"{stats['failed']} en échec")
+    return stats
@@ -0,0 +1,303 @@
+"""
+Service de rendu PDF hors de la boucle d'événements
+
+ReportLab est exécuté dans un pool de processus : un devis volumineux ne
+bloque plus les autres sessions NiceGUI. Les PDF produits sont conservés
+dans un cache disque indexé par une empreinte du devis, de l'organisation
+et du modèle, de sorte qu'un devis inchangé n'est jamais re-rendu.
+
+Le cache est rangé dans le dossier de données du tenant (data/pdf_cache en
+mono-tenant) et borné en taille et en âge : après chaque rendu, les PDF les
+moins récemment servis sont supprimés (PDF_CACHE_MAX_BYTES,
+PDF_CACHE_MAX_AGE_DAYS).
+"""
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from erp.core.constants import (
+    PDF_CACHE_MAX_AGE_DAYS, PDF_CACHE_MAX_BYTES, PDF_RENDER_MAX_QUEUE, PDF_RENDER_WORKERS,
+)
+from erp.utils.exceptions import PDFGenerationError
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PdfRenderContext:
+    """Instantané sérialisable des données nécessaires au rendu d'un devis
+
+    Remplace le gestionnaire de données (lié à la base) dans les processus de
+    travail : il expose le sous-ensemble d'API utilisé par pdf_service.
+    """
+
+    def __init__(self, data_dir: Path, organisation=None, clients: Optional[Dict[int, Any]] = None,
+                 ouvrages: Optional[Dict[int, Any]] = None, company_info: Optional[dict] = None):
+        self.data_dir = Path(data_dir)
+        self.organisation = organisation
+        self.clients = clients or {}
+        self.ouvrages = ouvrages or {}
+        self.company_info = company_info
+
+    @classmethod
+    def from_data_manager(cls, dm, devis) -> 'PdfRenderContext':
+        """Capture l'organisation, le client et les ouvrages référencés par le devis"""
+        client = dm.get_client_by_id(devis.client_id)
+        ouvrages = {}
+        for ligne in devis.lignes or []:
+            if getattr(ligne, 'type', 'ouvrage') == 'ouvrage' and ligne.ouvrage_id not in ouvrages:
+                ouvrage = dm.get_ouvrage_by_id(ligne.ouvrage_id)
+                if ouvrage:
+                    ouvrages[ligne.ouvrage_id] = ouvrage
+        return cls(
+            data_dir=dm.data_dir,
+            organisation=dm.organisation,
+            clients={client.id: client} if client else {},
+            ouvrages=ouvrages,
+        )
+
+    def get_client_by_id(self, client_id):
+        return self.clients.get(client_id)
+
+    def get_ouvrage_by_id(self, ouvrage_id):
+        return self.ouvrages.get(ouvrage_id)
+
+    def get_company_info(self):
+        return self.company_info or {}
+
+
+def _to_plain(value):
+    """Convertit un objet (dataclass, liste, dict) en structure JSON stable"""
+    if is_dataclass(value):
+        return asdict(value)
+    return value
+
+
+def _file_signature(path: Path) -> Optional[list]:
+    """Taille et date de modification d'un fichier (None s'il n'existe pas)"""
+    try:
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        return None
+
+
+def compute_render_key(devis, context: PdfRenderContext, template: Optional[dict] = None) -> str:
+    """Empreinte du contenu rendu : devis, organisation, client, ouvrages, logo et modèle"""
+    from erp.services.pdf_template_engine import resolve_logo_path
+
+    logos = {'data_logo': _file_signature(context.data_dir / 'logo.png')}
+    for block in (template or {}).get('blocks', []):
+        if block.get('logoPath'):
+            logos[block['logoPath']] = _file_signature(resolve_logo_path(block['logoPath']))
+
+    payload = {
+        'devis': _to_plain(devis),
+        'organisation': _to_plain(context.organisation),
+        'company_info': context.company_info,
+        'clients': {str(k): _to_plain(v) for k, v in sorted(context.clients.items())},
+        'ouvrages': {str(k): getattr(v, 'designation', '') for k, v in sorted(context.ouvrages.items())},
+        'template': (template or {}).get('blocks'),
+        'logos': logos,
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _render_job(devis, context: PdfRenderContext, template: Optional[dict], output_path: str) -> str:
+    """Rendu effectif (exécuté dans un processus de travail)"""
+    from erp.services.pdf_service import generate_pdf, render_template_pdf
+
+    tmp_path = Path(f"{output_path}.{os.getpid()}.tmp")
+    if template is None:
+        generate_pdf(devis, context, tmp_path, company_info=context.company_info)
+    else:
+        render_template_pdf(template, devis, context, tmp_path)
+    # Écriture atomique : un fichier présent dans le cache est toujours complet
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def prune_cache(cache_dir: Path, max_bytes: int = PDF_CACHE_MAX_BYTES,
+                max_age_days: float = PDF_CACHE_MAX_AGE_DAYS, keep: Optional[Path] = None) -> int:
+    """Supprime les PDF trop anciens puis les moins récemment servis au-delà de max_bytes
+
+    La date de modification d'un PDF est mise à jour à chaque service depuis
+    le cache : elle sert de date de dernière utilisation. Le fichier keep
+    (PDF qui vient d'être rendu) n'est jamais supprimé.
+
+    Returns:
+        Nombre de fichiers supprimés
+    """
+    entries = []
+    for path in Path(cache_dir).glob('*.pdf'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    removed = 0
+    oldest_allowed = time.time() - max_age_days * 86400
+    total = sum(size for _, size, _ in entries)
+    # Du moins récemment servi au plus récent
+    for mtime, size, path in sorted(entries, key=lambda e: e[0]):
+        if mtime >= oldest_allowed and total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    if removed:
+        logger.debug(f"Cache PDF {cache_dir}: {removed} fichier(s) supprimé(s)")
+    return removed
+
+
+class PdfRenderService:
+    """Pool de rendu PDF avec file bornée, résultats attendables et cache disque
+
+    Args:
+        cache_dir: Dossier du cache ; par défaut pdf_cache dans le dossier de
+            données du contexte de rendu (un cache par tenant)
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_workers: Optional[int] = PDF_RENDER_WORKERS,
+                 max_queue: int = PDF_RENDER_MAX_QUEUE, max_cache_bytes: int = PDF_CACHE_MAX_BYTES,
+                 max_cache_age_days: float = PDF_CACHE_MAX_AGE_DAYS):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_cache_bytes = max_cache_bytes
+        self.max_cache_age_days = max_cache_age_days
+        self._executor: Optional[Executor] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def _get_executor(self) -> Executor:
+        """Crée le pool de processus à la première utilisation"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def cache_dir_for(self, context: PdfRenderContext) -> Path:
+        """Dossier du cache pour un contexte de rendu (celui du tenant du devis)"""
+        if self.cache_dir is not None:
+            return self.cache_dir
+        return context.data_dir / 'pdf_cache'
+
+    def cache_path(self, key: str, context: PdfRenderContext) -> Path:
+        """Chemin du PDF en cache pour une empreinte donnée"""
+        return self.cache_dir_for(context) / f"{key}.pdf"
+
+    def is_cached(self, devis, context: PdfRenderContext, template: Optional[dict] = None) -> bool:
+        """Indique si un PDF à jour existe déjà pour ce devis"""
+        return self.cache_path(compute_render_key(devis, context, template), context).exists()
+
+    @property
+    def queue_size(self) -> int:
+        """Nombre de rendus en cours ou en attente"""
+        return len(self._pending)
+
+    async def render(self, devis, context: PdfRenderContext, dest_path: Optional[Path] = None,
+                     template: Optional[dict] = None) -> Path:
+        """Rend un devis en PDF sans bloquer la boucle d'événements
+
+        Args:
+            devis: Devis à rendre
+            context: Instantané des données (voir PdfRenderContext.from_data_manager)
+            dest_path: Copie de destination du PDF (facultatif)
+            template: Modèle de blocs de l'éditeur, ou None pour la mise en page standard
+
+        Returns:
+            Chemin du PDF (dest_path si fourni, sinon le fichier du cache)
+
+        Raises:
+            PDFGenerationError: si la file de rendu est saturée ou si le rendu échoue
+        """
+        key = compute_render_key(devis, context, template)
+        cached = self.cache_path(key, context)
+
+        if cached.exists():
+            logger.debug(f"PDF {devis.numero} servi depuis le cache")
+            try:
+                os.utime(cached)  # Dernière utilisation, pour l'élagage du cache
+            except OSError:
+                pass
+        else:
+            pending = self._pending.get(key)
+            if pending is None:
+                if len(self._pending) >= self.max_queue:
+                    raise PDFGenerationError(
+                        "File de rendu PDF saturée, veuillez réessayer dans quelques instants",
+                        details={'queue_size': len(self._pending)}
+                    )
+                cached.parent.mkdir(parents=True, exist_ok=True)
+                loop = asyncio.get_running_loop()
+                pending = loop.run_in_executor(
+                    self._get_executor(), _render_job, devis, context, template, str(cached)
+                )
+                self._pending[key] = pending
+                pending.add_done_callback(lambda _f, k=key: self._pending.pop(k, None))
+            try:
+                await asyncio.shield(pending)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    # Un processus de travail est mort : recréer le pool au prochain rendu
+                    self._executor = None
+                logger.error(f"Erreur de rendu PDF pour {devis.numero}: {e}", exc_info=True)
+                raise PDFGenerationError(f"Erreur lors de la génération du PDF : {e}",
+                                         details={'numero': devis.numero}) from e
+            logger.info(f"PDF {devis.numero} généré")
+            self.prune(cached.parent, keep=cached)
+
+        if dest_path is None:
+            return cached
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(cached, dest_path)
+        return dest_path
+
+    def prune(self, cache_dir: Path, keep: Optional[Path] = None) -> int:
+        """Applique les limites de taille et d'âge à un dossier de cache"""
+        try:
+            return prune_cache(cache_dir, self.max_cache_bytes, self.max_cache_age_days, keep)
+        except OSError as e:
+            logger.warning(f"Élagage du cache PDF {cache_dir} impossible: {e}")
+            return 0
+
+    def clear_cache(self, context: Optional[PdfRenderContext] = None):
+        """Supprime tous les PDF du cache disque (celui du contexte si fourni)"""
+        cache_dir = self.cache_dir_for(context) if context is not None else self.cache_dir
+        if cache_dir is not None and cache_dir.exists():
+            for path in cache_dir.glob('*.pdf'):
+                path.unlink(missing_ok=True)
+
+    def shutdown(self):
+        """Arrête le pool de processus"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Instance singleton du service
+_pdf_render_service = None
+
+
+def get_pdf_render_service() -> PdfRenderService:
+    """Retourne l'instance singleton du service de rendu PDF"""
+    global _pdf_render_service
+    if _pdf_render_service is None:
+        _pdf_render_service = PdfRenderService()
+    return _pdf_render_service
@@ -2,8 +2,9 @@ from pathlib import Path
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.units import mm
-from reportlab.platypus import BaseDocTemplate, Paragraph, Table, TableStyle, Image, Spacer, PageBreak, Frame, PageTemplate, FrameBreak, KeepTogether
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import BaseDocTemplate, Paragraph, Table, Image, Spacer, PageBreak, Frame, PageTemplate, FrameBreak, KeepTogether
+
+from erp.services.pdf_assets import get_pdf_assets
 
 
 def _on_page(canvas, doc):
@@ -18,9 +19,10 @@ def _on_page(canvas, doc):
 
 
 def generate_pdf(devis, data_manager, pdf_path: Path, company_info: dict | None = None):
-    styles = getSampleStyleSheet()
-    normal = styles['Normal']
-    title_style = ParagraphStyle('title', parent=styles['Heading1'], alignment=2, fontSize=18)
+    # Une seule lecture de l'organisation (copie du cache des réglages, voir settings_service)
+    org = getattr(data_manager, 'organisation', None)
+    assets = get_pdf_assets(data_manager.data_dir, org)
+    normal = assets.normal
 
     # Use a BaseDocTemplate with two frames: main content and a fixed bottom frame for totals
     page_width, page_height = A4
@@ -63,8 +65,7 @@ def generate_pdf(devis, data_manager, pdf_path: Path, company_info: dict | None
     comp = company_info or {}
     # if no explicit company_info passed, try to get it from the data manager
     if not comp:
-        if hasattr(data_manager, 'organisation') and data_manager.organisation:
-            org = data_manager.organisation
+        if org:
             address_line = getattr(org, 'adresse', '') or '35 route de Valenciennes'
             comp = {
                 'name': getattr(org, 'nom', '') or 'VICTOIRE SA',
@@ -92,32 +93,23 @@ def generate_pdf(devis, data_manager, pdf_path: Path, company_info: dict | None
     company_lines.append(Paragraph(f"Tel: {company_phone}", normal))
     
     # Create header with company info on left and DEVIS on right
-    devis_title = ParagraphStyle('devis_title', parent=styles['Heading1'], alignment=2, fontSize=16, textColor=colors.HexColor('#1f2937'), spaceAfter=0)
-    devis_text = Paragraph('<b>DEVIS</b>', devis_title)
+    devis_text = Paragraph('<b>DEVIS</b>', assets.devis_title)
     
     # Add devis number below DEVIS title
-    devis_numero_style = ParagraphStyle('devis_numero', parent=styles['Normal'], alignment=2, fontSize=11, textColor=colors.HexColor('#1f2937'), spaceAfter=0)
-    devis_numero = Paragraph(f"N° {getattr(devis, 'numero', '')}", devis_numero_style)
+    devis_numero = Paragraph(f"N° {getattr(devis, 'numero', '')}", assets.devis_numero)
     
     # Stack DEVIS and numero vertically
     devis_info = [[devis_text], [devis_numero]]
     devis_stack = Table(devis_info, colWidths=[None])
-    devis_stack.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('TOPPADDING', (0, 0), (-1, -1), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-    ]))
+    devis_stack.setStyle(assets.devis_stack_style)
     
     # Create header table with only DEVIS title + numero
     if logo is not None:
         header_table = Table([[logo, devis_stack]], colWidths=[60*mm, None])
-        header_table.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'TOP'), ('ALIGN', (1, 0), (1, 0), 'RIGHT')]))
+        header_table.setStyle(assets.header_logo_style)
     else:
         header_table = Table([[devis_stack]], colWidths=[None])
-        header_table.setStyle(TableStyle([('ALIGN', (0, 0), (0, 0), 'RIGHT')]))
+        header_table.setStyle(assets.header_style)
     
     elems.append(header_table)
     
@@ -153,13 +145,7 @@ def generate_pdf(devis, data_manager, pdf_path: Path, company_info: dict | None
     
     # Create address table with org+chantier on left, facturation on right
     addr_table = Table([[org_and_chantier, right]], colWidths=[110*mm, 80*mm])
-    addr_table.setStyle(TableStyle([
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ('LEFTPADDING', (0,0), (-1,-1), 0),
-        ('RIGHTPADDING', (0,0), (-1,-1), 6),
-        ('TOPPADDING', (0,0), (-1,-1), 0),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 0),
-    ]))
+    addr_table.setStyle(assets.block_style)
 
     # Add address table directly
     elems.append(addr_table)
@@ -167,19 +153,11 @@ def generate_pdf(devis, data_manager, pdf_path: Path, company_info: dict | None
 
     # Description - in a table format like addresses (left aligned like VICTOIRE SA block)
     desc = getattr(devis, 'description', '') or getattr(devis, 'objet', '') if hasattr(devis, 'objet') else ''
-    desc_style = ParagraphStyle('desc_title', parent=styles['Normal'], fontSize=11, textColor=colors.HexColor('#1f2937'), spaceAfter=3)
-    
     # Create description content in a two-column table to match address table structure
     desc_para = Paragraph('<b>Descriptif des travaux</b><br/>' + (desc or '&nbsp;'), normal)
     
     desc_table = Table([[desc_para, '']], colWidths=[110*mm, 80*mm])
-    desc_table.setStyle(TableStyle([
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ('LEFTPADDING', (0,0), (-1,-1), 0),
-        ('RIGHTPADDING', (0,0), (-1,-1), 6),
-        ('TOPPADDING', (0,0), (-1,-1), 0),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 0),
-    ]))
+    desc_table.setStyle(assets.block_style)
     
     elems.append(desc_table)
     elems.append(Spacer(1, 8*mm))
@@ -249,21 +227,7 @@ def generate_pdf(devis, data_manager, pdf_path: Path, company_info: dict | None
     )
     
     # Créer le style de table
-    tbl_style = TableStyle([
-        ('GRID', (0,0), (-1,-1), 0.4, colors.grey),
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#f0f0f0')),
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        # center header text
-        ('ALIGN', (0,0), (-1,0), 'CENTER'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('ALIGN', (2,1), (2,-1), 'RIGHT'),
-        ('ALIGN', (4,1), (5,-1), 'RIGHT'),
-        ('ALIGN', (6,1), (6,-1), 'CENTER'),
-        ('LEFTPADDING', (0,0), (-1,-1), 2),
-        ('RIGHTPADDING', (0,0), (-1,-1), 2),
-        ('TOPPADDING', (0,0), (-1,-1), 2),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-    ])
+    tbl_style = assets.table_style(assets.lines_style)
     
     # Ajouter des styles pour les chapitres et textes
     row_idx = 1
@@ -294,13 +258,6 @@ def generate_pdf(devis, data_manager, pdf_path: Path, company_info: dict | None
     total_tva = getattr(devis, 'total_tva', total_ht * (tva_rate/100.0))
     total_ttc = getattr(devis, 'total_ttc', total_ht + total_tva)
 
-    totals_data = [['Total HT', f"{total_ht:.2f} €"], [f"TVA ({tva_rate:.0f}%)", f"{total_tva:.2f} €"], ['Total TTC', f"{total_ttc:.2f} €"]]
-    totals_table = Table(totals_data, colWidths=[120*mm, 40*mm])
-    totals_table.setStyle(TableStyle([
-        ('ALIGN', (1,0), (-1,-1), 'RIGHT'),
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
-        ('LINEABOVE', (0,0), (-1,0), 0.6, colors.black),
-    ]))
     # Insert a FrameBreak so the totals render in the bottom frame
     # Place the following content directly after the table (not a page footer)
     # It will appear on the page after the table if there's not enough room.
@@ -326,11 +283,7 @@ def generate_pdf(devis, data_manager, pdf_path: Path, company_info: dict | None
     # Right block: totals summary and payment lines
     right_rows = [[ 'Total HT', f"{total_ht:.2f} €" ], [ f"TVA ({tva_rate:.0f}%)", f"{total_tva:.2f} €" ], [ 'Total TTC', f"{total_ttc:.2f} €" ]]
     right_table = Table(right_rows, colWidths=[50*mm, 30*mm])
-    right_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (0,-1), 'RIGHT'),
-        ('ALIGN', (1,0), (1,-1), 'RIGHT'),
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
-    ]))
+    right_table.setStyle(assets.totals_style)
 
     right_block = [right_table, Spacer(1, 12*mm)]
 
@@ -341,27 +294,17 @@ def generate_pdf(devis, data_manager, pdf_path: Path, company_info: dict | None
     left_col_width = content_width - desired_right + 70*mm  # Augmenter la largeur de la colonne gauche
     right_col_width = desired_right - 70*mm
     bottom_table = Table([[left_block, right_block]], colWidths=[left_col_width, right_col_width], splitByRow=0)
-    bottom_table.setStyle(TableStyle([
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ('ALIGN', (1,0), (1,0), 'RIGHT'),
-        ('LEFTPADDING', (0,0), (-1,-1), 4),
-        ('RIGHTPADDING', (0,0), (-1,-1), 4),
-    ]))
+    bottom_table.setStyle(assets.footer_style)
 
     # Ensure footer content is kept together and not split across pages
     elems.append(KeepTogether([bottom_table]))
     
     # Add signature lines on the same line at the bottom
     sig_left = Paragraph('Pour l\'entreprise (signature et cachet)', normal)
-    sig_right = Paragraph('Pour le client (signature)', ParagraphStyle('right_align', parent=normal, alignment=2))
+    sig_right = Paragraph('Pour le client (signature)', assets.right_align)
     
     sig_table = Table([[sig_left, sig_right]], colWidths=[left_col_width, right_col_width])
-    sig_table.setStyle(TableStyle([
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ('ALIGN', (1,0), (1,0), 'RIGHT'),
-        ('LEFTPADDING', (0,0), (-1,-1), 4),
-        ('RIGHTPADDING', (0,0), (-1,-1), 4),
-    ]))
+    sig_table.setStyle(assets.footer_style)
     
     elems.append(sig_table)
 
@@ -369,3 +312,24 @@ def generate_pdf(devis, data_manager, pdf_path: Path, company_info: dict | None
     doc.build(elems)
 
     return pdf_path
+
+
+def render_template_pdf(template_data: dict, devis, data_manager, pdf_path: Path,
+                        show_placeholders: bool = False):
+    """Génère un PDF à partir d'un modèle de blocs conçu dans l'éditeur de devis
+
+    Le modèle est compilé une fois en plan de rendu (voir pdf_template_engine),
+    seul le remplissage des champs est refait pour chaque devis.
+
+    Args:
+        template_data: Modèle sauvegardé ({'blocks': [...]})
+        devis: Devis à imprimer
+        data_manager: Source de données (organisation, clients, ouvrages)
+        pdf_path: Chemin du fichier PDF à écrire
+        show_placeholders: Dessiner un cadre à la place des logos absents (aperçu de l'éditeur)
+    """
+    from erp.services.pdf_template_engine import bind_template_data, execute_plan, get_compiled_template
+
+    plan = get_compiled_template(template_data)
+    data = bind_template_data(plan.fields, devis, data_manager)
+    return execute_plan(plan, data, pdf_path, show_placeholders=show_placeholders)
@@ -0,0 +1,285 @@
+"""
+Moteur de rendu des modèles de devis conçus dans l'éditeur
+
+Un modèle (liste de blocs positionnés en pixels) est compilé une seule fois
+en plan de rendu : positions converties en points, polices résolues, textes
+fixes précalculés et champs de données identifiés. Le plan est ensuite
+exécuté sur n'importe quel devis. Les plans sont mis en cache par contenu de
+modèle : modifier un modèle produit automatiquement un nouveau plan.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Conversion des coordonnées de l'éditeur (px à 96 dpi) vers les points PDF
+PX_TO_PT = mm / 3.78
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# Nombre de plans compilés conservés
+MAX_COMPILED_TEMPLATES = 32
+
+
+class Field(NamedTuple):
+    """Référence à une donnée du devis, résolue au moment du rendu"""
+    name: str
+
+
+class TemplatePlan(NamedTuple):
+    """Plan de rendu compilé : opérations de dessin et champs requis"""
+    ops: Tuple[tuple, ...]
+    fields: frozenset
+
+
+def resolve_logo_path(logo_path: str) -> Path:
+    """Résout le chemin d'un logo de bloc (/static/xxx.png) depuis la racine du projet"""
+    return PROJECT_ROOT / logo_path.lstrip('/')
+
+
+def _compile_block(block: dict, page_height: float) -> List[tuple]:
+    """Traduit un bloc de l'éditeur en opérations de dessin"""
+    block_type = block.get('type', '')
+    x = block.get('x', 0) * PX_TO_PT
+    y = page_height - block.get('y', 0) * PX_TO_PT
+    w = block.get('width', 200) * PX_TO_PT
+    h = block.get('height', 150) * PX_TO_PT
+
+    if block_type == 'adresse_entreprise':
+        return [
+            ('font', 'Helvetica-Bold', 11),
+            ('text', x, y, Field('org_nom')),
+            ('font', 'Helvetica', 9),
+            ('text', x, y - 12, Field('org_adresse')),
+            ('text', x, y - 22, Field('org_cp_ville')),
+            ('text', x, y - 32, Field('org_telephone')),
+            ('text', x, y - 42, Field('org_email')),
+        ]
+    if block_type == 'titre':
+        return [('font', 'Helvetica-Bold', 28), ('centred', x + w / 2, y, 'DEVIS')]
+    if block_type == 'client':
+        return [('font', 'Helvetica', 10), ('lines', x, y, Field('client_lines'), 12)]
+    if block_type == 'infos_devis':
+        return [
+            ('font', 'Helvetica-Bold', 9), ('text', x, y, 'Ref:'),
+            ('font', 'Helvetica', 9), ('text', x + 40, y, Field('numero')),
+            ('font', 'Helvetica-Bold', 9), ('text', x, y - 12, 'Date:'),
+            ('font', 'Helvetica', 9), ('text', x + 40, y - 12, Field('date')),
+        ]
+    if block_type == 'objet':
+        return [('font', 'Helvetica-Bold', 12), ('text', x, y, Field('objet'))]
+    if block_type == 'tableau_ouvrages':
+        return [
+            ('font', 'Helvetica-Bold', 10),
+            ('text', x, y, 'DÉTAIL DES OUVRAGES'),
+            ('table', x, y - 20, Field('ouvrages_rows'), 15, 60, 20),
+        ]
+    if block_type == 'totaux':
+        return [
+            ('font', 'Helvetica-Bold', 10),
+            ('right', x + w, y, Field('total_ht')),
+            ('right', x + w, y - 15, Field('total_tva')),
+            ('font', 'Helvetica-Bold', 12),
+            ('right', x + w, y - 33, Field('total_ttc')),
+        ]
+    if block_type == 'conditions':
+        return [
+            ('font', 'Helvetica-Bold', 9),
+            ('text', x, y, 'CONDITIONS GÉNÉRALES'),
+            ('font', 'Helvetica', 8),
+            ('lines', x, y - 15, Field('conditions_lines'), 10),
+        ]
+    if block_type == 'signature':
+        return [
+            ('font', 'Helvetica-Bold', 9),
+            ('text', x, y, 'Signature du client'),
+            ('text', x + w / 2, y, 'Signature entreprise'),
+            ('font', 'Helvetica', 8),
+            ('text', x, y - 30, 'Date: ___________'),
+            ('text', x + w / 2, y - 30, 'Date: ___________'),
+        ]
+    if block_type == 'logo':
+        logo = block.get('logoPath', '')
+        return [('image', x, y - h, w, h, str(resolve_logo_path(logo)) if logo else None)]
+    # Blocs sans rendu PDF (texte libre, types inconnus)
+    return []
+
+
+def compile_template(template_data: dict) -> TemplatePlan:
+    """Compile un modèle de l'éditeur en plan de rendu"""
+    _, page_height = A4
+    ops: List[tuple] = []
+    for block in template_data.get('blocks', []):
+        block_ops = _compile_block(block, page_height)
+        if block_ops:
+            ops.append(('save',))
+            ops.extend(block_ops)
+            ops.append(('restore',))
+    fields = frozenset(arg.name for op in ops for arg in op if isinstance(arg, Field))
+    return TemplatePlan(tuple(ops), fields)
+
+
+_plans: "OrderedDict[str, TemplatePlan]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def template_key(template_data: dict) -> str:
+    """Empreinte du contenu d'un modèle (ses blocs)"""
+    raw = json.dumps(template_data.get('blocks', []), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def get_compiled_template(template_data: dict) -> TemplatePlan:
+    """Retourne le plan compilé du modèle (compilé au premier usage)"""
+    key = template_key(template_data)
+    with _lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+            return plan
+    plan = compile_template(template_data)
+    with _lock:
+        _plans[key] = plan
+        while len(_plans) > MAX_COMPILED_TEMPLATES:
+            _plans.popitem(last=False)
+    logger.debug(f"Modèle compilé ({len(plan.ops)} opérations)")
+    return plan
+
+
+def invalidate_compiled_templates():
+    """Vide le cache des plans compilés"""
+    with _lock:
+        _plans.clear()
+
+
+def bind_template_data(fields: frozenset, devis, data_manager) -> Dict[str, object]:
+    """Calcule les valeurs des champs requis par un plan pour un devis donné"""
+    data: Dict[str, object] = {}
+    if fields & {'org_nom', 'org_adresse', 'org_cp_ville', 'org_telephone', 'org_email'}:
+        org = data_manager.organisation
+        data['org_nom'] = org.nom or "MON ENTREPRISE BTP"
+        data['org_adresse'] = org.adresse or ""
+        data['org_cp_ville'] = f"{org.cp or ''} {org.ville or ''}"
+        data['org_telephone'] = f"Tél: {org.telephone or ''}"
+        data['org_email'] = f"Email: {org.email or ''}"
+    if 'client_lines' in fields:
+        client = data_manager.get_client_by_id(devis.client_id)
+        lines = []
+        if client:
+            lines.append(f"{client.prenom or ''} {client.nom or ''}")
+            if client.entreprise:
+                lines.append(client.entreprise)
+            lines.append(client.adresse or "")
+            lines.append(f"{client.cp or ''} {client.ville or ''}")
+        data['client_lines'] = lines
+    data['numero'] = devis.numero
+    data['date'] = devis.date
+    data['objet'] = f"Objet: {devis.objet if devis.objet else 'Description des travaux'}"
+    if 'ouvrages_rows' in fields:
+        rows = [['Réf', 'Désignation', 'Qté', 'P.U.', 'Total']]
+        for ligne in devis.lignes:
+            if ligne.type == 'ouvrage':
+                ouvrage = data_manager.get_ouvrage_by_id(ligne.ouvrage_id)
+                rows.append([
+                    str(ligne.ouvrage_id),
+                    ouvrage.designation if ouvrage else '',
+                    str(ligne.quantite),
+                    f"{ligne.prix_unitaire:.2f}€",
+                    f"{ligne.prix_ht:.2f}€"
+                ])
+        data['ouvrages_rows'] = rows
+    if fields & {'total_ht', 'total_tva', 'total_ttc'}:
+        totals = devis.calculate_totals()
+        data['total_ht'] = f"Total HT: {totals['ht']:.2f}€"
+        data['total_tva'] = f"TVA ({devis.tva}%): {totals['tva']:.2f}€"
+        data['total_ttc'] = f"Total TTC: {totals['ttc']:.2f}€"
+    if 'conditions_lines' in fields:
+        lines = devis.conditions.split('\n') if devis.conditions else []
+        data['conditions_lines'] = [line[:80] for line in lines[:5]]
+    return data
+
+
+def _draw_image(c, x, y, w, h, path: Optional[str], show_placeholders: bool):
+    """Dessine un logo, ou un cadre indicatif en aperçu si le logo est absent"""
+    if path is None:
+        if show_placeholders:
+            c.setStrokeColor(colors.grey)
+            c.setFillColor(colors.lightgrey)
+            c.rect(x, y, w, h, fill=1)
+            c.setFillColor(colors.black)
+            c.setFont("Helvetica", 8)
+            c.drawString(x + 5, y + h / 2, "Logo non configuré")
+        return
+    if not Path(path).exists():
+        if show_placeholders:
+            c.setStrokeColor(colors.orange)
+            c.rect(x, y, w, h)
+            c.setFont("Helvetica", 6)
+            c.drawString(x + 2, y + h / 2 + 5, "Introuvable:")
+            c.drawString(x + 2, y + h / 2 - 5, path[:50])
+        return
+    try:
+        c.drawImage(path, x, y, width=w, height=h, preserveAspectRatio=True, mask='auto')
+    except Exception as e:
+        if show_placeholders:
+            c.setStrokeColor(colors.red)
+            c.rect(x, y, w, h)
+            c.setFont("Helvetica", 8)
+            c.drawString(x + 5, y + h / 2, f"Erreur: {str(e)[:40]}")
+
+
+def execute_plan(plan: TemplatePlan, data: Dict[str, object], pdf_path: Path,
+                 show_placeholders: bool = False):
+    """Exécute un plan compilé et écrit le PDF
+
+    Args:
+        plan: Plan issu de get_compiled_template
+        data: Valeurs issues de bind_template_data
+        pdf_path: Fichier PDF à écrire
+        show_placeholders: Dessiner des cadres indicatifs pour les logos absents (aperçu)
+    """
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(str(pdf_path), pagesize=A4)
+
+    def value(arg):
+        return data[arg.name] if isinstance(arg, Field) else arg
+
+    for op in plan.ops:
+        code = op[0]
+        if code == 'text':
+            c.drawString(op[1], op[2], value(op[3]))
+        elif code == 'font':
+            c.setFont(op[1], op[2])
+        elif code == 'save':
+            c.saveState()
+        elif code == 'restore':
+            c.restoreState()
+        elif code == 'right':
+            c.drawRightString(op[1], op[2], value(op[3]))
+        elif code == 'centred':
+            c.drawCentredString(op[1], op[2], value(op[3]))
+        elif code == 'lines':
+            _, x, y, field, leading = op
+            for i, line in enumerate(value(field)):
+                c.drawString(x, y - i * leading, line)
+        elif code == 'table':
+            _, x, y, field, row_height, col_step, max_chars = op
+            for i, row in enumerate(value(field)):
+                c.setFont("Helvetica-Bold" if i == 0 else "Helvetica", 8)
+                for j, col in enumerate(row):
+                    c.drawString(x + j * col_step, y - i * row_height, str(col)[:max_chars])
+        elif code == 'image':
+            _draw_image(c, op[1], op[2], op[3], op[4], op[5], show_placeholders)
+
+    c.save()
+    return pdf_path
@@ -0,0 +1,123 @@
+"""
+Service des chiffres de chantier (prévisionnel, réel, écarts)
+
+Le tableau des chantiers n'affiche sur chaque card que trois totaux ; le
+détail par article (agrégation de toutes les lignes des devis rattachés)
+n'est calculé qu'à l'ouverture d'une card. Les deux sont mis en cache par
+tenant et par chantier, et invalidés par le gestionnaire de données dès
+qu'un chantier, un devis rattaché ou un article est modifié.
+"""
+import threading
+from typing import Dict, Hashable, Set, Tuple
+
+from erp.core.constants import PROJET_CACHE_MAX_ENTRIES, PROJET_CACHE_TTL
+from erp.core.tenant import current_tenant
+from erp.utils.cache import MISSING, TTLCache
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def compute_projet_summary(projet, dm) -> dict:
+    """Totaux de la card d'un chantier, sans l'agrégation par article
+
+    Returns:
+        {'prev_total_ht', 'reel_total_ht', 'ecart', 'ecart_pct'} (même calcul que Projet.get_ecarts)
+    """
+    prev_total = 0.0
+    for numero in projet.devis_numeros:
+        devis = dm.get_devis_by_numero(numero)
+        if devis:
+            prev_total += devis.total_ht
+    reel_total = sum(depense.prix_total for depense in projet.depenses_reelles)
+    ecart = reel_total - prev_total
+    return {
+        'prev_total_ht': prev_total,
+        'reel_total_ht': reel_total,
+        'ecart': ecart,
+        'ecart_pct': (ecart / prev_total * 100) if prev_total > 0 else 0,
+    }
+
+
+def compute_projet_details(projet, dm) -> dict:
+    """Détail prévisionnel / réel / écarts d'un chantier
+
+    Returns:
+        {'prev': get_previsionnel, 'reel': get_reel, 'ecarts': get_ecarts}
+    """
+    prev = projet.get_previsionnel(dm)
+    reel = projet.get_reel()
+    return {'prev': prev, 'reel': reel, 'ecarts': projet.get_ecarts(dm, prev=prev, reel=reel)}
+
+
+class ProjetSummaryService:
+    """Cache des chiffres de chantier avec invalidation par chantier ou par devis"""
+
+    def __init__(self, ttl: float = PROJET_CACHE_TTL, max_entries: int = PROJET_CACHE_MAX_ENTRIES):
+        self._summaries = TTLCache(ttl=ttl, max_entries=max_entries)
+        self._details = TTLCache(ttl=ttl, max_entries=max_entries)
+        # (tenant, numéro de devis) -> clés des chantiers qui le rattachent
+        self._devis_index: Dict[Tuple, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(projet_id) -> Tuple:
+        return current_tenant(), projet_id
+
+    def _remember(self, key: Tuple, projet):
+        with self._lock:
+            for numero in projet.devis_numeros:
+                self._devis_index.setdefault((key[0], numero), set()).add(key)
+
+    def get_summary(self, projet, dm) -> dict:
+        """Totaux de la card (calculés au premier affichage puis servis depuis le cache)"""
+        key = self._key(projet.id)
+        summary = self._summaries.get(key)
+        if summary is MISSING:
+            summary = compute_projet_summary(projet, dm)
+            self._summaries.set(key, summary)
+            self._remember(key, projet)
+        return summary
+
+    def get_details(self, projet, dm) -> dict:
+        """Détail prévisionnel / réel / écarts (calculé à la première ouverture de la card)"""
+        key = self._key(projet.id)
+        details = self._details.get(key)
+        if details is MISSING:
+            details = compute_projet_details(projet, dm)
+            self._details.set(key, details)
+            self._remember(key, projet)
+        return details
+
+    def invalidate_projet(self, projet_id):
+        """Chantier modifié ou supprimé"""
+        key = self._key(projet_id)
+        self._summaries.invalidate(key)
+        self._details.invalidate(key)
+
+    def invalidate_devis(self, numero: str):
+        """Devis modifié ou supprimé : chantiers qui le rattachent"""
+        with self._lock:
+            keys = self._devis_index.pop((current_tenant(), numero), set())
+        for key in keys:
+            self._summaries.invalidate(key)
+            self._details.invalidate(key)
+
+    def clear(self):
+        """Vide le cache (ex. type d'un article modifié : répartition matériaux / main d'œuvre)"""
+        self._summaries.clear()
+        self._details.clear()
+        with self._lock:
+            self._devis_index.clear()
+        logger.debug("Cache des chiffres de chantier vidé")
+
+
+_projet_summary_service = None
+
+
+def get_projet_summary_service() -> ProjetSummaryService:
+    """Retourne l'instance singleton du service des chiffres de chantier"""
+    global _projet_summary_service
+    if _projet_summary_service is None:
+        _projet_summary_service = ProjetSummaryService()
+    return _projet_summary_service
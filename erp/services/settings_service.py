@@ -0,0 +1,204 @@
+"""
+Service des réglages quasi statiques (organisation)
+
+L'organisation (raison sociale, SIRET, coordonnées, logo) est lue à chaque
+rendu du panneau organisation et à chaque génération de PDF, mais ne change
+que rarement. Elle est conservée en mémoire par tenant ; l'enregistrement
+par le gestionnaire de données vide l'entrée et prévient les abonnés
+(styles et logo PDF compilés).
+
+Avec PostgreSQL, plusieurs processus peuvent servir l'application : le
+setter émet un NOTIFY sur SETTINGS_NOTIFY_CHANNEL dans la transaction
+d'écriture (délivré au commit), et un thread d'écoute (LISTEN) applique les
+changements faits par les autres processus. Après une coupure de la
+connexion d'écoute, tout le cache est vidé (notifications manquées).
+"""
+import copy
+import json
+import select
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from erp.core.constants import (
+    SETTINGS_LISTEN_RETRY_DELAY, SETTINGS_LISTEN_TIMEOUT, SETTINGS_NOTIFY_CHANNEL,
+)
+from erp.core.models import Organisation
+from erp.core.tenant import current_tenant
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Réglages mis en cache (type transmis aux abonnés et dans les notifications)
+ORGANISATION = 'organisation'
+
+
+class SettingsService:
+    """Cache des réglages par tenant, invalidé localement et par notification"""
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex  # Identifie les notifications émises par ce processus
+        self._organisations: Dict[Optional[str], Organisation] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[str, Optional[str]], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def get_organisation(self, load: Callable[[], Organisation]) -> Organisation:
+        """Organisation du tenant courant (copie), chargée par load() au premier accès"""
+        tenant = current_tenant()
+        org = self._organisations.get(tenant)
+        if org is None:
+            generation = self._generation
+            org = load()
+            with self._lock:
+                # Ne pas mettre en cache une valeur lue avant une invalidation concurrente
+                if generation == self._generation:
+                    self._organisations[tenant] = org
+        return copy.copy(org)
+
+    def subscribe(self, callback: Callable[[str, Optional[str]], None]):
+        """Appelle callback(type de réglage, tenant) à chaque changement, local ou distant"""
+        self._subscribers.append(callback)
+
+    def changed(self, kind: str = ORGANISATION, tenant: Optional[str] = None):
+        """Réglage modifié : vide l'entrée du tenant (courant par défaut) et prévient les abonnés"""
+        self._apply(kind, current_tenant() if tenant is None else tenant)
+
+    def clear(self):
+        """Vide tout le cache (connexion d'écoute rétablie, tests)"""
+        with self._lock:
+            self._generation += 1
+            self._organisations.clear()
+        self._notify_subscribers(ORGANISATION, None)
+        logger.debug("Cache des réglages vidé")
+
+    def _apply(self, kind: str, tenant: Optional[str]):
+        with self._lock:
+            self._generation += 1
+            if kind == ORGANISATION:
+                self._organisations.pop(tenant, None)
+        self._notify_subscribers(kind, tenant)
+
+    def _notify_subscribers(self, kind: str, tenant: Optional[str]):
+        if kind == ORGANISATION:
+            # Les styles et le logo PDF compilés dépendent de l'organisation
+            from erp.services.pdf_assets import invalidate_pdf_assets
+            invalidate_pdf_assets()
+        for callback in list(self._subscribers):
+            try:
+                callback(kind, tenant)
+            except Exception as e:
+                logger.error(f"Erreur d'un abonné aux réglages ({kind}): {e}", exc_info=True)
+
+    # ------------------------------------------------------------------
+    # Notification des autres processus (PostgreSQL LISTEN/NOTIFY)
+    # ------------------------------------------------------------------
+
+    def publish(self, session, kind: str = ORGANISATION):
+        """Émet la notification d'un changement dans la transaction de session (PostgreSQL uniquement)"""
+        if session.get_bind().dialect.name != 'postgresql':
+            return
+        from sqlalchemy import text
+        payload = json.dumps({'kind': kind, 'tenant': current_tenant(), 'origin': self.origin})
+        session.execute(text('SELECT pg_notify(:channel, :payload)'),
+                        {'channel': SETTINGS_NOTIFY_CHANNEL, 'payload': payload})
+
+    def handle_notification(self, payload: str):
+        """Applique une notification reçue (celles de ce processus sont déjà appliquées)"""
+        try:
+            message = json.loads(payload)
+        except (TypeError, ValueError):
+            logger.warning(f"Notification de réglages invalide: {payload!r}")
+            return
+        if message.get('origin') == self.origin:
+            return
+        kind = message.get('kind', ORGANISATION)
+        tenant = message.get('tenant')
+        self._apply(kind, tenant)
+        logger.debug(f"Réglage {kind} modifié par un autre processus (tenant {tenant})")
+
+    def start_listener(self, engine) -> bool:
+        """Démarre le thread d'écoute sur le moteur donné (sans effet hors PostgreSQL)"""
+        if engine is None or engine.dialect.name != 'postgresql':
+            return False
+        with self._lock:
+            if self._thread is not None:
+                return True
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._listen, args=(engine,),
+                                            name='settings-listener', daemon=True)
+            self._thread.start()
+        return True
+
+    def shutdown(self, timeout: float = 5.0):
+        """Arrête le thread d'écoute"""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+
+    def _listen(self, engine):
+        reconnecting = False
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = self._open_listen_connection(engine)
+                if reconnecting:
+                    self.clear()
+                logger.info(f"Écoute des changements de réglages sur {SETTINGS_NOTIFY_CHANNEL}")
+                while not self._stopping.is_set():
+                    for payload in self._wait_notifications(conn, SETTINGS_LISTEN_TIMEOUT):
+                        self.handle_notification(payload)
+            except Exception as e:
+                logger.warning(f"Écoute des réglages interrompue, nouvel essai dans "
+                               f"{SETTINGS_LISTEN_RETRY_DELAY:.0f}s: {e}")
+                reconnecting = True
+                self._stopping.wait(SETTINGS_LISTEN_RETRY_DELAY)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    @staticmethod
+    def _open_listen_connection(engine):
+        """Connexion dédiée hors du pool, en autocommit (LISTEN actif immédiatement)"""
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        conn = engine.dialect.connect(*cargs, **cparams)
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute(f'LISTEN {SETTINGS_NOTIFY_CHANNEL}')
+        cursor.close()
+        return conn
+
+    @staticmethod
+    def _wait_notifications(conn, timeout: float) -> List[str]:
+        """Attend au plus timeout secondes et retourne les charges utiles reçues"""
+        if hasattr(conn, 'poll'):
+            # psycopg2 : attente sur le socket puis lecture de conn.notifies
+            if select.select([conn], [], [], timeout)[0]:
+                conn.poll()
+            payloads = [notify.payload for notify in conn.notifies]
+            del conn.notifies[:]
+            return payloads
+        # psycopg 3
+        return [notify.payload for notify in conn.notifies(timeout=timeout, stop_after=1)]
+
+
+_settings_service = None
+
+
+def get_settings_service() -> SettingsService:
+    """Retourne l'instance singleton du service des réglages"""
+    global _settings_service
+    if _settings_service is None:
+        _settings_service = SettingsService()
+    return _settings_service
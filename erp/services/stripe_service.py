@@ -304,70 +304,54 @@ class StripeService:
             bool: True si succès
         """
         import psycopg2
-        from psycopg2.extras import RealDictCursor
+        from erp.services.subscription_service import get_subscription_service
         
-        conn = None
-        cursor = None
+        subscription_service = get_subscription_service()
         
         try:
-            # Connexion à la base de données des abonnements
-            from erp.services.subscription_service import get_subscription_service
-            subscription_service = get_subscription_service()
-            
-            conn = psycopg2.connect(
-                host=subscription_service.host,
-                port=subscription_service.port,
-                database=subscription_service.database,
-                user=subscription_service.user,
-                password=subscription_service.password,
-                connect_timeout=5
-            )
-            cursor = conn.cursor()
-            
-            # Mettre à jour l'abonnement
-            query = """
-                UPDATE abonnements
-                SET date_fin_essai = %s,
-                    statut = 'actif'
-                WHERE client_id = %s
-            """
+            # Connexion (depuis le pool) à la base de données des abonnements
+            with subscription_service.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    # Mettre à jour l'abonnement
+                    query = """
+                        UPDATE abonnements
+                        SET date_fin_essai = %s,
+                            statut = 'actif'
+                        WHERE client_id = %s
+                    """
+                    
+                    cursor.execute(query, (new_expiry, client_id))
+                    
+                    # Enregistrer le paiement dans une table de logs (si elle existe)
+                    try:
+                        log_query = """
+                            INSERT INTO paiements_logs (client_id, stripe_session_id, plan, montant, date_paiement)
+                            VALUES (%s, %s, %s, %s, NOW())
+                        """
+                        plan_info = self.PLANS.get(plan, {})
+                        montant = plan_info.get('price', 0) / 100  # Convertir centimes en euros
+                        cursor.execute(log_query, (client_id, stripe_session_id, plan, montant))
+                    except psycopg2.Error:
+                        # La table de logs n'existe peut-être pas, ce n'est pas grave
+                        pass
+                    
+                    conn.commit()
+                finally:
+                    cursor.close()
             
-            cursor.execute(query, (new_expiry, client_id))
-            
-            # Enregistrer le paiement dans une table de logs (si elle existe)
-            try:
-                log_query = """
-                    INSERT INTO paiements_logs (client_id, stripe_session_id, plan, montant, date_paiement)
-                    VALUES (%s, %s, %s, %s, NOW())
-                """
-                plan_info = self.PLANS.get(plan, {})
-                montant = plan_info.get('price', 0) / 100  # Convertir centimes en euros
-                cursor.execute(log_query, (client_id, stripe_session_id, plan, montant))
-            except psycopg2.Error:
-                # La table de logs n'existe peut-être pas, ce n'est pas grave
-                pass
-            
-            conn.commit()
+            # Le statut en cache n'est plus valable
+            subscription_service.invalidate_subscription(client_id)
             logger.info(f"Base de données mise à jour pour client {client_id}")
             return True
             
         except psycopg2.Error as e:
             logger.error(f"Erreur DB lors de la mise à jour de l'abonnement: {e}", exc_info=True)
-            if conn:
-                conn.rollback()
             return False
             
         except Exception as e:
             logger.error(f"Erreur inattendue: {e}", exc_info=True)
-            if conn:
-                conn.rollback()
             return False
-            
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
     
     def get_session_details(self, session_id: str) -> Optional[Dict]:
         """
@@ -0,0 +1,289 @@
+"""
+Traitement différé et idempotent des webhooks Stripe
+
+Le point d'entrée /api/stripe/webhook se contente de vérifier la signature
+et d'enregistrer l'événement dans la table stripe_events (clé : identifiant
+Stripe de l'événement), puis répond immédiatement. Une livraison déjà
+enregistrée (nouvel envoi de Stripe) est ignorée.
+
+Un thread dédié traite ensuite les événements en attente ; la mise à jour de
+l'abonnement passe par le pool de connexions du service des abonnements.
+Un échec est retenté avec un délai croissant, et les événements encore en
+attente au redémarrage sont repris.
+
+Avant traitement, un événement est réservé par une mise à jour conditionnelle
+(pending -> processing) : si plusieurs processus, ou la reprise au démarrage
+et le webhook en direct, planifient le même événement, un seul le traite.
+Une réservation laissée par un processus arrêté expire après
+STRIPE_EVENT_CLAIM_TIMEOUT.
+
+En mode multi-tenant, la table stripe_events est celle du schéma public pour
+tous les tenants : le webhook reçu sur l'hôte d'un tenant et le thread de
+traitement (sans tenant) lisent et écrivent ainsi les mêmes lignes.
+"""
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+
+from erp.core.constants import STRIPE_EVENT_CLAIM_TIMEOUT, STRIPE_EVENT_MAX_ATTEMPTS, STRIPE_EVENT_RETRY_DELAY
+from erp.core.tenant import use_tenant
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Traitement d'un objet d'événement : retourne (succès, message d'erreur)
+EventHandler = Callable[[dict], Tuple[bool, Optional[str]]]
+
+
+def event_to_dict(event) -> dict:
+    """Convertit un événement Stripe (StripeObject ou dict) en dictionnaire simple"""
+    if hasattr(event, 'to_dict'):
+        return event.to_dict()
+    return dict(event)
+
+
+class StripeWebhookService:
+    """Journal des événements Stripe et thread de traitement
+
+    Args:
+        session_factory: Fabrique de sessions SQLAlchemy (par défaut : base de l'application)
+        handlers: Traitements par type d'événement (par défaut : checkout.session.completed)
+    """
+
+    def __init__(self, session_factory=None, handlers: Optional[Dict[str, EventHandler]] = None,
+                 max_attempts: int = STRIPE_EVENT_MAX_ATTEMPTS,
+                 retry_delay: float = STRIPE_EVENT_RETRY_DELAY,
+                 claim_timeout: float = STRIPE_EVENT_CLAIM_TIMEOUT):
+        if session_factory is None:
+            from erp.core.database import db_manager
+            session_factory = db_manager.get_session
+        self._session = session_factory
+        self._handlers = handlers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.claim_timeout = claim_timeout
+        self._heap = []
+        self._scheduled = set()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._busy = False
+
+    @property
+    def handlers(self) -> Dict[str, EventHandler]:
+        if self._handlers is None:
+            from erp.services.stripe_service import get_stripe_service
+            self._handlers = {
+                'checkout.session.completed': get_stripe_service().handle_checkout_completed,
+            }
+        return self._handlers
+
+    @contextmanager
+    def _events_session(self):
+        """Session sur le journal des événements (schéma public, quel que soit le tenant courant)"""
+        with use_tenant(None), self._session() as session:
+            yield session
+
+    # ------------------------------------------------------------------
+    # Réception
+    # ------------------------------------------------------------------
+
+    def record_event(self, event) -> bool:
+        """Enregistre un événement vérifié et planifie son traitement
+
+        Returns:
+            bool: True si l'événement est nouveau, False s'il avait déjà été reçu
+        """
+        from erp.core.db_models import StripeEventModel
+
+        data = event_to_dict(event)
+        event_id = data['id']
+        try:
+            with self._events_session() as session:
+                if session.get(StripeEventModel, event_id) is not None:
+                    logger.info(f"Événement Stripe {event_id} déjà reçu, ignoré")
+                    return False
+                session.add(StripeEventModel(
+                    id=event_id,
+                    type=data.get('type', ''),
+                    payload=data,
+                    status='pending',
+                    attempts=0,
+                    received_at=datetime.now()
+                ))
+        except IntegrityError:
+            # Deux livraisons simultanées du même événement
+            logger.info(f"Événement Stripe {event_id} déjà reçu, ignoré")
+            return False
+
+        self._schedule(event_id, 0.0)
+        self.start()
+        return True
+
+    # ------------------------------------------------------------------
+    # Thread de traitement
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Démarre le thread de traitement et reprend les événements en attente"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='stripe-events', daemon=True)
+        try:
+            self._resume_pending()
+        except Exception as e:
+            logger.error(f"Impossible de reprendre les événements Stripe en attente: {e}")
+        self._thread.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Attend le traitement des événements dont l'échéance est passée"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._busy or (self._heap and self._heap[0][0] <= time.monotonic()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: float = 5.0):
+        """Arrête le thread (les événements non traités restent en attente en base)"""
+        with self._cond:
+            thread = self._thread
+            self._stopping = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            self._thread = None
+
+    def _resume_pending(self):
+        from erp.core.db_models import StripeEventModel
+
+        with self._events_session() as session:
+            rows = session.query(StripeEventModel.id).filter(
+                self._claimable()
+            ).order_by(StripeEventModel.received_at).all()
+        for (event_id,) in rows:
+            self._schedule(event_id, 0.0)
+        if rows:
+            logger.info(f"{len(rows)} événement(s) Stripe en attente repris")
+
+    def _schedule(self, event_id: str, delay: float):
+        with self._cond:
+            if event_id in self._scheduled:
+                return
+            self._scheduled.add(event_id)
+            heapq.heappush(self._heap, (time.monotonic() + delay, event_id))
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if self._heap and self._heap[0][0] <= time.monotonic():
+                        break
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if self._stopping:
+                    return
+                _, event_id = heapq.heappop(self._heap)
+                self._scheduled.discard(event_id)
+                self._busy = True
+            try:
+                self._process(event_id)
+            except Exception as e:
+                logger.error(f"Erreur lors du traitement de l'événement Stripe {event_id}: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _claimable(self):
+        """Condition SQL : en attente, ou réservé par un processus arrêté"""
+        from erp.core.db_models import StripeEventModel
+
+        expired = datetime.now() - timedelta(seconds=self.claim_timeout)
+        return or_(
+            StripeEventModel.status == 'pending',
+            and_(StripeEventModel.status == 'processing', StripeEventModel.processed_at < expired),
+        )
+
+    def _claim(self, event_id: str) -> bool:
+        """Réserve un événement pour ce processus (mise à jour conditionnelle atomique)"""
+        from erp.core.db_models import StripeEventModel
+
+        with self._events_session() as session:
+            claimed = session.query(StripeEventModel).filter(
+                StripeEventModel.id == event_id, self._claimable()
+            ).update({StripeEventModel.status: 'processing', StripeEventModel.processed_at: datetime.now()},
+                     synchronize_session=False)
+        return claimed == 1
+
+    def _process(self, event_id: str):
+        """Traite un événement en attente et enregistre le résultat"""
+        from erp.core.db_models import StripeEventModel
+
+        if not self._claim(event_id):
+            # Déjà traité, ou en cours de traitement par un autre processus
+            return
+        with self._events_session() as session:
+            row = session.get(StripeEventModel, event_id)
+            event_type, payload, attempts = row.type, row.payload, row.attempts
+
+        handler = self.handlers.get(event_type)
+        if handler is None:
+            logger.info(f"Événement Stripe non géré: {event_type}")
+            self._finish(event_id, 'ignored', attempts)
+            return
+
+        try:
+            success, error = handler(payload.get('data', {}).get('object', {}))
+        except Exception as e:
+            success, error = False, str(e)
+
+        if success:
+            logger.info(f"Événement Stripe {event_id} ({event_type}) traité")
+            self._finish(event_id, 'done', attempts + 1)
+            return
+
+        attempts += 1
+        if attempts >= self.max_attempts:
+            logger.error(f"Abandon de l'événement Stripe {event_id} après {attempts} tentative(s): {error}")
+            self._finish(event_id, 'failed', attempts, error)
+            return
+
+        delay = self.retry_delay * 2 ** (attempts - 1)
+        logger.warning(f"Échec du traitement de l'événement Stripe {event_id} "
+                       f"(tentative {attempts}), nouvel essai dans {delay:.0f}s: {error}")
+        self._finish(event_id, 'pending', attempts, error)
+        self._schedule(event_id, delay)
+
+    def _finish(self, event_id: str, status: str, attempts: int, error: Optional[str] = None):
+        from erp.core.db_models import StripeEventModel
+
+        with self._events_session() as session:
+            row = session.get(StripeEventModel, event_id)
+            row.status = status
+            row.attempts = attempts
+            row.last_error = error
+            row.processed_at = datetime.now() if status != 'pending' else None
+
+
+# Instance singleton du service
+_stripe_webhook_service = None
+
+
+def get_stripe_webhook_service() -> StripeWebhookService:
+    """Retourne l'instance singleton du traitement des webhooks Stripe"""
+    global _stripe_webhook_service
+    if _stripe_webhook_service is None:
+        _stripe_webhook_service = StripeWebhookService()
+    return _stripe_webhook_service
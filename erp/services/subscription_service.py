@@ -1,11 +1,25 @@
 """
 Service de gestion des abonnements avec base de données externe
+
+La base des abonnements est distante : les connexions sont réutilisées via
+un pool, et le statut de chaque client est mis en cache. Un statut périmé
+est servi immédiatement pendant qu'il est rafraîchi en arrière-plan, de
+sorte que la latence de connexion ne dépend plus d'un aller-retour distant.
 """
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 import psycopg2
+from psycopg2 import pool as pg_pool
 from psycopg2.extras import RealDictCursor
+from erp.core.constants import (
+    SUBSCRIPTION_CACHE_MAX_STALE, SUBSCRIPTION_CACHE_TTL, SUBSCRIPTION_CHECK_TIMEOUT, SUBSCRIPTION_DB_POOL_SIZE,
+)
+from erp.core.tenant import get_client_id
 from erp.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -22,6 +36,20 @@ class SubscriptionService:
         self.user = os.getenv('SUBSCRIPTION_DB_USER', 'postgres')
         self.password = os.getenv('SUBSCRIPTION_DB_PASSWORD', '')
         
+        # Pool de connexions (créé à la première utilisation)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # Connexions ouvertes par le pool et connexions empruntées (métriques)
+        self._pool_conns = set()
+        self._pool_in_use = 0
+        self._pool_stats_lock = threading.Lock()
+        
+        # Cache des statuts : client_id -> ((is_active, message), horodatage monotone)
+        self._status_cache: Dict[str, Tuple[Tuple[bool, Optional[str]], float]] = {}
+        self._refreshing: Dict[str, object] = {}
+        self._cache_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='subscription')
+        
         # Log de configuration pour le débogage
         logger.debug(
             f"Configuration d'abonnement: host={self.host}, port={self.port}, "
@@ -35,19 +63,41 @@ class SubscriptionService:
                 "Vérifiez que la variable d'environnement SUBSCRIPTION_DB_PASSWORD est définie. "
                 "Les vérifications d'abonnement échoueront."
             )
+    
+    def _get_pool(self):
+        """Retourne le pool de connexions, créé au premier appel"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = pg_pool.ThreadedConnectionPool(
+                        0, SUBSCRIPTION_DB_POOL_SIZE,
+                        host=self.host,
+                        port=self.port,
+                        database=self.database,
+                        user=self.user,
+                        password=self.password,
+                        connect_timeout=5
+                    )
+        return self._pool
+    
+    @contextmanager
+    def connection(self):
+        """Emprunte une connexion au pool (rendue à la sortie du bloc)
+        
+        Usage:
+            with subscription_service.connection() as conn:
+                ...
+                conn.commit()
         
-    def _get_connection(self):
-        """Crée et retourne une connexion à la base de données des abonnements"""
+        Une transaction non validée est annulée ; une connexion cassée est fermée
+        au lieu d'être remise dans le pool.
+        """
         try:
-            conn = psycopg2.connect(
-                host=self.host,
-                port=self.port,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                connect_timeout=5
-            )
-            return conn
+            db_pool = self._get_pool()
+            conn = db_pool.getconn()
+            with self._pool_stats_lock:
+                self._pool_conns.add(id(conn))
+                self._pool_in_use += 1
         except psycopg2.Error as e:
             logger.error(
                 f"Erreur de connexion à la base des abonnements "
@@ -55,74 +105,171 @@ class SubscriptionService:
                 exc_info=True
             )
             raise
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            try:
+                if not broken and not conn.closed:
+                    conn.rollback()
+            except psycopg2.Error:
+                broken = True
+            close = broken or bool(conn.closed)
+            with self._pool_stats_lock:
+                self._pool_in_use -= 1
+                if close:
+                    self._pool_conns.discard(id(conn))
+            db_pool.putconn(conn, close=close)
+    
+    def pool_stats(self) -> Dict[str, int]:
+        """Connexions du pool par état (métriques), comptées à l'emprunt et au retour"""
+        with self._pool_stats_lock:
+            in_use = self._pool_in_use
+            return {'in_use': in_use, 'idle': len(self._pool_conns) - in_use}
+    
+    def shutdown(self):
+        """Ferme les connexions du pool et arrête les rafraîchissements"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+            with self._pool_stats_lock:
+                self._pool_conns.clear()
+                self._pool_in_use = 0
     
     def check_subscription(self, client_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Vérifie si l'abonnement du client est actif
         
+        Le dernier statut connu est servi depuis le cache. Au-delà de
+        SUBSCRIPTION_CACHE_TTL il est rafraîchi en arrière-plan ; sans statut
+        connu, la vérification attend au plus SUBSCRIPTION_CHECK_TIMEOUT.
+        
         Args:
-            client_id: Identifiant du client (optionnel, utilise CLIENT_ID de l'environnement par défaut)
+            client_id: Identifiant du client (optionnel, CLIENT_ID du tenant courant par défaut)
             
         Returns:
             Tuple[bool, Optional[str]]: (is_active, message)
                 - is_active: True si l'abonnement est actif, False sinon
                 - message: Message d'erreur ou None si actif
         """
-        # Utiliser CLIENT_ID depuis les variables d'environnement si client_id n'est pas fourni
+        # Utiliser le CLIENT_ID du tenant courant (environnement en mono-tenant) si client_id n'est pas fourni
         if client_id is None:
-            client_id = os.getenv('CLIENT_ID')
+            client_id = get_client_id()
             if not client_id:
-                logger.error("CLIENT_ID non configuré dans les variables d'environnement")
+                logger.error("CLIENT_ID non configuré (environnement ou fichier des tenants)")
                 return False, "Configuration incorrecte: CLIENT_ID manquant. Veuillez contacter le support."
-            logger.debug(f"Utilisation de CLIENT_ID depuis l'environnement: {client_id}")
+            logger.debug("Utilisation du CLIENT_ID configuré: %s", client_id)
+        client_id = str(client_id)
         
-        conn = None
-        cursor = None
+        with self._cache_lock:
+            cached = self._status_cache.get(client_id)
+        if cached is not None:
+            status, fetched_at = cached
+            age = time.monotonic() - fetched_at
+            if age < SUBSCRIPTION_CACHE_TTL:
+                return status
+            if age < SUBSCRIPTION_CACHE_MAX_STALE:
+                self._schedule_refresh(client_id)
+                return status
         
+        # Aucun statut exploitable : attendre la vérification, dans une limite de temps
+        future = self._schedule_refresh(client_id)
+        try:
+            return future.result(timeout=SUBSCRIPTION_CHECK_TIMEOUT)
+        except FutureTimeoutError:
+            logger.warning(f"Base des abonnements trop lente pour {client_id} - autorisation par défaut")
+        except Exception as e:
+            logger.error(f"Erreur inattendue lors de la vérification de l'abonnement: {e}", exc_info=True)
+        # Dernier statut connu s'il existe, sinon on laisse passer pour ne pas bloquer les utilisateurs
+        return cached[0] if cached is not None else (True, None)
+    
+    def _schedule_refresh(self, client_id: str):
+        """Lance (une seule fois par client) le rafraîchissement du statut en arrière-plan"""
+        with self._cache_lock:
+            future = self._refreshing.get(client_id)
+            if future is None:
+                future = self._executor.submit(self._refresh_status, client_id)
+                self._refreshing[client_id] = future
+            return future
+    
+    def _refresh_status(self, client_id: str) -> Tuple[bool, Optional[str]]:
+        """Interroge la base distante et met le statut en cache"""
         try:
-            conn = self._get_connection()
+            status = self._query_subscription_status(client_id)
+        except psycopg2.Error as e:
+            logger.error(f"Erreur lors de la vérification de l'abonnement: {e}", exc_info=True)
+            # En cas d'erreur de connexion à la DB des abonnements, on conserve le dernier
+            # statut connu, ou on laisse passer pour ne pas bloquer tous les utilisateurs
+            logger.warning("Erreur DB abonnements - dernier statut connu ou autorisation par défaut")
+            with self._cache_lock:
+                self._refreshing.pop(client_id, None)
+                cached = self._status_cache.get(client_id)
+            return cached[0] if cached is not None else (True, None)
+        except BaseException:
+            with self._cache_lock:
+                self._refreshing.pop(client_id, None)
+            raise
+        with self._cache_lock:
+            self._status_cache[client_id] = (status, time.monotonic())
+            self._refreshing.pop(client_id, None)
+        return status
+    
+    def invalidate_subscription(self, client_id: Optional[str] = None):
+        """Oublie le statut en cache d'un client (ou de tous) après une modification"""
+        with self._cache_lock:
+            if client_id is None:
+                self._status_cache.clear()
+            else:
+                self._status_cache.pop(str(client_id), None)
+    
+    def _query_subscription_status(self, client_id: str) -> Tuple[bool, Optional[str]]:
+        """Lit le statut d'abonnement dans la base distante (lève psycopg2.Error)"""
+        with self.connection() as conn:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            # Récupérer les informations d'abonnement
-            query = """
-                SELECT 
-                    id,
-                    client_id,
-                    date_fin_essai,
-                    statut
-                FROM abonnements
-                WHERE client_id = %s
-            """
-            
-            cursor.execute(query, (client_id,))
-            abonnement = cursor.fetchone()
-            
-            if not abonnement:
-                logger.warning(f"Aucun abonnement trouvé pour le client: {client_id}")
-                return False, "Aucun abonnement actif. Veuillez contacter le support."
-            
-            # Récupérer les informations d'abonnement
-            statut_actuel = abonnement['statut']
-            date_fin_essai = abonnement.get('date_fin_essai')
-            
-            date_maintenant = datetime.now().date()  # Utiliser .date() pour comparer avec DATE
-            
-            # Vérifier si le statut est suspendu
-            if statut_actuel == 'suspendu':
-                logger.warning(f"Tentative de connexion avec compte suspendu: {client_id}")
-                return False, "Votre compte est suspendu. Veuillez renouveler votre abonnement."
-            
-            # Vérifier la date de fin d'essai/abonnement
-            if date_fin_essai:
-                # Convertir la date en date si nécessaire
-                if isinstance(date_fin_essai, str):
-                    date_fin_essai = datetime.strptime(date_fin_essai, '%Y-%m-%d').date()
-                elif hasattr(date_fin_essai, 'date'):  # Si c'est un datetime
-                    date_fin_essai = date_fin_essai.date()
+            try:
+                # Récupérer les informations d'abonnement
+                query = """
+                    SELECT 
+                        id,
+                        client_id,
+                        date_fin_essai,
+                        statut
+                    FROM abonnements
+                    WHERE client_id = %s
+                """
+                
+                cursor.execute(query, (client_id,))
+                abonnement = cursor.fetchone()
+                
+                if not abonnement:
+                    logger.warning(f"Aucun abonnement trouvé pour le client: {client_id}")
+                    return False, "Aucun abonnement actif. Veuillez contacter le support."
+                
+                # Récupérer les informations d'abonnement
+                statut_actuel = abonnement['statut']
+                date_fin_essai = abonnement.get('date_fin_essai')
+                
+                date_maintenant = datetime.now().date()  # Utiliser .date() pour comparer avec DATE
                 
-                # Comparer les dates
-                if date_fin_essai < date_maintenant:
-                    if statut_actuel != 'suspendu':
+                # Vérifier si le statut est suspendu
+                if statut_actuel == 'suspendu':
+                    logger.warning(f"Tentative de connexion avec compte suspendu: {client_id}")
+                    return False, "Votre compte est suspendu. Veuillez renouveler votre abonnement."
+                
+                # Vérifier la date de fin d'essai/abonnement
+                if date_fin_essai:
+                    # Convertir la date en date si nécessaire
+                    if isinstance(date_fin_essai, str):
+                        date_fin_essai = datetime.strptime(date_fin_essai, '%Y-%m-%d').date()
+                    elif hasattr(date_fin_essai, 'date'):  # Si c'est un datetime
+                        date_fin_essai = date_fin_essai.date()
+                    
+                    # Comparer les dates
+                    if date_fin_essai < date_maintenant:
                         # Mettre à jour le statut à suspendu
                         self._update_subscription_status(cursor, abonnement['id'], 'suspendu')
                         conn.commit()
@@ -130,29 +277,14 @@ class SubscriptionService:
                         
                         # Envoyer un email d'avertissement
                         self._send_subscription_expired_email(client_id, abonnement['id'])
-                    
-                    return False, "Votre abonnement a expiré. Veuillez renouveler votre abonnement."
-            
-            # L'abonnement est actif (statut != 'suspendu' et date_fin_essai >= aujourd'hui)
-            logger.info(f"Abonnement actif pour le client {client_id} (Expire le: {date_fin_essai})")
-            return True, None
-            
-        except psycopg2.Error as e:
-            logger.error(f"Erreur lors de la vérification de l'abonnement: {e}", exc_info=True)
-            # En cas d'erreur de connexion à la DB des abonnements, on laisse passer
-            # pour ne pas bloquer tous les utilisateurs
-            logger.warning("Erreur DB abonnements - autorisation par défaut")
-            return True, None
-            
-        except Exception as e:
-            logger.error(f"Erreur inattendue lors de la vérification de l'abonnement: {e}", exc_info=True)
-            return True, None
-            
-        finally:
-            if cursor:
+                        
+                        return False, "Votre abonnement a expiré. Veuillez renouveler votre abonnement."
+                
+                # L'abonnement est actif (statut != 'suspendu' et date_fin_essai >= aujourd'hui)
+                logger.debug("Abonnement actif pour le client %s (Expire le: %s)", client_id, date_fin_essai)
+                return True, None
+            finally:
                 cursor.close()
-            if conn:
-                conn.close()
     
     def _update_subscription_status(self, cursor, abonnement_id: int, new_status: str):
         """
@@ -186,30 +318,29 @@ class SubscriptionService:
         Returns:
             Optional[dict]: Informations de l'abonnement ou None
         """
-        conn = None
-        cursor = None
-        
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            query = """
-                SELECT 
-                    id,
-                    client_id,
-                    plan,
-                    prix_mensuel,
-                    date_debut,
-                    date_fin,
-                    statut,
-                    periode_essai,
-                    date_fin_essai
-                FROM abonnements
-                WHERE client_id = %s
-            """
-            
-            cursor.execute(query, (client_id,))
-            abonnement = cursor.fetchone()
+            with self.connection() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                try:
+                    query = """
+                        SELECT 
+                            id,
+                            client_id,
+                            plan,
+                            prix_mensuel,
+                            date_debut,
+                            date_fin,
+                            statut,
+                            periode_essai,
+                            date_fin_essai
+                        FROM abonnements
+                        WHERE client_id = %s
+                    """
+                    
+                    cursor.execute(query, (client_id,))
+                    abonnement = cursor.fetchone()
+                finally:
+                    cursor.close()
             
             if abonnement:
                 return dict(abonnement)
@@ -219,68 +350,32 @@ class SubscriptionService:
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des informations d'abonnement: {e}", exc_info=True)
             return None
-            
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
     
     
     def add_user_log(self, user_id: str, username: str, action: str, client_id: str = None):
         """
         Enregistre un log de connexion/déconnexion dans la base externe
         
+        L'événement est mis en file et écrit en arrière-plan par lots
+        (voir erp.services.audit_log_service) : l'appel ne bloque pas.
+        
         Args:
             user_id: ID de l'utilisateur
             username: Nom d'utilisateur
             action: Action effectuée ('login' ou 'logout')
-            client_id: ID du client (optionnel, utilise CLIENT_ID de l'environnement par défaut)
+            client_id: ID du client (optionnel, CLIENT_ID du tenant courant par défaut)
         """
-        conn = None
-        cursor = None
+        # Utiliser le client_id fourni, sinon celui du tenant courant
+        if not client_id:
+            client_id = get_client_id()
         
-        try:
-            # Utiliser le client_id fourni, sinon récupérer depuis l'environnement
-            if not client_id:
-                client_id = os.getenv('CLIENT_ID')
-            
-            if not client_id:
-                logger.warning("CLIENT_ID non configuré et non fourni, impossible d'enregistrer le log de connexion")
-                return
-            
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Timestamp actuel
-            timestamp = datetime.now()
-            
-            # Insérer le log dans la table connexions
-            query = """
-                INSERT INTO connexions (client_id, username, action, timestamp)
-                VALUES (%s, %s, %s, %s)
-            """
-            
-            cursor.execute(query, (client_id, username, action, timestamp))
-            conn.commit()
-            
-            logger.info(f"Log de connexion enregistré: {username} - {action} à {timestamp} (client: {client_id})")
-            
-        except psycopg2.Error as e:
-            logger.error(f"Erreur lors de l'enregistrement du log de connexion: {e}", exc_info=True)
-            if conn:
-                conn.rollback()
-            
-        except Exception as e:
-            logger.error(f"Erreur inattendue lors de l'enregistrement du log: {e}", exc_info=True)
-            if conn:
-                conn.rollback()
-            
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
+        if not client_id:
+            logger.warning("CLIENT_ID non configuré et non fourni, impossible d'enregistrer le log de connexion")
+            return
+        
+        from erp.services.audit_log_service import get_audit_log_service
+        get_audit_log_service().log(client_id, username, action)
+        logger.debug("Log de connexion mis en file: %s - %s (client: %s)", username, action, client_id)
     
     def _send_subscription_expired_email(self, client_id: str, abonnement_id: int):
         """
@@ -291,10 +386,6 @@ class SubscriptionService:
             abonnement_id: ID de l'abonnement
         """
         try:
-            # Récupérer l'adresse email du client
-            conn = self._get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
             # Chercher les informations du client (email)
             # On assume que client_id pourrait être un email ou on doit chercher dans une table users
             # Pour l'instant, on envoie simplement à client_id s'il ressemble à un email
@@ -308,7 +399,7 @@ class SubscriptionService:
             
             # Générer un token de prolongation
             import uuid
-            from datetime import datetime, timedelta
+            from datetime import timedelta
             
             renewal_token = str(uuid.uuid4())
             expiry = datetime.now() + timedelta(hours=24)
@@ -339,14 +430,6 @@ class SubscriptionService:
             
         except Exception as e:
             logger.error(f"Erreur lors de l'envoi de l'email d'expiration: {e}", exc_info=True)
-        finally:
-            try:
-                if cursor:
-                    cursor.close()
-                if conn:
-                    conn.close()
-            except:
-                pass
     
     def renew_subscription(self, renewal_token: str) -> Tuple[bool, Optional[str]]:
         """
@@ -368,7 +451,6 @@ class SubscriptionService:
             token_data = self._renewal_tokens[renewal_token]
             
             # Vérifier l'expiration
-            from datetime import datetime
             if datetime.now() > token_data['expiry']:
                 logger.warning(f"Token de prolongation expiré: {renewal_token}")
                 del self._renewal_tokens[renewal_token]
@@ -378,21 +460,26 @@ class SubscriptionService:
             client_id = token_data['client_id']
             abonnement_id = token_data['abonnement_id']
             
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            from datetime import datetime, timedelta
+            from datetime import timedelta
             new_expiry = (datetime.now() + timedelta(days=30)).date()
             
-            query = """
-                UPDATE abonnements
-                SET date_fin_essai = %s,
-                    statut = 'actif'
-                WHERE id = %s
-            """
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    query = """
+                        UPDATE abonnements
+                        SET date_fin_essai = %s,
+                            statut = 'actif'
+                        WHERE id = %s
+                    """
+                    
+                    cursor.execute(query, (new_expiry, abonnement_id))
+                    conn.commit()
+                finally:
+                    cursor.close()
             
-            cursor.execute(query, (new_expiry, abonnement_id))
-            conn.commit()
+            # Le statut en cache n'est plus valable
+            self.invalidate_subscription(client_id)
             
             # Supprimer le token utilisé
             del self._renewal_tokens[renewal_token]
@@ -403,14 +490,6 @@ class SubscriptionService:
         except Exception as e:
             logger.error(f"Erreur lors de la prolongation d'abonnement: {e}", exc_info=True)
             return False, "Erreur lors de la prolongation"
-        finally:
-            try:
-                if cursor:
-                    cursor.close()
-                if conn:
-                    conn.close()
-            except:
-                pass
 
 
 # Instance singleton du service
@@ -0,0 +1,193 @@
+"""
+Service de stockage des modèles de présentation des devis
+
+Les modèles de l'éditeur sont stockés en base (une ligne par modèle, avec un
+numéro de version incrémenté à chaque enregistrement) et servis depuis un
+cache mémoire. Le cache est mis à jour directement par les écritures de ce
+processus ; les modifications faites par d'autres instances sont détectées
+par une requête de révision légère, au plus une fois par intervalle.
+
+En multi-tenant, chaque tenant a son propre cache (la session ouverte pointe
+vers les données du tenant courant).
+"""
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func
+
+from erp.core.constants import TEMPLATE_CACHE_CHECK_INTERVAL
+from erp.core.db_models import DevisTemplateModel
+from erp.core.tenant import current_tenant
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Ancien stockage fichier, importé une fois en base puis renommé (hors
+# multi-tenant uniquement : il ne peut appartenir à aucun tenant précis)
+LEGACY_TEMPLATES_FILE = Path(__file__).parent.parent / 'data' / 'devis_templates.json'
+
+
+def _to_dict(row: DevisTemplateModel) -> dict:
+    """Format attendu par l'éditeur et la génération PDF"""
+    return {
+        'name': row.nom,
+        'blocks': row.blocks or [],
+        'timestamp': row.timestamp or '',
+        'version': row.version,
+    }
+
+
+class _TenantTemplates:
+    """Cache des modèles d'un tenant"""
+
+    def __init__(self):
+        self.templates: Optional[Dict[str, dict]] = None
+        self.revision: Optional[Tuple[int, int, int]] = None
+        self.checked_at = 0.0
+
+
+class TemplateService:
+    """Modèles de devis en base avec cache mémoire"""
+
+    def __init__(self, session_factory=None, legacy_file: Optional[Path] = LEGACY_TEMPLATES_FILE,
+                 check_interval: float = TEMPLATE_CACHE_CHECK_INTERVAL):
+        if session_factory is None:
+            from erp.core.database import db_manager
+            session_factory = db_manager.get_session
+        self._session = session_factory
+        self.legacy_file = legacy_file
+        self.check_interval = check_interval
+        self._caches: Dict[Optional[str], _TenantTemplates] = {}
+        self._lock = threading.RLock()
+
+    def _cache(self) -> _TenantTemplates:
+        """Cache du tenant courant (à appeler sous le verrou)"""
+        tenant = current_tenant()
+        cache = self._caches.get(tenant)
+        if cache is None:
+            cache = self._caches[tenant] = _TenantTemplates()
+        return cache
+
+    @staticmethod
+    def _read_revision(session) -> Tuple[int, int, int]:
+        """Révision de la table : change à chaque ajout, modification ou suppression"""
+        count, versions, max_id = session.query(
+            func.count(DevisTemplateModel.id),
+            func.coalesce(func.sum(DevisTemplateModel.version), 0),
+            func.coalesce(func.max(DevisTemplateModel.id), 0),
+        ).one()
+        return int(count), int(versions), int(max_id)
+
+    def _import_legacy_file(self, session) -> int:
+        """Importe l'ancien fichier JSON dans une table vide (hors multi-tenant)"""
+        if current_tenant() is not None:
+            return 0
+        if self.legacy_file is None or not self.legacy_file.exists():
+            return 0
+        try:
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            logger.warning(f"Fichier de modèles illisible ({self.legacy_file}): {e}")
+            return 0
+        for name, template in legacy.items():
+            session.add(DevisTemplateModel(nom=name, blocks=template.get('blocks', []),
+                                           timestamp=template.get('timestamp', ''), version=1))
+        session.flush()
+        self.legacy_file.rename(self.legacy_file.with_name(self.legacy_file.name + '.migrated'))
+        logger.info(f"{len(legacy)} modèle(s) de devis importé(s) depuis {self.legacy_file.name}")
+        return len(legacy)
+
+    def _reload(self, cache: _TenantTemplates):
+        with self._session() as session:
+            revision = self._read_revision(session)
+            if revision[0] == 0 and self._import_legacy_file(session):
+                revision = self._read_revision(session)
+            rows = session.query(DevisTemplateModel).order_by(DevisTemplateModel.nom).all()
+            cache.templates = {row.nom: _to_dict(row) for row in rows}
+        cache.revision = revision
+        cache.checked_at = time.monotonic()
+
+    def _ensure_fresh(self) -> _TenantTemplates:
+        """Cache à jour du tenant courant"""
+        cache = self._cache()
+        if cache.templates is None:
+            self._reload(cache)
+            return cache
+        if time.monotonic() - cache.checked_at < self.check_interval:
+            return cache
+        with self._session() as session:
+            revision = self._read_revision(session)
+        cache.checked_at = time.monotonic()
+        if revision != cache.revision:
+            logger.debug("Modèles de devis modifiés par une autre instance, rechargement")
+            self._reload(cache)
+        return cache
+
+    def list_templates(self) -> Dict[str, dict]:
+        """Retourne les modèles par nom ({'name', 'blocks', 'timestamp', 'version'})"""
+        with self._lock:
+            return dict(self._ensure_fresh().templates)
+
+    def get_template(self, name: str) -> Optional[dict]:
+        """Retourne un modèle par son nom"""
+        return self.list_templates().get(name)
+
+    def save_template(self, name: str, blocks: list, timestamp: str = '') -> dict:
+        """Crée ou met à jour un seul modèle
+
+        Returns:
+            Le modèle enregistré, avec son nouveau numéro de version
+        """
+        with self._lock:
+            cache = self._ensure_fresh()
+            with self._session() as session:
+                row = session.query(DevisTemplateModel).filter_by(nom=name).first()
+                if row is None:
+                    row = DevisTemplateModel(nom=name, blocks=blocks, timestamp=timestamp, version=1)
+                    session.add(row)
+                else:
+                    row.blocks = blocks
+                    row.timestamp = timestamp
+                    row.version = row.version + 1
+                session.flush()
+                template = _to_dict(row)
+                revision = self._read_revision(session)
+            cache.templates[name] = template
+            cache.revision = revision
+            logger.info(f"Modèle de devis enregistré: {name} (v{template['version']})")
+            return template
+
+    def delete_template(self, name: str) -> bool:
+        """Supprime un modèle. Retourne False s'il n'existait pas"""
+        with self._lock:
+            cache = self._ensure_fresh()
+            with self._session() as session:
+                deleted = session.query(DevisTemplateModel).filter_by(nom=name).delete()
+                session.flush()
+                revision = self._read_revision(session)
+            cache.templates.pop(name, None)
+            cache.revision = revision
+            if deleted:
+                logger.info(f"Modèle de devis supprimé: {name}")
+            return bool(deleted)
+
+    def invalidate(self):
+        """Force le rechargement au prochain accès (tous les tenants)"""
+        with self._lock:
+            self._caches.clear()
+
+
+# Instance singleton
+_template_service = None
+
+
+def get_template_service() -> TemplateService:
+    """Retourne l'instance singleton du service de modèles de devis"""
+    global _template_service
+    if _template_service is None:
+        _template_service = TemplateService()
+    return _template_service
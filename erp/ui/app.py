@@ -3,7 +3,6 @@ from datetime import datetime
 from typing import List
 from pathlib import Path
 
-from erp.services.pdf_service import generate_pdf as generate_pdf_file
 from erp.config.theme import get_theme, set_accent_color, THEME_PRESETS
 from erp.ui.components import (
     create_input_field, create_number_field, create_textarea_field, 
@@ -21,22 +20,8 @@ from erp.core.models import (
 )
 from erp.core.storage_config import get_data_manager
 
-# Imports des panels extraits
-from erp.ui.panels.devis import create_devis_panel as panel_create_devis
-from erp.ui.panels.ouvrages import create_ouvrages_panel as panel_create_ouvrages
-from erp.ui.panels.catalogue import create_catalogue_panel as panel_create_catalogue
-from erp.ui.panels.clients import create_clients_panel as panel_create_clients
-from erp.ui.panels.parametres import create_parametres_panel as panel_create_parametres
-from erp.ui.panels.projets import render_projets_panel as panel_create_projets
-from erp.ui.panels.autres import (
-    create_liste_devis_panel as panel_create_liste_devis,
-    create_dashboard_panel as panel_create_dashboard,
-    create_company_panel as panel_create_company
-)
-from erp.ui.panels.liste_articles import create_liste_articles_panel as panel_create_liste_articles
-from erp.ui.panels.liste_ouvrages import create_liste_ouvrages_panel as panel_create_liste_ouvrages
-from erp.ui.panels.editeur_devis import create_editeur_devis_panel as panel_create_editeur_devis
-from erp.ui.panels.categories import create_categories_panel as panel_create_categories
+# Les panels (et ReportLab, importé par certains d'entre eux) sont importés à
+# leur première ouverture : le démarrage de l'application ne les charge pas.
 
 # Helper pour créer un bouton avec la couleur du thème (utilisé comme méthode de classe uniquement)
 def apply_theme_styles():
@@ -219,7 +204,7 @@ class DevisApp:
         """Met à jour l'affichage des totaux du devis"""
         total_ht = sum(ligne.prix_ht for ligne in self.current_devis_lignes if ligne.type == 'ouvrage')
         
-        tva_rate = self.tva_rate_field.value / 100 if self.tva_rate_field else 0.20
+        tva_rate = (self.tva_rate_field.value or 0) / 100 if self.tva_rate_field else 0.20
         total_tva = total_ht * tva_rate
         total_ttc = total_ht + total_tva
         
@@ -524,52 +509,65 @@ class DevisApp:
 
     def create_devis_panel(self):
         """Cree le panneau de gestion des devis"""
-        panel_create_devis(self)
+        from erp.ui.panels.devis import create_devis_panel
+        create_devis_panel(self)
 
     def create_ouvrages_panel(self):
         """Cree le panneau de gestion des ouvrages"""
-        panel_create_ouvrages(self)
+        from erp.ui.panels.ouvrages import create_ouvrages_panel
+        create_ouvrages_panel(self)
 
     def create_catalogue_panel(self):
         """Cree le panneau de gestion des articles"""
-        panel_create_catalogue(self)
+        from erp.ui.panels.catalogue import create_catalogue_panel
+        create_catalogue_panel(self)
 
     def create_clients_panel(self):
         """Crée le panneau de gestion des clients"""
-        panel_create_clients(self)
+        from erp.ui.panels.clients import create_clients_panel
+        create_clients_panel(self)
     
     def create_projets_panel(self):
         """Crée le panneau de gestion des projets"""
-        panel_create_projets(self)
+        from erp.ui.panels.projets import render_projets_panel
+        render_projets_panel(self)
 
     def create_parametres_panel(self):
         """Crée le panneau de paramètres"""
-        panel_create_parametres(self)
+        from erp.ui.panels.parametres import create_parametres_panel
+        create_parametres_panel(self)
 
     def create_liste_devis_panel(self):
         """Cree le panneau de liste des devis"""
-        panel_create_liste_devis(self)
+        from erp.ui.panels.autres import create_liste_devis_panel
+        create_liste_devis_panel(self)
 
     def create_liste_articles_panel(self):
         """Crée le panneau de liste des articles"""
-        panel_create_liste_articles(self)
+        from erp.ui.panels.liste_articles import create_liste_articles_panel
+        create_liste_articles_panel(self)
 
     def create_liste_ouvrages_panel(self):
         """Crée le panneau de liste des ouvrages"""
-        panel_create_liste_ouvrages(self)
+        from erp.ui.panels.liste_ouvrages import create_liste_ouvrages_panel
+        create_liste_ouvrages_panel(self)
 
     def create_dashboard_panel(self):
         """Crée le panneau du dashboard"""
-        panel_create_dashboard(self)
+        from erp.ui.panels.autres import create_dashboard_panel
+        create_dashboard_panel(self)
 
     def create_company_panel(self):
         """Cree le panneau de gestion de l'organisation"""
-        panel_create_company(self)
+        from erp.ui.panels.autres import create_company_panel
+        create_company_panel(self)
 
     def create_editeur_devis_panel(self):
         """Crée le panneau éditeur de mise en forme des devis"""
-        panel_create_editeur_devis(self)
+        from erp.ui.panels.editeur_devis import create_editeur_devis_panel
+        create_editeur_devis_panel(self)
 
     def create_categories_panel(self):
         """Crée le panneau de gestion des catégories"""
-        panel_create_categories(self)
+        from erp.ui.panels.categories import create_categories_panel
+        create_categories_panel(self)
@@ -2,9 +2,11 @@
 Composants UI réutilisables et homogénéisés
 """
 from nicegui import ui
-from typing import List, Dict, Callable, Optional
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
 from pathlib import Path
 
+from erp.core.constants import LIST_PAGE_SIZE, LIST_PAGE_SIZE_OPTIONS
+
 
 # ============================================================================
 # COMPOSANTS FORMULAIRE STANDARD
@@ -211,6 +213,183 @@ def create_edit_dialog(
     return dialog
 
 
+# ============================================================================
+# TABLEAU PAGINÉ CÔTÉ SERVEUR
+# ============================================================================
+
+class PagedTable:
+    """
+    Tableau Quasar paginé côté serveur avec défilement virtuel
+
+    Seule la page courante est chargée (fetch) et envoyée au navigateur : la
+    mémoire et la charge utile restent constantes quel que soit le nombre de
+    lignes. Le tri et la taille de page déclenchent une nouvelle requête.
+
+    Args:
+        columns: Colonnes QTable ({'name', 'label', 'field', 'sortable', ...})
+        fetch: fetch(offset, limit, sort_by, descending) -> (lignes dict, total)
+        row_key: Champ identifiant chaque ligne
+        sort_by: Colonne de tri initiale
+        descending: Tri décroissant initial
+        actions: Boutons de la colonne 'actions' [(nom, icône, suppression ?), ...] ;
+            le clic appelle on_action(nom, clé de la ligne)
+        on_action: Callback des événements 'action' ({name, key}) émis par les slots
+        empty_label: Message affiché sans résultat
+    """
+
+    def __init__(
+        self,
+        columns: List[Dict],
+        fetch: Callable[[int, int, Optional[str], bool], Tuple[List[Dict], int]],
+        row_key: str = 'id',
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        actions: Sequence[Tuple[str, str, bool]] = (),
+        on_action: Optional[Callable[[str, object], None]] = None,
+        empty_label: str = 'Aucun résultat',
+    ):
+        self.fetch = fetch
+        self.on_action = on_action
+        self.table = ui.table(
+            columns=columns,
+            rows=[],
+            row_key=row_key,
+            pagination={
+                'page': 1,
+                'rowsPerPage': LIST_PAGE_SIZE,
+                'rowsNumber': 0,
+                'sortBy': sort_by,
+                'descending': descending,
+            },
+        ).classes('w-full').style('max-height: 70vh')
+        self.table.props(
+            f'flat bordered dense virtual-scroll no-data-label="{empty_label}" '
+            f':rows-per-page-options="{list(LIST_PAGE_SIZE_OPTIONS)}"'
+        )
+        # Les arguments de 'request' contiennent aussi getCellValue (non sérialisable)
+        self.table.on('request', self._on_request, ['pagination'])
+        if actions:
+            buttons = ''.join(
+                f'<q-btn flat round dense icon="{icon}" '
+                f'class="{"delete-button hover:bg-red-50" if is_delete else "themed-link hover:bg-gray-100"}" '
+                f'@click="$parent.$emit(\'action\', {{name: \'{name}\', key: props.key}})" />'
+                for name, icon, is_delete in actions
+            )
+            self.table.add_slot('body-cell-actions', f'<q-td :props="props">{buttons}</q-td>')
+        if on_action:
+            self.table.on('action', self._on_action)
+        self.refresh()
+
+    def _on_request(self, e) -> None:
+        pagination = e.args['pagination']
+        self.table.pagination = {**self.table.pagination, **pagination}
+        self.refresh()
+
+    def _on_action(self, e):
+        # Le résultat est renvoyé pour que NiceGUI planifie les callbacks asynchrones
+        return self.on_action(e.args['name'], e.args['key'])
+
+    def refresh(self, reset_page: bool = False) -> None:
+        """Recharge la page courante (ou la première page après un changement de filtre)"""
+        pagination = dict(self.table.pagination)
+        if reset_page:
+            pagination['page'] = 1
+        limit = pagination['rowsPerPage'] or LIST_PAGE_SIZE
+        offset = (pagination['page'] - 1) * limit
+        rows, total = self.fetch(offset, limit, pagination.get('sortBy'), bool(pagination.get('descending')))
+        if not rows and total and offset:
+            # Page devenue vide (suppression de sa dernière ligne) : revenir à la dernière page
+            pagination['page'] = (total - 1) // limit + 1
+            offset = (pagination['page'] - 1) * limit
+            rows, total = self.fetch(offset, limit, pagination.get('sortBy'), bool(pagination.get('descending')))
+        pagination['rowsNumber'] = total
+        # Chaque affectation renvoie le tableau au navigateur : ignorer les rafraîchissements sans effet
+        if rows != self.table.rows:
+            self.table.rows = rows
+        if pagination != self.table.pagination:
+            self.table.pagination = pagination
+
+
+# ============================================================================
+# LISTE RÉCONCILIÉE PAR CLÉ
+# ============================================================================
+
+class KeyedList:
+    """
+    Lignes d'un conteneur réconciliées par clé (id de l'entité)
+
+    update(items) compare chaque élément à son dernier rendu : seules les lignes
+    ajoutées, modifiées ou supprimées sont créées ou détruites, les autres sont
+    conservées et au besoin réordonnées. Le navigateur ne reçoit que les lignes
+    recréées et la liste des enfants du conteneur, au lieu de toute la liste.
+
+    Le conteneur ne doit contenir que les lignes gérées par la KeyedList.
+
+    Args:
+        container: Conteneur des lignes
+        key: key(item) -> identifiant stable de la ligne
+        render: render(item) -> élément racine de la ligne, créé dans le conteneur
+        signature: signature(item) -> valeur comparée pour détecter une modification
+            (repr par défaut, qui couvre tous les champs d'une dataclass)
+    """
+
+    def __init__(
+        self,
+        container: ui.element,
+        key: Callable[[Any], Hashable],
+        render: Callable[[Any], ui.element],
+        signature: Callable[[Any], Any] = repr,
+    ):
+        self.container = container
+        self.key = key
+        self.render = render
+        self.signature = signature
+        self._rows: Dict[Hashable, Tuple[Any, ui.element]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def update(self, items: Iterable) -> Dict[str, int]:
+        """
+        Aligne les lignes affichées sur items (dans cet ordre)
+
+        Returns:
+            Nombre de lignes {'kept', 'inserted', 'updated', 'removed'}
+        """
+        stats = {'kept': 0, 'inserted': 0, 'updated': 0, 'removed': 0}
+        ordered = []
+        rows = {}
+        for item in items:
+            row_key = self.key(item)
+            signature = self.signature(item)
+            current = self._rows.pop(row_key, None)
+            if current is not None and current[0] == signature:
+                element = current[1]
+                stats['kept'] += 1
+            else:
+                if current is not None:
+                    self.container.remove(current[1])
+                    stats['updated'] += 1
+                else:
+                    stats['inserted'] += 1
+                with self.container:
+                    element = self.render(item)
+            rows[row_key] = (signature, element)
+            ordered.append(element)
+
+        # Lignes absentes de items
+        for _, element in self._rows.values():
+            self.container.remove(element)
+            stats['removed'] += 1
+        self._rows = rows
+
+        children = self.container.default_slot.children
+        if children != ordered:
+            children[:] = ordered
+            self.container.update()
+        return stats
+
+
 # ============================================================================
 # HELPERS STANDARD
 # ============================================================================
@@ -1,22 +1,28 @@
 """
 UI Panels - Individual application panels
+
+Les panels sont importés à la première utilisation (PEP 562).
 """
-from erp.ui.panels.devis import create_devis_panel
-from erp.ui.panels.ouvrages import create_ouvrages_panel
-from erp.ui.panels.catalogue import create_catalogue_panel
-from erp.ui.panels.clients import create_clients_panel
-from erp.ui.panels.parametres import create_parametres_panel
-from erp.ui.panels.liste_devis import create_liste_devis_panel
-from erp.ui.panels.dashboard import create_dashboard_panel
-from erp.ui.panels.organisation import create_company_panel
+import importlib
+
+_EXPORTS = {
+    'create_devis_panel': 'erp.ui.panels.devis',
+    'create_ouvrages_panel': 'erp.ui.panels.ouvrages',
+    'create_catalogue_panel': 'erp.ui.panels.catalogue',
+    'create_clients_panel': 'erp.ui.panels.clients',
+    'create_parametres_panel': 'erp.ui.panels.parametres',
+    'create_liste_devis_panel': 'erp.ui.panels.liste_devis',
+    'create_dashboard_panel': 'erp.ui.panels.dashboard',
+    'create_company_panel': 'erp.ui.panels.organisation',
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    'create_devis_panel',
-    'create_ouvrages_panel',
-    'create_catalogue_panel',
-    'create_clients_panel',
-    'create_parametres_panel',
-    'create_liste_devis_panel',
-    'create_dashboard_panel',
-    'create_company_panel',
-]
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
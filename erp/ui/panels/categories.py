@@ -7,8 +7,7 @@ Structure en arbre: catégories mères -> sous-catégories filles
 
 from nicegui import ui
 from erp.ui.utils import notify_success, notify_error
-import json
-from pathlib import Path
+from erp.services.category_service import get_category_service
 
 
 def create_categories_panel(app_instance):
@@ -18,56 +17,13 @@ def create_categories_panel(app_instance):
         app_instance: Instance de DevisApp contenant dm et autres état
     """
     
-    # Fichier pour stocker les catégories
-    categories_file = Path('data') / 'categories.json'
-    
-    def load_categories():
-        """Charge les catégories depuis le fichier"""
-        if categories_file.exists():
-            with open(categories_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            # Structure par défaut en arbre
-            return [
-                {
-                    'id': 'general',
-                    'label': 'Général',
-                    'children': []
-                },
-                {
-                    'id': 'platrerie',
-                    'label': 'Plâtrerie',
-                    'children': []
-                },
-                {
-                    'id': 'menuiserie_int',
-                    'label': 'Menuiserie Intérieure',
-                    'children': []
-                },
-                {
-                    'id': 'menuiserie_ext',
-                    'label': 'Menuiserie Extérieure',
-                    'children': []
-                },
-                {
-                    'id': 'isolation',
-                    'label': 'Isolation',
-                    'children': []
-                },
-                {
-                    'id': 'peinture',
-                    'label': 'Peinture',
-                    'children': []
-                }
-            ]
+    category_service = get_category_service()
     
     def save_categories(categories_data):
-        """Sauvegarde les catégories dans le fichier"""
-        categories_file.parent.mkdir(exist_ok=True)
-        with open(categories_file, 'w', encoding='utf-8') as f:
-            json.dump(categories_data, f, ensure_ascii=False, indent=2)
+        """Sauvegarde les catégories (met aussi à jour le cache partagé)"""
+        category_service.save_nodes(categories_data)
     
-    categories_data = load_categories()
+    categories_data = category_service.load_nodes()
     selected_node = {'value': None}
     tree_widget = {'ref': None}
     
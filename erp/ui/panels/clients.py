@@ -5,7 +5,7 @@ Contient tous les composants pour consulter, éditer et gérer les clients.
 """
 
 from nicegui import ui
-from erp.ui.components import create_edit_dialog
+from erp.ui.components import PagedTable, create_edit_dialog
 from erp.ui.utils import notify_success, notify_error
 from erp.utils.validators import validate_client
 
@@ -20,109 +20,98 @@ def create_clients_panel(app_instance):
     with ui.card().classes('w-full shadow-sm').style('padding: 48px; min-height: 600px; min-width: 1200px; width: 100%;'):
         ui.label('Clients').classes('text-3xl font-bold text-gray-900 mb-6')
         
-        # Conteneur du tableau
-        table_container = ui.column().classes('w-full gap-0')
+        colonnes = [
+            {'name': 'nom', 'label': 'Nom', 'field': 'nom', 'align': 'left', 'sortable': True},
+            {'name': 'prenom', 'label': 'Prenom', 'field': 'prenom', 'align': 'left', 'sortable': True},
+            {'name': 'entreprise', 'label': 'Entreprise', 'field': 'entreprise', 'align': 'left', 'sortable': True},
+            {'name': 'ville', 'label': 'Ville', 'field': 'ville', 'align': 'left', 'sortable': True},
+            {'name': 'email', 'label': 'Email', 'field': 'email', 'align': 'left', 'sortable': True},
+            {'name': 'telephone', 'label': 'Telephone', 'field': 'telephone', 'align': 'left', 'sortable': True},
+            {'name': 'actions', 'label': 'Actions', 'field': 'id', 'align': 'center'},
+        ]
         
-        def display_clients():
-            """Affiche le tableau des clients"""
-            app_instance.dm.load_data()
-            table_container.clear()
-            
-            if not app_instance.dm.clients:
-                with table_container:
-                    ui.label('Aucun client trouvé').classes('text-gray-500 text-center py-8')
+        search_input = ui.input(placeholder='Rechercher (nom, entreprise, ville, email)...').props('clearable dense debounce=300').classes('w-96 mb-2')
+        
+        def fetch_clients(offset, limit, sort_by, descending):
+            """Charge une page de clients depuis le gestionnaire de données"""
+            clients, total = app_instance.dm.page_clients(offset, limit, search=search_input.value or None,
+                                                          order_by=sort_by, descending=descending)
+            rows = [
+                {
+                    'id': c.id,
+                    'nom': c.nom,
+                    'prenom': c.prenom,
+                    'entreprise': c.entreprise,
+                    'ville': f"{c.cp or ''} {c.ville or ''}".strip(),
+                    'email': c.email,
+                    'telephone': c.telephone,
+                }
+                for c in clients
+            ]
+            return rows, total
+        
+        def modify_client(client_id):
+            """Ouvre la dialog de modification d'un client"""
+            client = app_instance.dm.get_client_by_id(client_id)
+            if not client:
+                notify_error('Client non trouvé')
                 return
             
-            with table_container:
-                # Headers
-                with ui.row().classes('w-full gap-2 font-bold bg-gray-100 p-2 rounded text-sm'):
-                    ui.label('Nom').classes('w-32 font-semibold')
-                    ui.label('Prenom').classes('w-32 font-semibold')
-                    ui.label('Entreprise').classes('flex-1 font-semibold')
-                    ui.label('Ville').classes('w-32 font-semibold')
-                    ui.label('Email').classes('w-40 font-semibold')
-                    ui.label('Telephone').classes('w-32 font-semibold')
-                    ui.label('Actions').classes('w-32')
+            def save_client(values):
+                # Valider les données
+                is_valid, error_message = validate_client(values)
+                if not is_valid:
+                    notify_error(error_message)
+                    return
+                
+                # Mettre à jour le client
+                client.nom = values.get('nom', '').strip()
+                client.prenom = values.get('prenom', '').strip()
+                client.entreprise = values.get('entreprise', '').strip()
+                client.email = values.get('email', '').strip()
+                client.telephone = values.get('telephone', '').strip()
+                client.adresse = values.get('adresse', '').strip()
+                client.cp = values.get('cp', '').strip()
+                client.ville = values.get('ville', '').strip()
                 
-                # Rows
-                for idx, client in enumerate(app_instance.dm.clients):
-                    with ui.row().classes('w-full gap-2 p-1 items-center hover:bg-gray-50 text-sm border-b border-gray-100'):
-                        ui.label(client.nom).classes('w-32')
-                        ui.label(client.prenom).classes('w-32')
-                        ui.label(client.entreprise).classes('flex-1')
-                        ui.label(f"{client.cp or ''} {client.ville or ''}".strip()).classes('w-32 text-xs')
-                        ui.label(client.email).classes('w-40 text-xs')
-                        ui.label(client.telephone).classes('w-32')
-                        
-                        with ui.row().classes('gap-2 items-center'):
-                            def make_modify_handler(client_id):
-                                """Factory function pour créer le handler de modification"""
-                                def on_modify_click():
-                                    # Trouver le client dans les données actuelles
-                                    client = next((c for c in app_instance.dm.clients if c.id == client_id), None)
-                                    if not client:
-                                        notify_error('Client non trouvé')
-                                        return
-                                    
-                                    def save_client(values):
-                                        # Valider les données
-                                        is_valid, error_message = validate_client(values)
-                                        if not is_valid:
-                                            notify_error(error_message)
-                                            return
-                                        
-                                        # Recharger le client au cas où il aurait changé
-                                        client_updated = next((c for c in app_instance.dm.clients if c.id == client_id), None)
-                                        if not client_updated:
-                                            return
-                                        
-                                        # Mettre à jour le client
-                                        client_updated.nom = values.get('nom', '').strip()
-                                        client_updated.prenom = values.get('prenom', '').strip()
-                                        client_updated.entreprise = values.get('entreprise', '').strip()
-                                        client_updated.email = values.get('email', '').strip()
-                                        client_updated.telephone = values.get('telephone', '').strip()
-                                        client_updated.adresse = values.get('adresse', '').strip()
-                                        client_updated.cp = values.get('cp', '').strip()
-                                        client_updated.ville = values.get('ville', '').strip()
-                                        
-                                        try:
-                                            app_instance.dm.update_client(client_updated)
-                                            display_clients()
-                                            notify_success('Client modifié avec succès')
-                                        except Exception as e:
-                                            notify_error(f"Erreur lors de la sauvegarde : {str(e)}")
-                                    
-                                    # Créer la dialog avec create_edit_dialog
-                                    edit_dialog = create_edit_dialog(
-                                        'Modifier le client',
-                                        fields=[
-                                            {'type': 'input', 'label': 'Nom', 'value': client.nom, 'key': 'nom'},
-                                            {'type': 'input', 'label': 'Prenom', 'value': client.prenom, 'key': 'prenom'},
-                                            {'type': 'input', 'label': 'Entreprise', 'value': client.entreprise, 'key': 'entreprise'},
-                                            {'type': 'input', 'label': 'Email', 'value': client.email, 'key': 'email'},
-                                            {'type': 'input', 'label': 'Telephone', 'value': client.telephone, 'key': 'telephone'},
-                                            {'type': 'input', 'label': 'Adresse', 'value': client.adresse, 'key': 'adresse'},
-                                            {'type': 'input', 'label': 'Code postal', 'value': client.cp, 'key': 'cp'},
-                                            {'type': 'input', 'label': 'Ville', 'value': client.ville, 'key': 'ville'},
-                                        ],
-                                        on_save=save_client
-                                    )
-                                    edit_dialog.open()
-                                
-                                return on_modify_click
-                            
-                            def make_delete_handler(client_id):
-                                def delete_client():
-                                    notify_success(f'Client supprimé')
-                                    app_instance.dm.delete_client(client_id)
-                                    display_clients()
-                                return delete_client
-                            
-                            with ui.button(on_click=make_modify_handler(client.id)).props('flat').classes('themed-link hover:bg-gray-100'):
-                                ui.icon('edit').classes('text-xl')
-                            with ui.button(on_click=make_delete_handler(client.id)).props('flat').classes('text-red-600 hover:bg-red-50'):
-                                ui.icon('delete').classes('text-xl')
+                try:
+                    app_instance.dm.update_client(client)
+                    clients_table.refresh()
+                    notify_success('Client modifié avec succès')
+                except Exception as e:
+                    notify_error(f"Erreur lors de la sauvegarde : {str(e)}")
+            
+            # Créer la dialog avec create_edit_dialog
+            edit_dialog = create_edit_dialog(
+                'Modifier le client',
+                fields=[
+                    {'type': 'input', 'label': 'Nom', 'value': client.nom, 'key': 'nom'},
+                    {'type': 'input', 'label': 'Prenom', 'value': client.prenom, 'key': 'prenom'},
+                    {'type': 'input', 'label': 'Entreprise', 'value': client.entreprise, 'key': 'entreprise'},
+                    {'type': 'input', 'label': 'Email', 'value': client.email, 'key': 'email'},
+                    {'type': 'input', 'label': 'Telephone', 'value': client.telephone, 'key': 'telephone'},
+                    {'type': 'input', 'label': 'Adresse', 'value': client.adresse, 'key': 'adresse'},
+                    {'type': 'input', 'label': 'Code postal', 'value': client.cp, 'key': 'cp'},
+                    {'type': 'input', 'label': 'Ville', 'value': client.ville, 'key': 'ville'},
+                ],
+                on_save=save_client
+            )
+            edit_dialog.open()
+        
+        def delete_client(client_id):
+            app_instance.dm.delete_client(client_id)
+            notify_success('Client supprimé')
+            clients_table.refresh()
+        
+        handlers = {'edit': modify_client, 'delete': delete_client}
         
-        # Afficher le tableau une première fois
-        display_clients()
+        # Tableau paginé côté serveur : seule la page affichée est chargée
+        clients_table = PagedTable(
+            colonnes,
+            fetch_clients,
+            sort_by='nom',
+            actions=[('edit', 'edit', False), ('delete', 'delete', True)],
+            on_action=lambda name, client_id: handlers[name](client_id),
+            empty_label='Aucun client trouvé',
+        )
+        search_input.on_value_change(lambda: clients_table.refresh(reset_page=True))
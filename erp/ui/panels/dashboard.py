@@ -3,96 +3,50 @@ Panel du dashboard avec Pygwalker
 """
 
 from nicegui import ui
-from pathlib import Path
+
+from erp.services.dashboard_service import build_devis_records, get_dashboard_service
 
 
 def create_dashboard_panel(app_instance):
     """Crée le panneau du dashboard avec Pygwalker
-    
+
+    Le HTML Pygwalker est généré hors de la boucle d'événements et mis en
+    cache : un indicateur de chargement est affiché puis remplacé par le rendu.
+
     Args:
         app_instance: Instance de DevisApp contenant dm et autres état
     """
-    import pandas as pd
-    import pygwalker as pyg
-    
     with ui.column().classes('w-full').style('padding: 0; margin: 0;'):
         ui.label('Tableau de bord - Analyse des données').classes('text-3xl font-bold text-gray-900 mb-6').style('padding: 24px 24px 0 24px;')
 
-        # Préparer les DataFrames à partir des objets Python (SQL)
-        dataframes = {}
-
-        # Devis
+        # Préparer les données des devis (SQL)
         try:
-            devis_data = []
-            for devis in app_instance.dm.devis_list:
-                devis_dict = {
-                    'numero': devis.numero,
-                    'date': devis.date,
-                    'client_id': devis.client_id,
-                    'statut': devis.statut,
-                    'total_ht': devis.total_ht,
-                    'total_ttc': devis.total_ttc,
-                    'tva': devis.tva,
-                    'coefficient_marge': devis.coefficient_marge,
-                    'nb_lignes': len(devis.lignes) if devis.lignes else 0
-                }
-                devis_data.append(devis_dict)
-            if devis_data:
-                dataframes['Devis'] = pd.DataFrame(devis_data)
+            devis_records = build_devis_records(app_instance.dm)
         except Exception as e:
             ui.label(f'Erreur chargement devis: {e}').classes('text-red-500')
-
-        # Clients
-        try:
-            clients_data = []
-            for client in app_instance.dm.clients:
-                client_dict = {
-                    'id': client.id,
-                    'nom': client.nom,
-                    'prenom': client.prenom,
-                    'entreprise': client.entreprise,
-                    'ville': client.ville,
-                    'cp': client.cp
-                }
-                clients_data.append(client_dict)
-            if clients_data:
-                dataframes['Clients'] = pd.DataFrame(clients_data)
-        except Exception as e:
-            ui.label(f'Erreur chargement clients: {e}').classes('text-red-500')
-
-        # Projets/Chantiers
-        try:
-            projets_data = []
-            for projet in app_instance.dm.projets:
-                projet_dict = {
-                    'numero': getattr(projet, 'numero', ''),
-                    'client_id': getattr(projet, 'client_id', ''),
-                    'date_creation': getattr(projet, 'date_creation', ''),
-                    'statut': getattr(projet, 'statut', ''),
-                    'nb_devis': len(getattr(projet, 'devis_numeros', []))
-                }
-                projets_data.append(projet_dict)
-            if projets_data:
-                dataframes['Chantiers'] = pd.DataFrame(projets_data)
-        except Exception as e:
-            ui.label(f'Erreur chargement chantiers: {e}').classes('text-red-500')
-
-        # Affichage principal
-        if dataframes:
-            df_principal = dataframes.get('Devis', pd.DataFrame())
-            if not df_principal.empty:
-                try:
-                    pyg_html = pyg.to_html(
-                        df_principal,
-                        spec="",
-                        use_kernel_calc=True,
-                        default_tab='data',
-                        appearance='light'
-                    )
-                    ui.html(pyg_html, sanitize=False).style('width: 100%; height: 1200px; overflow: auto; padding: 0 24px;')
-                except Exception as e:
+            return
+
+        if not devis_records:
+            ui.label('Aucune donnée disponible pour l\'analyse').classes('text-gray-500 text-center py-8')
+            return
+
+        content = ui.column().classes('w-full')
+        with content:
+            with ui.row().classes('w-full justify-center items-center gap-3 py-8'):
+                ui.spinner(size='lg')
+                ui.label('Génération du tableau de bord...').classes('text-gray-500')
+
+        async def load_dashboard():
+            """Récupère le rendu (cache ou processus de travail) puis l'affiche"""
+            try:
+                pyg_html = await get_dashboard_service().get_html(devis_records)
+            except Exception as e:
+                content.clear()
+                with content:
                     ui.label(f'Erreur Pygwalker: {e}').classes('text-red-500 text-center py-4')
-            else:
-                ui.label('Aucune donnée disponible pour l\'analyse').classes('text-gray-500 text-center py-8')
-        else:
-            ui.label('Aucune donnée disponible').classes('text-gray-500 text-center py-8')
+                return
+            content.clear()
+            with content:
+                ui.html(pyg_html, sanitize=False).style('width: 100%; height: 1200px; overflow: auto; padding: 0 24px;')
+
+        ui.timer(0.1, load_dashboard, once=True)
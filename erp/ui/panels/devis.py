@@ -6,12 +6,64 @@ Contient tous les composants pour créer, éditer et gérer les devis.
 
 from nicegui import ui
 from datetime import datetime
-from pathlib import Path
-import json
 
 from erp.core.models import LigneDevis, Devis
-from erp.ui.utils import notify_success, notify_error, notify_warning, notify_info
+from erp.ui.utils import EditBatcher, notify_success, notify_error, notify_warning, notify_info
 from erp.services.pdf_service import generate_pdf as generate_pdf_file
+from erp.services.pdf_render_service import PdfRenderContext, get_pdf_render_service
+from erp.services.pdf_export_service import client_folder_name
+from erp.services.template_service import get_template_service
+from erp.utils.exceptions import PDFGenerationError, ResourceNotFoundError
+
+
+def section_totals(lignes):
+    """Totaux HT des chapitres : {index du chapitre: (niveau, total)}
+
+    Un ouvrage compte dans tous les chapitres ouverts au-dessus de lui ; un
+    chapitre est fermé par le chapitre suivant de niveau inférieur ou égal.
+    """
+    totals = {}
+    chapter_stack = []
+    for idx, ligne in enumerate(lignes):
+        niveau = getattr(ligne, 'niveau', 1)
+        if ligne.type == 'chapitre':
+            while chapter_stack and chapter_stack[-1][1] >= niveau:
+                closed_idx, closed_niveau, closed_total = chapter_stack.pop()
+                totals[closed_idx] = (closed_niveau, closed_total)
+            chapter_stack.append([idx, niveau, 0.0])
+        elif ligne.type == 'ouvrage':
+            for chapter_info in chapter_stack:
+                chapter_info[2] += ligne.prix_ht
+    while chapter_stack:
+        closed_idx, closed_niveau, closed_total = chapter_stack.pop()
+        totals[closed_idx] = (closed_niveau, closed_total)
+    return totals
+
+
+def enclosing_chapters(lignes, idx):
+    """Index des chapitres ouverts au-dessus de la ligne idx (du plus proche au plus haut)
+
+    Seuls ces sous-totaux changent quand le prix de la ligne change.
+    """
+    chapters = []
+    limite = float('inf')
+    for j in range(idx - 1, -1, -1):
+        ligne = lignes[j]
+        if ligne.type != 'chapitre':
+            continue
+        niveau = getattr(ligne, 'niveau', 1)
+        if niveau < limite:
+            chapters.append(j)
+            limite = niveau
+            if niveau <= 1:
+                break
+    return chapters
+
+
+def set_text(label, text):
+    """Change le texte d'un label seulement s'il diffère (aucun envoi au navigateur sinon)"""
+    if label.text != text:
+        label.set_text(text)
 
 
 def create_devis_panel(app_instance):
@@ -21,9 +73,6 @@ def create_devis_panel(app_instance):
         app_instance: Instance de DevisApp contenant dm et autres état
     """
     
-    # Charger Sortable.js au tout début
-    ui.add_head_html('<script src="https://cdn.jsdelivr.net/npm/sortablejs@latest/Sortable.min.js"></script>')
-    
     # Vérifier s'il y a un devis à charger depuis la navigation
     # devis_to_load contient maintenant un objet Devis complet, pas un numéro
     devis_to_load = getattr(app_instance, 'devis_to_load', None)
@@ -217,118 +266,50 @@ def create_devis_panel(app_instance):
                 
                 # ===== DÉFINIR TOUTES LES FONCTIONS INTERNES EN PREMIER =====
                 
-                # Fonction pour initialiser Sortable.js (DOIT ÊTRE DÉFINIE AVANT refresh_table)
-                def init_sortable():
-                    """Initialise ou réinitialise Sortable.js sur le conteneur"""
-                    ui.run_javascript('''
-                        function loadSortableAndInit() {
-                            // Charger Sortable.js si pas déjà chargé
-                            if (typeof Sortable === 'undefined') {
-                                const script = document.createElement('script');
-                                script.src = 'https://cdn.jsdelivr.net/npm/sortablejs@latest/Sortable.min.js';
-                                script.onload = function() {
-                                    initSortableWithRetry(10);
-                                };
-                                document.head.appendChild(script);
-                            } else {
-                                initSortableWithRetry(10);
-                            }
-                        }
-                        
-                        function initSortableWithRetry(attempts) {
-                            if (attempts <= 0) {
-                                return;
-                            }
-                            
-                            const el = document.getElementById('devis-lines-sortable');
-                            
-                            if (!el || typeof Sortable === 'undefined') {
-                                setTimeout(function() { initSortableWithRetry(attempts - 1); }, 200);
-                                return;
-                            }
-                            
-                            if (el.sortableInstance) {
-                                el.sortableInstance.destroy();
-                            }
-                            
-                            el.sortableInstance = new Sortable(el, {
-                                animation: 150,
-                                draggable: '[data-id]',
-                                ghostClass: 'opacity-50',
-                                onEnd: function(evt) {
-                                    if (evt.oldIndex !== evt.newIndex) {
-                                        const items = el.querySelectorAll('[data-id]');
-                                        const newOrder = [];
-                                        items.forEach(function(item) {
-                                            newOrder.push(item.getAttribute('data-id'));
-                                        });
-                                        window.newOrder = newOrder;
-                                        window.reorderReady = true;
-                                    }
-                                }
-                            });
-                        }
-                        
-                        loadSortableAndInit();
-                    ''')
-                
-                # Timer pour vérifier et traiter les réorganisations
-                async def check_reorder():
-                    """Vérifie s'il y a une réorganisation en attente"""
-                    result = await ui.run_javascript('''
-                        if (window.reorderReady) {
-                            window.reorderReady = false;
-                            return window.newOrder || null;
-                        }
-                        return null;
-                    ''')
+                def on_lines_reordered(e):
+                    """Applique l'ordre des lignes après un glisser-déposer
+
+                    Appelé par l'événement onEnd de Sortable (bundle SortableJS
+                    servi par NiceGUI) : la ligne déplacée est déjà repositionnée
+                    dans le conteneur, son ordre donne celui des lignes du devis.
+                    """
+                    if e.old_index == e.new_index:
+                        return
+                    lignes_par_id = {str(l.id): l for l in app_instance.current_devis_lignes}
+                    new_lignes = [
+                        lignes_par_id[child.props['data-id']]
+                        for child in e.target.default_slot.children
+                        if child.props.get('data-id') in lignes_par_id
+                    ]
+                    if len(new_lignes) != len(app_instance.current_devis_lignes):
+                        refresh_table()
+                        return
                     
-                    if result:
-                        # Réorganiser selon le nouvel ordre des data-id
-                        new_lignes = []
-                        for ligne_id in result:
-                            # Convertir en int si c'est un string
-                            try:
-                                ligne_id_int = int(ligne_id)
-                            except:
-                                ligne_id_int = ligne_id
-                            
-                            ligne = next((l for l in app_instance.current_devis_lignes if l.id == ligne_id_int), None)
-                            if ligne:
-                                new_lignes.append(ligne)
-                        
-                        if len(new_lignes) == len(app_instance.current_devis_lignes):
-                            app_instance.current_devis_lignes = new_lignes
-                            recalculate_ouvrage_niveaux()
-                            refresh_table()
-                            app_instance.update_totals()
-                            
-                            # Sauvegarder automatiquement
-                            try:
-                                if hasattr(app_instance, 'numero_devis_field'):
-                                    numero = app_instance.numero_devis_field.value
-                                    existing_devis = next((d for d in app_instance.dm.devis_list if d.numero == numero), None)
-                                    if existing_devis:
-                                        existing_devis.client_id = app_instance.selected_client_id if app_instance.selected_client_id else existing_devis.client_id
-                                        existing_devis.objet = app_instance.objet_devis_field.value if hasattr(app_instance, 'objet_devis_field') else existing_devis.objet
-                                        existing_devis.lignes = app_instance.current_devis_lignes
-                                        existing_devis.coefficient_marge = app_instance.current_devis_coefficient
-                                        existing_devis.tva = app_instance.tva_rate_field.value if hasattr(app_instance, 'tva_rate_field') and app_instance.tva_rate_field else existing_devis.tva
-                                        app_instance.dm.update_devis(existing_devis)
-                            except:
-                                pass
-                
-                # Lancer le timer
-                ui.timer(0.15, check_reorder, active=True)
+                    app_instance.current_devis_lignes = new_lignes
+                    recalculate_ouvrage_niveaux()
+                    refresh_table()
+                    app_instance.update_totals()
+                    
+                    # Sauvegarde ciblée des lignes si le devis est déjà enregistré
+                    if hasattr(app_instance, 'numero_devis_field'):
+                        try:
+                            app_instance.dm.update_devis_lignes(app_instance.numero_devis_field.value, new_lignes)
+                        except ResourceNotFoundError:
+                            pass  # Nouveau devis : sera créé au premier enregistrement
+                        except Exception as ex:
+                            notify_error(f'Erreur: {str(ex)}')
                 
                 def refresh_table():
                     """Rafraîchit l'affichage du tableau des lignes avec totaux par niveau"""
+                    # Reconstruction complète : les modifications en attente sont déjà dans les lignes
+                    line_edits.cancel()
+                    for cells in table_cells.values():
+                        cells.clear()
                     lines_container.clear()
                     
                     if not app_instance.current_devis_lignes:
                         with lines_container:
                             ui.label('Aucune ligne. Ajoutez-en une ci-dessus.').classes('text-gray-500 text-center py-8')
-                        init_sortable()
                         return
                     
                     with lines_container:
@@ -343,32 +324,14 @@ def create_devis_panel(app_instance):
                             ui.label('Actions').classes('w-32 px-2')
                         
                         # Calculer les totaux hiérarchiques
-                        def calculate_hierarchical_totals():
-                            section_totals = {}
-                            chapter_stack = []
-                            for idx, ligne in enumerate(app_instance.current_devis_lignes):
-                                niveau = getattr(ligne, 'niveau', 1)
-                                if ligne.type == 'chapitre':
-                                    while chapter_stack and chapter_stack[-1][1] >= niveau:
-                                        closed_idx, closed_niveau, closed_total = chapter_stack.pop()
-                                        section_totals[closed_idx] = (closed_niveau, closed_total)
-                                    chapter_stack.append([idx, niveau, 0.0])
-                                elif ligne.type == 'ouvrage':
-                                    for chapter_info in chapter_stack:
-                                        chapter_info[2] += ligne.prix_ht
-                            while chapter_stack:
-                                closed_idx, closed_niveau, closed_total = chapter_stack.pop()
-                                section_totals[closed_idx] = (closed_niveau, closed_total)
-                            return section_totals
-                        
-                        section_totals_map = calculate_hierarchical_totals()
+                        section_totals_map = section_totals(app_instance.current_devis_lignes)
                         
-                        # Conteneur pour les lignes avec Sortable.js
+                        # Conteneur des lignes déplaçables (seules les lignes portent data-id)
                         sortable_container = ui.column().classes('w-full').style('gap: 2px !important;')
-                        print(f"[PYTHON] Created sortable container with id: devis-lines-sortable")
-                        sortable_container._props['id'] = 'devis-lines-sortable'
+                        sortable_container.make_sortable(options={'draggable': '[data-id]'}, on_end=on_lines_reordered)
                         
                         displayed_subtotals = set()
+                        sous_total_labels = {}
                         
                         for idx, ligne in enumerate(app_instance.current_devis_lignes):
                             niveau = getattr(ligne, 'niveau', 1)
@@ -396,7 +359,7 @@ def create_devis_panel(app_instance):
                                                 ui.label(f'Sous-total - {chapter_titre}').classes('flex-1 px-2 font-bold text-purple-800')
                                                 ui.label('').classes('w-24 px-2')
                                                 ui.label('').classes('w-32 px-2')
-                                                ui.label(f"{chapter_total:.2f} €").classes('w-32 px-2 text-right font-bold text-purple-800')
+                                                sous_total_labels[chapter_idx] = ui.label(f"{chapter_total:.2f} €").classes('w-32 px-2 text-right font-bold text-purple-800')
                                                 ui.label('').classes('w-32 px-2')
                                         elif chapter_niveau == 2:
                                             with ui.row().classes('w-full px-1 bg-green-50 border-t-2 border-green-300'):
@@ -405,9 +368,10 @@ def create_devis_panel(app_instance):
                                                 ui.label(f'Sous-total - {chapter_titre}').classes('flex-1 px-2 font-bold text-green-800')
                                                 ui.label('').classes('w-24 px-2')
                                                 ui.label('').classes('w-32 px-2')
-                                                ui.label(f"{chapter_total:.2f} €").classes('w-32 px-2 text-right font-bold text-green-800')
+                                                sous_total_labels[chapter_idx] = ui.label(f"{chapter_total:.2f} €").classes('w-32 px-2 text-right font-bold text-green-800')
                                                 ui.label('').classes('w-32 px-2')
                             
+                            table_cells['positions'][ligne.id] = idx
                             with sortable_container:
                                 line_container = ui.column().classes('w-full').style('margin: 0; padding: 0; min-height: 30px;')
                                 line_container._props['data-id'] = str(ligne.id)
@@ -438,7 +402,8 @@ def create_devis_panel(app_instance):
                                         elif ligne.type == 'texte':
                                             with ui.column().classes('w-6'):
                                                 ui.label('')
-                                            ui.label(ligne.texte).classes('flex-1 px-2 italic text-gray-600 overflow-hidden text-ellipsis border-r-2 border-gray-300')
+                                            contenu_label = ui.label(ligne.texte).classes('flex-1 px-2 italic text-gray-600 overflow-hidden text-ellipsis border-r-2 border-gray-300')
+                                            table_cells['lignes'][ligne.id] = {'contenu': contenu_label}
                                             ui.label('').classes('w-24 px-2 border-r-2 border-gray-300')
                                             ui.label('').classes('w-32 px-2 border-r-2 border-gray-300')
                                             ui.label('').classes('w-32 px-2 border-r-2 border-gray-300')
@@ -449,10 +414,13 @@ def create_devis_panel(app_instance):
                                                 else:
                                                     expand_btn = None
                                                     ui.label('')
-                                            ui.label(ligne.description if ligne.description else ligne.designation).classes('flex-1 px-2 overflow-hidden text-ellipsis border-r-2 border-gray-300')
-                                            ui.label(f"{ligne.quantite:.2f}").classes('w-24 px-2 text-right overflow-hidden border-r-2 border-gray-300')
-                                            ui.label(f"{ligne.prix_unitaire:.2f}").classes('w-32 px-2 text-right overflow-hidden border-r-2 border-gray-300')
-                                            ui.label(f"{ligne.prix_ht:.2f}").classes('w-32 px-2 text-right font-bold overflow-hidden border-r-2 border-gray-300')
+                                            table_cells['lignes'][ligne.id] = {
+                                                'contenu': ui.label(ligne.description if ligne.description else ligne.designation).classes('flex-1 px-2 overflow-hidden text-ellipsis border-r-2 border-gray-300'),
+                                                'quantite': ui.label(f"{ligne.quantite:.2f}").classes('w-24 px-2 text-right overflow-hidden border-r-2 border-gray-300'),
+                                                'prix_unitaire': ui.label(f"{ligne.prix_unitaire:.2f}").classes('w-32 px-2 text-right overflow-hidden border-r-2 border-gray-300'),
+                                                'prix_ht': ui.label(f"{ligne.prix_ht:.2f}").classes('w-32 px-2 text-right font-bold overflow-hidden border-r-2 border-gray-300'),
+                                                'valeur_ht': ligne.prix_ht,
+                                            }
                                         
                                         # Boutons d'action
                                         with ui.row().classes('w-32 px-2 gap-1 items-center flex-nowrap'):
@@ -496,33 +464,21 @@ def create_devis_panel(app_instance):
                                                 pu_input = ui.input(value=f"{comp.prix_unitaire:.2f}").classes('w-20 text-right').props('dense borderless type=text inputmode=decimal')
                                                 total_label = ui.label(f"{comp.prix_total():.2f}").classes('w-20 text-right font-bold')
                                                 
-                                                def update_composant(c=comp, q=qte_input, p=pu_input, t=total_label, l=ligne):
+                                                def on_composant_change(c=comp, q=qte_input, p=pu_input, t=total_label, l=ligne):
                                                     try:
                                                         c.quantite = float(q.value.replace(',', '.')) if q.value else 0
                                                         c.prix_unitaire = float(p.value.replace(',', '.')) if p.value else 0
                                                     except (ValueError, AttributeError):
-                                                        c.quantite = 0
-                                                        c.prix_unitaire = 0
+                                                        return  # Saisie incomplète (ex. "1,") : attendre la suite
                                                     t.text = f"{c.prix_total():.2f}"
-                                                    # Recalculer le prix de l'ouvrage
+                                                    # Recalculer le prix de l'ouvrage, l'affichage suit au prochain lot
                                                     l.prix_unitaire = sum(comp.prix_total() for comp in l.composants)
-                                                    refresh_table()
-                                                    app_instance.update_totals()
+                                                    line_edits.push(l.id)
                                                 
-                                                qte_input.on('keydown.enter', lambda e, c=comp, q=qte_input, p=pu_input, t=total_label, l=ligne: update_composant(c, q, p, t, l))
-                                                pu_input.on('keydown.enter', lambda e, c=comp, q=qte_input, p=pu_input, t=total_label, l=ligne: update_composant(c, q, p, t, l))
-                                                
-                                                # Mise à jour du total en temps réel sans refresh complet
-                                                def update_display_only(q=qte_input, p=pu_input, t=total_label):
-                                                    try:
-                                                        qte_val = float(q.value or 0)
-                                                        pu_val = float(p.value or 0)
-                                                        t.text = f"{qte_val * pu_val:.2f}"
-                                                    except:
-                                                        pass
-                                                
-                                                qte_input.on_value_change(lambda e, q=qte_input, p=pu_input, t=total_label: update_display_only(q, p, t))
-                                                pu_input.on_value_change(lambda e, q=qte_input, p=pu_input, t=total_label: update_display_only(q, p, t))
+                                                qte_input.on_value_change(lambda e, c=comp, q=qte_input, p=pu_input, t=total_label, l=ligne: on_composant_change(c, q, p, t, l))
+                                                pu_input.on_value_change(lambda e, c=comp, q=qte_input, p=pu_input, t=total_label, l=ligne: on_composant_change(c, q, p, t, l))
+                                                qte_input.on('keydown.enter', lambda e: line_edits.flush())
+                                                pu_input.on('keydown.enter', lambda e: line_edits.flush())
                         
                         # Afficher les sous-totaux de tous les chapitres ouverts à la fin (non encore affichés)
                         if app_instance.current_devis_lignes:
@@ -546,7 +502,7 @@ def create_devis_panel(app_instance):
                                             ui.label(f'Sous-total - {chapter_titre}').classes('flex-1 px-2 font-bold text-purple-800')
                                             ui.label('').classes('w-24 px-2')
                                             ui.label('').classes('w-32 px-2')
-                                            ui.label(f"{chapter_total:.2f} €").classes('w-32 px-2 text-right font-bold text-purple-800')
+                                            sous_total_labels[chapter_idx] = ui.label(f"{chapter_total:.2f} €").classes('w-32 px-2 text-right font-bold text-purple-800')
                                             ui.label('').classes('w-32 px-2')
                                     elif niveau == 2:
                                         with ui.row().classes('w-full px-1 bg-green-50 border-t-2 border-green-300'):
@@ -555,7 +511,7 @@ def create_devis_panel(app_instance):
                                             ui.label(f'Sous-total - {chapter_titre}').classes('flex-1 px-2 font-bold text-green-800')
                                             ui.label('').classes('w-24 px-2')
                                             ui.label('').classes('w-32 px-2')
-                                            ui.label(f"{chapter_total:.2f} €").classes('w-32 px-2 text-right font-bold text-green-800')
+                                            sous_total_labels[chapter_idx] = ui.label(f"{chapter_total:.2f} €").classes('w-32 px-2 text-right font-bold text-green-800')
                                             ui.label('').classes('w-32 px-2')
                                     elif niveau == 1:
                                         with ui.row().classes('w-full px-1 bg-blue-50 border-t-2 border-blue-300'):
@@ -564,13 +520,49 @@ def create_devis_panel(app_instance):
                                             ui.label(f'Sous-total - {chapter_titre}').classes('flex-1 px-2 font-bold text-blue-800')
                                             ui.label('').classes('w-24 px-2')
                                             ui.label('').classes('w-32 px-2')
-                                            ui.label(f"{chapter_total:.2f} €").classes('w-32 px-2 text-right font-bold text-blue-800')
+                                            sous_total_labels[chapter_idx] = ui.label(f"{chapter_total:.2f} €").classes('w-32 px-2 text-right font-bold text-blue-800')
                                             ui.label('').classes('w-32 px-2')
-                    
-                    print(f"[PYTHON] Calling init_sortable()")
-                    # Toujours réinitialiser le drag and drop après chaque refresh
-                    init_sortable()
+                        
+                        for chapter_idx, label in sous_total_labels.items():
+                            table_cells['chapitres'][app_instance.current_devis_lignes[chapter_idx].id] = {
+                                'label': label,
+                                'total': section_totals_map[chapter_idx][1],
+                            }
+                
+                def apply_line_edits(ligne_ids):
+                    """Applique un lot de modifications : cellules des lignes, sous-totaux concernés, totaux
 
+                    Seuls les labels dont le texte change sont mis à jour ; le
+                    tableau n'est pas reconstruit.
+                    """
+                    lignes = app_instance.current_devis_lignes
+                    for ligne_id in ligne_ids:
+                        idx = table_cells['positions'].get(ligne_id)
+                        cells = table_cells['lignes'].get(ligne_id)
+                        if idx is None or cells is None or idx >= len(lignes) or lignes[idx].id != ligne_id:
+                            continue
+                        ligne = lignes[idx]
+                        if ligne.type == 'texte':
+                            set_text(cells['contenu'], ligne.texte)
+                            continue
+                        set_text(cells['contenu'], ligne.description if ligne.description else ligne.designation)
+                        set_text(cells['quantite'], f"{ligne.quantite:.2f}")
+                        set_text(cells['prix_unitaire'], f"{ligne.prix_unitaire:.2f}")
+                        set_text(cells['prix_ht'], f"{ligne.prix_ht:.2f}")
+                        delta = ligne.prix_ht - cells['valeur_ht']
+                        cells['valeur_ht'] = ligne.prix_ht
+                        if not delta:
+                            continue
+                        for chapter_idx in enclosing_chapters(lignes, idx):
+                            chapitre = table_cells['chapitres'].get(lignes[chapter_idx].id)
+                            if chapitre:
+                                chapitre['total'] += delta
+                                set_text(chapitre['label'], f"{chapitre['total']:.2f} €")
+                    app_instance.update_totals()
+                
+                # Cellules affichées (remplies par refresh_table) et lot de modifications en attente
+                table_cells = {'lignes': {}, 'chapitres': {}, 'positions': {}}
+                line_edits = EditBatcher(apply_line_edits)
                 
                 def show_edit_dialog(idx):
                     """Affiche la dialog d'édition pour une ligne"""
@@ -606,8 +598,8 @@ def create_devis_panel(app_instance):
                                 with ui.row().classes('gap-2 mt-6 justify-end'):
                                     def save():
                                         ligne.texte = texte.value
-                                        refresh_table()
-                                        app_instance.update_totals()
+                                        line_edits.push(ligne.id)
+                                        line_edits.flush()
                                         dialog.close()
                                     
                                     ui.button('Enregistrer', on_click=save).classes('themed-button')
@@ -642,8 +634,8 @@ def create_devis_panel(app_instance):
                                         ligne.description = description.value
                                         ligne.quantite = quantite.value
                                         # Ne pas modifier le prix_unitaire - il vient des composants
-                                        refresh_table()
-                                        app_instance.update_totals()
+                                        line_edits.push(ligne.id)
+                                        line_edits.flush()
                                         dialog.close()
                                     
                                     ui.button('Enregistrer', on_click=save).classes('themed-button')
@@ -721,8 +713,7 @@ def create_devis_panel(app_instance):
                     refresh_table()
                     app_instance.update_totals()
                 
-                # Initialiser Sortable.js et afficher le tableau initial
-                init_sortable()
+                # Afficher le tableau initial
                 refresh_table()
         
         # Stocker pour l'utiliser lors du chargement d'un devis
@@ -741,6 +732,8 @@ def create_devis_panel(app_instance):
                     with ui.row().classes('w-full justify-end items-center gap-4'):
                         ui.label('TVA').classes('text-base font-medium text-gray-700')
                         app_instance.tva_rate_field = ui.number(value=20, min=0, max=100).classes('tva-input').style('width: 80px !important;')
+                        tva_edits = EditBatcher(lambda keys: app_instance.update_totals())
+                        app_instance.tva_rate_field.on_value_change(lambda e: tva_edits.push('tva'))
                         ui.label('%').classes('text-base font-medium text-gray-700')
                         app_instance.total_tva_label = ui.label('0.00 EUR').classes('text-lg font-bold text-gray-900 w-28 text-right')
                     
@@ -805,19 +798,11 @@ def create_devis_panel(app_instance):
         
         def generate_pdf():
             """Générer un PDF du devis avec choix du modèle"""
-            # Charger les templates disponibles
-            templates_file = Path(__file__).parent.parent.parent / 'data' / 'devis_templates.json'
-            
-            def load_templates():
-                if templates_file.exists():
-                    try:
-                        with open(templates_file, 'r', encoding='utf-8') as f:
-                            return json.load(f)
-                    except:
-                        return {}
-                return {}
-            
-            templates = load_templates()
+            # Charger les templates disponibles (cache du service de modèles)
+            try:
+                templates = get_template_service().list_templates()
+            except Exception:
+                templates = {}
             
             if not templates:
                 notify_warning('Aucun modèle de devis disponible. Créez-en un dans l\'éditeur.')
@@ -827,12 +812,8 @@ def create_devis_panel(app_instance):
             with ui.dialog() as template_dialog, ui.card().classes('w-96'):
                 ui.label('Choisir un modèle').classes('text-lg font-bold mb-4')
                 
-                def generate_with_template(template_data):
+                async def generate_with_template(template_data):
                     try:
-                        from reportlab.lib.pagesizes import A4
-                        from reportlab.lib.units import mm
-                        from reportlab.pdfgen import canvas
-                        from reportlab.lib import colors
                         import os
                         
                         # Créer le devis
@@ -847,167 +828,20 @@ def create_devis_panel(app_instance):
                         )
                         
                         client = app_instance.dm.get_client_by_id(app_instance.selected_client_id)
-                        org = app_instance.dm.organisation
-                        
-                        # Créer le dossier PDF
-                        if client:
-                            if client.prenom and client.nom:
-                                client_name = f"{client.prenom}_{client.nom}"
-                            elif client.entreprise:
-                                client_name = client.entreprise
-                            else:
-                                client_name = "Client_inconnu"
-                        else:
-                            client_name = "Client_inconnu"
-                        client_name = client_name.replace(" ", "_")
-                        pdf_dir = app_instance.dm.data_dir / 'pdf' / client_name
-                        pdf_dir.mkdir(parents=True, exist_ok=True)
-                        pdf_path = pdf_dir / f"{devis.numero}.pdf"
-                        
-                        # Générer le PDF avec le template
-                        c = canvas.Canvas(str(pdf_path), pagesize=A4)
-                        width, height = A4
-                        
-                        # Parcourir tous les blocs du template
-                        for block in template_data['blocks']:
-                            block_type = block.get('type', '')
-                            x_mm = block.get('x', 0) * mm / 3.78
-                            y_mm = (height - block.get('y', 0) * mm / 3.78)
-                            w_mm = block.get('width', 200) * mm / 3.78
-                            
-                            c.saveState()
-                            
-                            # Générer le contenu selon le type (code similaire à editeur_devis.py)
-                            if block_type == 'adresse_entreprise':
-                                c.setFont("Helvetica-Bold", 11)
-                                c.drawString(x_mm, y_mm, org.nom or "MON ENTREPRISE BTP")
-                                c.setFont("Helvetica", 9)
-                                y_mm -= 12
-                                c.drawString(x_mm, y_mm, org.adresse or "")
-                                y_mm -= 10
-                                c.drawString(x_mm, y_mm, f"{org.cp or ''} {org.ville or ''}")
-                                y_mm -= 10
-                                c.drawString(x_mm, y_mm, f"Tél: {org.telephone or ''}")
-                                y_mm -= 10
-                                c.drawString(x_mm, y_mm, f"Email: {org.email or ''}")
-                            
-                            elif block_type == 'titre':
-                                c.setFont("Helvetica-Bold", 28)
-                                c.drawCentredString(x_mm + w_mm/2, y_mm, "DEVIS")
-                            
-                            elif block_type == 'client':
-                                c.setFont("Helvetica", 10)
-                                if client:
-                                    c.drawString(x_mm, y_mm, f"{client.prenom or ''} {client.nom or ''}")
-                                    y_mm -= 12
-                                    if client.entreprise:
-                                        c.drawString(x_mm, y_mm, client.entreprise)
-                                        y_mm -= 12
-                                    c.drawString(x_mm, y_mm, client.adresse or "")
-                                    y_mm -= 12
-                                    c.drawString(x_mm, y_mm, f"{client.cp or ''} {client.ville or ''}")
-                            
-                            elif block_type == 'infos_devis':
-                                c.setFont("Helvetica-Bold", 9)
-                                c.drawString(x_mm, y_mm, f"Ref:")
-                                c.setFont("Helvetica", 9)
-                                c.drawString(x_mm + 40, y_mm, devis.numero)
-                                y_mm -= 12
-                                c.setFont("Helvetica-Bold", 9)
-                                c.drawString(x_mm, y_mm, f"Date:")
-                                c.setFont("Helvetica", 9)
-                                c.drawString(x_mm + 40, y_mm, devis.date)
-                            
-                            elif block_type == 'objet':
-                                c.setFont("Helvetica-Bold", 12)
-                                objet_text = devis.objet if devis.objet else "Description des travaux"
-                                c.drawString(x_mm, y_mm, f"Objet: {objet_text}")
-                            
-                            elif block_type == 'tableau_ouvrages':
-                                c.setFont("Helvetica-Bold", 10)
-                                c.drawString(x_mm, y_mm, "DÉTAIL DES OUVRAGES")
-                                y_mm -= 20
-                                
-                                # Créer les données du tableau
-                                data = [['Réf', 'Désignation', 'Qté', 'P.U.', 'Total']]
-                                for ligne in devis.lignes:
-                                    if ligne.type == 'ouvrage':
-                                        ouvrage = app_instance.dm.get_ouvrage_by_id(ligne.ouvrage_id)
-                                        data.append([
-                                            str(ligne.ouvrage_id),
-                                            ouvrage.designation if ouvrage else '',
-                                            str(ligne.quantite),
-                                            f"{ligne.prix_unitaire:.2f}€",
-                                            f"{ligne.prix_ht:.2f}€"
-                                        ])
-                                
-                                # Dessiner le tableau manuellement
-                                c.setFont("Helvetica", 8)
-                                row_height = 15
-                                for i, row in enumerate(data):
-                                    x_pos = x_mm
-                                    if i == 0:
-                                        c.setFont("Helvetica-Bold", 8)
-                                    else:
-                                        c.setFont("Helvetica", 8)
-                                    
-                                    for col in row:
-                                        c.drawString(x_pos, y_mm - i * row_height, str(col)[:20])
-                                        x_pos += 60
-                            
-                            elif block_type == 'totaux':
-                                totals = devis.calculate_totals()
-                                c.setFont("Helvetica-Bold", 10)
-                                c.drawRightString(x_mm + w_mm, y_mm, f"Total HT: {totals['ht']:.2f}€")
-                                y_mm -= 15
-                                c.drawRightString(x_mm + w_mm, y_mm, f"TVA ({devis.tva}%): {totals['tva']:.2f}€")
-                                y_mm -= 18
-                                c.setFont("Helvetica-Bold", 12)
-                                c.drawRightString(x_mm + w_mm, y_mm, f"Total TTC: {totals['ttc']:.2f}€")
-                            
-                            elif block_type == 'conditions':
-                                c.setFont("Helvetica-Bold", 9)
-                                c.drawString(x_mm, y_mm, "CONDITIONS GÉNÉRALES")
-                                c.setFont("Helvetica", 8)
-                                y_mm -= 15
-                                conditions_lines = devis.conditions.split('\n') if devis.conditions else []
-                                for line in conditions_lines[:5]:
-                                    c.drawString(x_mm, y_mm, line[:80])
-                                    y_mm -= 10
-                            
-                            elif block_type == 'signature':
-                                c.setFont("Helvetica-Bold", 9)
-                                c.drawString(x_mm, y_mm, "Signature du client")
-                                c.drawString(x_mm + w_mm/2, y_mm, "Signature entreprise")
-                                y_mm -= 30
-                                c.setFont("Helvetica", 8)
-                                c.drawString(x_mm, y_mm, "Date: ___________")
-                                c.drawString(x_mm + w_mm/2, y_mm, "Date: ___________")
-                            
-                            elif block_type == 'logo':
-                                logo_relative = block.get('logoPath', '').lstrip('/')
-                                if logo_relative:
-                                    base_path = Path(__file__).parent.parent.parent
-                                    if logo_relative.startswith('static/'):
-                                        logo_path = base_path / logo_relative
-                                    else:
-                                        logo_path = base_path / logo_relative.lstrip('/')
-                                    
-                                    if logo_path.exists():
-                                        try:
-                                            h_mm = block.get('height', 150) * mm / 3.78
-                                            c.drawImage(str(logo_path), x_mm, y_mm - h_mm, width=w_mm, height=h_mm, preserveAspectRatio=True, mask='auto')
-                                        except:
-                                            pass
-                            
-                            c.restoreState()
+                        client_name = client_folder_name(client)
+                        pdf_path = app_instance.dm.data_dir / 'pdf' / client_name / f"{devis.numero}.pdf"
                         
-                        c.save()
+                        # Générer le PDF avec le template dans le pool de rendu
                         template_dialog.close()
+                        notify_info('Génération du PDF en cours...')
+                        context = PdfRenderContext.from_data_manager(app_instance.dm, devis)
+                        await get_pdf_render_service().render(devis, context, pdf_path, template=template_data)
                         notify_success(f'PDF généré : {pdf_path.name}')
                         
                         # Ouvrir le PDF
                         os.startfile(str(pdf_path))
+                    except PDFGenerationError as e:
+                        notify_error(e.message)
                     except Exception as e:
                         notify_error(f'Erreur lors de la génération du PDF : {str(e)}')
                 
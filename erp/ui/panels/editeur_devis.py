@@ -2,10 +2,14 @@
 Panel éditeur de mise en forme des devis avec drag and drop
 """
 
-from nicegui import ui, app
+from nicegui import ui
 from erp.ui.utils import notify_success, notify_error, notify_info
-import json
-from pathlib import Path
+from erp.services.pdf_service import render_template_pdf
+from erp.services.template_service import get_template_service
+from erp.utils.logger import get_logger
+import asyncio
+
+logger = get_logger(__name__)
 
 
 def create_editeur_devis_panel(app_instance):
@@ -15,28 +19,16 @@ def create_editeur_devis_panel(app_instance):
         app_instance: Instance de DevisApp contenant dm et autres état
     """
     
-    # Fichier de sauvegarde persistant
-    templates_file = Path(__file__).parent.parent.parent / 'data' / 'devis_templates.json'
-    
-    def load_templates_from_file():
-        """Charger les templates depuis le fichier JSON"""
-        if templates_file.exists():
-            try:
-                with open(templates_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Erreur lors du chargement des templates: {e}")
-        return {}
+    # Modèles stockés en base, servis depuis le cache du service
+    template_service = get_template_service()
     
-    def save_templates_to_file(templates):
-        """Sauvegarder les templates dans le fichier JSON"""
+    def store_template(name, result):
+        """Enregistre un seul modèle en base. Retourne False en cas d'erreur"""
         try:
-            templates_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(templates_file, 'w', encoding='utf-8') as f:
-                json.dump(templates, f, ensure_ascii=False, indent=2)
+            template_service.save_template(name, result['blocks'], result.get('timestamp', ''))
             return True
         except Exception as e:
-            print(f"Erreur lors de la sauvegarde des templates: {e}")
+            logger.error(f"Erreur lors de la sauvegarde du modèle {name}: {e}", exc_info=True)
             return False
     
     # Ajouter les styles CSS pour la page A4 et le drag and drop
@@ -205,16 +197,7 @@ def create_editeur_devis_panel(app_instance):
                             # Si un template est déjà chargé, proposer de le mettre à jour
                             if current_template_name['value']:
                                 # Mise à jour directe du template existant
-                                templates = load_templates_from_file()
-                                
-                                templates[current_template_name['value']] = {
-                                    'blocks': result['blocks'],
-                                    'timestamp': result['timestamp'],
-                                    'name': current_template_name['value']
-                                }
-                                
-                                if save_templates_to_file(templates):
-                                    app.storage.user['devis_templates'] = templates
+                                if store_template(current_template_name['value'], result):
                                     notify_success(f'Présentation "{current_template_name["value"]}" mise à jour ! ({len(result["blocks"])} blocs)')
                                 else:
                                     notify_error('Erreur lors de la mise à jour')
@@ -229,20 +212,8 @@ def create_editeur_devis_panel(app_instance):
                                             notify_error('Veuillez saisir un nom')
                                             return
                                         
-                                        # Récupérer les templates existants (fichier JSON prioritaire)
-                                        templates = load_templates_from_file()
-                                        
-                                        # Ajouter le nouveau template
-                                        templates[template_name.value] = {
-                                            'blocks': result['blocks'],
-                                            'timestamp': result['timestamp'],
-                                            'name': template_name.value
-                                        }
-                                        
-                                        # Sauvegarder dans le fichier JSON (persistant)
-                                        if save_templates_to_file(templates):
-                                            # Synchroniser avec app.storage pour compatibilité
-                                            app.storage.user['devis_templates'] = templates
+                                        # Enregistrer le nouveau template en base
+                                        if store_template(template_name.value, result):
                                             current_template_name['value'] = template_name.value
                                             current_template_label_ref['label'].text = f'Modèle: {template_name.value}'
                                             notify_success(f'Présentation "{template_name.value}" sauvegardée ! ({len(result["blocks"])} blocs)')
@@ -260,12 +231,8 @@ def create_editeur_devis_panel(app_instance):
                     
                     async def load_template():
                         """Charger une présentation sauvegardée"""
-                        # Charger depuis le fichier JSON (persistant)
-                        templates = load_templates_from_file()
-                        
-                        # Synchroniser avec app.storage
-                        if templates:
-                            app.storage.user['devis_templates'] = templates
+                        # Charger depuis le cache du service (sans accès disque)
+                        templates = template_service.list_templates()
                         
                         if not templates:
                             notify_info('Aucune présentation sauvegardée')
@@ -287,15 +254,12 @@ def create_editeur_devis_panel(app_instance):
                                 load_dialog.close()
                             
                             async def do_delete(template_name):
-                                templates = load_templates_from_file()
-                                if template_name in templates:
-                                    del templates[template_name]
-                                    if save_templates_to_file(templates):
-                                        app.storage.user['devis_templates'] = templates
+                                try:
+                                    if template_service.delete_template(template_name):
                                         notify_success(f'Présentation "{template_name}" supprimée')
-                                    else:
-                                        notify_error('Erreur lors de la suppression')
-                                    load_dialog.close()
+                                except Exception:
+                                    notify_error('Erreur lors de la suppression')
+                                load_dialog.close()
                             
                             # Liste des templates
                             for name, template_data in templates.items():
@@ -337,15 +301,7 @@ def create_editeur_devis_panel(app_instance):
                                         notify_error('Veuillez saisir un nom')
                                         return
                                     
-                                    templates = load_templates_from_file()
-                                    templates[template_name.value] = {
-                                        'blocks': result['blocks'],
-                                        'timestamp': result['timestamp'],
-                                        'name': template_name.value
-                                    }
-                                    
-                                    if save_templates_to_file(templates):
-                                        app.storage.user['devis_templates'] = templates
+                                    if store_template(template_name.value, result):
                                         current_template_name['value'] = template_name.value
                                         current_template_label_ref['label'].text = f'Modèle: {template_name.value}'
                                         notify_success(f'Présentation "{template_name.value}" sauvegardée ! ({len(result["blocks"])} blocs)')
@@ -444,10 +400,6 @@ def create_editeur_devis_panel(app_instance):
                         
                         async def generate_pdf_with_demo():
                             """Générer le PDF avec le premier devis disponible ou des données de démo"""
-                            from reportlab.lib.pagesizes import A4
-                            from reportlab.lib.units import mm
-                            from reportlab.pdfgen import canvas
-                            from reportlab.lib import colors
                             from datetime import datetime
                             from pathlib import Path
                             import os
@@ -484,177 +436,9 @@ def create_editeur_devis_panel(app_instance):
                             pdf_path = client_dir / pdf_filename
                             
                             try:
-                                # Créer le PDF avec ReportLab
-                                c = canvas.Canvas(str(pdf_path), pagesize=A4)
-                                width, height = A4
-                                
-                                # Parcourir tous les blocs du template
-                                for block in result['blocks']:
-                                    block_type = block.get('type', '')
-                                    # Convertir les coordonnées (origin en haut à gauche en HTML -> bas à gauche en PDF)
-                                    x_mm = block.get('x', 0) * mm / 3.78  # Conversion px to mm approximative
-                                    y_mm = (height - block.get('y', 0) * mm / 3.78)  # Inverser Y
-                                    w_mm = block.get('width', 200) * mm / 3.78
-                                    
-                                    c.saveState()
-                                    
-                                    # Générer le contenu selon le type
-                                    if block_type == 'adresse_entreprise':
-                                        c.setFont("Helvetica-Bold", 11)
-                                        c.drawString(x_mm, y_mm, org.nom or "MON ENTREPRISE BTP")
-                                        c.setFont("Helvetica", 9)
-                                        y_mm -= 12
-                                        c.drawString(x_mm, y_mm, org.adresse or "")
-                                        y_mm -= 10
-                                        c.drawString(x_mm, y_mm, f"{org.cp or ''} {org.ville or ''}")
-                                        y_mm -= 10
-                                        c.drawString(x_mm, y_mm, f"Tél: {org.telephone or ''}")
-                                        y_mm -= 10
-                                        c.drawString(x_mm, y_mm, f"Email: {org.email or ''}")
-                                    
-                                    elif block_type == 'titre':
-                                        c.setFont("Helvetica-Bold", 28)
-                                        c.drawCentredString(x_mm + w_mm/2, y_mm, "DEVIS")
-                                    
-                                    elif block_type == 'client':
-                                        c.setFont("Helvetica", 10)
-                                        if pdf_client:
-                                            c.drawString(x_mm, y_mm, f"{pdf_client.prenom or ''} {pdf_client.nom or ''}")
-                                            y_mm -= 12
-                                            if pdf_client.entreprise:
-                                                c.drawString(x_mm, y_mm, pdf_client.entreprise)
-                                                y_mm -= 12
-                                            c.drawString(x_mm, y_mm, pdf_client.adresse or "")
-                                            y_mm -= 12
-                                            c.drawString(x_mm, y_mm, f"{pdf_client.cp or ''} {pdf_client.ville or ''}")
-                                    
-                                    elif block_type == 'infos_devis':
-                                        c.setFont("Helvetica-Bold", 9)
-                                        c.drawString(x_mm, y_mm, f"Ref:")
-                                        c.setFont("Helvetica", 9)
-                                        c.drawString(x_mm + 40, y_mm, selected.numero)
-                                        y_mm -= 12
-                                        c.setFont("Helvetica-Bold", 9)
-                                        c.drawString(x_mm, y_mm, f"Date:")
-                                        c.setFont("Helvetica", 9)
-                                        c.drawString(x_mm + 40, y_mm, selected.date)
-                                    
-                                    elif block_type == 'objet':
-                                        c.setFont("Helvetica-Bold", 12)
-                                        objet_text = selected.objet if selected.objet else "Description des travaux"
-                                        c.drawString(x_mm, y_mm, f"Objet: {objet_text}")
-                                    
-                                    elif block_type == 'tableau_ouvrages':
-                                        from reportlab.platypus import Table, TableStyle
-                                        c.setFont("Helvetica-Bold", 10)
-                                        c.drawString(x_mm, y_mm, "DÉTAIL DES OUVRAGES")
-                                        y_mm -= 20
-                                        
-                                        # Créer les données du tableau
-                                        data = [['Réf', 'Désignation', 'Qté', 'P.U.', 'Total']]
-                                        for ligne in selected.lignes:
-                                            if ligne.type == 'ouvrage':
-                                                ouvrage = app_instance.dm.get_ouvrage_by_id(ligne.ouvrage_id)
-                                                data.append([
-                                                    str(ligne.ouvrage_id),
-                                                    ouvrage.designation if ouvrage else '',
-                                                    str(ligne.quantite),
-                                                    f"{ligne.prix_unitaire:.2f}€",
-                                                    f"{ligne.prix_ht:.2f}€"
-                                                ])
-                                        
-                                        # Dessiner le tableau manuellement (simplifié)
-                                        c.setFont("Helvetica", 8)
-                                        row_height = 15
-                                        for i, row in enumerate(data):
-                                            x_pos = x_mm
-                                            if i == 0:
-                                                c.setFont("Helvetica-Bold", 8)
-                                            else:
-                                                c.setFont("Helvetica", 8)
-                                            
-                                            for col in row:
-                                                c.drawString(x_pos, y_mm - i * row_height, str(col)[:20])
-                                                x_pos += 60
-                                    
-                                    elif block_type == 'totaux':
-                                        totals = selected.calculate_totals()
-                                        c.setFont("Helvetica-Bold", 10)
-                                        c.drawRightString(x_mm + w_mm, y_mm, f"Total HT: {totals['ht']:.2f}€")
-                                        y_mm -= 15
-                                        c.drawRightString(x_mm + w_mm, y_mm, f"TVA ({selected.tva}%): {totals['tva']:.2f}€")
-                                        y_mm -= 18
-                                        c.setFont("Helvetica-Bold", 12)
-                                        c.drawRightString(x_mm + w_mm, y_mm, f"Total TTC: {totals['ttc']:.2f}€")
-                                    
-                                    elif block_type == 'conditions':
-                                        c.setFont("Helvetica-Bold", 9)
-                                        c.drawString(x_mm, y_mm, "CONDITIONS GÉNÉRALES")
-                                        c.setFont("Helvetica", 8)
-                                        y_mm -= 15
-                                        conditions_lines = selected.conditions.split('\n') if selected.conditions else []
-                                        for line in conditions_lines[:5]:  # Limiter à 5 lignes
-                                            c.drawString(x_mm, y_mm, line[:80])
-                                            y_mm -= 10
-                                    
-                                    elif block_type == 'signature':
-                                        c.setFont("Helvetica-Bold", 9)
-                                        c.drawString(x_mm, y_mm, "Signature du client")
-                                        c.drawString(x_mm + w_mm/2, y_mm, "Signature entreprise")
-                                        y_mm -= 30
-                                        c.setFont("Helvetica", 8)
-                                        c.drawString(x_mm, y_mm, "Date: ___________")
-                                        c.drawString(x_mm + w_mm/2, y_mm, "Date: ___________")
-                                    
-                                    elif block_type == 'logo':
-                                        # Dessiner le logo
-                                        logo_relative = block.get('logoPath', '').lstrip('/')
-                                        
-                                        if not logo_relative:
-                                            # Pas de logo configuré, afficher un placeholder
-                                            c.setStrokeColor(colors.grey)
-                                            c.setFillColor(colors.lightgrey)
-                                            h_mm = block.get('height', 150) * mm / 3.78
-                                            c.rect(x_mm, y_mm - h_mm, w_mm, h_mm, fill=1)
-                                            c.setFillColor(colors.black)
-                                            c.setFont("Helvetica", 8)
-                                            c.drawString(x_mm + 5, y_mm - h_mm/2, "Logo non configuré")
-                                        else:
-                                            # Le chemin est /static/xxx.png, construire le chemin absolu
-                                            # __file__ est dans erp/ui/panels/, on remonte de 3 niveaux pour arriver à erp/, puis encore 1 pour la racine
-                                            base_path = Path(__file__).parent.parent.parent.parent
-                                            # logo_relative peut être "static/logo.png" ou "/static/logo.png"
-                                            if logo_relative.startswith('static/'):
-                                                logo_path = base_path / logo_relative
-                                            else:
-                                                # Enlever le / initial s'il existe
-                                                logo_path = base_path / logo_relative.lstrip('/')
-                                            
-                                            if logo_path.exists():
-                                                try:
-                                                    # Récupérer la hauteur du bloc (convertie depuis HTML)
-                                                    h_mm = block.get('height', 150) * mm / 3.78
-                                                    # Dessiner l'image (y_mm est déjà inversé, on descend de la hauteur)
-                                                    c.drawImage(str(logo_path), x_mm, y_mm - h_mm, width=w_mm, height=h_mm, preserveAspectRatio=True, mask='auto')
-                                                except Exception as e:
-                                                    # En cas d'erreur, dessiner un rectangle pour montrer où devrait être le logo
-                                                    c.setStrokeColor(colors.red)
-                                                    h_mm = block.get('height', 150) * mm / 3.78
-                                                    c.rect(x_mm, y_mm - h_mm, w_mm, h_mm)
-                                                    c.setFont("Helvetica", 8)
-                                                    c.drawString(x_mm + 5, y_mm - h_mm/2, f"Erreur: {str(e)[:40]}")
-                                            else:
-                                                # Fichier non trouvé - afficher le chemin complet pour debug
-                                                c.setStrokeColor(colors.orange)
-                                                h_mm = block.get('height', 150) * mm / 3.78
-                                                c.rect(x_mm, y_mm - h_mm, w_mm, h_mm)
-                                                c.setFont("Helvetica", 6)
-                                                c.drawString(x_mm + 2, y_mm - h_mm/2 + 5, f"Introuvable:")
-                                                c.drawString(x_mm + 2, y_mm - h_mm/2 - 5, str(logo_path)[:50])
-                                    
-                                    c.restoreState()
-                                
-                                c.save()
+                                # Même moteur que la génération réelle, avec cadres indicatifs pour les logos
+                                await asyncio.to_thread(render_template_pdf, result, selected, app_instance.dm,
+                                                        pdf_path, show_placeholders=True)
                                 notify_success(f'PDF généré : {pdf_path.name}')
                                 
                                 # Ouvrir le PDF
@@ -2,7 +2,11 @@
 Panel de liste des devis
 """
 
+import json
+
 from nicegui import ui
+from erp.core.constants import DEVIS_STATUSES
+from erp.ui.components import PagedTable
 from erp.ui.utils import notify_success, notify_error
 
 
@@ -14,213 +18,281 @@ def create_liste_devis_panel(app_instance):
     """
     
     with ui.card().classes('w-full shadow-sm').style('padding: 24px; min-height: 800px; min-width: 1200px; width: 100%;'):
-        ui.label('Liste des Devis').classes('text-3xl font-bold text-gray-900 mb-6')
-        
-        # Conteneur du tableau
-        table_container = ui.column().classes('w-full gap-0')
+        with ui.row().classes('w-full items-center justify-between mb-6'):
+            ui.label('Liste des Devis').classes('text-3xl font-bold text-gray-900')
+            ui.button('Export PDF (ZIP)', icon='archive', on_click=lambda: open_export_dialog()).props('flat color=primary')
         
-        def display_table():
-            """Affiche le tableau des devis"""
-            app_instance.dm.load_data()
-            table_container.clear()
+        def open_export_dialog():
+            """Dialog d'export par lot des PDF (client, statut, période)"""
+            from datetime import datetime
+            from erp.services.pdf_export_service import select_devis, export_devis_zip
             
-            if not app_instance.dm.devis_list:
-                with table_container:
-                    ui.label('Aucun devis trouvé').classes('text-gray-500 text-center py-8')
-                return
+            client_options = {'': 'Tous les clients'}
+            for c in app_instance.dm.clients:
+                client_options[c.id] = f"{c.prenom} {c.nom}".strip() or c.entreprise
+            statut_options = {'': 'Tous les statuts', **{s: s for s in DEVIS_STATUSES}}
             
-            with table_container:
-                # Headers
-                with ui.row().classes('w-full gap-2 font-bold bg-gray-100 px-2 py-2 rounded text-sm items-center'):
-                    ui.label('').classes('w-8 text-center')
-                    ui.label('Numéro').classes('w-36 font-semibold text-center')
-                    ui.label('Date').classes('w-24 font-semibold text-center')
-                    ui.label('Client').classes('w-48 font-semibold')
-                    ui.label('Objet').classes('flex-1 font-semibold')
-                    ui.label('Statut').classes('w-32 font-semibold text-center')
-                    ui.label('Total HT').classes('w-28 text-right font-semibold')
-                    ui.label('Total TTC').classes('w-28 text-right font-semibold')
-                    ui.label('Actions').classes('w-48 text-center font-semibold')
+            with ui.dialog() as export_dialog, ui.card().classes('w-96'):
+                ui.label('Exporter les PDF').classes('text-lg font-bold mb-2')
+                client_select = ui.select(client_options, value='', label='Client').classes('w-full')
+                statut_select = ui.select(statut_options, value='', label='Statut').classes('w-full')
+                with ui.row().classes('w-full gap-2'):
+                    date_debut = ui.input('Du').props('type=date').classes('flex-1')
+                    date_fin = ui.input('Au').props('type=date').classes('flex-1')
+                progress = ui.linear_progress(value=0, show_value=False).classes('w-full mt-2')
+                progress.set_visibility(False)
+                progress_label = ui.label('').classes('text-sm text-gray-600')
                 
-                # Rows
-                for idx, devis in enumerate(app_instance.dm.devis_list):
-                    # Créer une copie locale de devis pour éviter les problèmes de closure
-                    current_devis = devis
-                    client = app_instance.dm.get_client_by_id(current_devis.client_id)
-                    client_name = f"{client.prenom} {client.nom}" if client else "Client inconnu"
+                async def do_export():
+                    selection = select_devis(
+                        app_instance.dm.devis_list,
+                        client_id=client_select.value if client_select.value != '' else None,
+                        statut=statut_select.value or None,
+                        date_debut=date_debut.value or None,
+                        date_fin=date_fin.value or None,
+                    )
+                    if not selection:
+                        notify_error('Aucun devis ne correspond aux critères')
+                        return
+                    
+                    def on_progress(done, total):
+                        progress.set_value(done / total)
+                        progress_label.text = f'{done} / {total} PDF'
                     
-                    with ui.row().classes('w-full gap-2 px-2 py-2 items-center hover:bg-gray-50 text-sm border-b border-gray-200'):
-                        # État du bouton toggle pour chaque devis
-                        toggle_state = {'expanded': False}
-                        details_container = None
-                        expand_btn = None
-                        
-                        expand_btn = app_instance.material_icon_button('chevron_right', on_click=None)
-                        expand_btn.classes('w-8')
-                        ui.label(current_devis.numero).classes('w-36 font-medium themed-accent')
-                        ui.label(current_devis.date).classes('w-24')
-                        ui.label(client_name).classes('w-48')
-                        ui.label(current_devis.objet or '').classes('flex-1 overflow-hidden text-ellipsis')
-                        
-                        # Selecteur de statut
-                        statut_options = ['en cours', 'envoyé', 'refusé', 'accepté']
-                        def make_statut_handler(devis_obj):
-                            def on_statut_change(e):
-                                devis_obj.statut = e.value
-                                app_instance.dm.update_devis(devis_obj)
-                            return on_statut_change
-                        
-                        ui.select(options=statut_options, value=current_devis.statut, on_change=make_statut_handler(current_devis)).classes('w-32').props('dense borderless').style('text-align: center;')
-                        
-                        ui.label(f"{current_devis.total_ht:.2f} EUR").classes('w-28 text-right text-xs')
-                        ui.label(f"{current_devis.total_ttc:.2f} EUR").classes('w-28 text-right font-bold text-xs')
-                        
-                        # Définir les handlers avant de les utiliser
-                        def make_create_projet_handler(devis_obj):
-                            def create_projet():
-                                from erp.ui.panels.projets import create_projet_from_devis
-                                create_projet_from_devis(devis_obj, app_instance, table_container)
-                            return create_projet
-                        
-                        def make_modify_handler(devis_numero, devis_obj):
-                                def modify_devis():
-                                    # Marquer qu'on charge un devis existant (pas un nouveau)
-                                    app_instance.devis_to_load = devis_obj
-                                    app_instance.current_devis_numero = devis_numero
-                                    app_instance.is_editing_existing_devis = True
-                                    
-                                    # Copier les lignes du devis sélectionné dans l'ordre d'origine
-                                    app_instance.current_devis_lignes = [ligne for ligne in devis_obj.lignes] if devis_obj.lignes else []
-                                    app_instance.current_devis_coefficient = devis_obj.coefficient_marge
-                                    app_instance.selected_client_id = devis_obj.client_id
-                                    
-                                    # Naviguer vers la section devis avec le nouveau système de menu
-                                    if hasattr(app_instance, 'show_section_with_children'):
-                                        # Mettre à jour la section courante
-                                        app_instance.current_section['value'] = 'devis'
-                                        # Naviguer vers la section Devis avec le menu secondaire : d'abord 'liste', puis 'devis'
-                                        app_instance.show_section_with_children('devis', ['liste', 'devis'])
-                                        # Sélectionner l'onglet 'devis' dans le menu horizontal
-                                        if hasattr(app_instance, 'tab_selector'):
-                                            app_instance.tab_selector.value = 'devis_tab'
-                                    
-                                    # Attendre que le panneau soit créé, puis charger les données
-                                    def load_devis_data():
-                                        if hasattr(app_instance, 'numero_devis_field') and app_instance.numero_devis_field:
-                                            app_instance.numero_devis_field.set_value(devis_numero)
-                                        if hasattr(app_instance, 'date_devis_field') and app_instance.date_devis_field:
-                                            app_instance.date_devis_field.set_value(devis_obj.date)
-                                        if hasattr(app_instance, 'client_select') and app_instance.client_select:
-                                            app_instance.client_select.set_value(devis_obj.client_id)
-                                        if hasattr(app_instance, 'tva_rate_field') and app_instance.tva_rate_field:
-                                            app_instance.tva_rate_field.set_value(devis_obj.tva)
-                                        if hasattr(app_instance, 'objet_devis_field') and app_instance.objet_devis_field:
-                                            app_instance.objet_devis_field.set_value(devis_obj.objet or "")
-                                        # Recalculer next_ligne_id basé sur les lignes existantes
-                                        if devis_obj.lignes:
-                                            app_instance.next_ligne_id = max(l.id for l in devis_obj.lignes) + 1
-                                        else:
-                                            app_instance.next_ligne_id = 0
-                                        # Rafraîchir le tableau des lignes
-                                        if hasattr(app_instance, 'refresh_devis_table') and app_instance.refresh_devis_table:
-                                            app_instance.refresh_devis_table()
-                                        app_instance.update_totals()
-                                        from erp.ui.utils import notify_info
-                                        notify_info(f'Devis {devis_numero} chargé pour modification')
-                                    
-                                    ui.timer(0.2, load_devis_data, once=True)
-                                return modify_devis
-                        
-                        def make_pdf_handler(numero=current_devis.numero, client_id=current_devis.client_id, devis_obj=current_devis):
-                                def generate_pdf_devis():
-                                    try:
-                                        from erp.services.pdf_service import generate_pdf as generate_pdf_file
-                                        
-                                        # Recharger le devis depuis le fichier pour avoir les modifications récentes
-                                        updated_devis = app_instance.dm.get_devis_by_numero(numero)
-                                        if not updated_devis:
-                                            notify_error(f'Devis {numero} non trouvé')
-                                            return
-                                        
-                                        client = app_instance.dm.get_client_by_id(client_id)
-                                        if client:
-                                            if client.prenom and client.nom:
-                                                client_name = f"{client.prenom}_{client.nom}"
-                                            elif client.entreprise:
-                                                client_name = client.entreprise
-                                            else:
-                                                client_name = "Client_inconnu"
-                                        else:
-                                            client_name = "Client_inconnu"
-                                        client_name = client_name.replace(" ", "_")
-                                        
-                                        pdf_dir = app_instance.dm.data_dir / 'pdf' / client_name
-                                        pdf_dir.mkdir(parents=True, exist_ok=True)
-                                        pdf_path = pdf_dir / f"{numero}.pdf"
-                                        
-                                        generate_pdf_file(updated_devis, app_instance.dm, pdf_path)
-                                        notify_success(f'PDF généré: {pdf_path}')
-                                    except Exception as e:
-                                        notify_error(f'Erreur: {str(e)}')
-                                return generate_pdf_devis
-                        
-                        def make_delete_handler(numero=current_devis.numero):
-                                def delete_devis():
-                                    # Dialog de confirmation
-                                    with ui.dialog() as confirm_dialog, ui.card():
-                                        ui.label(f'Confirmer la suppression du devis {numero} ?').classes('text-lg font-semibold mb-4')
-                                        ui.label('Cette action est irréversible.').classes('text-gray-600 mb-6')
-                                        with ui.row().classes('gap-2 justify-end w-full'):
-                                            ui.button('Annuler', on_click=confirm_dialog.close).props('flat')
-                                            def confirm_delete():
-                                                for d in app_instance.dm.devis_list[:]:
-                                                    if d.numero == numero:
-                                                        app_instance.dm.delete_devis(numero)
-                                                        notify_success(f'Devis {numero} supprimé')
-                                                        display_table()
-                                                        break
-                                                confirm_dialog.close()
-                                            ui.button('Supprimer', on_click=confirm_delete).props('color=negative')
-                                    confirm_dialog.open()
-                                return delete_devis
-                            
-                        # Actions avec icônes (zone fixe pour alignement)
-                        with ui.row().classes('gap-0 w-48 justify-center items-center'):
-                            # Bouton Créer/Rattacher chantier (visible uniquement pour devis acceptés)
-                            if current_devis.statut == 'accepté':
-                                app_instance.material_icon_button(
-                                    'engineering',
-                                    make_create_projet_handler(current_devis),
-                                    is_delete=False
-                                ).props('title="Créer un nouveau chantier ou rattacher à un chantier existant"')
-                            app_instance.material_icon_button('edit', on_click=make_modify_handler(current_devis.numero, current_devis))
-                            app_instance.material_icon_button('picture_as_pdf', on_click=make_pdf_handler())
-                            app_instance.material_icon_button('delete', on_click=make_delete_handler(), is_delete=True)
-                        
-                        details_container = ui.column().classes('w-full bg-gray-50 p-1 ml-8 hidden gap-0')
-                        
-                        def toggle_details(details=details_container, btn=expand_btn, state=toggle_state):
-                            if state['expanded']:
-                                details.classes(add='hidden')
-                                btn.props('icon=chevron_right')
-                                state['expanded'] = False
-                            else:
-                                details.classes(remove='hidden')
-                                btn.props('icon=expand_more')
-                                state['expanded'] = True
-                        
-                        expand_btn.on('click', toggle_details)
-                        
-                        with details_container:
-                            ui.label(f'Coefficient: {current_devis.coefficient_marge:.2f}').classes('text-xs font-semibold text-gray-700 m-0')
-                            ui.label(f'TVA: {current_devis.tva}%').classes('text-xs text-gray-600 m-0')
-                            if current_devis.notes:
-                                ui.label(f'Notes: {current_devis.notes}').classes('text-xs text-gray-600 italic m-0')
-                            if current_devis.conditions:
-                                ui.label(f'Conditions: {current_devis.conditions}').classes('text-xs text-gray-600 italic m-0')
+                    progress.set_visibility(True)
+                    export_btn.disable()
+                    zip_name = f"devis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+                    zip_path = app_instance.dm.data_dir / 'exports' / zip_name
+                    try:
+                        stats = await export_devis_zip(app_instance.dm, selection, zip_path, on_progress)
+                    except Exception as e:
+                        notify_error(f'Erreur lors de l\'export : {str(e)}')
+                        export_btn.enable()
+                        return
+                    ui.download.file(zip_path, zip_name)
+                    exported = stats['total'] - stats['failed']
+                    notify_success(f"{exported} devis exportés ({stats['rendered']} générés, {stats['cached']} déjà à jour)")
+                    if stats['failed']:
+                        notify_error(f"{stats['failed']} devis non exportés (détail dans ERREURS.txt de l'archive)")
+                    export_dialog.close()
+                
+                with ui.row().classes('w-full justify-end gap-2 mt-4'):
+                    ui.button('Annuler', on_click=export_dialog.close).props('flat')
+                    export_btn = ui.button('Exporter', icon='download', on_click=do_export).props('color=primary')
+            
+            export_dialog.open()
+        
+        colonnes = [
+            {'name': 'expand', 'label': '', 'field': 'numero'},
+            {'name': 'numero', 'label': 'Numéro', 'field': 'numero', 'align': 'center', 'sortable': True},
+            {'name': 'date', 'label': 'Date', 'field': 'date', 'align': 'center', 'sortable': True},
+            {'name': 'client', 'label': 'Client', 'field': 'client', 'align': 'left'},
+            {'name': 'objet', 'label': 'Objet', 'field': 'objet', 'align': 'left', 'sortable': True},
+            {'name': 'statut', 'label': 'Statut', 'field': 'statut', 'align': 'center', 'sortable': True},
+            {'name': 'total_ht', 'label': 'Total HT', 'field': 'total_ht', 'align': 'right'},
+            {'name': 'total_ttc', 'label': 'Total TTC', 'field': 'total_ttc', 'align': 'right'},
+            {'name': 'actions', 'label': 'Actions', 'field': 'numero', 'align': 'center'},
+        ]
+        
+        # Ligne du devis + ligne de détails dépliable (rendues par le navigateur)
+        body_template = '''
+            <q-tr :props="props">
+                <q-td key="expand" :props="props" auto-width>
+                    <q-btn flat round class="themed-link" :icon="props.expand ? 'expand_more' : 'chevron_right'"
+                           @click="props.expand = !props.expand" />
+                </q-td>
+                <q-td key="numero" :props="props" class="font-medium themed-accent">{{ props.row.numero }}</q-td>
+                <q-td key="date" :props="props">{{ props.row.date }}</q-td>
+                <q-td key="client" :props="props">{{ props.row.client }}</q-td>
+                <q-td key="objet" :props="props" class="ellipsis" style="max-width: 320px">{{ props.row.objet }}</q-td>
+                <q-td key="statut" :props="props">
+                    <q-select dense borderless :options='__STATUTS__' :model-value="props.row.statut"
+                              @update:model-value="value => $parent.$emit('statut', {key: props.key, value: value})" />
+                </q-td>
+                <q-td key="total_ht" :props="props" class="text-xs">{{ props.row.total_ht }}</q-td>
+                <q-td key="total_ttc" :props="props" class="font-bold text-xs">{{ props.row.total_ttc }}</q-td>
+                <q-td key="actions" :props="props">
+                    <q-btn v-if="props.row.statut === 'accepté'" flat round icon="engineering" class="themed-link hover:bg-gray-100"
+                           title="Créer un nouveau chantier ou rattacher à un chantier existant"
+                           @click="$parent.$emit('action', {name: 'projet', key: props.key})" />
+                    <q-btn flat round icon="edit" class="themed-link hover:bg-gray-100"
+                           @click="$parent.$emit('action', {name: 'edit', key: props.key})" />
+                    <q-btn flat round icon="picture_as_pdf" class="themed-link hover:bg-gray-100"
+                           @click="$parent.$emit('action', {name: 'pdf', key: props.key})" />
+                    <q-btn flat round icon="delete" class="delete-button hover:bg-red-50"
+                           @click="$parent.$emit('action', {name: 'delete', key: props.key})" />
+                </q-td>
+            </q-tr>
+            <q-tr v-show="props.expand" :props="props">
+                <q-td colspan="100%" class="bg-gray-50">
+                    <div class="text-xs font-semibold text-gray-700">Coefficient: {{ props.row.coefficient }}</div>
+                    <div class="text-xs text-gray-600">TVA: {{ props.row.tva }}%</div>
+                    <div v-if="props.row.notes" class="text-xs text-gray-600 italic">Notes: {{ props.row.notes }}</div>
+                    <div v-if="props.row.conditions" class="text-xs text-gray-600 italic">Conditions: {{ props.row.conditions }}</div>
+                </q-td>
+            </q-tr>
+        '''
+        
+        body_template = body_template.replace('__STATUTS__', json.dumps(DEVIS_STATUSES, ensure_ascii=False))
+        
+        search_input = ui.input(placeholder='Rechercher (numéro, objet)...').props('clearable dense debounce=300').classes('w-96 mb-2')
+        
+        # Conteneur du tableau (remplacé par le panneau chantiers après création d'un chantier)
+        table_container = ui.column().classes('w-full gap-0')
+        
+        def fetch_devis(offset, limit, sort_by, descending):
+            """Charge une page de devis et les clients de cette page uniquement"""
+            devis_page, total = app_instance.dm.page_devis(offset, limit, search=search_input.value or None,
+                                                           order_by=sort_by, descending=descending)
+            clients = {}
+            rows = []
+            for devis in devis_page:
+                if devis.client_id not in clients:
+                    client = app_instance.dm.get_client_by_id(devis.client_id)
+                    clients[devis.client_id] = f"{client.prenom} {client.nom}" if client else "Client inconnu"
+                rows.append({
+                    'numero': devis.numero,
+                    'date': devis.date,
+                    'client': clients[devis.client_id],
+                    'objet': devis.objet or '',
+                    'statut': devis.statut,
+                    'total_ht': f"{devis.total_ht:.2f} EUR",
+                    'total_ttc': f"{devis.total_ttc:.2f} EUR",
+                    'coefficient': f"{devis.coefficient_marge:.2f}",
+                    'tva': devis.tva,
+                    'notes': devis.notes,
+                    'conditions': devis.conditions,
+                })
+            return rows, total
+        
+        def create_projet(numero):
+            devis_obj = app_instance.dm.get_devis_by_numero(numero)
+            if not devis_obj:
+                notify_error(f'Devis {numero} non trouvé')
+                return
+            from erp.ui.panels.projets import create_projet_from_devis
+            create_projet_from_devis(devis_obj, app_instance, table_container)
+        
+        def modify_devis(devis_numero):
+            """Ouvre un devis existant dans l'éditeur"""
+            devis_obj = app_instance.dm.get_devis_by_numero(devis_numero)
+            if not devis_obj:
+                notify_error(f'Devis {devis_numero} non trouvé')
+                return
+            # Marquer qu'on charge un devis existant (pas un nouveau)
+            app_instance.devis_to_load = devis_obj
+            app_instance.current_devis_numero = devis_numero
+            app_instance.is_editing_existing_devis = True
+
+            # Copier les lignes du devis sélectionné dans l'ordre d'origine
+            app_instance.current_devis_lignes = [ligne for ligne in devis_obj.lignes] if devis_obj.lignes else []
+            app_instance.current_devis_coefficient = devis_obj.coefficient_marge
+            app_instance.selected_client_id = devis_obj.client_id
+
+            # Naviguer vers la section devis avec le nouveau système de menu
+            if hasattr(app_instance, 'show_section_with_children'):
+                # Mettre à jour la section courante
+                app_instance.current_section['value'] = 'devis'
+                # Naviguer vers la section Devis avec le menu secondaire : d'abord 'liste', puis 'devis'
+                app_instance.show_section_with_children('devis', ['liste', 'devis'])
+                # Sélectionner l'onglet 'devis' dans le menu horizontal
+                if hasattr(app_instance, 'tab_selector'):
+                    app_instance.tab_selector.value = 'devis_tab'
+
+            # Attendre que le panneau soit créé, puis charger les données
+            def load_devis_data():
+                if hasattr(app_instance, 'numero_devis_field') and app_instance.numero_devis_field:
+                    app_instance.numero_devis_field.set_value(devis_numero)
+                if hasattr(app_instance, 'date_devis_field') and app_instance.date_devis_field:
+                    app_instance.date_devis_field.set_value(devis_obj.date)
+                if hasattr(app_instance, 'client_select') and app_instance.client_select:
+                    app_instance.client_select.set_value(devis_obj.client_id)
+                if hasattr(app_instance, 'tva_rate_field') and app_instance.tva_rate_field:
+                    app_instance.tva_rate_field.set_value(devis_obj.tva)
+                if hasattr(app_instance, 'objet_devis_field') and app_instance.objet_devis_field:
+                    app_instance.objet_devis_field.set_value(devis_obj.objet or "")
+                # Recalculer next_ligne_id basé sur les lignes existantes
+                if devis_obj.lignes:
+                    app_instance.next_ligne_id = max(l.id for l in devis_obj.lignes) + 1
+                else:
+                    app_instance.next_ligne_id = 0
+                # Rafraîchir le tableau des lignes
+                if hasattr(app_instance, 'refresh_devis_table') and app_instance.refresh_devis_table:
+                    app_instance.refresh_devis_table()
+                app_instance.update_totals()
+                from erp.ui.utils import notify_info
+                notify_info(f'Devis {devis_numero} chargé pour modification')
+
+            ui.timer(0.2, load_devis_data, once=True)
+
+        async def generate_pdf_devis(numero):
+            from erp.services.pdf_render_service import PdfRenderContext, get_pdf_render_service
+            from erp.services.pdf_export_service import client_folder_name
+            from erp.utils.exceptions import PDFGenerationError
+            try:
+                # Recharger le devis depuis le fichier pour avoir les modifications récentes
+                updated_devis = app_instance.dm.get_devis_by_numero(numero)
+                if not updated_devis:
+                    notify_error(f'Devis {numero} non trouvé')
+                    return
+
+                client = app_instance.dm.get_client_by_id(updated_devis.client_id)
+                client_name = client_folder_name(client)
+
+                pdf_path = app_instance.dm.data_dir / 'pdf' / client_name / f"{numero}.pdf"
+
+                # Rendu dans le pool de processus (cache disque si le devis est inchangé)
+                context = PdfRenderContext.from_data_manager(app_instance.dm, updated_devis)
+                await get_pdf_render_service().render(updated_devis, context, pdf_path)
+                notify_success(f'PDF généré: {pdf_path}')
+            except PDFGenerationError as e:
+                notify_error(e.message)
+            except Exception as e:
+                notify_error(f'Erreur: {str(e)}')
+
+        def delete_devis(numero):
+            # Dialog de confirmation
+            with ui.dialog() as confirm_dialog, ui.card():
+                ui.label(f'Confirmer la suppression du devis {numero} ?').classes('text-lg font-semibold mb-4')
+                ui.label('Cette action est irréversible.').classes('text-gray-600 mb-6')
+                with ui.row().classes('gap-2 justify-end w-full'):
+                    ui.button('Annuler', on_click=confirm_dialog.close).props('flat')
+                    def confirm_delete():
+                        if app_instance.dm.get_devis_by_numero(numero):
+                            app_instance.dm.delete_devis(numero)
+                            notify_success(f'Devis {numero} supprimé')
+                            display_table()
+                        confirm_dialog.close()
+                    ui.button('Supprimer', on_click=confirm_delete).props('color=negative')
+            confirm_dialog.open()
         
-        # Afficher le tableau une première fois
-        display_table()
+        def on_statut_change(e):
+            devis_obj = app_instance.dm.get_devis_by_numero(e.args['key'])
+            if devis_obj:
+                devis_obj.statut = e.args['value']
+                app_instance.dm.update_devis(devis_obj)
+            display_table()
+        
+        handlers = {'projet': create_projet, 'edit': modify_devis, 'pdf': generate_pdf_devis, 'delete': delete_devis}
+        
+        with table_container:
+            # Tableau paginé côté serveur : seule la page affichée est chargée
+            devis_table = PagedTable(
+                colonnes,
+                fetch_devis,
+                row_key='numero',
+                sort_by='date',
+                descending=True,
+                on_action=lambda name, numero: handlers[name](numero),
+                empty_label='Aucun devis trouvé',
+            )
+        devis_table.table.add_slot('body', body_template)
+        devis_table.table.on('statut', on_statut_change)
+        search_input.on_value_change(lambda: devis_table.refresh(reset_page=True))
+        
+        def display_table():
+            """Recharge la page affichée des devis"""
+            devis_table.refresh()
         
         # Stocker pour les rafraîchissements
         app_instance.display_table_callback = display_table
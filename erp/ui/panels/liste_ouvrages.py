@@ -3,9 +3,9 @@ Panel de liste des ouvrages
 """
 
 from nicegui import ui
+from erp.ui.components import PagedTable
 from erp.ui.utils import notify_success, notify_error
-import json
-from pathlib import Path
+from erp.services.category_service import get_category_service
 
 
 def create_liste_ouvrages_panel(app_instance):
@@ -20,82 +20,82 @@ def create_liste_ouvrages_panel(app_instance):
         
         selected_filters = {'categorie': None}
         
-        # Charger les catégories depuis le fichier
-        def load_categories():
-            categories_file = Path('data') / 'categories.json'
-            if categories_file.exists():
-                with open(categories_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
-        
-        categories_data = load_categories()
+        # Arborescence des catégories (cache partagé, descendants précalculés)
+        category_service = get_category_service()
+        categories_data = category_service.get_tree().nodes
         
         # Conteneurs
         filters_container = ui.column().classes('w-full')
-        ouvrages_container = ui.column().classes('w-full gap-0')
         
-        def refresh_ouvrages_list():
-            app_instance.dm.load_data()
-            ouvrages_container.clear()
-            
-            # Appliquer les filtres
-            filtered_ouvrages = app_instance.dm.ouvrages
-            
-            # Filtrer par catégorie uniquement
+        colonnes = [
+            {'name': 'reference', 'label': 'Reference', 'field': 'reference', 'align': 'left', 'sortable': True,
+             'classes': 'font-mono'},
+            {'name': 'designation', 'label': 'Designation', 'field': 'designation', 'align': 'left', 'sortable': True},
+            {'name': 'categorie', 'label': 'Catégorie', 'field': 'categorie', 'align': 'left', 'sortable': True,
+             'classes': 'text-gray-600'},
+            {'name': 'prix_revient', 'label': 'Prix revient', 'field': 'prix_revient', 'align': 'right',
+             'classes': 'font-semibold'},
+            {'name': 'actions', 'label': 'Actions', 'field': 'id', 'align': 'center'},
+        ]
+        
+        search_input = ui.input(placeholder='Rechercher (référence, désignation)...').props('clearable dense debounce=300').classes('w-96 mb-2')
+        
+        def fetch_ouvrages(offset, limit, sort_by, descending):
+            """Charge une page d'ouvrages filtrés par catégorie"""
+            categories = None
             if selected_filters['categorie']:
                 # Filtre par catégorie principale : inclure les ouvrages de cette catégorie et de ses sous-catégories
-                cat_node = next((c for c in categories_data if c['id'] == selected_filters['categorie']), None)
-                if cat_node:
-                    allowed_categories = [selected_filters['categorie']]
-                    if cat_node.get('children'):
-                        allowed_categories.extend([child['id'] for child in cat_node['children']])
-                    filtered_ouvrages = [o for o in filtered_ouvrages if o.categorie in allowed_categories]
-            
-            if not filtered_ouvrages:
-                with ouvrages_container:
-                    ui.label('Aucun ouvrage dans cette catégorie.').classes('text-gray-500 text-center py-8')
+                categories = category_service.get_tree().descendants(selected_filters['categorie'])
+            ouvrages, total = app_instance.dm.page_ouvrages(offset, limit, categories=categories,
+                                                            search=search_input.value or None,
+                                                            order_by=sort_by, descending=descending)
+            rows = [
+                {
+                    'id': o.id,
+                    'reference': o.reference,
+                    'designation': o.designation,
+                    'categorie': o.categorie,
+                    'prix_revient': f"{o.prix_revient_unitaire:.2f}",
+                }
+                for o in ouvrages
+            ]
+            return rows, total
+        
+        def edit_ouvrage(ouvrage_id):
+            ouvrage = app_instance.dm.get_ouvrage_by_id(ouvrage_id)
+            if not ouvrage:
+                notify_error('Ouvrage non trouvé')
                 return
+            # Stocker l'ouvrage à éditer dans l'instance de l'app
+            app_instance.ouvrage_to_edit = ouvrage
             
-            with ouvrages_container:
-                # Headers
-                with ui.row().classes('w-full gap-2 font-bold bg-gray-100 p-1 rounded'):
-                    ui.label('Reference').classes('w-40')
-                    ui.label('Designation').classes('flex-1')
-                    ui.label('Catégorie').classes('w-32')
-                    ui.label('Prix revient').classes('w-24 text-right')
-                    ui.label('Actions').classes('w-32')
-                
-                # Rows
-                for ouvrage in filtered_ouvrages:
-                    with ui.row().classes('w-full gap-2 p-1 items-center hover:bg-gray-50 text-sm border-b border-gray-100'):
-                        ui.label(ouvrage.reference).classes('w-40 font-mono')
-                        ui.label(ouvrage.designation).classes('flex-1')
-                        ui.label(ouvrage.categorie).classes('w-32 text-gray-600')
-                        ui.label(f"{ouvrage.prix_revient_unitaire:.2f}").classes('w-24 text-right font-semibold')
-                        
-                        def make_edit_handler(ouv):
-                            def edit_ouvrage():
-                                # Stocker l'ouvrage à éditer dans l'instance de l'app
-                                app_instance.ouvrage_to_edit = ouv
-                                
-                                # Naviguer vers la section ouvrages
-                                if hasattr(app_instance, 'show_section_with_children'):
-                                    app_instance.current_section['value'] = 'ouvrages'
-                                    app_instance.show_section_with_children('ouvrages', ['ouvrages', 'liste_ouvrages'])
-                                    if hasattr(app_instance, 'tab_selector'):
-                                        app_instance.tab_selector.value = 'ouvrages_tab'
-                            return edit_ouvrage
-                        
-                        def make_delete_handler(ouv):
-                            def delete_ouvrage():
-                                notify_success('Ouvrage supprimé')
-                                app_instance.dm.delete_ouvrage(ouv.id)
-                                refresh_ouvrages_list()
-                            return delete_ouvrage
-                        
-                        with ui.row().classes('gap-1 w-32'):
-                            app_instance.material_icon_button('edit', on_click=make_edit_handler(ouvrage))
-                            app_instance.material_icon_button('delete', on_click=make_delete_handler(ouvrage), is_delete=True)
+            # Naviguer vers la section ouvrages
+            if hasattr(app_instance, 'show_section_with_children'):
+                app_instance.current_section['value'] = 'ouvrages'
+                app_instance.show_section_with_children('ouvrages', ['ouvrages', 'liste_ouvrages'])
+                if hasattr(app_instance, 'tab_selector'):
+                    app_instance.tab_selector.value = 'ouvrages_tab'
+        
+        def delete_ouvrage(ouvrage_id):
+            app_instance.dm.delete_ouvrage(ouvrage_id)
+            notify_success('Ouvrage supprimé')
+            ouvrages_table.refresh()
+        
+        handlers = {'edit': edit_ouvrage, 'delete': delete_ouvrage}
+        
+        # Tableau paginé côté serveur : seule la page affichée est chargée
+        ouvrages_table = PagedTable(
+            colonnes,
+            fetch_ouvrages,
+            sort_by='reference',
+            actions=[('edit', 'edit', False), ('delete', 'delete', True)],
+            on_action=lambda name, ouvrage_id: handlers[name](ouvrage_id),
+            empty_label='Aucun ouvrage dans cette catégorie.',
+        )
+        search_input.on_value_change(lambda: ouvrages_table.refresh(reset_page=True))
+        
+        def refresh_ouvrages_list():
+            ouvrages_table.refresh(reset_page=True)
         
         # Section filtres en haut (après la définition de refresh_ouvrages_list)
         with filters_container:
@@ -128,5 +128,3 @@ def create_liste_ouvrages_panel(app_instance):
                             
                             ui.button(cat_label, on_click=make_select_cat(cat_id)).props('size=sm flat')
         
-        # Appeler refresh pour remplir le tableau initial
-        refresh_ouvrages_list()
@@ -24,6 +24,7 @@ def create_company_panel(app_instance):
         
         def display_organisation():
             """Affiche les informations de l'organisation"""
+            org = app_instance.dm.organisation
             org_container.clear()
             with org_container:
                 with ui.column().classes('w-full gap-6'):
@@ -31,42 +32,42 @@ def create_company_panel(app_instance):
                     with ui.row().classes('w-full gap-6 p-6 bg-gray-50 rounded'):
                         with ui.column().classes('flex-1'):
                             ui.label('Nom').classes('font-semibold text-base')
-                            ui.label(app_instance.dm.organisation.nom or '-').classes('text-lg')
+                            ui.label(org.nom or '-').classes('text-lg')
                         with ui.column().classes('flex-1'):
                             ui.label('SIRET').classes('font-semibold text-base')
-                            ui.label(app_instance.dm.organisation.siret or '-').classes('text-lg')
+                            ui.label(org.siret or '-').classes('text-lg')
                     
                     with ui.row().classes('w-full gap-6 p-6 bg-gray-50 rounded'):
                         with ui.column().classes('flex-1'):
                             ui.label('Adresse').classes('font-semibold text-base')
-                            ui.label(app_instance.dm.organisation.adresse or '-').classes('text-lg')
+                            ui.label(org.adresse or '-').classes('text-lg')
                         with ui.column().classes('flex-1'):
                             ui.label('Code Postal').classes('font-semibold text-base')
-                            ui.label(app_instance.dm.organisation.cp or '-').classes('text-lg')
+                            ui.label(org.cp or '-').classes('text-lg')
                     
                     with ui.row().classes('w-full gap-6 p-6 bg-gray-50 rounded'):
                         with ui.column().classes('flex-1'):
                             ui.label('Ville').classes('font-semibold text-base')
-                            ui.label(app_instance.dm.organisation.ville or '-').classes('text-lg')
+                            ui.label(org.ville or '-').classes('text-lg')
                         with ui.column().classes('flex-1'):
                             ui.label('Téléphone').classes('font-semibold text-base')
-                            ui.label(app_instance.dm.organisation.telephone or '-').classes('text-lg')
+                            ui.label(org.telephone or '-').classes('text-lg')
                     
                     with ui.row().classes('w-full gap-6 p-6 bg-gray-50 rounded'):
                         with ui.column().classes('flex-1'):
                             ui.label('Email').classes('font-semibold text-base')
-                            ui.label(app_instance.dm.organisation.email or '-').classes('text-lg')
+                            ui.label(org.email or '-').classes('text-lg')
                         with ui.column().classes('flex-1'):
                             ui.label('Site Web').classes('font-semibold text-base')
-                            ui.label(app_instance.dm.organisation.site_web or '-').classes('text-lg')
+                            ui.label(org.site_web or '-').classes('text-lg')
                     
                     with ui.row().classes('w-full gap-6 p-6 bg-gray-50 rounded'):
                         with ui.column().classes('flex-1'):
                             ui.label('Début d\'exercice').classes('font-semibold text-base')
-                            ui.label(getattr(app_instance.dm.organisation, 'date_debut_exercice', None) or '-').classes('text-lg')
+                            ui.label(getattr(org, 'date_debut_exercice', None) or '-').classes('text-lg')
                         with ui.column().classes('flex-1'):
                             ui.label('Fin d\'exercice').classes('font-semibold text-base')
-                            ui.label(getattr(app_instance.dm.organisation, 'date_fin_exercice', None) or '-').classes('text-lg')
+                            ui.label(getattr(org, 'date_fin_exercice', None) or '-').classes('text-lg')
                     
                     # Edit button
                     with ui.row().classes('gap-2 mt-8 justify-end'):
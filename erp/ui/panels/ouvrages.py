@@ -7,8 +7,7 @@ Contient tous les composants pour créer, éditer et gérer les ouvrages.
 from nicegui import ui
 from erp.core.models import Ouvrage, ComposantOuvrage
 from erp.ui.utils import notify_success, notify_error, notify_info
-import json
-from pathlib import Path
+from erp.services.category_service import get_category_service
 
 
 def create_ouvrages_panel(app_instance):
@@ -18,15 +17,9 @@ def create_ouvrages_panel(app_instance):
         app_instance: Instance de DevisApp contenant dm et autres état
     """
     
-    # Charger les catégories depuis le fichier
-    def load_categories():
-        categories_file = Path('data') / 'categories.json'
-        if categories_file.exists():
-            with open(categories_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
-    
-    categories_data = load_categories()
+    # Arborescence des catégories (cache partagé, descendants précalculés)
+    category_service = get_category_service()
+    categories_data = category_service.get_tree().nodes
     
     # Ajouter le style CSS global pour masquer les flèches des champs number
     ui.add_head_html('''
@@ -267,21 +260,16 @@ def create_ouvrages_panel(app_instance):
                                 """Filtrer et afficher les articles"""
                                 articles_list_container.clear()
                                 
-                                # Récupérer tous les articles
-                                articles = app_instance.dm.articles
-                                
-                                # Filtrer par sous-catégorie si sélectionnée
-                                if selected_sous_cat_filter['value']:
-                                    articles = [a for a in articles if getattr(a, 'categorie', 'general') == selected_sous_cat_filter['value']]
-                                # Sinon filtrer par catégorie (en tenant compte des sous-catégories)
-                                elif categorie_filter.value != 'toutes':
-                                    # Trouver la catégorie sélectionnée et ses sous-catégories
-                                    cat_node = next((c for c in categories_data if c['id'] == categorie_filter.value), None)
-                                    if cat_node:
-                                        allowed_categories = [categorie_filter.value]
-                                        if cat_node.get('children'):
-                                            allowed_categories.extend([child['id'] for child in cat_node['children']])
-                                        articles = [a for a in articles if getattr(a, 'categorie', 'general') in allowed_categories]
+                                # Filtrer par sous-catégorie si sélectionnée, sinon par catégorie
+                                # (sous-catégories incluses, à toute profondeur) directement en SQL
+                                selected_cat = selected_sous_cat_filter['value']
+                                if not selected_cat and categorie_filter.value != 'toutes':
+                                    selected_cat = categorie_filter.value
+                                if selected_cat:
+                                    tree = category_service.get_tree()
+                                    articles = app_instance.dm.get_articles_by_categories(tree.sql_in_list(selected_cat))
+                                else:
+                                    articles = app_instance.dm.articles
                                 
                                 # Filtrer par type
                                 if type_filter.value != 'tous':
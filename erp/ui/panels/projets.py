@@ -6,6 +6,8 @@ from datetime import datetime
 from nicegui import ui
 from erp.core.storage_config import get_data_manager
 from erp.core.models import Projet, DepenseReelle
+from erp.services.projet_summary_service import get_projet_summary_service
+from erp.ui.components import KeyedList
 from erp.ui.utils import notify_success, notify_error, notify_warning
 
 
@@ -177,51 +179,70 @@ def render_projets_panel(app_instance):
                 render_projets_list(dm.projets, app_instance, projets_container)
 
 
-def render_projets_list(projets, app_instance, container):
-    """Affiche les chantiers dans une vue type Trello avec colonnes par statut"""
-    dm = get_data_manager()
-    
-    # Colonnes de statut
-    statuts = [
-        {'key': 'en attente', 'label': 'En attente', 'icon': 'schedule', 'color': 'yellow'},
-        {'key': 'en cours', 'label': 'En cours', 'icon': 'construction', 'color': 'blue'},
-        {'key': 'terminé', 'label': 'Terminé', 'icon': 'check_circle', 'color': 'green'},
-        {'key': 'annulé', 'label': 'Annulé', 'icon': 'cancel', 'color': 'red'}
-    ]
-    
-    # Grouper les projets par statut
-    projets_by_statut = {s['key']: [] for s in statuts}
+# Colonnes de statut du tableau des chantiers
+PROJET_STATUTS = [
+    {'key': 'en attente', 'label': 'En attente', 'icon': 'schedule', 'color': 'yellow'},
+    {'key': 'en cours', 'label': 'En cours', 'icon': 'construction', 'color': 'blue'},
+    {'key': 'terminé', 'label': 'Terminé', 'icon': 'check_circle', 'color': 'green'},
+    {'key': 'annulé', 'label': 'Annulé', 'icon': 'cancel', 'color': 'red'}
+]
+
+
+def group_projets_by_statut(projets):
+    """Groupe les chantiers par statut, les plus récents d'abord"""
+    projets_by_statut = {s['key']: [] for s in PROJET_STATUTS}
     for projet in projets:
         if projet.statut in projets_by_statut:
             projets_by_statut[projet.statut].append(projet)
+    for projets_statut in projets_by_statut.values():
+        projets_statut.sort(key=lambda p: p.date_creation, reverse=True)
+    return projets_by_statut
+
+
+def projet_card_summary(projet, dm):
+    """Chiffres affichés sur la card d'un chantier (servent aussi à détecter une modification)
+
+    Les totaux viennent du cache des chantiers : le détail par article n'est
+    calculé qu'à l'ouverture de la card.
+    """
+    client = dm.get_client_by_id(projet.client_id)
+    return {
+        'client_name': f"{client.prenom} {client.nom}" if client else "Client inconnu",
+        **get_projet_summary_service().get_summary(projet, dm),
+    }
+
+
+def render_projets_list(projets, app_instance, container):
+    """Affiche les chantiers dans une vue type Trello avec colonnes par statut"""
+    dm = get_data_manager()
     
     # Dictionnaire global pour stocker les colonnes et gérer l'expansion
     columns_dict = {'columns': [], 'expanded_card': None}
     
+    # Couleurs de colonne
+    bg_colors = {
+        'yellow': 'bg-yellow-50',
+        'blue': 'bg-blue-50',
+        'green': 'bg-green-50',
+        'red': 'bg-red-50'
+    }
+    border_colors = {
+        'yellow': 'border-yellow-200',
+        'blue': 'border-blue-200',
+        'green': 'border-green-200',
+        'red': 'border-red-200'
+    }
+    
+    # Cards de chaque colonne, réconciliées par id de chantier lors des rafraîchissements
+    board = {'columns_dict': columns_dict, 'statuts': {}}
+    
+    def render_card(entry):
+        projet, summary = entry
+        return render_projet_card(projet, dm, app_instance, container, columns_dict, summary)
+    
     # Afficher les colonnes
     with ui.row().classes('w-full gap-4').style('align-items: stretch;'):
-        for statut_info in statuts:
-            statut_key = statut_info['key']
-            projets_statut = sorted(
-                projets_by_statut[statut_key],
-                key=lambda p: p.date_creation,
-                reverse=True
-            )
-            
-            # Couleurs de colonne
-            bg_colors = {
-                'yellow': 'bg-yellow-50',
-                'blue': 'bg-blue-50',
-                'green': 'bg-green-50',
-                'red': 'bg-red-50'
-            }
-            border_colors = {
-                'yellow': 'border-yellow-200',
-                'blue': 'border-blue-200',
-                'green': 'border-green-200',
-                'red': 'border-red-200'
-            }
-            
+        for statut_info in PROJET_STATUTS:
             # Colonne
             colonne = ui.column().classes(f'flex-1 {bg_colors[statut_info["color"]]} p-4 rounded-lg border-2 {border_colors[statut_info["color"]]}').style('min-width: 300px; min-height: 600px; transition: all 0.3s ease;')
             columns_dict['columns'].append(colonne)
@@ -231,22 +252,46 @@ def render_projets_list(projets, app_instance, container):
                 with ui.row().classes('w-full items-center gap-2 mb-4'):
                     ui.icon(statut_info['icon']).classes('text-xl')
                     ui.label(statut_info['label']).classes('text-lg font-bold')
-                    ui.label(f'({len(projets_statut)})').classes('text-sm text-gray-500')
+                    count_label = ui.label('(0)').classes('text-sm text-gray-500')
                 
                 # Cards des chantiers
-                for projet in projets_statut:
-                    render_projet_card(projet, dm, app_instance, container, columns_dict)
+                cards = KeyedList(
+                    ui.column().classes('w-full gap-0'),
+                    key=lambda entry: entry[0].id,
+                    render=render_card,
+                    signature=lambda entry: (repr(entry[0]), entry[1]),
+                )
+            board['statuts'][statut_info['key']] = (count_label, cards)
+    
+    update_projets_board(board, projets, dm)
+    container.projets_board = board
 
 
-def render_projet_card(projet, dm, app_instance, container, columns_dict):
-    """Affiche une card individuelle de chantier dans le style Trello"""
-    client = dm.get_client_by_id(projet.client_id)
-    client_name = f"{client.prenom} {client.nom}" if client else "Client inconnu"
+def update_projets_board(board, projets, dm):
+    """Met à jour les colonnes du tableau : seules les cards modifiées sont recréées"""
+    projets_by_statut = group_projets_by_statut(projets)
+    for statut_key, (count_label, cards) in board['statuts'].items():
+        projets_statut = projets_by_statut[statut_key]
+        count_label.text = f'({len(projets_statut)})'
+        cards.update((projet, projet_card_summary(projet, dm)) for projet in projets_statut)
     
-    # Calculer les données
-    prev = projet.get_previsionnel(dm)
-    reel = projet.get_reel()
-    ecarts = projet.get_ecarts(dm)
+    # La card dépliée a pu être recréée : restaurer la largeur des colonnes
+    columns_dict = board['columns_dict']
+    expanded = columns_dict['expanded_card']
+    if expanded and expanded['card'].is_deleted:
+        columns_dict['expanded_card'] = None
+        for col in columns_dict['columns']:
+            col.style('min-width: 300px; flex: 1; transition: all 0.3s ease;')
+
+
+def render_projet_card(projet, dm, app_instance, container, columns_dict, summary=None):
+    """Affiche une card individuelle de chantier dans le style Trello
+    
+    Returns:
+        L'élément racine de la card
+    """
+    summary = summary or projet_card_summary(projet, dm)
+    client_name = summary['client_name']
     
     # Card avec hover effect
     card_element = ui.card().classes('w-full mb-3 cursor-pointer hover:shadow-lg transition-shadow').style('background: white; transition: all 0.3s ease;')
@@ -325,30 +370,30 @@ def render_projet_card(projet, dm, app_instance, container, columns_dict):
             with ui.column().classes('w-full gap-1 text-xs'):
                 with ui.row().classes('justify-between'):
                     ui.label('Prévu:').classes('text-gray-600')
-                    ui.label(f"{prev['total_ht']:.2f} €").classes('font-semibold')
+                    ui.label(f"{summary['prev_total_ht']:.2f} €").classes('font-semibold')
                 
                 with ui.row().classes('justify-between'):
                     ui.label('Réel:').classes('text-gray-600')
-                    ui.label(f"{reel['total_ht']:.2f} €").classes('font-bold')
+                    ui.label(f"{summary['reel_total_ht']:.2f} €").classes('font-bold')
                 
                 with ui.row().classes('justify-between'):
                     ui.label('Écart:').classes('text-gray-600')
-                    ecart_color = 'text-red-600' if ecarts['total_ht']['ecart'] > 0 else 'text-green-600'
-                    ui.label(f"{ecarts['total_ht']['ecart']:+.2f} € ({ecarts['total_ht']['ecart_pct']:+.1f}%)").classes(f'font-bold {ecart_color}')
+                    ecart_color = 'text-red-600' if summary['ecart'] > 0 else 'text-green-600'
+                    ui.label(f"{summary['ecart']:+.2f} € ({summary['ecart_pct']:+.1f}%)").classes(f'font-bold {ecart_color}')
         
-        # Container pour les détails (masqué par défaut)
+        # Container pour les détails (masqué, rempli à l'ouverture de la card)
         details_container = ui.column().classes('w-full mt-2 gap-2').style('display: none')
         projet_details['details_container'] = details_container
-        
-        with details_container:
-            render_projet_details(projet, dm, app_instance, container)
+    
+    return card_element
 
 
 def render_projet_details(projet, dm, app_instance, container):
-    """Affiche les détails d'un chantier (prévisionnel vs réel)"""
-    prev = projet.get_previsionnel(dm)
-    reel = projet.get_reel()
-    ecarts = projet.get_ecarts(dm)
+    """Affiche les détails d'un chantier (prévisionnel vs réel, calculés une fois puis en cache)"""
+    details = get_projet_summary_service().get_details(projet, dm)
+    prev = details['prev']
+    reel = details['reel']
+    ecarts = details['ecarts']
     
     with ui.tabs().classes('w-full') as tabs:
         ui.tab('Synthèse', icon='dashboard')
@@ -579,7 +624,7 @@ def toggle_projet_details(projet, details_dict, app_instance, dm):
         current_column = None
         for col in columns_dict['columns']:
             # Détecter si cette colonne contient la card active (vérifier si card est dans cette colonne)
-            if card.parent_slot and card.parent_slot.parent == col:
+            if col in card.ancestors():
                 current_column = col
                 break
         
@@ -837,12 +882,19 @@ def delete_projet(projet, app_instance, container):
 
 
 def refresh_projets_list(app_instance, container):
-    """Rafraîchit la liste des chantiers"""
+    """Rafraîchit la liste des chantiers (seules les cards modifiées sont recréées)"""
     dm = get_data_manager()
+    projets = dm.projets
+    board = getattr(container, 'projets_board', None)
+    if board is not None and projets:
+        update_projets_board(board, projets, dm)
+        return
+    
+    container.projets_board = None
     container.clear()
     with container:
-        if not dm.projets:
+        if not projets:
             ui.label('Aucun chantier pour le moment').classes('text-gray-500 italic')
             ui.label('Les chantiers sont créés à partir des devis acceptés').classes('text-sm text-gray-400')
         else:
-            render_projets_list(dm.projets, app_instance, container)
+            render_projets_list(projets, app_instance, container)
@@ -1,9 +1,15 @@
 """
 Utilitaires et helpers pour l'UI
 """
-from typing import Callable, Dict, Any, Optional
+import asyncio
+from typing import Callable, Dict, Any, List, Optional
 from nicegui import ui
 
+from erp.core.constants import DEBOUNCE_INPUT
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
 
 # ============================================================================
 # HANDLERS GÉNÉRIQUES
@@ -127,3 +133,56 @@ class DebounceTimer:
                 once=True
             )
         return wrapper
+
+
+class EditBatcher:
+    """Regroupe les modifications rapides et les applique en un seul lot
+
+    Chaque ``push(key)`` relance le délai ; à son expiration, ``apply`` reçoit
+    les clés modifiées (sans doublon, dans l'ordre de première modification).
+    ``flush()`` applique immédiatement le lot en attente (touche Entrée,
+    validation d'un dialogue), ``cancel()`` l'abandonne (reconstruction
+    complète déjà prévue).
+    """
+    def __init__(self, apply: Callable[[List[Any]], None], wait: float = DEBOUNCE_INPUT):
+        self.wait = wait
+        self._apply = apply
+        self._pending: Dict[Any, None] = {}
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def pending(self) -> List[Any]:
+        """Clés en attente d'application"""
+        return list(self._pending)
+
+    def push(self, key: Any):
+        """Signale une modification et relance le délai"""
+        self._pending[key] = None
+        if self._handle:
+            self._handle.cancel()
+        try:
+            self._handle = asyncio.get_running_loop().call_later(self.wait, self.flush)
+        except RuntimeError:
+            # Hors boucle asyncio (scripts, tests) : application immédiate
+            self._handle = None
+            self.flush()
+
+    def flush(self):
+        """Applique le lot en attente"""
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        keys, self._pending = list(self._pending), {}
+        if not keys:
+            return
+        try:
+            self._apply(keys)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'application des modifications: {e}", exc_info=True)
+
+    def cancel(self):
+        """Abandonne le lot en attente"""
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        self._pending = {}
@@ -0,0 +1,64 @@
+"""
+Cache mémoire à durée de vie limitée (TTL)
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+# Valeur retournée par TTLCache.get pour une clé absente ou expirée
+MISSING = object()
+
+
+class TTLCache:
+    """Cache clé/valeur avec expiration et taille bornée (LRU)
+
+    Args:
+        ttl: Durée de vie d'une entrée en secondes
+        max_entries: Nombre maximal d'entrées conservées
+        clock: Horloge monotone (remplaçable dans les tests)
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Retourne la valeur si elle est présente et non expirée, sinon default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if self._clock() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Enregistre une valeur (ttl spécifique optionnel)"""
+        with self._lock:
+            self._entries[key] = (value, self._clock() + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Supprime une entrée"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,327 @@
+"""
+Générateur de données synthétiques à volume réaliste
+
+Remplit une base (PostgreSQL configurée ou toute URL SQLAlchemy) avec des
+fournisseurs, clients, articles, ouvrages, devis et chantiers cohérents entre
+eux : les lignes de devis reprennent les composants des ouvrages, les
+chantiers regroupent des devis acceptés et leurs dépenses portent sur les
+articles de ces devis.
+
+À l'échelle 1 : 100 000 articles, 5 000 ouvrages, 50 000 devis de 50 à 500
+lignes et 2 000 chantiers. Les données sont produites et insérées par lots
+(INSERT multi-lignes) sans jamais être toutes en mémoire ; une graine fixe
+donne toujours la même base.
+
+Exécuter: python -m erp.utils.data_generator --scale 0.01 [--url sqlite:///data/bench.db]
+"""
+import argparse
+import random
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from erp.core.constants import DEFAULT_TVA_RATE, DEVIS_NUMBER_FORMAT, DEVIS_STATUSES
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Volumes à l'échelle 1
+FULL_VOLUMES = {
+    'fournisseurs': 200,
+    'clients': 5_000,
+    'articles': 100_000,
+    'ouvrages': 5_000,
+    'devis': 50_000,
+    'projets': 2_000,
+}
+
+# Bornes indépendantes de l'échelle
+LIGNES_PAR_DEVIS = (50, 500)
+COMPOSANTS_PAR_OUVRAGE = (3, 8)
+DEVIS_PAR_PROJET = (1, 3)
+DEPENSES_PAR_PROJET = (10, 150)
+PREMIERE_ANNEE = 2019
+NB_ANNEES = 7
+
+CATEGORIES = ['platrerie', 'menuiserie_int', 'menuiserie_ext', 'faux_plafond', 'agencement', 'isolation', 'peinture']
+
+# Type d'article : (proportion, unités possibles, fourchette de prix unitaire)
+TYPES_ARTICLE = {
+    'materiau': (0.55, ['m²', 'ml', 'u', 'm³'], (1.5, 180.0)),
+    'fourniture': (0.25, ['u', 'boîte', 'ml'], (0.5, 60.0)),
+    'consommable': (0.15, ['u', 'kg', 'l'], (0.2, 35.0)),
+    'main_oeuvre': (0.05, ['h'], (32.0, 65.0)),
+}
+
+MOTS = {
+    'platrerie': ['Plaque BA13', 'Plaque hydrofuge', 'Rail 48', 'Montant 70', 'Bande à joint', 'Enduit'],
+    'menuiserie_int': ['Bloc-porte', 'Huisserie', 'Plinthe chêne', 'Porte coulissante', 'Poignée'],
+    'menuiserie_ext': ['Fenêtre PVC', 'Volet roulant', 'Porte-fenêtre', 'Appui de fenêtre', 'Baie alu'],
+    'faux_plafond': ['Dalle 60x60', 'Ossature T24', 'Suspente', 'Cornière de rive', 'Dalle acoustique'],
+    'agencement': ['Placard', 'Étagère', 'Plan de travail', 'Caisson', 'Façade mélaminée'],
+    'isolation': ['Laine de verre', 'Laine de roche', 'Polystyrène', 'Pare-vapeur', 'Isolant mince'],
+    'peinture': ['Peinture acrylique', 'Sous-couche', 'Lasure', 'Enduit de lissage', 'Toile de verre'],
+}
+QUALIFICATIFS = ['standard', 'renforcé', 'premium', 'éco', 'haute densité', 'ignifugé', 'blanc', 'gris']
+NOMS = ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand', 'Leroy', 'Moreau',
+        'Simon', 'Laurent', 'Lefebvre', 'Michel', 'Garcia', 'David', 'Bertrand', 'Roux', 'Vincent', 'Fournier']
+PRENOMS = ['Jean', 'Marie', 'Pierre', 'Sophie', 'Luc', 'Julie', 'Paul', 'Claire', 'Marc', 'Anne', 'Hugo', 'Léa']
+VILLES = [('75001', 'Paris'), ('69002', 'Lyon'), ('13001', 'Marseille'), ('59000', 'Lille'),
+          ('33000', 'Bordeaux'), ('44000', 'Nantes'), ('67000', 'Strasbourg'), ('31000', 'Toulouse')]
+
+
+def volumes(scale: float) -> Dict[str, int]:
+    """Volumes à générer pour une échelle donnée (au moins un élément de chaque)"""
+    return {name: max(1, round(count * scale)) for name, count in FULL_VOLUMES.items()}
+
+
+class DataGenerator:
+    """Production déterministe des lignes de chaque table
+
+    Args:
+        scale: Échelle des volumes (1.0 = volumes de FULL_VOLUMES)
+        seed: Graine du générateur pseudo-aléatoire
+    """
+
+    def __init__(self, scale: float = 1.0, seed: int = 42):
+        self.scale = scale
+        self.volumes = volumes(scale)
+        self.rng = random.Random(seed)
+        # (id, designation, unite, prix_unitaire, type) : nécessaire aux composants et aux dépenses
+        self._articles: List[Tuple[int, str, str, float, str]] = []
+        self._articles_mo: List[int] = []
+        # (id, designation, unite, prix de revient, composants)
+        self._ouvrages: List[Tuple[int, str, str, float, List[dict]]] = []
+        self._devis_acceptes: List[Tuple[str, int, str, List[int]]] = []
+
+    # ------------------------------------------------------------------
+    # Référentiels
+    # ------------------------------------------------------------------
+
+    def organisation(self) -> dict:
+        return {'id': 1, 'nom': 'BTP Synthétique', 'siret': '12345678900011', 'adresse': '1 rue des Artisans',
+                'cp': '59000', 'ville': 'Lille', 'telephone': '0320000000', 'email': 'contact@btp.example',
+                'site_web': '', 'logo_path': '', 'date_debut_exercice': '', 'date_fin_exercice': ''}
+
+    def fournisseurs(self) -> Iterator[dict]:
+        rng = self.rng
+        for i in range(1, self.volumes['fournisseurs'] + 1):
+            categorie = CATEGORIES[i % len(CATEGORIES)]
+            yield {'id': i, 'nom': f"{rng.choice(NOMS)} {categorie.replace('_', ' ').title()} {i}",
+                   'specialite': categorie, 'telephone': f"03{rng.randrange(10**8):08d}",
+                   'email': f"contact{i}@fournisseur.example", 'remise': rng.choice([0.0, 0.0, 5.0, 10.0])}
+
+    def clients(self) -> Iterator[dict]:
+        rng = self.rng
+        for i in range(1, self.volumes['clients'] + 1):
+            nom, prenom = rng.choice(NOMS), rng.choice(PRENOMS)
+            cp, ville = rng.choice(VILLES)
+            yield {'id': i, 'nom': nom, 'prenom': prenom,
+                   'entreprise': f"SCI {nom} {i}" if rng.random() < 0.3 else '',
+                   'adresse': f"{rng.randint(1, 250)} rue {rng.choice(NOMS)}", 'cp': cp, 'ville': ville,
+                   'telephone': f"06{rng.randrange(10**8):08d}", 'email': f"{prenom.lower()}.{nom.lower()}{i}@client.example"}
+
+    def articles(self) -> Iterator[dict]:
+        rng = self.rng
+        types = list(TYPES_ARTICLE)
+        poids = [TYPES_ARTICLE[t][0] for t in types]
+        for i in range(1, self.volumes['articles'] + 1):
+            type_article = rng.choices(types, poids)[0]
+            _, unites, (prix_min, prix_max) = TYPES_ARTICLE[type_article]
+            categorie = rng.choice(CATEGORIES)
+            if type_article == 'main_oeuvre':
+                designation = f"Main d'œuvre {categorie.replace('_', ' ')} {rng.choice(['qualifié', 'compagnon', 'chef d équipe'])}"
+            else:
+                designation = f"{rng.choice(MOTS[categorie])} {rng.choice(QUALIFICATIFS)} {i}"
+            unite = rng.choice(unites)
+            prix = round(rng.uniform(prix_min, prix_max), 2)
+            self._articles.append((i, designation, unite, prix, type_article))
+            if type_article == 'main_oeuvre':
+                self._articles_mo.append(i)
+            yield {'id': i, 'reference': f"{categorie[:4].upper()}-{i:06d}", 'designation': designation,
+                   'unite': unite, 'prix_unitaire': prix, 'type_article': type_article,
+                   'fournisseur_id': rng.randint(1, self.volumes['fournisseurs']),
+                   'description': '', 'categorie': categorie}
+
+    def ouvrages(self) -> Iterator[dict]:
+        rng = self.rng
+        for i in range(1, self.volumes['ouvrages'] + 1):
+            categorie = rng.choice(CATEGORIES)
+            composants = []
+            for _ in range(rng.randint(*COMPOSANTS_PAR_OUVRAGE) - 1):
+                article_id, designation, unite, prix, _ = rng.choice(self._articles)
+                composants.append({'article_id': article_id, 'quantite': round(rng.uniform(0.05, 3.0), 3),
+                                   'designation': designation, 'unite': unite, 'prix_unitaire': prix})
+            # Presque tous les ouvrages comportent de la main d'œuvre
+            if self._articles_mo and rng.random() < 0.9:
+                article_id, designation, unite, prix, _ = self._articles[rng.choice(self._articles_mo) - 1]
+                composants.append({'article_id': article_id, 'quantite': round(rng.uniform(0.1, 1.5), 2),
+                                   'designation': designation, 'unite': unite, 'prix_unitaire': prix})
+            designation = f"{rng.choice(MOTS[categorie])} posé {rng.choice(QUALIFICATIFS)}"
+            unite = rng.choice(['m²', 'ml', 'u', 'forfait'])
+            prix_revient = sum(c['quantite'] * c['prix_unitaire'] for c in composants)
+            self._ouvrages.append((i, designation, unite, prix_revient, composants))
+            yield {'id': i, 'reference': f"OUV-{i:05d}", 'designation': designation,
+                   'description': f"Fourniture et pose : {designation.lower()}", 'categorie': categorie,
+                   'sous_categorie': '', 'unite': unite, 'composants': composants}
+
+    # ------------------------------------------------------------------
+    # Devis et chantiers
+    # ------------------------------------------------------------------
+
+    def _lignes(self, coefficient: float) -> List[dict]:
+        rng = self.rng
+        nb_lignes = round(rng.triangular(LIGNES_PAR_DEVIS[0], LIGNES_PAR_DEVIS[1], 120))
+        lignes = []
+        chapitre = 0
+        for ligne_id in range(nb_lignes):
+            ligne = {'type': 'ouvrage', 'id': ligne_id, 'niveau': 1, 'ouvrage_id': 0, 'designation': '',
+                     'description': '', 'quantite': 0.0, 'unite': '', 'prix_unitaire': 0.0, 'composants': [],
+                     'titre': '', 'texte': ''}
+            if ligne_id == 0 or rng.random() < 0.06:
+                chapitre += 1
+                ligne.update(type='chapitre', titre=f"Lot {chapitre} - {rng.choice(CATEGORIES).replace('_', ' ')}")
+            elif rng.random() < 0.03:
+                ligne.update(type='texte', niveau=2, texte="Prestation selon DTU en vigueur, gravats évacués.")
+            else:
+                ouvrage_id, designation, unite, prix_revient, composants = rng.choice(self._ouvrages)
+                ligne.update(niveau=2, ouvrage_id=ouvrage_id, designation=designation, unite=unite,
+                             quantite=round(rng.uniform(1, 120), 2),
+                             prix_unitaire=round(prix_revient * coefficient, 2),
+                             composants=[dict(c) for c in composants])
+            lignes.append(ligne)
+        return lignes
+
+    def devis(self) -> Iterator[dict]:
+        """Devis répartis sur NB_ANNEES, numérotés par année"""
+        rng = self.rng
+        total = self.volumes['devis']
+        par_annee = -(-total // NB_ANNEES)
+        for n in range(total):
+            annee = PREMIERE_ANNEE + n // par_annee
+            jour = date(annee, 1, 1) + timedelta(days=(n % par_annee) * 365 // par_annee)
+            numero = DEVIS_NUMBER_FORMAT.format(year=annee, number=n % par_annee + 1)
+            client_id = rng.randint(1, self.volumes['clients'])
+            coefficient = round(rng.uniform(1.2, 1.6), 2)
+            statut = rng.choices(DEVIS_STATUSES, [0.2, 0.3, 0.2, 0.3])[0]
+            lignes = self._lignes(coefficient)
+            if statut == 'accepté':
+                articles = sorted({c['article_id'] for l in lignes for c in l['composants']})
+                self._devis_acceptes.append((numero, client_id, jour.isoformat(), articles))
+            yield {'numero': numero, 'date': jour.isoformat(), 'client_id': client_id,
+                   'objet': f"Rénovation {rng.choice(CATEGORIES).replace('_', ' ')} - lot {n % 17 + 1}",
+                   'lignes': lignes, 'coefficient_marge': coefficient, 'remise': rng.choice([0.0, 0.0, 2.0, 5.0]),
+                   'tva': rng.choice([DEFAULT_TVA_RATE, 10.0, 5.5]), 'validite': 30, 'notes': '',
+                   'conditions': 'Acompte de 30 % à la commande.', 'statut': statut}
+
+    def projets(self) -> Iterator[dict]:
+        """Chantiers issus des devis acceptés (un même client), avec leurs dépenses"""
+        rng = self.rng
+        acceptes = self._devis_acceptes
+        if not acceptes:
+            return
+        for i in range(1, self.volumes['projets'] + 1):
+            numero, client_id, jour, articles = rng.choice(acceptes)
+            devis_numeros = [numero]
+            for _ in range(rng.randint(*DEVIS_PAR_PROJET) - 1):
+                devis_numeros.append(rng.choice(acceptes)[0])
+            depenses = []
+            for depense_id in range(1, rng.randint(*DEPENSES_PAR_PROJET) + 1):
+                article_id = rng.choice(articles) if articles else rng.randint(1, len(self._articles))
+                _, designation, unite, prix, type_article = self._articles[article_id - 1]
+                depenses.append({'id': depense_id, 'type_depense': type_article, 'designation': designation,
+                                 'quantite': round(rng.uniform(0.5, 200), 2), 'unite': unite,
+                                 'prix_unitaire': round(prix * rng.uniform(0.9, 1.15), 2),
+                                 'date': jour, 'article_id': article_id, 'notes': ''})
+            debut = date.fromisoformat(jour) + timedelta(days=rng.randint(7, 60))
+            yield {'id': i, 'numero': f"PROJ-{debut.year}-{i:04d}", 'devis_numeros': sorted(set(devis_numeros)),
+                   'client_id': client_id, 'date_creation': jour, 'date_debut': debut.isoformat(),
+                   'date_fin_prevue': (debut + timedelta(days=rng.randint(10, 120))).isoformat(),
+                   'date_fin_reelle': '', 'statut': rng.choice(['en attente', 'en cours', 'terminé']),
+                   'adresse_chantier': f"{rng.randint(1, 250)} avenue {rng.choice(NOMS)}", 'notes': '',
+                   'depenses_reelles': depenses}
+
+
+def _batches(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def populate(engine, scale: float = 1.0, seed: int = 42, batch_size: int = 500,
+             progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+    """Remplit une base vide (tables créées au besoin)
+
+    Args:
+        engine: Moteur SQLAlchemy de la base cible
+        scale: Échelle des volumes
+        seed: Graine (même graine, même base)
+        batch_size: Lignes par INSERT (les devis sont insérés par lots de batch_size // 10)
+        progress: Appelée avec (table, nombre de lignes insérées) après chaque lot
+
+    Returns:
+        Dict[str, int]: Nombre de lignes insérées par table
+    """
+    from erp.core.database import Base
+    from erp.core.db_models import (
+        ArticleModel, ClientModel, DevisModel, FournisseurModel, OrganisationModel, OuvrageModel, ProjetModel,
+    )
+
+    Base.metadata.create_all(engine)
+    with engine.connect() as conn:
+        if conn.execute(ArticleModel.__table__.select().limit(1)).first() is not None:
+            raise ValueError("La base contient déjà des articles : génération annulée")
+
+    generator = DataGenerator(scale, seed)
+    steps = [
+        (OrganisationModel, iter([generator.organisation()]), batch_size),
+        (FournisseurModel, generator.fournisseurs(), batch_size),
+        (ClientModel, generator.clients(), batch_size),
+        (ArticleModel, generator.articles(), batch_size),
+        (OuvrageModel, generator.ouvrages(), batch_size),
+        # Un devis pèse plusieurs centaines de lignes JSON : lots plus petits
+        (DevisModel, generator.devis(), max(1, batch_size // 10)),
+        (ProjetModel, generator.projets(), max(1, batch_size // 10)),
+    ]
+    counts = {}
+    for model, rows, size in steps:
+        table = model.__table__
+        inserted = 0
+        for batch in _batches(rows, size):
+            with engine.begin() as conn:
+                conn.execute(table.insert(), batch)
+            inserted += len(batch)
+            if progress:
+                progress(table.name, inserted)
+        counts[table.name] = inserted
+        logger.info(f"{inserted} ligne(s) générée(s) dans {table.name}")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Génère une base de données synthétique')
+    parser.add_argument('--scale', type=float, default=0.01,
+                        help='Échelle des volumes (1.0 = 100 000 articles, 50 000 devis)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--url', help='URL SQLAlchemy de la base cible (par défaut : base PostgreSQL configurée)')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    from erp.core.database import db_manager
+    db_manager.initialize(check_connection=False, url=args.url)
+
+    def progress(table, count):
+        print(f"\r{table:<15} {count:>8}", end='', flush=True)
+
+    counts = populate(db_manager.engine, args.scale, args.seed, args.batch_size, progress)
+    print()
+    for table, count in counts.items():
+        print(f"{table:<15} {count:>8}")
+
+
+if __name__ == '__main__':
+    main()
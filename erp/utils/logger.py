@@ -2,19 +2,39 @@
 Logging configuration for ERP BTP application
 
 Provides centralized logging with both console and file handlers.
+
+Loggers only put records on a bounded queue: formatting and console/file
+I/O happen on a dedicated QueueListener thread, never on request threads.
+Pass arguments instead of f-strings (logger.info("Devis %s", numero)) so
+that disabled levels cost nothing and messages are built off-thread.
+
+Environment:
+    LOG_LEVEL: DEBUG, INFO (default), WARNING, ERROR, CRITICAL
+    LOG_FORMAT: text (default) or json (one JSON object per line)
 """
+import atexit
+import copy
+import json
 import logging
 import os
+import queue
+import threading
+import time
+from datetime import date, datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional, Set
+
+from erp.core.constants import (
+    APP_NAME, LOGS_DIR_NAME, LOG_QUEUE_SIZE, LOG_RATE_LIMIT, LOG_RATE_LIMITED_LOGGERS, LOG_RATE_WINDOW,
+)
 
-from erp.core.constants import APP_NAME, LOGS_DIR_NAME
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
 
 
 class NiceGUIWarningFilter(logging.Filter):
     """Filtre pour supprimer les warnings NiceGUI non pertinents"""
-    
+
     def filter(self, record):
         # Filtrer les messages contenant .js.map ou .well-known
         if '.js.map not found' in record.getMessage():
@@ -24,6 +44,203 @@ class NiceGUIWarningFilter(logging.Filter):
         return True
 
 
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement (champs passés via extra= inclus)"""
+
+    # Attributs standard d'un LogRecord, exclus des champs supplémentaires
+    _RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in self._RESERVED and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Limite les messages INFO/DEBUG répétés par une même ligne de code
+
+    Au plus `limit` enregistrements par fenêtre de `window` secondes pour
+    chaque appel (logger, fichier, ligne) ; le premier message de la fenêtre
+    suivante indique combien ont été supprimés. WARNING et au-delà passent
+    toujours. Par défaut seuls les loggers de LOG_RATE_LIMITED_LOGGERS sont
+    limités ; les autres se règlent avec set_log_rate_limit.
+    """
+
+    def __init__(self, limit: Optional[int] = LOG_RATE_LIMIT, window: float = LOG_RATE_WINDOW,
+                 clock=time.monotonic):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.limits: Dict[str, Optional[int]] = {}
+        self._clock = clock
+        self._sites: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        limit = self.limits.get(record.name, self.limit)
+        if limit is None:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = self._clock()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                suppressed = site[2] if site is not None else 0
+                site = self._sites[key] = [now, 0, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} [{suppressed} message(s) similaire(s) supprimé(s)]"
+            site[1] += 1
+            if site[1] > limit:
+                site[2] += 1
+                return False
+        return True
+
+
+# Types dont la valeur ne peut pas changer entre l'appel et l'écriture différée
+_IMMUTABLE_ARGS = (str, int, float, bool, type(None), bytes, date, Path)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """Dépose les enregistrements dans la file sans les formater ni bloquer"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Ne jamais bloquer l'appelant : l'enregistrement est abandonné
+            self.dropped += 1
+
+    def prepare(self, record):
+        """Copie de l'enregistrement, formatée plus tard par le thread d'écriture
+
+        Seuls la trace d'une exception et les arguments modifiables (listes,
+        objets) sont figés ici, avant qu'ils ne changent.
+        """
+        record = copy.copy(record)
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if record.args:
+            values = record.args.values() if isinstance(record.args, dict) else record.args
+            if not all(isinstance(value, _IMMUTABLE_ARGS) for value in values):
+                record.msg = record.getMessage()
+                record.args = None
+        return record
+
+
+# Pipeline partagé par tous les loggers de l'application
+_pipeline_lock = threading.Lock()
+_queue_handler: Optional[AsyncQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_rate_limit_filter = RateLimitFilter()
+_rate_limit_filter.limits.update(LOG_RATE_LIMITED_LOGGERS)
+# Loggers exclus de la console ou du fichier (setup_logger(log_to_console=False, ...))
+_no_console: Set[str] = set()
+_no_file: Set[str] = set()
+
+
+class _ExcludeLoggers(logging.Filter):
+    """Écarte les loggers d'un ensemble (destination désactivée pour eux)"""
+
+    def __init__(self, names: Set[str]):
+        super().__init__()
+        self.names = names
+
+    def filter(self, record):
+        return record.name not in self.names
+
+
+def _env_log_level() -> int:
+    """Niveau de log lu dans LOG_LEVEL (INFO par défaut)"""
+    level = getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper(), None)
+    return level if isinstance(level, int) else logging.INFO
+
+
+def _get_queue_handler() -> AsyncQueueHandler:
+    """Crée au premier appel la file, les handlers console/fichier et le thread d'écriture"""
+    global _queue_handler, _listener
+    with _pipeline_lock:
+        if _queue_handler is not None:
+            return _queue_handler
+
+        # Format for log messages
+        if LOG_FORMAT == 'json':
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(
+                fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            )
+
+        # Console handler
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(_env_log_level())
+        console_handler.setFormatter(formatter)
+        console_handler.addFilter(NiceGUIWarningFilter())
+        console_handler.addFilter(_ExcludeLoggers(_no_console))
+
+        # File handler
+        # Create logs directory if it doesn't exist
+        log_dir = Path(__file__).parent.parent.parent / LOGS_DIR_NAME
+        log_dir.mkdir(exist_ok=True)
+
+        # Create log file with date
+        log_file = log_dir / f'erp_btp_{datetime.now().strftime("%Y%m%d")}.log'
+
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setLevel(logging.DEBUG)  # File logs everything
+        file_handler.setFormatter(formatter)
+        file_handler.addFilter(_ExcludeLoggers(_no_file))
+
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        handler = AsyncQueueHandler(log_queue)
+        handler.addFilter(_rate_limit_filter)
+        _listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        _queue_handler = handler
+        return handler
+
+
+def shutdown_logging():
+    """Écrit les enregistrements en attente et arrête le thread d'écriture"""
+    global _listener
+    with _pipeline_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def set_log_rate_limit(name: str, limit: Optional[int]):
+    """Limite propre à un logger (messages INFO/DEBUG par ligne et par fenêtre ; None = illimité)"""
+    _rate_limit_filter.limits[name] = limit
+
+
+def dropped_log_records() -> int:
+    """Nombre d'enregistrements abandonnés faute de place dans la file"""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
 # Global logger cache
 _loggers = {}
 
@@ -36,16 +253,16 @@ def setup_logger(
 ) -> logging.Logger:
     """
     Configure and return a logger for the application.
-    
+
     Args:
         name: Logger name (usually module name or app name)
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_to_file: Whether to log to file
         log_to_console: Whether to log to console
-    
+
     Returns:
         Configured logger instance
-    
+
     Example:
         >>> logger = setup_logger(__name__)
         >>> logger.info("Application started")
@@ -54,81 +271,55 @@ def setup_logger(
     # Check if logger already exists
     if name in _loggers:
         return _loggers[name]
-    
+
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    
+
     # Prevent duplicate handlers
     if logger.handlers:
         return logger
-    
-    # Format for log messages
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Console handler
-    if log_to_console:
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(level)
-        console_handler.setFormatter(formatter)
-        console_handler.addFilter(NiceGUIWarningFilter())
-        logger.addHandler(console_handler)
-    
-    # File handler
-    if log_to_file:
-        # Create logs directory if it doesn't exist
-        log_dir = Path(__file__).parent.parent.parent / LOGS_DIR_NAME
-        log_dir.mkdir(exist_ok=True)
-        
-        # Create log file with date
-        log_file = log_dir / f'erp_btp_{datetime.now().strftime("%Y%m%d")}.log'
-        
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(logging.DEBUG)  # File logs everything
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
+
+    if not log_to_console:
+        _no_console.add(name)
+    if not log_to_file:
+        _no_file.add(name)
+    if log_to_console or log_to_file:
+        logger.addHandler(_get_queue_handler())
+
     # Cache the logger
     _loggers[name] = logger
-    
+
     return logger
 
 
 def get_logger(name: Optional[str] = None) -> logging.Logger:
     """
     Get an existing logger or create a new one.
-    
+
     Args:
         name: Logger name. If None, returns the main app logger.
-    
+
     Returns:
         Logger instance
-    
+
     Example:
         >>> logger = get_logger(__name__)
         >>> logger.debug("Debug message")
     """
     if name is None:
         name = APP_NAME
-    
+
     if name not in _loggers:
         # Récupérer le niveau de log depuis l'environnement
-        _log_level_str = os.getenv('LOG_LEVEL', 'INFO').upper()
-        try:
-            _log_level = getattr(logging, _log_level_str)
-        except AttributeError:
-            _log_level = logging.INFO
-        return setup_logger(name, level=_log_level)
-    
+        return setup_logger(name, level=_env_log_level())
+
     return _loggers[name]
 
 
 def log_function_call(logger: logging.Logger):
     """
     Decorator to log function calls with arguments.
-    
+
     Example:
         >>> logger = get_logger(__name__)
         >>> @log_function_call(logger)
@@ -137,10 +328,10 @@ def log_function_call(logger: logging.Logger):
     """
     def decorator(func):
         def wrapper(*args, **kwargs):
-            logger.debug(f"Calling {func.__name__} with args={args}, kwargs={kwargs}")
+            logger.debug("Calling %s with args=%s, kwargs=%s", func.__name__, args, kwargs)
             try:
                 result = func(*args, **kwargs)
-                logger.debug(f"{func.__name__} returned: {result}")
+                logger.debug("%s returned: %s", func.__name__, result)
                 return result
             except Exception as e:
                 logger.error(f"{func.__name__} raised {type(e).__name__}: {e}", exc_info=True)
@@ -151,10 +342,4 @@ def log_function_call(logger: logging.Logger):
 
 # Create main application logger on module import
 # Lire le niveau de log depuis la variable d'environnement LOG_LEVEL
-_log_level_str = os.getenv('LOG_LEVEL', 'INFO').upper()
-try:
-    _log_level = getattr(logging, _log_level_str)
-except AttributeError:
-    _log_level = logging.INFO
-
-app_logger = setup_logger(APP_NAME, level=_log_level)
+app_logger = setup_logger(APP_NAME, level=_env_log_level())
@@ -0,0 +1,236 @@
+"""
+Métriques de l'application au format d'exposition texte Prometheus
+
+Le registre conserve, par route (modèle de chemin, pas l'URL brute) : un
+histogramme des durées de réponse, le nombre de réponses par code HTTP et le
+nombre de requêtes lentes ; ainsi que le nombre de requêtes en cours par
+méthode (la route n'est connue qu'une fois la requête routée).
+D'autres valeurs (pools de connexions, caches, files d'attente) sont lues
+au moment de la collecte via des fonctions enregistrées.
+
+L'accès à /metrics est refusé par défaut : jeton METRICS_TOKEN exigé s'il
+est défini, sinon seules les requêtes locales directes (sans proxy) passent.
+"""
+import bisect
+import hmac
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from erp.core.constants import METRICS_LATENCY_BUCKETS, METRICS_SLOW_REQUEST_THRESHOLD
+from erp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Valeur d'une métrique collectée : nombre, ou dictionnaire {valeur du label: nombre}
+Sample = Union[float, int, Dict[str, Union[float, int]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Registre des métriques HTTP et des métriques collectées à la demande
+
+    Args:
+        buckets: Bornes supérieures de l'histogramme des durées (secondes)
+        slow_threshold: Durée au-delà de laquelle une requête est comptée comme lente
+    """
+
+    def __init__(self, buckets: Sequence[float] = METRICS_LATENCY_BUCKETS,
+                 slow_threshold: float = METRICS_SLOW_REQUEST_THRESHOLD):
+        self.buckets = tuple(sorted(buckets))
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        # (méthode, route) -> [compteurs par seuil (+Inf inclus), somme, nombre]
+        self._histograms: Dict[Tuple[str, str], list] = {}
+        self._responses: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._slow: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._callbacks: List[Tuple[str, str, str, Optional[str], Callable[[], Sample]]] = []
+
+    # ------------------------------------------------------------------
+    # Requêtes HTTP
+    # ------------------------------------------------------------------
+
+    def request_started(self, method: str):
+        """Compte une requête en cours"""
+        with self._lock:
+            self._in_flight[method] += 1
+
+    def request_finished(self, method: str, route: str, status: int, duration: float):
+        """Enregistre une réponse (et la retire des requêtes en cours)"""
+        key = (method, route)
+        with self._lock:
+            self._in_flight[method] -= 1
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][bisect.bisect_left(self.buckets, duration)] += 1
+            histogram[1] += duration
+            histogram[2] += 1
+            self._responses[(method, route, status)] += 1
+            if duration >= self.slow_threshold:
+                self._slow[key] += 1
+
+    # ------------------------------------------------------------------
+    # Métriques collectées à la demande
+    # ------------------------------------------------------------------
+
+    def register_callback(self, name: str, help_text: str, fn: Callable[[], Sample],
+                          label: Optional[str] = None, kind: str = 'gauge'):
+        """Enregistre une métrique lue lors de chaque collecte
+
+        Args:
+            name: Nom de la métrique
+            help_text: Description (ligne HELP)
+            fn: Fonction retournant un nombre, ou {valeur du label: nombre} si label est fourni
+            label: Nom du label des valeurs retournées sous forme de dictionnaire
+            kind: 'gauge' ou 'counter'
+        """
+        with self._lock:
+            self._callbacks = [c for c in self._callbacks if c[0] != name]
+            self._callbacks.append((name, help_text, kind, label, fn))
+
+    # ------------------------------------------------------------------
+    # Exposition
+    # ------------------------------------------------------------------
+
+    def render(self) -> str:
+        """Retourne toutes les métriques au format texte Prometheus"""
+        with self._lock:
+            histograms = {k: ([*v[0]], v[1], v[2]) for k, v in self._histograms.items()}
+            responses = dict(self._responses)
+            in_flight = dict(self._in_flight)
+            slow = dict(self._slow)
+            callbacks = list(self._callbacks)
+
+        lines = [
+            '# HELP http_request_duration_seconds Durée de traitement des requêtes HTTP',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (method, route), (counts, total, count) in sorted(histograms.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                lines.append(f'http_request_duration_seconds_bucket'
+                             f'{_labels(method=method, route=route, le=_number(bound))} {cumulative}')
+            lines.append(f'http_request_duration_seconds_sum{_labels(method=method, route=route)} {_number(total)}')
+            lines.append(f'http_request_duration_seconds_count{_labels(method=method, route=route)} {count}')
+
+        lines += ['# HELP http_responses_total Réponses HTTP par code de statut',
+                  '# TYPE http_responses_total counter']
+        for (method, route, status), count in sorted(responses.items()):
+            lines.append(f'http_responses_total{_labels(method=method, route=route, status=status)} {count}')
+
+        lines += ['# HELP http_requests_in_flight Requêtes HTTP en cours de traitement',
+                  '# TYPE http_requests_in_flight gauge']
+        for method, count in sorted(in_flight.items()):
+            lines.append(f'http_requests_in_flight{_labels(method=method)} {count}')
+
+        lines += [f'# HELP http_slow_requests_total Requêtes HTTP de plus de {self.slow_threshold:g}s',
+                  '# TYPE http_slow_requests_total counter']
+        for (method, route), count in sorted(slow.items()):
+            lines.append(f'http_slow_requests_total{_labels(method=method, route=route)} {count}')
+
+        for name, help_text, kind, label, fn in callbacks:
+            try:
+                value = fn()
+            except Exception as e:
+                logger.warning(f"Collecte de la métrique {name} impossible: {e}")
+                continue
+            if value is None:
+                continue
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            if isinstance(value, dict):
+                for label_value, sample in sorted(value.items()):
+                    lines.append(f'{name}{_labels(**{label: label_value})} {_number(sample)}')
+            else:
+                lines.append(f'{name} {_number(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# Adresses des requêtes locales (scraper Prometheus sur la même machine)
+LOOPBACK_HOSTS = {'127.0.0.1', '::1'}
+
+
+def metrics_access_allowed(request, token: str) -> bool:
+    """Indique si une requête peut lire les métriques
+
+    Avec un jeton : en-tête Authorization: Bearer <jeton> requis. Sans jeton :
+    uniquement depuis la boucle locale, et pas au travers d'un proxy (une
+    requête relayée par un proxy local arrive aussi de 127.0.0.1).
+    """
+    if token:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    host = request.client.host if request.client else None
+    proxied = 'x-forwarded-for' in request.headers or 'forwarded' in request.headers
+    return host in LOOPBACK_HOSTS and not proxied
+
+
+def route_label(scope: dict) -> str:
+    """Label de route d'une requête : modèle de chemin, sans identifiants"""
+    route = scope.get('route')
+    path = getattr(route, 'path', None)
+    if path:
+        return path
+    request_path = scope.get('path', '')
+    if request_path.startswith('/_nicegui'):
+        return '/_nicegui/*'
+    for prefix in ('/static/', '/data/'):
+        if request_path.startswith(prefix):
+            return prefix + '*'
+    # Chemins non routés (404, fichiers) : regroupés pour borner le nombre de séries
+    return 'other'
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """Middleware qui mesure la durée et le statut des requêtes HTTP"""
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None):
+        super().__init__(app)
+        self.registry = registry or get_metrics_registry()
+
+    async def dispatch(self, request, call_next):
+        method = request.method
+        self.registry.request_started(method)
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            self.registry.request_finished(method, route_label(request.scope), status, time.perf_counter() - start)
+
+
+# Registre du processus
+_metrics_registry = None
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Retourne le registre de métriques du processus"""
+    global _metrics_registry
+    if _metrics_registry is None:
+        _metrics_registry = MetricsRegistry()
+    return _metrics_registry
@@ -5,7 +5,7 @@ import sys
 import os
 from dotenv import load_dotenv
 from fastapi import Request
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, JSONResponse, PlainTextResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
 # Charger les variables d'environnement depuis .env si le fichier existe
@@ -331,13 +331,19 @@ unrestricted_page_routes = {'/login', '/reset-password', '/forgot-password', '/w
 # Créer une instance globale de l'AuthManager (partagée entre toutes les pages)
 from erp.core.auth import AuthManager
 from erp.core.storage_config import get_data_manager
+from erp.core.tenant import MULTI_TENANT, current_tenant, get_tenant_registry, use_tenant
 
 _data_manager = get_data_manager()
 _auth_manager = AuthManager(_data_manager)
 
 # Initialiser un utilisateur admin si aucun utilisateur n'existe
-def _init_default_admin():
-    """Crée un utilisateur admin par défaut si aucun utilisateur n'existe"""
+def _init_default_admin(initial_username: str = None, initial_password: str = None):
+    """Crée un utilisateur admin par défaut si aucun utilisateur n'existe
+    
+    Args:
+        initial_username: Identifiant (INITIAL_USERNAME par défaut)
+        initial_password: Mot de passe (INITIAL_PASSWORD par défaut)
+    """
     from erp.utils.logger import get_logger
     from erp.core.models import User
     import uuid
@@ -354,9 +360,9 @@ def _init_default_admin():
         logger.error(f"Erreur lors de la vérification des utilisateurs: {e}")
         return
     
-    # Récupérer les variables d'environnement
-    initial_username = os.getenv('INITIAL_USERNAME', 'admin')
-    initial_password = os.getenv('INITIAL_PASSWORD', 'admin123')
+    # Récupérer les variables d'environnement (ou les identifiants déclarés pour le tenant)
+    initial_username = initial_username or os.getenv('INITIAL_USERNAME', 'admin')
+    initial_password = initial_password or os.getenv('INITIAL_PASSWORD', 'admin123')
     
     # Retirer les guillemets si présents (ajoutés dans Portainer pour les caractères spéciaux)
     if initial_password.startswith('"') and initial_password.endswith('"'):
@@ -420,8 +426,23 @@ def _init_default_admin():
     except Exception as e:
         logger.error(f"Erreur lors de la création de l'utilisateur admin: {e}", exc_info=True)
 
-# Initialiser l'admin au démarrage
-_init_default_admin()
+# Tenants dont l'admin par défaut a été vérifié (mode multi-tenant)
+_admin_checked_tenants = set()
+
+
+def _init_tenant_admin(tenant_id: str):
+    """Crée l'admin par défaut d'un tenant à sa première visite (schéma créé au passage)"""
+    if tenant_id in _admin_checked_tenants:
+        return
+    tenant = get_tenant_registry().get(tenant_id)
+    with use_tenant(tenant_id):
+        _init_default_admin(tenant.initial_username, tenant.initial_password)
+    _admin_checked_tenants.add(tenant_id)
+
+
+# Initialiser l'admin au démarrage (en multi-tenant : à la première visite de chaque tenant)
+if not MULTI_TENANT:
+    _init_default_admin()
 
 # Page de bienvenue (première installation)
 @ui.page('/welcome')
@@ -648,13 +669,28 @@ def login_page(redirect_to: str = '/'):
     if nicegui_app.storage.user.get('authenticated', False):
       return RedirectResponse('/')
     
+    # Multi-tenant : tenant déduit du nom d'hôte, sinon saisi dans le formulaire
+    host_tenant = current_tenant() if MULTI_TENANT else None
+    if host_tenant is not None:
+        _init_tenant_admin(host_tenant)
+    
     def try_login():
         from erp.utils.logger import get_logger
         logger = get_logger('main')
         
         logger.info(f"=== LOGIN ATTEMPT: username={username.value} ===")
         
-        result = _auth_manager.authenticate(username.value, password.value)
+        tenant_id = host_tenant
+        if MULTI_TENANT and tenant_id is None:
+            tenant_id = (tenant_input.value or '').strip().lower()
+            if get_tenant_registry().get(tenant_id) is None:
+                logger.warning(f"✗ LOGIN FAILED: tenant inconnu '{tenant_id}'")
+                ui.notify('Entreprise inconnue', color='negative')
+                return
+            _init_tenant_admin(tenant_id)
+        
+        with use_tenant(tenant_id):
+            result = _auth_manager.authenticate(username.value, password.value)
         logger.info(f"Authentication result: {result is not None}")
         
         if result:
@@ -690,10 +726,11 @@ def login_page(redirect_to: str = '/'):
             nicegui_app.storage.user.update({
                 'username': user.username,
                 'session_id': session_id,
-                'authenticated': True
+                'authenticated': True,
+                'tenant': tenant_id
             })
             
-            logger.info(f"Storage updated: {dict(nicegui_app.storage.user)}")
+            logger.debug("Storage updated (keys: %s)", sorted(nicegui_app.storage.user))
             logger.info(f"Navigating to: {redirect_to}")
             
             ui.navigate.to(redirect_to)
@@ -704,6 +741,8 @@ def login_page(redirect_to: str = '/'):
     with ui.column().classes('w-full h-screen items-center justify-center bg-gray-100'):
         with ui.card().classes('w-96 p-6'):
             ui.label('Connexion ERP BTP').classes('text-2xl font-bold mb-4')
+            if MULTI_TENANT and host_tenant is None:
+                tenant_input = ui.input('Entreprise').classes('w-full').on('keydown.enter', try_login)
             username = ui.input('Nom d\'utilisateur').classes('w-full').on('keydown.enter', try_login)
             password = ui.input('Mot de passe', password=True, password_toggle_button=True).classes('w-full').on('keydown.enter', try_login)
             ui.button('Se connecter', on_click=try_login).classes('w-full')
@@ -978,31 +1017,28 @@ def index_page(request: Request):
     from erp.utils.logger import get_logger
     logger = get_logger('main')
 
-    logger.info("=== INDEX PAGE CALLED ===")
-    logger.info(f"Storage contents: {dict(nicegui_app.storage.user)}")
+    # Appelé à chaque chargement de page : traces en DEBUG, sans le contenu du storage
+    logger.debug("Index page (storage keys: %s)", sorted(nicegui_app.storage.user))
 
     # Initialiser les styles
     init_styles()
 
     # Récupérer la session
     session_id = nicegui_app.storage.user.get('session_id')
-    logger.info(f"Session ID from storage: {session_id}")
 
     # Vérifier que la session est valide avec l'auth_manager global
     current_user = _auth_manager.get_current_user(session_id)
-    logger.info(f"Current user: {current_user}")
 
     if not current_user:
         logger.warning("No valid user, redirecting to login")
         nicegui_app.storage.user.clear()
         return RedirectResponse('/login')
 
-    logger.info(f"Creating main UI for user {current_user.username}")
+    logger.debug("Creating main UI for user %s", current_user.username)
 
     # Charger le thème depuis le storage utilisateur
     from erp.config.theme import get_theme, set_accent_color
     saved_color = nicegui_app.storage.user.get('theme_accent_color', '#c84c3c')
-    logger.info(f"Theme color from storage: {saved_color}")
     set_accent_color(saved_color, save_to_storage=False)
 
     # Créer l'interface principale
@@ -1038,7 +1074,85 @@ def main():
     # Serve static files from data and static directories
     nicegui_app.add_static_files('/data', str(base_path / 'data'))
     nicegui_app.add_static_files('/static', str(base_path / 'static'))
-    
+
+    # Arrêter les processus de rendu et fermer les pools à l'arrêt de l'application
+    from erp.services.dashboard_service import get_dashboard_service
+    from erp.services.pdf_render_service import get_pdf_render_service
+    from erp.services.audit_log_service import get_audit_log_service
+    from erp.services.email_service import get_email_service
+    from erp.services.stripe_webhook_service import get_stripe_webhook_service
+    from erp.services.subscription_service import get_subscription_service
+    from erp.services.settings_service import get_settings_service
+    nicegui_app.on_shutdown(get_dashboard_service().shutdown)
+    nicegui_app.on_shutdown(get_pdf_render_service().shutdown)
+    nicegui_app.on_shutdown(get_email_service().shutdown)
+    nicegui_app.on_shutdown(get_stripe_webhook_service().shutdown)
+    # Le journal des connexions est vidé avant la fermeture du pool des abonnements
+    nicegui_app.on_shutdown(get_audit_log_service().shutdown)
+    nicegui_app.on_shutdown(get_subscription_service().shutdown)
+    # Reprendre les webhooks Stripe acquittés mais pas encore traités
+    nicegui_app.on_startup(get_stripe_webhook_service().start)
+    # Rejouer le journal des connexions conservé sur disque lors du dernier arrêt
+    nicegui_app.on_startup(get_audit_log_service().start)
+    # Envoyer les emails restés en file lors du dernier arrêt
+    nicegui_app.on_startup(get_email_service().start)
+    # Changements d'organisation faits par les autres processus (PostgreSQL uniquement)
+    from erp.core.database import db_manager
+    nicegui_app.on_startup(lambda: get_settings_service().start_listener(db_manager.engine))
+    nicegui_app.on_shutdown(get_settings_service().shutdown)
+
+    # ==================== METRIQUES ====================
+    from erp.utils.metrics import get_metrics_registry, metrics_access_allowed, MetricsMiddleware, CONTENT_TYPE
+    from nicegui import Client
+
+    metrics = get_metrics_registry()
+
+    def db_pool_stats():
+        pool = db_manager.engine.pool if db_manager.engine is not None else None
+        if pool is None or not hasattr(pool, 'checkedout'):
+            return None
+        return {'checked_out': pool.checkedout(), 'idle': pool.checkedin(), 'overflow': max(0, pool.overflow())}
+
+    def mail_queue_stat(name):
+        mail_queue = get_email_service()._queue
+        return None if mail_queue is None else getattr(mail_queue, name)
+
+    user_cache = getattr(_data_manager, '_user_cache', None)
+    metrics.register_callback('erp_db_pool_connections', "Connexions du pool de la base de l'application", db_pool_stats, label='state')
+    metrics.register_callback('erp_subscription_pool_connections', "Connexions du pool de la base des abonnements",
+                              lambda: get_subscription_service().pool_stats(), label='state')
+    metrics.register_callback('erp_subscription_cache_entries', "Statuts d'abonnement en cache",
+                              lambda: len(get_subscription_service()._status_cache))
+    if user_cache is not None:
+        metrics.register_callback('erp_user_cache_entries', "Utilisateurs en cache", lambda: len(user_cache))
+        metrics.register_callback('erp_user_cache_requests_total', "Lectures du cache utilisateurs",
+                                  lambda: {'hit': user_cache.hits, 'miss': user_cache.misses}, label='result', kind='counter')
+    metrics.register_callback('erp_audit_log_queue_size', "Événements de connexion en attente d'écriture",
+                              lambda: get_audit_log_service().queue_size)
+    metrics.register_callback('erp_audit_log_events_total', "Événements de connexion écrits ou mis de côté",
+                              lambda: {'written': get_audit_log_service().written, 'spooled': get_audit_log_service().spooled},
+                              label='outcome', kind='counter')
+    metrics.register_callback('erp_mail_queue_pending', "Emails en attente d'envoi", lambda: mail_queue_stat('pending'))
+    metrics.register_callback('erp_websocket_clients', "Clients NiceGUI connectés",
+                              lambda: sum(1 for c in Client.instances.values() if c.has_socket_connection))
+    if MULTI_TENANT:
+        metrics.register_callback('erp_tenants_active', "Tenants servis depuis le démarrage", db_manager.tenant_count)
+
+    @nicegui_app.get("/metrics")
+    async def metrics_endpoint(request: Request):
+        """
+        Métriques au format d'exposition texte Prometheus
+        
+        Si METRICS_TOKEN est défini, l'en-tête Authorization: Bearer <token> est requis ;
+        sinon, seules les requêtes locales directes sont acceptées.
+        """
+        token = os.getenv('METRICS_TOKEN', '')
+        if not metrics_access_allowed(request, token):
+            if token:
+                return PlainTextResponse('Unauthorized', status_code=401)
+            return PlainTextResponse('Forbidden', status_code=403)
+        return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
     # ==================== API ROUTES ====================
     
     @nicegui_app.post("/api/subscriptions/renew")
@@ -1277,11 +1391,16 @@ def main():
         """
         Endpoint pour recevoir les webhooks Stripe
         
-        Traite les événements:
+        L'événement est vérifié, enregistré (table stripe_events) puis acquitté
+        immédiatement ; il est traité en arrière-plan par le service des
+        webhooks. Une livraison déjà reçue est ignorée.
+        
+        Événements traités:
         - checkout.session.completed: Paiement réussi
         """
         try:
             from erp.services.stripe_service import get_stripe_service
+            from erp.services.stripe_webhook_service import get_stripe_webhook_service
             from erp.utils.logger import get_logger
             
             logger = get_logger(__name__)
@@ -1297,24 +1416,10 @@ def main():
                 logger.warning(f"Webhook signature invalid: {error}")
                 return JSONResponse({'error': error}, status_code=400)
             
-            # Traiter l'événement
-            event_type = event.get('type')
-            logger.info(f"Webhook received: {event_type}")
-            
-            if event_type == 'checkout.session.completed':
-                session = event.get('data', {}).get('object', {})
-                success, error_msg = stripe_service.handle_checkout_completed(session)
-                
-                if success:
-                    logger.info(f"Checkout completed successfully")
-                    return {'status': 'success'}
-                else:
-                    logger.error(f"Checkout handling failed: {error_msg}")
-                    return JSONResponse({'error': error_msg}, status_code=500)
-            
-            # Autres événements (logging uniquement)
-            logger.info(f"Unhandled webhook event: {event_type}")
-            return {'status': 'received'}
+            # Enregistrer l'événement (le traitement est différé)
+            is_new = await asyncio.to_thread(get_stripe_webhook_service().record_event, event)
+            logger.info(f"Webhook received: {event.get('type')} ({'new' if is_new else 'duplicate'})")
+            return {'status': 'received' if is_new else 'duplicate'}
             
         except Exception as e:
             from erp.utils.logger import get_logger
@@ -1328,7 +1433,7 @@ def main():
         """Middleware qui restreint l'accès aux pages"""
         async def dispatch(self, request: Request, call_next):
             # Autoriser les ressources NiceGUI internes, les routes non restreintes et les APIs publiques
-            if request.url.path.startswith('/_nicegui') or request.url.path in unrestricted_page_routes or is_api_route(request.url.path):
+            if request.url.path.startswith('/_nicegui') or request.url.path in unrestricted_page_routes or is_api_route(request.url.path) or request.url.path == '/metrics':
                 return await call_next(request)
             
             # Vérifier l'authentification (le storage peut ne pas être encore initialisé)
@@ -1341,6 +1446,9 @@ def main():
             # Rediriger vers login si non authentifié
             return RedirectResponse(f'/login?redirect_to={request.url.path}')
 
+    # Ajouté en dernier : enveloppe les autres middlewares et mesure donc la requête complète
+    nicegui_app.add_middleware(MetricsMiddleware, registry=metrics)
+
 
 if __name__ in {"__main__", "__mp_main__"}:
     # Gestion du chemin pour le favicon
@@ -0,0 +1 @@
+"""Micro-benchmarks (exécutés manuellement, non collectés par pytest)"""
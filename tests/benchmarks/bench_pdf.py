@@ -0,0 +1,85 @@
+"""
+Micro-benchmark de génération PDF (PDF par seconde)
+
+Compare un registre de styles froid (reconstruit à chaque PDF, comportement
+historique) et chaud (ressources précompilées), sur un petit et un gros devis.
+
+Exécuter: python -m tests.benchmarks.bench_pdf [--iterations 20]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from erp.core.models import Client, Devis, LigneDevis, Organisation
+from erp.services.pdf_assets import invalidate_pdf_assets
+from erp.services.pdf_service import generate_pdf
+
+
+def make_devis(nb_lignes: int) -> Devis:
+    lignes = []
+    for i in range(nb_lignes):
+        if i % 25 == 0:
+            lignes.append(LigneDevis(type='chapitre', id=i, titre=f'Chapitre {i // 25 + 1}'))
+        else:
+            lignes.append(LigneDevis(type='ouvrage', id=i, ouvrage_id=i, designation=f'Ouvrage {i}',
+                                     quantite=float(i % 7 + 1), unite='m²', prix_unitaire=12.5 + i % 40))
+    return Devis(numero=f'BENCH-{nb_lignes}', date='2025-01-01', client_id=1, objet='Benchmark', lignes=lignes)
+
+
+def make_logo(data_dir: Path):
+    """Crée un logo PNG de taille réaliste dans le dossier de données"""
+    from PIL import Image, ImageDraw
+    image = Image.new('RGB', (1200, 400), 'white')
+    draw = ImageDraw.Draw(image)
+    for x in range(0, 1200, 8):
+        draw.line([(x, 0), (1200 - x, 400)], fill=(200, 76, 60 + x % 150))
+    image.save(data_dir / 'logo.png')
+
+
+def make_context(data_dir: Path):
+    client = Client(id=1, nom='Durand', prenom='Paul', entreprise='', adresse='1 rue du Port',
+                    cp='59000', ville='Lille', telephone='', email='')
+    return SimpleNamespace(
+        data_dir=data_dir,
+        organisation=Organisation(nom='BTP Nord', adresse='2 rue des Artisans', cp='59000', ville='Lille'),
+        get_client_by_id=lambda _id: client,
+    )
+
+
+def bench(devis, context, out_dir: Path, iterations: int, cold: bool) -> float:
+    """Retourne le nombre de PDF générés par seconde"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        if cold:
+            invalidate_pdf_assets()
+        generate_pdf(devis, context, out_dir / f'{devis.numero}_{i}.pdf')
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de génération PDF')
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        make_logo(out_dir)
+        context = make_context(out_dir)
+        for label, nb_lignes in (('petit devis (10 lignes)', 10), ('gros devis (500 lignes)', 500)):
+            devis = make_devis(nb_lignes)
+            iterations = args.iterations if nb_lignes < 100 else max(1, args.iterations // 5)
+            generate_pdf(devis, context, out_dir / 'warmup.pdf')
+            cold = bench(devis, context, out_dir, iterations, cold=True)
+            warm = bench(devis, context, out_dir, iterations, cold=False)
+            print(f"{label:<26} registre froid: {cold:7.1f} PDF/s   registre chaud: {warm:7.1f} PDF/s")
+
+
+if __name__ == '__main__':
+    main()
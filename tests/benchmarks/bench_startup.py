@@ -0,0 +1,74 @@
+"""
+Benchmark du temps d'import au démarrage
+
+Mesure, dans des interpréteurs neufs, le temps d'import des modules chargés
+par main.py avant le premier affichage d'une page, puis liste les modules les
+plus coûteux (python -X importtime) et les bibliothèques lourdes chargées.
+
+Exécuter: python -m tests.benchmarks.bench_startup [--runs 5] [--top 15]
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from tests.test_lazy_imports import HEAVY_MODULES, STARTUP_MODULES
+
+IMPORT_CODE = (
+    'import sys, time\n'
+    't0 = time.perf_counter()\n'
+    'import nicegui\n'
+    't1 = time.perf_counter()\n'
+    + ''.join(f'import {m}\n' for m in STARTUP_MODULES)
+    + 't2 = time.perf_counter()\n'
+    f'print(t1 - t0, t2 - t1, ",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n'
+)
+
+
+def run_once():
+    """Retourne (durée NiceGUI, durée application, bibliothèques lourdes chargées)"""
+    result = subprocess.run([sys.executable, '-c', IMPORT_CODE], cwd=project_root,
+                            capture_output=True, text=True, check=True)
+    nicegui_time, app_time, heavy = result.stdout.split(' ', 2)
+    return float(nicegui_time), float(app_time), heavy.strip()
+
+
+def top_imports(count: int):
+    """Modules les plus coûteux (temps cumulé, hors NiceGUI préchargé)"""
+    code = 'import nicegui\n' + ''.join(f'import {m}\n' for m in STARTUP_MODULES)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=project_root,
+                            capture_output=True, text=True, check=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)', line)
+        if match and not match.group(3).startswith('nicegui'):
+            entries.append((int(match.group(1)), match.group(3)))
+    return sorted(entries, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du temps d'import au démarrage")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    nicegui_median = statistics.median(r[0] for r in runs)
+    app_median = statistics.median(r[1] for r in runs)
+    print(f"NiceGUI             : {nicegui_median * 1000:8.1f} ms (médiane sur {args.runs})")
+    print(f"Modules applicatifs : {app_median * 1000:8.1f} ms")
+    print(f"Bibliothèques lourdes chargées : {runs[-1][2] or 'aucune'}")
+    print()
+    print(f"{'cumulé (ms)':>12}  module")
+    for cumulative_us, name in top_imports(args.top):
+        print(f"{cumulative_us / 1000:12.1f}  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+Suite de benchmarks sur une base synthétique, comparée à des références
+
+Génère (une fois, puis réutilise) une base SQLite avec erp.utils.data_generator,
+mesure les opérations courantes de l'application puis compare la médiane de
+chaque cas à la référence enregistrée dans tests/benchmarks/baselines.json :
+un écart au-delà de la tolérance est signalé comme plus lent ou plus rapide.
+
+Cas mesurés : hydratation des devis, calcul des totaux, prévisionnel des
+chantiers, page liste des devis, génération PDF, recherche d'articles.
+
+Avec --backend memory, la base est chargée dans DataManagerMemory : mêmes cas
+sans E/S ni hydratation SQL, pour isoler le coût du stockage. Chaque backend a
+son fichier de références (baselines.json, baselines_memory.json).
+
+Les références dépendent de la machine : les enregistrer (--save-baseline)
+sur la machine qui sert aux comparaisons, avant les changements à évaluer.
+
+Exécuter: python -m tests.benchmarks.bench_suite [--scale 0.01] [--backend sqlite|memory] [--save-baseline] [--check]
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+BASELINES_DIR = Path(__file__).parent
+BACKENDS = ('sqlite', 'memory')
+
+# Cas enregistrés : nom -> (description, préparation retournant la fonction mesurée)
+CASES: Dict[str, tuple] = {}
+
+
+def case(name: str, description: str):
+    """Enregistre un cas : la fonction décorée prépare les données et retourne la fonction mesurée"""
+    def register(setup):
+        CASES[name] = (description, setup)
+        return setup
+    return register
+
+
+@case('hydratation_devis', "Chargement de 20 devis par numéro (JSON -> dataclasses)")
+def _hydratation(dm, numeros, tmp_dir):
+    sample = numeros[:20]
+    return lambda: [dm.get_devis_by_numero(n) for n in sample]
+
+
+@case('totaux_devis', "Totaux HT/TVA/TTC et heures de MO de 100 devis chargés")
+def _totaux(dm, numeros, tmp_dir):
+    devis = [dm.get_devis_by_numero(n) for n in numeros[:100]]
+    return lambda: [(d.calculate_totals(), d.get_total_heures_main_oeuvre()) for d in devis]
+
+
+@case('previsionnel_chantiers', "get_previsionnel de 3 chantiers")
+def _previsionnel(dm, numeros, tmp_dir):
+    projets = dm.projets[:3]
+    return lambda: [p.get_previsionnel(dm) for p in projets]
+
+
+@case('page_liste_devis', "Données de la page liste des devis (devis, client et totaux par ligne)")
+def _liste_devis(dm, numeros, tmp_dir):
+    def run():
+        for devis in dm.devis_list:
+            dm.get_client_by_id(devis.client_id)
+            devis.total_ht, devis.total_ttc
+    return run
+
+
+@case('generation_pdf', "PDF du plus gros des 20 premiers devis")
+def _pdf(dm, numeros, tmp_dir):
+    from erp.services.pdf_service import generate_pdf
+    devis = max((dm.get_devis_by_numero(n) for n in numeros[:20]), key=lambda d: len(d.lignes))
+    return lambda: generate_pdf(devis, dm, tmp_dir / f'{devis.numero}.pdf')
+
+
+@case('recherche_articles', "Recherche texte dans les articles et filtre SQL par catégorie")
+def _recherche(dm, numeros, tmp_dir):
+    def run():
+        articles = dm.articles
+        for term in ('ba13', 'laine', 'porte'):
+            [a for a in articles if term in a.reference.lower() or term in a.designation.lower()]
+        dm.get_articles_by_categories(['isolation', 'platrerie'])
+    return run
+
+
+def prepare_database(path: Path, scale: float, seed: int):
+    """Ouvre la base de benchmark, générée au premier lancement"""
+    from erp.core.database import db_manager
+    from erp.utils.data_generator import populate
+
+    exists = path.exists()
+    db_manager.initialize(check_connection=False, url=f'sqlite:///{path}')
+    if not exists:
+        print(f"Génération de la base synthétique (échelle {scale}) : {path}")
+        start = time.perf_counter()
+        populate(db_manager.engine, scale, seed)
+        print(f"Base générée en {time.perf_counter() - start:.1f}s")
+
+
+def measure(fn: Callable[[], object], repeat: int) -> float:
+    """Médiane de repeat exécutions (après une exécution de chauffe), en secondes"""
+    fn()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def baselines_path(backend: str) -> Path:
+    """Fichier des références d'un backend"""
+    return BASELINES_DIR / ('baselines.json' if backend == 'sqlite' else f'baselines_{backend}.json')
+
+
+def load_baselines(path: Path) -> dict:
+    if path.exists():
+        return json.loads(path.read_text(encoding='utf-8'))
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Suite de benchmarks sur base synthétique')
+    parser.add_argument('--scale', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--backend', choices=BACKENDS, default='sqlite',
+                        help='Stockage mesuré : base SQLite ou copie en mémoire (référence sans E/S)')
+    parser.add_argument('--db', help='Fichier SQLite de la base (par défaut : dossier temporaire, réutilisé)')
+    parser.add_argument('--only', nargs='*', choices=sorted(CASES), help='Cas à exécuter')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Écart toléré par rapport à la référence')
+    parser.add_argument('--save-baseline', action='store_true', help='Enregistre les résultats comme référence')
+    parser.add_argument('--check', action='store_true', help='Code de sortie 1 si un cas est plus lent')
+    args = parser.parse_args()
+
+    db_path = Path(args.db) if args.db else Path(tempfile.gettempdir()) / f'erp_bench_{args.scale:g}_{args.seed}.db'
+    prepare_database(db_path, args.scale, args.seed)
+
+    from erp.core.data_manager_postgres import DataManagerPostgres
+    from erp.core.database import db_manager
+    from erp.core.db_models import DevisModel
+
+    dm = DataManagerPostgres()
+    with db_manager.get_session() as session:
+        numeros = [n for (n,) in session.query(DevisModel.numero).order_by(DevisModel.numero)]
+    if args.backend == 'memory':
+        from erp.core.data_manager_memory import DataManagerMemory
+        memory = DataManagerMemory()
+        memory.load_from(dm)
+        dm = memory
+        # Les millions d'objets chargés ne sont plus parcourus par le ramasse-miettes,
+        # qui sinon pèserait sur chaque cas sans rapport avec le stockage
+        gc.freeze()
+
+    path = baselines_path(args.backend)
+    baselines = load_baselines(path)
+    comparable = baselines.get('scale') == args.scale and baselines.get('seed') == args.seed
+    if baselines and not comparable:
+        print(f"Références enregistrées pour l'échelle {baselines.get('scale')} : pas de comparaison")
+    reference = baselines.get('cases', {}) if comparable else {}
+
+    results = {}
+    regressions = []
+    print(f"\n{'cas':<24}{'médiane':>12}{'référence':>12}{'écart':>9}  verdict")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.only or CASES:
+            _, setup = CASES[name]
+            median = measure(setup(dm, numeros, Path(tmp)), args.repeat)
+            results[name] = round(median, 6)
+            base = reference.get(name)
+            if base:
+                delta = median / base - 1
+                verdict = 'plus lent' if delta > args.tolerance else 'plus rapide' if delta < -args.tolerance else '='
+                if verdict == 'plus lent':
+                    regressions.append(name)
+                print(f"{name:<24}{median * 1000:>10.1f}ms{base * 1000:>10.1f}ms{delta:>+9.0%}  {verdict}")
+            else:
+                print(f"{name:<24}{median * 1000:>10.1f}ms{'-':>12}{'':>9}  (pas de référence)")
+
+    if args.save_baseline:
+        baselines = {
+            'scale': args.scale,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+            'date': datetime.now().strftime('%Y-%m-%d'),
+            'cases': dict(reference, **results) if comparable else results,
+        }
+        path.write_text(json.dumps(baselines, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+        print(f"\nRéférences enregistrées dans {path}")
+
+    if regressions:
+        print(f"\nPlus lent que la référence : {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
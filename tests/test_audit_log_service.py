@@ -0,0 +1,185 @@
+"""
+Tests du journal des connexions écrit par lots en arrière-plan
+
+Exécuter: pytest tests/test_audit_log_service.py -v
+"""
+import sys
+import json
+import threading
+import pytest
+from datetime import datetime
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from erp.services.audit_log_service import AuditLogService
+
+
+class FakeTable:
+    """Table connexions simulée : enregistre les lots, peut être indisponible"""
+
+    def __init__(self):
+        self.batches = []
+        self.down = False
+        self.lock = threading.Lock()
+
+    def __call__(self, events):
+        if self.down:
+            raise ConnectionError('base injoignable')
+        with self.lock:
+            self.batches.append(list(events))
+
+    @property
+    def rows(self):
+        return [e['username'] for batch in self.batches for e in batch]
+
+
+@pytest.fixture
+def table():
+    return FakeTable()
+
+
+@pytest.fixture
+def make_service(table, tmp_path):
+    services = []
+
+    def make(**kwargs):
+        kwargs.setdefault('flush_interval', 60)
+        kwargs.setdefault('retry_interval', 0)
+        svc = AuditLogService(table, spool_path=tmp_path / 'spool.jsonl', **kwargs)
+        services.append(svc)
+        return svc
+
+    yield make
+    for svc in services:
+        svc.shutdown()
+
+
+class TestBatching:
+    """Regroupement des événements"""
+
+    def test_flush_writes_single_batch(self, make_service, table):
+        svc = make_service()
+        for i in range(5):
+            svc.log('c1', f'u{i}', 'login')
+        assert svc.flush(5)
+        assert len(table.batches) == 1
+        assert table.rows == ['u0', 'u1', 'u2', 'u3', 'u4']
+
+    def test_batch_size_threshold(self, make_service, table):
+        svc = make_service(batch_size=3)
+        for i in range(7):
+            svc.log('c1', f'u{i}', 'login')
+        svc.flush(5)
+        assert [len(b) for b in table.batches] == [3, 3, 1]
+
+    def test_timer_flushes_partial_batch(self, make_service, table):
+        svc = make_service(flush_interval=0.05)
+        svc.log('c1', 'u0', 'logout')
+        for _ in range(100):
+            if table.batches:
+                break
+            threading.Event().wait(0.02)
+        assert table.rows == ['u0']
+
+    def test_shutdown_drains_queue(self, make_service, table):
+        svc = make_service()
+        svc.log('c1', 'u0', 'login')
+        svc.shutdown()
+        assert table.rows == ['u0']
+
+
+class TestSpool:
+    """Fichier de secours pendant une indisponibilité"""
+
+    def test_outage_spools_then_replays(self, make_service, table, tmp_path):
+        svc = make_service()
+        table.down = True
+        svc.log('c1', 'u0', 'login', timestamp=datetime(2024, 1, 2, 3, 4, 5))
+        svc.flush(5)
+        assert table.batches == []
+        lines = (tmp_path / 'spool.jsonl').read_text(encoding='utf-8').splitlines()
+        assert json.loads(lines[0])['timestamp'] == '2024-01-02T03:04:05'
+
+        table.down = False
+        svc.log('c1', 'u1', 'login')
+        svc.flush(5)
+        assert table.rows == ['u0', 'u1']
+        assert table.batches[0][0]['timestamp'] == datetime(2024, 1, 2, 3, 4, 5)
+        assert not (tmp_path / 'spool.jsonl').exists()
+
+    def test_spool_replayed_after_restart(self, make_service, table, tmp_path):
+        table.down = True
+        first = make_service()
+        first.log('c1', 'u0', 'login')
+        first.shutdown()
+
+        table.down = False
+        second = make_service()
+        second.log('c1', 'u1', 'login')
+        second.flush(5)
+        assert table.rows == ['u0', 'u1']
+
+    def test_full_queue_spools_without_blocking(self, make_service, table):
+        svc = make_service(max_queue=1)
+        svc._ensure_worker = lambda: None  # thread d'écriture pas encore démarré
+        for i in range(4):
+            svc.log('c1', f'u{i}', 'login')
+        assert svc.spooled == 3
+
+        del svc._ensure_worker
+        svc._ensure_worker()
+        svc.flush(5)
+        assert sorted(table.rows) == ['u0', 'u1', 'u2', 'u3']
+
+    def test_start_replays_without_new_event(self, make_service, table, tmp_path):
+        table.down = True
+        first = make_service()
+        first.log('c1', 'u0', 'login')
+        first.shutdown()
+
+        table.down = False
+        second = make_service()
+        second.start()
+        second.flush(5)
+        assert table.rows == ['u0']
+        assert not (tmp_path / 'spool.jsonl').exists()
+
+    def test_replay_does_not_hold_spool_lock(self, make_service, table, tmp_path):
+        table.down = True
+        svc = make_service()
+        svc.log('c1', 'u0', 'login')
+        svc.flush(5)
+
+        lock_free = []
+
+        def write(events):
+            # log() doit pouvoir écrire le fichier de secours pendant une écriture lente
+            lock_free.append(svc._spool_lock.acquire(blocking=False))
+            if lock_free[-1]:
+                svc._spool_lock.release()
+            table(events)
+
+        svc._write_batch = write
+        table.down = False
+        svc.flush(5)
+        assert table.rows == ['u0']
+        assert lock_free and all(lock_free)
+        assert not svc.replay_path.exists()
+
+    def test_failed_replay_kept_for_next_attempt(self, make_service, table, tmp_path):
+        table.down = True
+        svc = make_service()
+        svc.log('c1', 'u0', 'login')
+        svc.flush(5)
+        svc.start()
+        svc.flush(5)
+        assert svc.replay_path.exists()
+
+        table.down = False
+        svc.log('c1', 'u1', 'login')
+        svc.flush(5)
+        assert table.rows == ['u0', 'u1']
+        assert not svc.replay_path.exists() and not (tmp_path / 'spool.jsonl').exists()
@@ -0,0 +1,145 @@
+"""
+Tests du service de catégories (cache et descendants précalculés)
+
+Exécuter: pytest tests/test_category_service.py -v
+"""
+import sys
+import os
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from erp.services.category_service import CategoryService, CategoryTree, DEFAULT_CATEGORIES
+
+
+NODES = [
+    {'id': 'platrerie', 'label': 'Plâtrerie', 'children': [
+        {'id': 'plaques', 'label': 'Plaques', 'children': [
+            {'id': 'plaques_hydro', 'label': 'Plaques hydro', 'children': []},
+        ]},
+        {'id': 'enduits', 'label': 'Enduits', 'children': []},
+    ]},
+    {'id': 'general', 'label': 'Général', 'children': []},
+]
+
+
+class TestCategoryTree:
+    """Tests de l'index de l'arborescence"""
+
+    def setup_method(self):
+        self.tree = CategoryTree(NODES)
+
+    def test_descendants_at_any_depth(self):
+        assert self.tree.descendants('platrerie') == {'platrerie', 'plaques', 'plaques_hydro', 'enduits'}
+        assert self.tree.descendants('plaques') == {'plaques', 'plaques_hydro'}
+        assert self.tree.descendants('enduits') == {'enduits'}
+
+    def test_unknown_category(self):
+        assert self.tree.descendants('inconnue') == {'inconnue'}
+        assert self.tree.display_labels('inconnue') == ('inconnue', '-')
+
+    def test_in_category(self):
+        assert self.tree.in_category('plaques_hydro', 'platrerie')
+        assert not self.tree.in_category('enduits', 'plaques')
+        assert self.tree.in_category(None, 'general')
+
+    def test_sql_in_list_is_sorted(self):
+        assert self.tree.sql_in_list('plaques') == ['plaques', 'plaques_hydro']
+
+    def test_display_labels(self):
+        assert self.tree.display_labels('platrerie') == ('Plâtrerie', '-')
+        assert self.tree.display_labels('plaques_hydro') == ('Plâtrerie', 'Plaques hydro')
+
+
+class TestCategoryService:
+    """Tests du cache et de son invalidation"""
+
+    def test_defaults_without_file(self, tmp_path):
+        tree = CategoryService(tmp_path / 'categories.json').get_tree()
+        assert [n['id'] for n in tree.nodes] == [n['id'] for n in DEFAULT_CATEGORIES]
+
+    def test_tree_is_cached(self, tmp_path):
+        path = tmp_path / 'categories.json'
+        path.write_text(json.dumps(NODES), encoding='utf-8')
+        svc = CategoryService(path)
+        assert svc.get_tree() is svc.get_tree()
+
+    def test_external_file_change_reloads(self, tmp_path):
+        path = tmp_path / 'categories.json'
+        path.write_text(json.dumps(NODES), encoding='utf-8')
+        svc = CategoryService(path)
+        first = svc.get_tree()
+
+        path.write_text(json.dumps(NODES[1:]), encoding='utf-8')
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        second = svc.get_tree()
+        assert second is not first
+        assert second.version > first.version
+        assert second.find('platrerie') is None
+
+    def test_save_updates_cache(self, tmp_path):
+        svc = CategoryService(tmp_path / 'categories.json')
+        nodes = svc.load_nodes()
+        nodes[0]['children'].append({'id': 'divers', 'label': 'Divers', 'children': []})
+        svc.save_nodes(nodes)
+
+        assert 'divers' in svc.get_tree().descendants(nodes[0]['id'])
+        assert json.loads((tmp_path / 'categories.json').read_text(encoding='utf-8')) == nodes
+
+    def test_load_nodes_is_a_copy(self, tmp_path):
+        svc = CategoryService(tmp_path / 'categories.json')
+        svc.load_nodes()[0]['label'] = 'Modifié'
+        assert svc.get_tree().nodes[0]['label'] != 'Modifié'
+
+    def test_categories_per_tenant(self, tmp_path, monkeypatch):
+        from erp.core import tenant as tenant_module
+        monkeypatch.setattr(tenant_module, 'MULTI_TENANT', True)
+        service = CategoryService(base_data_dir=tmp_path)
+        with tenant_module.use_tenant('alpha'):
+            service.save_nodes(NODES)
+            assert service.get_tree().nodes == NODES
+        with tenant_module.use_tenant('beta'):
+            assert service.get_tree().nodes == DEFAULT_CATEGORIES
+        assert (tmp_path / 'tenants' / 'alpha' / 'categories.json').exists()
+        assert not (tmp_path / 'categories.json').exists()
+
+
+class TestArticlesByCategories:
+    """Le filtre par catégorie est appliqué en SQL (clause IN)"""
+
+    def test_sql_filter(self, monkeypatch):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        import erp.core.data_manager_postgres as dm_module
+        from erp.core.db_models import ArticleModel, FournisseurModel
+
+        engine = create_engine('sqlite://')
+        FournisseurModel.__table__.create(engine)
+        ArticleModel.__table__.create(engine)
+        factory = sessionmaker(bind=engine)
+
+        @contextmanager
+        def get_session():
+            session = factory()
+            try:
+                yield session
+                session.commit()
+            finally:
+                session.close()
+
+        monkeypatch.setattr(dm_module, 'db_manager', SimpleNamespace(get_session=get_session))
+        with get_session() as session:
+            for i, categorie in enumerate(['plaques_hydro', 'enduits', 'peinture', None]):
+                session.add(ArticleModel(id=i + 1, reference=f'A{i}', designation='x', unite='u',
+                                         prix_unitaire=1.0, type_article='materiau', categorie=categorie))
+
+        dm = object.__new__(dm_module.DataManagerPostgres)
+        tree = CategoryTree(NODES)
+        assert {a.reference for a in dm.get_articles_by_categories(tree.sql_in_list('platrerie'))} == {'A0', 'A1'}
+        assert [a.categorie for a in dm.get_articles_by_categories(tree.sql_in_list('general'))] == ['general']
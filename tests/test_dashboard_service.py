@@ -0,0 +1,97 @@
+"""
+Tests du cache du tableau de bord Pygwalker
+Le rendu Pygwalker est remplacé par une fonction légère exécutée dans un thread.
+
+Exécuter: pytest tests/test_dashboard_service.py -v
+"""
+import sys
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import erp.services.dashboard_service as dashboard_module
+from erp.services.dashboard_service import (
+    DashboardService, build_devis_records, compute_data_version
+)
+
+
+@pytest.fixture
+def render_calls(monkeypatch):
+    """Remplace le rendu Pygwalker par un rendu factice et compte les appels"""
+    calls = []
+
+    def fake_render(records):
+        calls.append(len(records))
+        return f"<div>{len(records)} devis</div>"
+
+    monkeypatch.setattr(dashboard_module, '_render_pygwalker_html', fake_render)
+    return calls
+
+
+@pytest.fixture
+def service():
+    """Service avec un pool de threads à la place du pool de processus"""
+    svc = DashboardService(max_entries=2)
+    svc._executor = ThreadPoolExecutor(max_workers=1)
+    yield svc
+    svc.shutdown()
+
+
+def make_records(n):
+    return [{'numero': f'DEV-{i}', 'total_ht': float(i)} for i in range(n)]
+
+
+class TestDashboardService:
+    """Tests du cache par tenant et version de données"""
+
+    def test_build_devis_records(self):
+        devis = SimpleNamespace(numero='DEV-1', date='2025-01-01', client_id=1, statut='en cours',
+                                total_ht=100.0, total_ttc=120.0, tva=20.0, coefficient_marge=1.35,
+                                lignes=[1, 2])
+        records = build_devis_records(SimpleNamespace(devis_list=[devis]))
+        assert records[0]['numero'] == 'DEV-1'
+        assert records[0]['nb_lignes'] == 2
+
+    def test_data_version_is_stable(self):
+        assert compute_data_version(make_records(3)) == compute_data_version(make_records(3))
+        assert compute_data_version(make_records(3)) != compute_data_version(make_records(4))
+
+    def test_render_is_cached(self, service, render_calls):
+        html1 = asyncio.run(service.get_html(make_records(3), tenant='a'))
+        html2 = asyncio.run(service.get_html(make_records(3), tenant='a'))
+        assert html1 == html2 == "<div>3 devis</div>"
+        assert render_calls == [3]
+
+    def test_new_data_version_replaces_old(self, service, render_calls):
+        asyncio.run(service.get_html(make_records(3), tenant='a'))
+        asyncio.run(service.get_html(make_records(4), tenant='a'))
+        assert render_calls == [3, 4]
+        assert service.get_cached('a', compute_data_version(make_records(3))) is None
+        assert len(service._cache) == 1
+
+    def test_lru_eviction_across_tenants(self, service, render_calls):
+        for tenant in ('a', 'b', 'c'):
+            asyncio.run(service.get_html(make_records(1), tenant=tenant))
+        assert [key[0] for key in service._cache] == ['b', 'c']
+
+    def test_concurrent_requests_share_render(self, service, render_calls):
+        async def run_both():
+            return await asyncio.gather(
+                service.get_html(make_records(2), tenant='a'),
+                service.get_html(make_records(2), tenant='a'),
+            )
+        results = asyncio.run(run_both())
+        assert results[0] == results[1]
+        assert render_calls == [2]
+
+    def test_invalidate_tenant(self, service, render_calls):
+        asyncio.run(service.get_html(make_records(1), tenant='a'))
+        asyncio.run(service.get_html(make_records(1), tenant='b'))
+        service.invalidate('a')
+        assert [key[0] for key in service._cache] == ['b']
@@ -0,0 +1,90 @@
+"""
+Tests du générateur de données synthétiques
+
+Exécuter: pytest tests/test_data_generator.py -v
+"""
+import sys
+import pytest
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.pool import StaticPool
+
+from erp.core.db_models import ArticleModel, DevisModel, OuvrageModel, ProjetModel
+from erp.utils.data_generator import LIGNES_PAR_DEVIS, DataGenerator, populate, volumes
+
+SCALE = 0.002
+
+
+@pytest.fixture(scope='module')
+def engine():
+    engine = create_engine('sqlite://', poolclass=StaticPool)
+    populate(engine, scale=SCALE, seed=7, batch_size=50)
+    return engine
+
+
+class TestVolumes:
+    """Volumes proportionnels à l'échelle"""
+
+    def test_full_scale(self):
+        full = volumes(1.0)
+        assert full['articles'] == 100_000
+        assert full['devis'] == 50_000
+        assert full['ouvrages'] == 5_000
+        assert full['projets'] == 2_000
+
+    def test_minimum_one(self):
+        assert min(volumes(0.00001).values()) == 1
+
+    def test_rows_inserted(self, engine):
+        expected = volumes(SCALE)
+        with engine.connect() as conn:
+            assert conn.scalar(select(func.count()).select_from(ArticleModel)) == expected['articles']
+            assert conn.scalar(select(func.count()).select_from(DevisModel)) == expected['devis']
+            assert conn.scalar(select(func.count()).select_from(ProjetModel)) == expected['projets']
+
+    def test_refuses_populated_database(self, engine):
+        with pytest.raises(ValueError):
+            populate(engine, scale=SCALE)
+
+
+class TestCoherence:
+    """Données liées entre elles et lisibles par l'application"""
+
+    def test_devis_lines_within_bounds(self, engine):
+        with engine.connect() as conn:
+            for (lignes,) in conn.execute(select(DevisModel.lignes)):
+                assert LIGNES_PAR_DEVIS[0] <= len(lignes) <= LIGNES_PAR_DEVIS[1]
+
+    def test_composants_reference_existing_articles(self, engine):
+        with engine.connect() as conn:
+            article_ids = set(conn.scalars(select(ArticleModel.id)))
+            for (composants,) in conn.execute(select(OuvrageModel.composants)):
+                assert composants
+                assert {c['article_id'] for c in composants} <= article_ids
+
+    def test_projets_reference_existing_devis(self, engine):
+        with engine.connect() as conn:
+            numeros = set(conn.scalars(select(DevisModel.numero)))
+            for devis_numeros, depenses in conn.execute(select(ProjetModel.devis_numeros,
+                                                               ProjetModel.depenses_reelles)):
+                assert set(devis_numeros) <= numeros
+                assert depenses
+
+    def test_hydrates_as_devis(self, engine):
+        from erp.core.models import ComposantOuvrage, Devis, LigneDevis
+        with engine.connect() as conn:
+            row = conn.execute(select(DevisModel).limit(1)).mappings().one()
+        lignes = [LigneDevis(**dict(l, composants=[ComposantOuvrage(**c) for c in l['composants']]))
+                  for l in row['lignes']]
+        devis = Devis(numero=row['numero'], date=row['date'], client_id=row['client_id'], lignes=lignes)
+        assert devis.total_ht > 0
+
+    def test_deterministic(self):
+        first = [a['designation'] for a in DataGenerator(SCALE, seed=3).articles()]
+        second = [a['designation'] for a in DataGenerator(SCALE, seed=3).articles()]
+        assert first == second
@@ -0,0 +1,267 @@
+"""
+Tests de contrat des gestionnaires de données
+
+Les mêmes tests s'exécutent sur le backend mémoire et sur DataManagerPostgres
+branché sur une base SQLite en mémoire : aucun serveur PostgreSQL requis.
+
+Exécuter: pytest tests/test_data_manager_backends.py -v
+"""
+import sys
+import pytest
+from datetime import datetime
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import erp.core.data_manager_postgres as dm_module
+import erp.core.storage_config as storage_config
+import erp.core.tenant as tenant_module
+import erp.services.settings_service as settings_module
+from erp.core.data_manager_base import DataManager
+from erp.core.data_manager_memory import DataManagerMemory
+from erp.core.database import DatabaseManager
+from erp.core.models import (
+    Article, Client, ComposantOuvrage, DepenseReelle, Devis, LigneDevis, Organisation, Ouvrage, Projet, User
+)
+from erp.core.session_store import MemorySessionStore, create_session_store
+from erp.core.tenant import use_tenant
+from erp.services.settings_service import SettingsService
+from erp.utils.cache import TTLCache
+from erp.utils.exceptions import ResourceNotFoundError
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def dm(request, tmp_path, monkeypatch):
+    if request.param == 'memory':
+        yield DataManagerMemory(data_dir=tmp_path)
+        return
+    db = DatabaseManager()
+    db.engine = create_engine('sqlite://', poolclass=StaticPool)
+    db.session_factory = sessionmaker(bind=db.engine)
+    db.Session = scoped_session(db.session_factory)
+    db.ensure_schema()
+    monkeypatch.setattr(dm_module, 'db_manager', db)
+    # Cache de l'organisation propre à chaque base de test
+    monkeypatch.setattr(settings_module, '_settings_service', SettingsService())
+    manager = object.__new__(dm_module.DataManagerPostgres)
+    manager._user_cache = TTLCache(ttl=60)
+    manager.base_data_dir = tmp_path
+    yield manager
+    db.close()
+
+
+def make_devis(numero: str, date: str = None) -> Devis:
+    ligne = LigneDevis(type='ouvrage', ouvrage_id=1, designation='Cloison BA13', quantite=10.0, unite='m²',
+                       prix_unitaire=40.0,
+                       composants=[ComposantOuvrage(article_id=1, quantite=1.05, designation='Plaque BA13',
+                                                    unite='m²', prix_unitaire=8.5)])
+    return Devis(numero=numero, date=date or datetime.now().strftime('%Y-%m-%d'), client_id=1,
+                 objet='Rénovation', lignes=[ligne])
+
+
+def make_user(uid: str, username: str, email: str) -> User:
+    pwd_hash, salt = User.hash_password('secret')
+    return User(id=uid, username=username, email=email, password_hash=pwd_hash, salt=salt)
+
+
+class TestContract:
+    """Même comportement quel que soit le stockage"""
+
+    def test_implements_interface(self, dm):
+        assert isinstance(dm, DataManager)
+
+    def test_organisation_default_then_saved(self, dm):
+        assert dm.organisation.nom == ''
+        dm.organisation = Organisation(nom='Dupont BTP', ville='Lyon')
+        assert dm.organisation.nom == 'Dupont BTP'
+        assert dm.get_company_info()['address'].endswith('Lyon')
+
+    def test_client_crud(self, dm):
+        dm.add_client(Client(id=1, nom='Dupont', prenom='Jean', entreprise='', adresse='', cp='', ville='',
+                             telephone='', email='j@dupont.fr'))
+        client = dm.get_client_by_id(1)
+        client.ville = 'Paris'
+        assert dm.get_client_by_id(1).ville == ''
+        dm.update_client(client)
+        assert [c.ville for c in dm.clients] == ['Paris']
+        dm.delete_client(1)
+        assert dm.get_client_by_id(1) is None
+        with pytest.raises(ResourceNotFoundError):
+            dm.delete_client(1)
+
+    def test_article_id_assigned_and_categories(self, dm):
+        first = Article(id=99, reference='BA13', designation='Plaque', unite='m²', prix_unitaire=8.5,
+                        type_article='materiau', fournisseur_id=0, categorie='platrerie')
+        second = Article(id=99, reference='LV100', designation='Laine', unite='m²', prix_unitaire=6.0,
+                         type_article='materiau', fournisseur_id=0, categorie='')
+        dm.add_article(first)
+        dm.add_article(second)
+        assert first.id != second.id
+        assert dm.get_article_by_id(second.id).categorie == 'general'
+        assert [a.reference for a in dm.get_articles_by_categories(['platrerie'])] == ['BA13']
+        assert [a.reference for a in dm.get_articles_by_categories(['general'])] == ['LV100']
+        with pytest.raises(ResourceNotFoundError):
+            dm.update_article(Article(id=12345, reference='X', designation='X', unite='u',
+                                      prix_unitaire=1.0, type_article='materiau', fournisseur_id=0))
+
+    def test_ouvrage_round_trip(self, dm):
+        ouvrage = Ouvrage(id=0, reference='CLO', designation='Cloison', description='', categorie='platrerie',
+                          unite='m²', composants=[ComposantOuvrage(article_id=1, quantite=1.05)])
+        dm.add_ouvrage(ouvrage)
+        loaded = dm.get_ouvrage_by_id(ouvrage.id)
+        assert loaded.composants[0].quantite == 1.05
+        assert dm.get_next_ouvrage_id() == ouvrage.id + 1
+
+    def test_devis_round_trip_and_numbering(self, dm):
+        year = datetime.now().year
+        assert dm.get_next_devis_number() == f'DEV-{year}-0001'
+        dm.add_devis(make_devis(f'DEV-{year}-0001'))
+        dm.add_devis(make_devis('DEV-2001-0001', date='2001-03-01'))
+        assert dm.get_next_devis_number() == f'DEV-{year}-0002'
+        devis = dm.get_devis_by_numero(f'DEV-{year}-0001')
+        assert isinstance(devis.lignes[0].composants[0], ComposantOuvrage)
+        assert devis.total_ht == make_devis('x').total_ht
+        devis.statut = 'accepté'
+        dm.update_devis(devis)
+        assert dm.get_devis_by_numero(devis.numero).statut == 'accepté'
+        dm.delete_devis(devis.numero)
+        assert len(dm.devis_list) == 1
+
+    def test_update_devis_lignes_keeps_other_fields(self, dm):
+        devis = make_devis('DEV-2001-0001', date='2001-03-01')
+        devis.lignes.insert(0, LigneDevis(type='chapitre', titre='Cloisons', niveau=1))
+        devis.statut = 'envoyé'
+        dm.add_devis(devis)
+        dm.update_devis_lignes(devis.numero, list(reversed(devis.lignes)))
+        stored = dm.get_devis_by_numero(devis.numero)
+        assert [l.type for l in stored.lignes] == ['ouvrage', 'chapitre']
+        assert isinstance(stored.lignes[0].composants[0], ComposantOuvrage)
+        assert stored.statut == 'envoyé'
+        with pytest.raises(ResourceNotFoundError):
+            dm.update_devis_lignes('DEV-0000-0000', [])
+
+    def test_projet_by_numero(self, dm):
+        year = datetime.now().year
+        projet = Projet(id=1, numero=dm.get_next_projet_number(), devis_numeros=[], client_id=1,
+                        date_creation=datetime.now().strftime('%Y-%m-%d'),
+                        depenses_reelles=[DepenseReelle(id=1, type_depense='materiau', designation='Plaques',
+                                                        quantite=10, unite='m²', prix_unitaire=8.5,
+                                                        date='2025-01-01')])
+        dm.add_projet(projet)
+        assert projet.numero == f'PROJ-{year}-0001'
+        assert dm.get_projet_by_numero(projet.numero).depenses_reelles[0].designation == 'Plaques'
+        assert dm.get_next_projet_number() == f'PROJ-{year}-0002'
+        assert dm.get_projet_by_numero('PROJ-1999-0001') is None
+
+    def test_users(self, dm):
+        dm.add_user(make_user('u1', 'paul', 'paul@btp.fr'))
+        dm.add_user(make_user('u2', 'marie@btp.fr', 'm@btp.fr'))
+        dm.add_user(make_user('u3', 'marie', 'marie@btp.fr'))
+        with pytest.raises(ValueError):
+            dm.add_user(make_user('u4', 'paul', 'autre@btp.fr'))
+        with pytest.raises(ValueError):
+            dm.add_user(make_user('u4', 'pierre', 'paul@btp.fr'))
+        assert dm.get_user_by_login('marie@btp.fr').id == 'u2'
+        assert dm.get_user_by_login('paul@btp.fr').id == 'u1'
+        user = dm.get_user_by_id('u1')
+        user.nom = 'Durand'
+        dm.update_user(user)
+        assert dm.get_user_by_username('paul').nom == 'Durand'
+        with pytest.raises(ResourceNotFoundError):
+            dm.update_user(make_user('absent', 'absent', 'absent@btp.fr'))
+
+    def test_page_clients_search_and_sort(self, dm):
+        for i, nom in enumerate(['dupont', 'Martin', 'Bernard', 'Durand'], start=1):
+            dm.add_client(Client(id=i, nom=nom, prenom='', entreprise='', adresse='', cp='', ville='',
+                                 telephone='', email=''))
+        page, total = dm.page_clients(0, 2)
+        assert total == 4
+        assert [c.nom for c in page] == ['Bernard', 'dupont']
+        page, total = dm.page_clients(2, 2, descending=True)
+        assert [c.nom for c in page] == ['dupont', 'Bernard']
+        page, total = dm.page_clients(0, 10, search='DU')
+        assert (sorted(c.nom for c in page), total) == (['Durand', 'dupont'], 2)
+
+    def test_page_search_is_literal(self, dm):
+        for i, nom in enumerate(['A_B', 'AXB', '50%', '500', 'C\\D'], start=1):
+            dm.add_client(Client(id=i, nom=nom, prenom='', entreprise='', adresse='', cp='', ville='',
+                                 telephone='', email=''))
+        assert [c.nom for c in dm.page_clients(0, 10, search='_')[0]] == ['A_B']
+        assert [c.nom for c in dm.page_clients(0, 10, search='%')[0]] == ['50%']
+        assert [c.nom for c in dm.page_clients(0, 10, search='\\')[0]] == ['C\\D']
+
+    def test_page_articles_filters(self, dm):
+        for ref, type_article, categorie, prix in [('A', 'materiau', 'platrerie', 3.0),
+                                                   ('B', 'main_oeuvre', 'platrerie', 45.0),
+                                                   ('C', 'materiau', '', 1.0)]:
+            dm.add_article(Article(id=0, reference=ref, designation=f'Article {ref}', unite='u',
+                                   prix_unitaire=prix, type_article=type_article, fournisseur_id=0,
+                                   categorie=categorie))
+        assert dm.count_articles_by_type() == {'materiau': 2, 'main_oeuvre': 1}
+        page, total = dm.page_articles(0, 10, type_article='materiau', order_by='prix_unitaire')
+        assert ([a.reference for a in page], total) == (['C', 'A'], 2)
+        page, total = dm.page_articles(0, 10, categories=['general'])
+        assert [a.reference for a in page] == ['C']
+        page, total = dm.page_articles(0, 1, order_by='colonne_inconnue')
+        assert ([a.reference for a in page], total) == (['A'], 3)
+
+    def test_page_ouvrages_and_devis(self, dm):
+        for ref, categorie in [('CLO', 'platrerie'), ('POR', 'menuiserie')]:
+            dm.add_ouvrage(Ouvrage(id=0, reference=ref, designation=ref, description='', categorie=categorie,
+                                   unite='u', composants=[ComposantOuvrage(article_id=1, quantite=1.0)]))
+        page, total = dm.page_ouvrages(0, 10, categories=['menuiserie'])
+        assert ([o.reference for o in page], total) == (['POR'], 1)
+        assert page[0].composants[0].quantite == 1.0
+        dm.add_devis(make_devis('DEV-2024-0001', date='2024-01-10'))
+        dm.add_devis(make_devis('DEV-2025-0001', date='2025-02-01'))
+        page, total = dm.page_devis(0, 1)
+        assert ([d.numero for d in page], total) == (['DEV-2025-0001'], 2)
+        assert isinstance(page[0].lignes[0].composants[0], ComposantOuvrage)
+        assert dm.page_devis(0, 10, search='2024-0001')[1] == 1
+
+    def test_demo_data(self, dm):
+        dm.init_demo_data()
+        assert len(dm.clients) == 2
+        assert dm.organisation.nom == 'POCKO construction'
+        assert dm.get_ouvrage_by_id(dm.ouvrages[0].id).composants
+
+
+class TestMemoryBackend:
+    """Spécificités du backend mémoire"""
+
+    def test_tenants_isolated(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tenant_module, 'MULTI_TENANT', True)
+        dm = DataManagerMemory(data_dir=tmp_path)
+        with use_tenant('dupont'):
+            dm.add_devis(make_devis('DEV-1'))
+            assert dm.data_dir == tmp_path / 'tenants' / 'dupont'
+        with use_tenant('martin'):
+            assert dm.devis_list == []
+            dm.add_devis(make_devis('DEV-1'))
+        assert dm.devis_list == []
+
+    def test_load_from_keeps_ids(self, tmp_path):
+        source = DataManagerMemory(data_dir=tmp_path)
+        source.init_demo_data()
+        copy = DataManagerMemory(data_dir=tmp_path)
+        copy.load_from(source)
+        assert sorted(a.id for a in copy.articles) == [1, 2, 3, 4]
+        assert copy.get_ouvrage_by_id(1).composants[2].article_id == 100
+        assert copy.get_client_by_id(2).nom == 'Martin'
+
+    def test_storage_config(self, monkeypatch):
+        monkeypatch.setattr(storage_config, '_memory_data_manager', None)
+        dm = storage_config.get_data_manager('memory')
+        assert isinstance(dm, DataManagerMemory)
+        assert storage_config.get_data_manager('memory') is dm
+
+    def test_sessions_follow_memory_backend(self, monkeypatch):
+        import erp.core.session_store as session_store
+        monkeypatch.setattr(session_store, 'STORAGE_BACKEND', 'memory')
+        assert isinstance(create_session_store('database'), MemorySessionStore)
@@ -0,0 +1,103 @@
+"""
+Tests du recalcul incrémental de l'éditeur de devis
+
+Sous-totaux de chapitres touchés par une ligne et regroupement des saisies
+rapides (EditBatcher).
+
+Exécuter: pytest tests/test_devis_edits.py -v
+"""
+import asyncio
+import sys
+import pytest
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from erp.core.models import LigneDevis
+from erp.ui.panels.devis import enclosing_chapters, section_totals
+from erp.ui.utils import EditBatcher
+
+
+def chapitre(titre, niveau):
+    return LigneDevis(type='chapitre', titre=titre, niveau=niveau)
+
+
+def ouvrage(prix):
+    return LigneDevis(type='ouvrage', designation='Cloison', quantite=1.0, unite='m²', prix_unitaire=prix)
+
+
+@pytest.fixture
+def lignes():
+    return [
+        chapitre('Lot 1', 1),          # 0
+        chapitre('Cloisons', 2),       # 1
+        ouvrage(100.0),                # 2
+        chapitre('Doublage', 3),       # 3
+        ouvrage(10.0),                 # 4
+        chapitre('Plafonds', 2),       # 5
+        ouvrage(50.0),                 # 6
+        chapitre('Lot 2', 1),          # 7
+        ouvrage(5.0),                  # 8
+    ]
+
+
+class TestSousTotaux:
+    """Seuls les chapitres ouverts au-dessus d'une ligne sont touchés"""
+
+    def test_section_totals(self, lignes):
+        totals = {idx: total for idx, (niveau, total) in section_totals(lignes).items()}
+        assert totals == {0: 160.0, 1: 110.0, 3: 10.0, 5: 50.0, 7: 5.0}
+
+    def test_enclosing_chapters(self, lignes):
+        assert enclosing_chapters(lignes, 2) == [1, 0]
+        assert enclosing_chapters(lignes, 4) == [3, 1, 0]
+        assert enclosing_chapters(lignes, 6) == [5, 0]
+        assert enclosing_chapters(lignes, 8) == [7]
+        assert enclosing_chapters([ouvrage(1.0)], 0) == []
+
+    def test_enclosing_matches_full_recalculation(self, lignes):
+        before = section_totals(lignes)
+        lignes[4].quantite = 3.0
+        after = section_totals(lignes)
+        changed = sorted(idx for idx in before if before[idx] != after[idx])
+        assert changed == sorted(enclosing_chapters(lignes, 4))
+
+
+class TestEditBatcher:
+    """Les modifications rapprochées sont appliquées en un seul lot"""
+
+    def test_coalesces_within_window(self):
+        batches = []
+
+        async def scenario():
+            batcher = EditBatcher(batches.append, wait=0.05)
+            for key in (3, 1, 3, 2):
+                batcher.push(key)
+                await asyncio.sleep(0.01)
+            assert batches == []
+            await asyncio.sleep(0.1)
+
+        asyncio.run(scenario())
+        assert batches == [[3, 1, 2]]
+
+    def test_flush_and_cancel(self):
+        batches = []
+
+        async def scenario():
+            batcher = EditBatcher(batches.append, wait=0.05)
+            batcher.push(1)
+            batcher.flush()
+            batcher.push(2)
+            batcher.cancel()
+            assert batcher.pending == []
+            await asyncio.sleep(0.1)
+
+        asyncio.run(scenario())
+        assert batches == [[1]]
+
+    def test_applies_immediately_without_event_loop(self):
+        batches = []
+        EditBatcher(batches.append).push('tva')
+        assert batches == [['tva']]
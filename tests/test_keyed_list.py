@@ -0,0 +1,76 @@
+"""
+Tests de la réconciliation par clé des listes (KeyedList)
+
+Les éléments sont créés dans un client NiceGUI sans navigateur : on vérifie
+quelles lignes sont conservées, recréées ou supprimées.
+
+Exécuter: pytest tests/test_keyed_list.py -v
+"""
+import sys
+import pytest
+from dataclasses import dataclass
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from nicegui import Client, ui
+from nicegui.page import page
+
+from erp.ui.components import KeyedList
+
+
+@dataclass
+class Ligne:
+    id: int
+    designation: str
+
+
+@pytest.fixture
+def keyed():
+    client = Client(page('/'), request=None)
+    with client:
+        container = ui.column()
+        rendered = []
+
+        def render(ligne):
+            rendered.append(ligne.id)
+            return ui.label(ligne.designation)
+
+        yield KeyedList(container, key=lambda l: l.id, render=render), container, rendered
+    client.delete()
+
+
+def labels(container):
+    return [child.text for child in container.default_slot.children]
+
+
+class TestKeyedList:
+    """Seules les lignes modifiées sont recréées"""
+
+    def test_initial_render(self, keyed):
+        rows, container, rendered = keyed
+        stats = rows.update([Ligne(1, 'Plaque'), Ligne(2, 'Rail')])
+        assert stats == {'kept': 0, 'inserted': 2, 'updated': 0, 'removed': 0}
+        assert labels(container) == ['Plaque', 'Rail']
+        assert len(rows) == 2
+
+    def test_unchanged_rows_are_reused(self, keyed):
+        rows, container, rendered = keyed
+        rows.update([Ligne(1, 'Plaque'), Ligne(2, 'Rail')])
+        first = container.default_slot.children[0]
+        stats = rows.update([Ligne(1, 'Plaque'), Ligne(2, 'Rail BA13')])
+        assert stats == {'kept': 1, 'inserted': 0, 'updated': 1, 'removed': 0}
+        assert rendered == [1, 2, 2]
+        assert container.default_slot.children[0] is first
+        assert labels(container) == ['Plaque', 'Rail BA13']
+
+    def test_insert_remove_and_reorder(self, keyed):
+        rows, container, rendered = keyed
+        rows.update([Ligne(1, 'Plaque'), Ligne(2, 'Rail'), Ligne(3, 'Vis')])
+        stats = rows.update([Ligne(3, 'Vis'), Ligne(4, 'Bande'), Ligne(1, 'Plaque')])
+        assert stats == {'kept': 2, 'inserted': 1, 'updated': 0, 'removed': 1}
+        assert labels(container) == ['Vis', 'Bande', 'Plaque']
+        assert rows.update([]) == {'kept': 0, 'inserted': 0, 'updated': 0, 'removed': 3}
+        assert labels(container) == []
@@ -0,0 +1,54 @@
+"""
+Tests des imports différés (démarrage de l'application sans dépendances lourdes)
+
+Chaque vérification s'exécute dans un interpréteur neuf.
+
+Exécuter: pytest tests/test_lazy_imports.py -v
+"""
+import sys
+import subprocess
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+HEAVY_MODULES = ('reportlab', 'stripe', 'pandas', 'pygwalker')
+
+# Modules importés par main.py avant le premier affichage d'une page
+STARTUP_MODULES = (
+    'erp.ui.app',
+    'erp.core.auth',
+    'erp.services.dashboard_service',
+    'erp.services.pdf_render_service',
+    'erp.services.audit_log_service',
+    'erp.services.email_service',
+    'erp.services.stripe_webhook_service',
+    'erp.services.subscription_service',
+    'erp.utils.metrics',
+)
+
+
+def loaded_after_import(modules):
+    code = (
+        'import sys\n'
+        + ''.join(f'import {m}\n' for m in modules)
+        + f'print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=project_root,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return [m for m in result.stdout.strip().split(',') if m]
+
+
+class TestLazyImports:
+    """Les bibliothèques lourdes ne sont chargées qu'à la première utilisation"""
+
+    def test_startup_modules_do_not_load_heavy_libraries(self):
+        assert loaded_after_import(STARTUP_MODULES) == []
+
+    def test_services_package_is_lazy(self):
+        assert loaded_after_import(['erp.services.category_service']) == []
+
+    def test_pdf_service_still_loads_reportlab(self):
+        assert loaded_after_import(['erp.services.pdf_service']) == ['reportlab']
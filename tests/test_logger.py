@@ -0,0 +1,105 @@
+"""
+Tests de la journalisation asynchrone (file, limitation de débit, JSON)
+
+Exécuter: pytest tests/test_logger.py -v
+"""
+import json
+import logging
+import queue
+import sys
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from erp.utils.logger import AsyncQueueHandler, JsonFormatter, RateLimitFilter
+
+
+def make_record(msg='Devis %s', args=('DEV-1',), level=logging.INFO, lineno=10, name='erp.test', **extra):
+    record = logging.LogRecord(name, level, '/erp/module.py', lineno, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestAsyncQueueHandler:
+    """Le thread appelant dépose l'enregistrement sans le formater ni bloquer"""
+
+    def test_simple_args_formatted_later(self):
+        handler = AsyncQueueHandler(queue.Queue())
+        handler.handle(make_record())
+        queued = handler.queue.get_nowait()
+        assert queued.msg == 'Devis %s'
+        assert queued.args == ('DEV-1',)
+        assert queued.getMessage() == 'Devis DEV-1'
+
+    def test_mutable_args_snapshotted(self):
+        handler = AsyncQueueHandler(queue.Queue())
+        lignes = ['a']
+        handler.handle(make_record('Lignes %s', (lignes,)))
+        lignes.append('b')
+        queued = handler.queue.get_nowait()
+        assert queued.args is None
+        assert queued.getMessage() == "Lignes ['a']"
+
+    def test_exception_rendered_before_queueing(self):
+        handler = AsyncQueueHandler(queue.Queue())
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = make_record()
+            record.exc_info = sys.exc_info()
+        handler.handle(record)
+        queued = handler.queue.get_nowait()
+        assert queued.exc_info is None
+        assert 'ValueError: boom' in queued.exc_text
+
+    def test_full_queue_drops_without_blocking(self):
+        handler = AsyncQueueHandler(queue.Queue(maxsize=1))
+        handler.handle(make_record())
+        handler.handle(make_record())
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 1
+
+
+class TestRateLimitFilter:
+    """Messages répétés limités par ligne de code, jamais les avertissements"""
+
+    def test_limit_and_suppressed_count(self):
+        now = [0.0]
+        limiter = RateLimitFilter(limit=2, window=60.0, clock=lambda: now[0])
+        assert [limiter.filter(make_record()) for _ in range(5)] == [True, True, False, False, False]
+        now[0] = 61.0
+        record = make_record()
+        assert limiter.filter(record)
+        assert record.getMessage() == 'Devis DEV-1 [3 message(s) similaire(s) supprimé(s)]'
+
+    def test_call_sites_and_warnings_independent(self):
+        limiter = RateLimitFilter(limit=1, clock=lambda: 0.0)
+        assert limiter.filter(make_record(lineno=1))
+        assert limiter.filter(make_record(lineno=2))
+        assert not limiter.filter(make_record(lineno=1))
+        assert limiter.filter(make_record(lineno=1, level=logging.WARNING))
+
+    def test_unlimited_by_default_except_listed_loggers(self):
+        from erp.utils.logger import _rate_limit_filter
+        assert all(_rate_limit_filter.filter(make_record(name='erp.test')) for _ in range(100))
+        assert _rate_limit_filter.limits['erp.services.subscription_service'] == 20
+
+    def test_per_logger_limit(self):
+        limiter = RateLimitFilter(limit=1, clock=lambda: 0.0)
+        limiter.limits['erp.bavard'] = None
+        assert all(limiter.filter(make_record(name='erp.bavard')) for _ in range(5))
+
+
+class TestJsonFormatter:
+    """Une ligne JSON par enregistrement"""
+
+    def test_fields_and_extra(self):
+        line = JsonFormatter().format(make_record(numero='DEV-1'))
+        data = json.loads(line)
+        assert data['level'] == 'INFO'
+        assert data['logger'] == 'erp.test'
+        assert data['message'] == 'Devis DEV-1'
+        assert data['numero'] == 'DEV-1'
+        assert 'exception' not in data
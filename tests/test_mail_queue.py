@@ -0,0 +1,241 @@
+"""
+Tests de la file d'envoi des emails contre un serveur SMTP local
+
+Le serveur de test (socketserver) implémente le strict nécessaire du
+protocole SMTP et compte les connexions et les messages reçus.
+
+Exécuter: pytest tests/test_mail_queue.py -v
+"""
+import os
+import sys
+import json
+import socketserver
+import threading
+import time
+import pytest
+from email import message_from_bytes
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from erp.services.mail_queue import MailQueue, SmtpSender
+
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    """Session SMTP minimale (EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT)"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        if server.down:
+            self.reply('421 service indisponible')
+            return
+        server.connections += 1
+        self.reply('220 localhost ESMTP test')
+        data, in_data = [], False
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if in_data:
+                if line == b'.\r\n':
+                    server.messages.append(message_from_bytes(b''.join(data)))
+                    data, in_data = [], False
+                    self.reply('250 OK')
+                else:
+                    data.append(line[1:] if line.startswith(b'..') else line)
+                continue
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self.wfile.write(b'250-localhost\r\n250 8BITMIME\r\n')
+            elif command == b'RCPT' and server.reject in line.decode():
+                self.reply('550 destinataire inconnu')
+            elif command in (b'HELO', b'MAIL', b'RCPT', b'RSET', b'NOOP'):
+                self.reply('250 OK')
+            elif command == b'DATA':
+                in_data = True
+                self.reply('354 fin avec .')
+            elif command == b'QUIT':
+                self.reply('221 au revoir')
+                return
+            else:
+                self.reply('500 commande inconnue')
+
+
+class SmtpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SmtpHandler)
+        self.connections = 0
+        self.messages = []
+        self.down = False
+        self.reject = 'refuse@'
+
+
+@pytest.fixture
+def smtp_server():
+    server = SmtpServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_queue(smtp_server, tmp_path):
+    queues = []
+
+    def make(**kwargs):
+        sender = SmtpSender('127.0.0.1', smtp_server.server_address[1], use_tls=False, timeout=5)
+        kwargs.setdefault('base_delay', 0.05)
+        mail_queue = MailQueue(sender, 'erp@example.com', queue_dir=tmp_path / 'queue', **kwargs)
+        queues.append(mail_queue)
+        return mail_queue
+
+    yield make
+    for mail_queue in queues:
+        mail_queue.shutdown()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+class TestDelivery:
+    """Envoi et réutilisation de la connexion SMTP"""
+
+    def test_messages_share_one_connection(self, make_queue, smtp_server, tmp_path):
+        mail_queue = make_queue()
+        for i in range(5):
+            mail_queue.enqueue(f'client{i}@example.com', f'Devis n°{i}', '<p>Bonjour</p>', 'Bonjour')
+        assert mail_queue.flush(5)
+
+        assert len(smtp_server.messages) == 5
+        assert smtp_server.connections == 1
+        assert smtp_server.messages[0]['To'] == 'client0@example.com'
+        assert mail_queue.pending == 0
+        assert list((tmp_path / 'queue').glob('*.json')) == []
+
+    def test_reconnects_after_idle_close(self, make_queue, smtp_server):
+        mail_queue = make_queue()
+        mail_queue.sender.idle_timeout = 0.05
+        mail_queue.enqueue('a@example.com', 'Sujet', '<p>1</p>')
+        mail_queue.flush(5)
+        assert wait_until(lambda: mail_queue.sender._server is None)
+
+        mail_queue.enqueue('b@example.com', 'Sujet', '<p>2</p>')
+        mail_queue.flush(5)
+        assert len(smtp_server.messages) == 2
+        assert smtp_server.connections == 2
+
+
+class TestRetries:
+    """Nouvelles tentatives et persistance"""
+
+    def test_retry_with_backoff_after_outage(self, make_queue, smtp_server):
+        smtp_server.down = True
+        mail_queue = make_queue(base_delay=0.2)
+        mail_queue.enqueue('a@example.com', 'Sujet', '<p>Bonjour</p>')
+        assert wait_until(lambda: mail_queue._pending and next(iter(mail_queue._pending.values()))['attempts'] >= 1)
+        assert smtp_server.messages == []
+
+        smtp_server.down = False
+        assert wait_until(lambda: len(smtp_server.messages) == 1)
+        assert mail_queue.pending == 0
+
+    def test_permanent_refusal_is_not_retried(self, make_queue, smtp_server, tmp_path):
+        mail_queue = make_queue()
+        mail_queue.enqueue('refuse@example.com', 'Sujet', '<p>Bonjour</p>')
+        mail_queue.flush(5)
+
+        failed = list((tmp_path / 'queue' / 'failed').glob('*.json'))
+        assert len(failed) == 1
+        assert json.loads(failed[0].read_text(encoding='utf-8'))['attempts'] == 1
+        assert mail_queue.pending == 0
+
+    def test_gives_up_after_max_attempts(self, make_queue, smtp_server):
+        smtp_server.down = True
+        mail_queue = make_queue(max_attempts=2, base_delay=0.01)
+        mail_queue.enqueue('a@example.com', 'Sujet', '<p>Bonjour</p>')
+        assert wait_until(lambda: mail_queue.failed == 1)
+
+    def test_pending_mail_survives_restart(self, make_queue, smtp_server):
+        smtp_server.down = True
+        first = make_queue(base_delay=60)
+        first.enqueue('a@example.com', 'Réinitialisation', '<p>Lien</p>', 'Lien')
+        assert wait_until(lambda: next(iter(first._pending.values()))['attempts'] == 1)
+        first.shutdown()
+
+        smtp_server.down = False
+        second = make_queue()
+        second.start()
+        assert second.pending == 1
+        # Échéance de la nouvelle tentative conservée sur disque : l'avancer
+        message = next(iter(second._pending.values()))
+        message['next_attempt'] = 0
+        second._write(message)
+        with second._cond:
+            second._cond.notify_all()
+        assert wait_until(lambda: len(smtp_server.messages) == 1)
+        assert smtp_server.messages[0]['To'] == 'a@example.com'
+
+
+class TestSharedDirectory:
+    """Plusieurs processus sur le même répertoire de file"""
+
+    def test_each_mail_sent_once_by_concurrent_queues(self, make_queue, smtp_server, tmp_path):
+        smtp_server.down = True
+        first = make_queue(base_delay=60)
+        for i in range(5):
+            first.enqueue(f'client{i}@example.com', 'Sujet', '<p>Bonjour</p>')
+        assert wait_until(lambda: all(m['attempts'] == 1 for m in first._pending.values()))
+        first.shutdown()
+        for path in (tmp_path / 'queue').glob('*.json'):
+            message = json.loads(path.read_text(encoding='utf-8'))
+            message['next_attempt'] = 0
+            path.write_text(json.dumps(message), encoding='utf-8')
+
+        smtp_server.down = False
+        workers = [make_queue(), make_queue()]
+        for worker in workers:
+            worker.start()
+        assert wait_until(lambda: all(w.pending == 0 for w in workers))
+        assert sorted(m['To'] for m in smtp_server.messages) == [f'client{i}@example.com' for i in range(5)]
+        assert list((tmp_path / 'queue').iterdir()) == []
+
+    def test_abandoned_claim_returned_to_queue(self, make_queue, smtp_server, tmp_path):
+        queue_dir = tmp_path / 'queue'
+        queue_dir.mkdir()
+        message = {'id': '0001-abc', 'to': 'a@example.com', 'subject': 'Sujet', 'html': '<p>1</p>',
+                   'text': None, 'attempts': 0, 'next_attempt': 0.0, 'last_error': None}
+        claimed = queue_dir / '0001-abc.4242-deadbeef.sending'
+        claimed.write_text(json.dumps(message), encoding='utf-8')
+        old = time.time() - 3600
+        os.utime(claimed, (old, old))
+
+        mail_queue = make_queue(claim_timeout=600)
+        mail_queue.start()
+        assert wait_until(lambda: len(smtp_server.messages) == 1)
+        assert not claimed.exists()
+
+    @pytest.mark.skipif(os.name != 'posix', reason='permissions POSIX')
+    def test_queue_files_private(self, make_queue, smtp_server, tmp_path):
+        smtp_server.down = True
+        mail_queue = make_queue(base_delay=60)
+        mail_queue.enqueue('a@example.com', 'Réinitialisation', '<p>token=secret</p>')
+        assert wait_until(lambda: next(iter(mail_queue._pending.values()))['attempts'] == 1)
+        path = next((tmp_path / 'queue').glob('*.json'))
+        assert path.stat().st_mode & 0o777 == 0o600
+        assert (tmp_path / 'queue').stat().st_mode & 0o777 == 0o700
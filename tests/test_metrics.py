@@ -0,0 +1,127 @@
+"""
+Tests des métriques HTTP et de leur exposition au format Prometheus
+
+Exécuter: pytest tests/test_metrics.py -v
+"""
+import sys
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from erp.utils.metrics import MetricsMiddleware, MetricsRegistry, metrics_access_allowed
+
+
+def parse(text):
+    """Retourne {ligne sans valeur: valeur} pour les échantillons exposés"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+class TestRegistry:
+    """Histogrammes, compteurs et métriques collectées"""
+
+    def test_histogram_is_cumulative(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0), slow_threshold=1.0)
+        for duration in (0.05, 0.5, 2.0):
+            registry.request_started('GET')
+            registry.request_finished('GET', '/devis/{id}', 200, duration)
+
+        samples = parse(registry.render())
+        labels = 'method="GET",route="/devis/{id}"'
+        assert samples[f'http_request_duration_seconds_bucket{{{labels},le="0.1"}}'] == 1
+        assert samples[f'http_request_duration_seconds_bucket{{{labels},le="1"}}'] == 2
+        assert samples[f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'] == 3
+        assert samples[f'http_request_duration_seconds_count{{{labels}}}'] == 3
+        assert samples[f'http_request_duration_seconds_sum{{{labels}}}'] == pytest.approx(2.55)
+        assert samples[f'http_slow_requests_total{{{labels}}}'] == 1
+        assert samples['http_requests_in_flight{method="GET"}'] == 0
+
+    def test_callbacks(self):
+        registry = MetricsRegistry()
+        registry.register_callback('erp_pool', 'Pool', lambda: {'idle': 2, 'in_use': 1}, label='state')
+        registry.register_callback('erp_queue', 'File', lambda: 4)
+        registry.register_callback('erp_absent', 'Non initialisé', lambda: None)
+        registry.register_callback('erp_broken', 'En erreur', lambda: 1 / 0)
+
+        text = registry.render()
+        samples = parse(text)
+        assert samples['erp_pool{state="idle"}'] == 2
+        assert samples['erp_queue'] == 4
+        assert '# TYPE erp_queue gauge' in text
+        assert 'erp_absent' not in text and 'erp_broken' not in text
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.register_callback('erp_x', 'X', lambda: {'a"b\\c': 1}, label='name')
+        assert 'erp_x{name="a\\"b\\\\c"} 1' in registry.render()
+
+
+class TestMiddleware:
+    """Mesure des requêtes d'une application FastAPI"""
+
+    @pytest.fixture
+    def client_and_registry(self):
+        registry = MetricsRegistry()
+        app = FastAPI()
+
+        @app.get('/items/{item_id}')
+        async def item(item_id: int):
+            if item_id == 0:
+                raise HTTPException(status_code=404)
+            return {'id': item_id}
+
+        @app.get('/boom')
+        async def boom():
+            raise RuntimeError('erreur')
+
+        app.add_middleware(MetricsMiddleware, registry=registry)
+        return TestClient(app, raise_server_exceptions=False), registry
+
+    def test_route_template_and_status(self, client_and_registry):
+        client, registry = client_and_registry
+        for item_id in (1, 2, 0):
+            client.get(f'/items/{item_id}')
+        client.get('/inconnu/123')
+
+        samples = parse(registry.render())
+        assert samples['http_responses_total{method="GET",route="/items/{item_id}",status="200"}'] == 2
+        assert samples['http_responses_total{method="GET",route="/items/{item_id}",status="404"}'] == 1
+        assert samples['http_responses_total{method="GET",route="other",status="404"}'] == 1
+        assert samples['http_requests_in_flight{method="GET"}'] == 0
+
+    def test_exception_counted_as_500(self, client_and_registry):
+        client, registry = client_and_registry
+        assert client.get('/boom').status_code == 500
+        samples = parse(registry.render())
+        assert samples['http_responses_total{method="GET",route="/boom",status="500"}'] == 1
+
+
+class TestAccess:
+    """Accès à /metrics refusé par défaut"""
+
+    @staticmethod
+    def request(host, **headers):
+        return SimpleNamespace(client=SimpleNamespace(host=host), headers=Headers(headers))
+
+    def test_without_token_only_direct_local_requests(self):
+        assert metrics_access_allowed(self.request('127.0.0.1'), '')
+        assert metrics_access_allowed(self.request('::1'), '')
+        assert not metrics_access_allowed(self.request('203.0.113.7'), '')
+        assert not metrics_access_allowed(self.request('127.0.0.1', **{'X-Forwarded-For': '203.0.113.7'}), '')
+
+    def test_token_required_when_set(self):
+        assert not metrics_access_allowed(self.request('127.0.0.1'), 'secret')
+        assert not metrics_access_allowed(self.request('203.0.113.7', Authorization='Bearer autre'), 'secret')
+        assert metrics_access_allowed(self.request('203.0.113.7', Authorization='Bearer secret'), 'secret')
@@ -0,0 +1,76 @@
+"""
+Tests du registre des styles PDF précompilés
+
+Exécuter: pytest tests/test_pdf_assets.py -v
+"""
+import sys
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from erp.core.models import Devis, LigneDevis, Organisation
+from erp.services.pdf_assets import get_pdf_assets, invalidate_pdf_assets
+from erp.services.pdf_service import generate_pdf
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    invalidate_pdf_assets()
+    yield
+    invalidate_pdf_assets()
+
+
+@pytest.fixture
+def logo_dir(tmp_path):
+    from PIL import Image
+    Image.new('RGBA', (120, 40), (200, 76, 60, 128)).save(tmp_path / 'logo.png')
+    return tmp_path
+
+
+class TestPdfAssetsRegistry:
+    """Tests de réutilisation et d'invalidation"""
+
+    def test_assets_are_reused(self, tmp_path):
+        org = Organisation(nom='BTP Nord')
+        assert get_pdf_assets(tmp_path, org) is get_pdf_assets(tmp_path, org)
+
+    def test_organisation_change_invalidates(self, tmp_path):
+        first = get_pdf_assets(tmp_path, Organisation(nom='BTP Nord'))
+        second = get_pdf_assets(tmp_path, Organisation(nom='BTP Sud'))
+        assert first is not second
+
+    def test_explicit_invalidation(self, tmp_path):
+        org = Organisation(nom='BTP Nord')
+        first = get_pdf_assets(tmp_path, org)
+        invalidate_pdf_assets()
+        assert get_pdf_assets(tmp_path, org) is not first
+
+    def test_table_style_copy_does_not_mutate_shared_style(self, tmp_path):
+        assets = get_pdf_assets(tmp_path, Organisation())
+        before = len(assets.lines_style.getCommands())
+        copy = assets.table_style(assets.lines_style)
+        copy.add('BACKGROUND', (0, 1), (6, 1), 'red')
+        assert len(assets.lines_style.getCommands()) == before
+
+
+class TestGeneratePdfWithAssets:
+    """Styles partagés et logo intégré à chaque document (PDF réel)"""
+
+    def test_logo_embedded_in_successive_pdfs(self, logo_dir):
+        client = SimpleNamespace(nom='Durand', prenom='Paul', adresse='', cp='', ville='')
+        dm = SimpleNamespace(data_dir=logo_dir, organisation=Organisation(nom='BTP Nord'),
+                             get_client_by_id=lambda _id: client)
+        devis = Devis(numero='DEV-1', date='2025-01-01', client_id=1,
+                      lignes=[LigneDevis(type='ouvrage', designation='Enduit', quantite=1.0, prix_unitaire=10.0)])
+
+        for i in range(2):
+            pdf = generate_pdf(devis, dm, logo_dir / f'{i}.pdf').read_bytes()
+            assert pdf.startswith(b'%PDF')
+            assert pdf.count(b'/Subtype /Image') == 2  # image + masque de transparence
+            assert b'/SMask' in pdf
+            assert b'/Width 120' in pdf and b'/Height 40' in pdf
+            assert b'Do' in pdf  # image effectivement dessinée sur la page
@@ -0,0 +1,128 @@
+"""
+Tests de l'export par lot des devis en ZIP
+
+Exécuter: pytest tests/test_pdf_export_service.py -v
+"""
+import os
+import sys
+import asyncio
+import time
+import zipfile
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import erp.services.pdf_render_service as render_module
+from erp.core.models import Client, Devis, LigneDevis, Organisation
+from erp.services.pdf_export_service import client_folder_name, export_devis_zip, prune_exports, select_devis
+from erp.services.pdf_render_service import PdfRenderService
+
+
+def make_devis(numero, client_id, date='2025-03-10', statut='en cours'):
+    ligne = LigneDevis(type='ouvrage', id=1, ouvrage_id=1, designation='Peinture',
+                       quantite=10.0, unite='m²', prix_unitaire=20.0)
+    return Devis(numero=numero, date=date, client_id=client_id, statut=statut, lignes=[ligne])
+
+
+@pytest.fixture
+def data_manager(tmp_path):
+    clients = {
+        1: Client(id=1, nom='Durand', prenom='Paul', entreprise='', adresse='', cp='', ville='', telephone='', email=''),
+        2: Client(id=2, nom='', prenom='', entreprise='SCI Les Tilleuls', adresse='', cp='', ville='', telephone='', email=''),
+    }
+    return SimpleNamespace(
+        data_dir=tmp_path,
+        organisation=Organisation(nom='BTP Nord'),
+        get_client_by_id=clients.get,
+        get_ouvrage_by_id=lambda _id: None,
+    )
+
+
+@pytest.fixture
+def render_service(tmp_path, monkeypatch):
+    """Service de rendu sur un pool de threads et un cache temporaire"""
+    svc = PdfRenderService(cache_dir=tmp_path / 'cache')
+    svc._executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(render_module, '_pdf_render_service', svc)
+    yield svc
+    svc.shutdown()
+
+
+class TestSelectDevis:
+    """Tests du filtrage client / statut / période"""
+
+    def setup_method(self):
+        self.devis = [
+            make_devis('DEV-1', 1, '2025-01-05', 'accepté'),
+            make_devis('DEV-2', 1, '2025-02-10', 'en cours'),
+            make_devis('DEV-3', 2, '2025-02-20', 'accepté'),
+        ]
+
+    def test_by_client(self):
+        assert [d.numero for d in select_devis(self.devis, client_id=1)] == ['DEV-1', 'DEV-2']
+
+    def test_by_statut(self):
+        assert [d.numero for d in select_devis(self.devis, statut='accepté')] == ['DEV-1', 'DEV-3']
+
+    def test_by_month(self):
+        selection = select_devis(self.devis, date_debut='2025-02-01', date_fin='2025-02-28')
+        assert [d.numero for d in selection] == ['DEV-2', 'DEV-3']
+
+
+class TestExportZip:
+    """Tests de la génération de l'archive"""
+
+    def test_client_folder_name(self):
+        assert client_folder_name(None) == 'Client_inconnu'
+        assert client_folder_name(SimpleNamespace(prenom='', nom='', entreprise='SCI A B')) == 'SCI_A_B'
+
+    def test_export_zip_and_progress(self, data_manager, render_service, tmp_path):
+        devis = [make_devis('DEV-1', 1), make_devis('DEV-2', 2)]
+        progress = []
+        zip_path = tmp_path / 'export.zip'
+
+        stats = asyncio.run(export_devis_zip(data_manager, devis, zip_path, lambda d, t: progress.append((d, t))))
+
+        assert stats == {'total': 2, 'rendered': 2, 'cached': 0, 'failed': 0}
+        assert progress[-1] == (2, 2)
+        with zipfile.ZipFile(zip_path) as archive:
+            assert archive.namelist() == ['Paul_Durand/DEV-1.pdf', 'SCI_Les_Tilleuls/DEV-2.pdf']
+
+    def test_only_stale_devis_are_rendered(self, data_manager, render_service, tmp_path):
+        devis = [make_devis('DEV-1', 1), make_devis('DEV-2', 2)]
+        asyncio.run(export_devis_zip(data_manager, devis, tmp_path / 'a.zip'))
+
+        devis[1].lignes[0].quantite = 12.0
+        stats = asyncio.run(export_devis_zip(data_manager, devis, tmp_path / 'b.zip'))
+        assert stats == {'total': 2, 'rendered': 1, 'cached': 1, 'failed': 0}
+
+    def test_failed_devis_reported_in_archive(self, data_manager, render_service, tmp_path, monkeypatch):
+        original = render_module._render_job
+
+        def failing_for_dev2(devis, *args):
+            if devis.numero == 'DEV-2':
+                raise RuntimeError('boom')
+            return original(devis, *args)
+
+        monkeypatch.setattr(render_module, '_render_job', failing_for_dev2)
+        devis = [make_devis('DEV-1', 1), make_devis('DEV-2', 2)]
+        stats = asyncio.run(export_devis_zip(data_manager, devis, tmp_path / 'export.zip'))
+
+        assert stats == {'total': 2, 'rendered': 1, 'cached': 0, 'failed': 1}
+        with zipfile.ZipFile(tmp_path / 'export.zip') as archive:
+            assert archive.namelist() == ['Paul_Durand/DEV-1.pdf', 'ERREURS.txt']
+            assert 'DEV-2' in archive.read('ERREURS.txt').decode('utf-8')
+
+    def test_old_exports_pruned(self, tmp_path):
+        old, recent = tmp_path / 'old.zip', tmp_path / 'recent.zip'
+        for path in (old, recent):
+            path.write_bytes(b'PK')
+        two_days_ago = time.time() - 48 * 3600
+        os.utime(old, (two_days_ago, two_days_ago))
+        assert prune_exports(tmp_path, max_age_hours=24) == 1
+        assert not old.exists() and recent.exists()
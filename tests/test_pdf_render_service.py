@@ -0,0 +1,167 @@
+"""
+Tests du service de rendu PDF (pool, file bornée et cache disque)
+Le pool de processus est remplacé par un pool de threads pour rester rapide.
+
+Exécuter: pytest tests/test_pdf_render_service.py -v
+"""
+import os
+import sys
+import asyncio
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import erp.services.pdf_render_service as render_module
+from erp.core.models import Client, Devis, LigneDevis, Organisation
+from erp.services.pdf_render_service import PdfRenderContext, PdfRenderService, compute_render_key, prune_cache
+from erp.utils.exceptions import PDFGenerationError
+
+
+def make_devis(quantite=2.0):
+    ligne = LigneDevis(type='ouvrage', id=1, ouvrage_id=1, designation='Cloison BA13',
+                       quantite=quantite, unite='m²', prix_unitaire=45.0)
+    return Devis(numero='DEV-2025-0001', date='2025-01-15', client_id=1,
+                 objet='Rénovation', lignes=[ligne])
+
+
+@pytest.fixture
+def context(tmp_path):
+    client = Client(id=1, nom='Durand', prenom='Paul', entreprise='', adresse='1 rue du Port',
+                    cp='59000', ville='Lille', telephone='', email='')
+    return PdfRenderContext(tmp_path, organisation=Organisation(nom='BTP Nord'), clients={1: client})
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = PdfRenderService(cache_dir=tmp_path / 'cache', max_queue=2)
+    svc._executor = ThreadPoolExecutor(max_workers=2)
+    yield svc
+    svc.shutdown()
+
+
+class TestRenderKey:
+    """Tests de l'empreinte de cache"""
+
+    def test_key_is_stable(self, context):
+        assert compute_render_key(make_devis(), context) == compute_render_key(make_devis(), context)
+
+    def test_key_changes_with_content(self, context):
+        assert compute_render_key(make_devis(2.0), context) != compute_render_key(make_devis(3.0), context)
+
+    def test_key_changes_with_organisation(self, context, tmp_path):
+        other = PdfRenderContext(tmp_path, organisation=Organisation(nom='Autre'), clients=context.clients)
+        assert compute_render_key(make_devis(), context) != compute_render_key(make_devis(), other)
+
+    def test_key_changes_with_template(self, context):
+        template = {'blocks': [{'type': 'titre', 'x': 10, 'y': 10, 'width': 200}]}
+        assert compute_render_key(make_devis(), context) != compute_render_key(make_devis(), context, template)
+
+
+class TestPdfRenderService:
+    """Tests du rendu et du cache disque"""
+
+    def test_render_standard_layout(self, service, context, tmp_path):
+        dest = tmp_path / 'out' / 'devis.pdf'
+        result = asyncio.run(service.render(make_devis(), context, dest))
+        assert result == dest
+        assert dest.read_bytes().startswith(b'%PDF')
+
+    def test_render_template_layout(self, service, context):
+        template = {'blocks': [{'type': 'titre', 'x': 10, 'y': 10, 'width': 200},
+                               {'type': 'totaux', 'x': 400, 'y': 900, 'width': 250}]}
+        result = asyncio.run(service.render(make_devis(), context, template=template))
+        assert result.read_bytes().startswith(b'%PDF')
+
+    def test_unchanged_devis_is_not_rerendered(self, service, context, monkeypatch):
+        calls = []
+        original = render_module._render_job
+
+        def counting_job(*args):
+            calls.append(args[0].numero)
+            return original(*args)
+
+        monkeypatch.setattr(render_module, '_render_job', counting_job)
+        asyncio.run(service.render(make_devis(), context))
+        asyncio.run(service.render(make_devis(), context))
+        assert calls == ['DEV-2025-0001']
+
+        asyncio.run(service.render(make_devis(5.0), context))
+        assert len(calls) == 2
+
+    def test_queue_is_bounded(self, service, context, monkeypatch):
+        def slow_job(devis, ctx, template, output_path):
+            import time
+            time.sleep(0.2)
+            Path(output_path).write_bytes(b'%PDF-fake')
+            return output_path
+
+        monkeypatch.setattr(render_module, '_render_job', slow_job)
+
+        async def flood():
+            return await asyncio.gather(
+                *(service.render(make_devis(float(q)), context) for q in range(1, 4)),
+                return_exceptions=True
+            )
+
+        results = asyncio.run(flood())
+        errors = [r for r in results if isinstance(r, PDFGenerationError)]
+        assert len(errors) == 1
+        assert service.queue_size == 0
+
+    def test_failed_render_raises_pdf_error(self, service, context, monkeypatch):
+        def failing_job(*args):
+            raise RuntimeError('boom')
+
+        monkeypatch.setattr(render_module, '_render_job', failing_job)
+        with pytest.raises(PDFGenerationError):
+            asyncio.run(service.render(make_devis(), context))
+
+
+class TestCacheBounds:
+    """Cache par dossier de données et élagage en taille et en âge"""
+
+    @staticmethod
+    def make_pdf(cache_dir, name, size, age_days):
+        path = cache_dir / f'{name}.pdf'
+        path.write_bytes(b'x' * size)
+        mtime = time.time() - age_days * 86400
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_prune_by_age_and_size(self, tmp_path):
+        old = self.make_pdf(tmp_path, 'old', 10, age_days=40)
+        lru = self.make_pdf(tmp_path, 'lru', 100, age_days=3)
+        recent = self.make_pdf(tmp_path, 'recent', 100, age_days=1)
+        assert prune_cache(tmp_path, max_bytes=150, max_age_days=30) == 2
+        assert not old.exists() and not lru.exists()
+        assert recent.exists()
+
+    def test_cache_follows_context_data_dir(self, tmp_path, context):
+        svc = PdfRenderService(max_queue=2)
+        svc._executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            other = PdfRenderContext(tmp_path / 'tenants' / 'beta', organisation=context.organisation,
+                                     clients=context.clients)
+            first = asyncio.run(svc.render(make_devis(), context))
+            second = asyncio.run(svc.render(make_devis(), other))
+        finally:
+            svc.shutdown()
+        assert first.parent == tmp_path / 'pdf_cache'
+        assert second.parent == tmp_path / 'tenants' / 'beta' / 'pdf_cache'
+
+    def test_render_prunes_cache(self, tmp_path, context):
+        svc = PdfRenderService(cache_dir=tmp_path / 'cache', max_cache_bytes=0)
+        svc._executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            (tmp_path / 'cache').mkdir()
+            stale = self.make_pdf(tmp_path / 'cache', 'stale', 10, age_days=1)
+            asyncio.run(svc.render(make_devis(), context, tmp_path / 'out.pdf'))
+        finally:
+            svc.shutdown()
+        assert not stale.exists()
+        assert (tmp_path / 'out.pdf').read_bytes().startswith(b'%PDF')
@@ -0,0 +1,106 @@
+"""
+Tests du moteur de rendu des modèles de devis compilés
+
+Exécuter: pytest tests/test_pdf_template_engine.py -v
+"""
+import sys
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from erp.core.models import Client, Devis, LigneDevis, Organisation
+from erp.services.pdf_service import render_template_pdf
+from erp.services.pdf_template_engine import (
+    Field, bind_template_data, compile_template, get_compiled_template, invalidate_compiled_templates,
+)
+
+
+TEMPLATE = {'blocks': [
+    {'type': 'adresse_entreprise', 'x': 20, 'y': 20, 'width': 250, 'height': 80},
+    {'type': 'client', 'x': 450, 'y': 140, 'width': 250, 'height': 80},
+    {'type': 'tableau_ouvrages', 'x': 20, 'y': 300, 'width': 700, 'height': 300},
+    {'type': 'totaux', 'x': 450, 'y': 650, 'width': 250, 'height': 80},
+    {'type': 'logo', 'x': 600, 'y': 20, 'width': 150, 'height': 60, 'logoPath': ''},
+]}
+
+
+@pytest.fixture(autouse=True)
+def clean_plans():
+    invalidate_compiled_templates()
+    yield
+    invalidate_compiled_templates()
+
+
+@pytest.fixture
+def data_manager(tmp_path):
+    client = Client(id=1, nom='Durand', prenom='Paul', entreprise='', adresse='1 rue Haute',
+                    cp='59000', ville='Lille', telephone='', email='')
+    ouvrage = SimpleNamespace(designation='Peinture murale')
+    return SimpleNamespace(
+        data_dir=tmp_path,
+        organisation=Organisation(nom='BTP Nord', cp='59000', ville='Lille'),
+        get_client_by_id=lambda _id: client if _id == 1 else None,
+        get_ouvrage_by_id=lambda _id: ouvrage,
+    )
+
+
+@pytest.fixture
+def devis():
+    ligne = LigneDevis(type='ouvrage', id=1, ouvrage_id=7, designation='Peinture',
+                       quantite=10.0, unite='m²', prix_unitaire=20.0)
+    return Devis(numero='DEV-1', date='2025-03-10', client_id=1, lignes=[ligne])
+
+
+class TestCompilation:
+    """Tests de la compilation et du cache des plans"""
+
+    def test_positions_converted_once(self):
+        plan = compile_template({'blocks': [{'type': 'titre', 'x': 0, 'y': 0, 'width': 378, 'height': 50}]})
+        centred = next(op for op in plan.ops if op[0] == 'centred')
+        assert centred[1] == pytest.approx(50 * 72 / 25.4)  # 378 px = 100 mm, centre à 50 mm
+
+    def test_only_required_fields_are_bound(self):
+        plan = compile_template({'blocks': [{'type': 'client'}]})
+        assert plan.fields == {'client_lines'}
+
+    def test_plan_reused_until_template_edited(self):
+        first = get_compiled_template(TEMPLATE)
+        assert get_compiled_template({'blocks': list(TEMPLATE['blocks']), 'name': 'copie'}) is first
+
+        edited = {'blocks': TEMPLATE['blocks'] + [{'type': 'titre', 'x': 300, 'y': 10}]}
+        assert get_compiled_template(edited) is not first
+
+    def test_unknown_blocks_are_ignored(self):
+        assert compile_template({'blocks': [{'type': 'texte_libre'}]}).ops == ()
+
+
+class TestRendering:
+    """Tests du remplissage et de l'exécution des plans"""
+
+    def test_bind_data(self, data_manager, devis):
+        plan = get_compiled_template(TEMPLATE)
+        data = bind_template_data(plan.fields, devis, data_manager)
+
+        assert data['org_nom'] == 'BTP Nord'
+        assert data['client_lines'] == ['Paul Durand', '1 rue Haute', '59000 Lille']
+        assert data['ouvrages_rows'][1][:3] == ['7', 'Peinture murale', '10.0']
+        assert data['total_ht'].startswith('Total HT: ')
+        assert all(arg.name in data for op in plan.ops for arg in op if isinstance(arg, Field))
+
+    def test_unknown_client_draws_nothing(self, data_manager, devis):
+        devis.client_id = 99
+        assert bind_template_data(frozenset({'client_lines'}), devis, data_manager)['client_lines'] == []
+
+    def test_render_template_pdf(self, data_manager, devis, tmp_path):
+        path = render_template_pdf(TEMPLATE, devis, data_manager, tmp_path / 'devis.pdf')
+        assert path.read_bytes().startswith(b'%PDF')
+
+    def test_missing_logo_placeholder_only_in_preview(self, data_manager, devis, tmp_path):
+        final = render_template_pdf(TEMPLATE, devis, data_manager, tmp_path / 'final.pdf')
+        preview = render_template_pdf(TEMPLATE, devis, data_manager, tmp_path / 'preview.pdf',
+                                      show_placeholders=True)
+        assert preview.stat().st_size > final.stat().st_size
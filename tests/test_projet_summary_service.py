@@ -0,0 +1,91 @@
+"""
+Tests du cache des chiffres de chantier (cards du tableau des chantiers)
+
+Exécuter: pytest tests/test_projet_summary_service.py -v
+"""
+import sys
+import pytest
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import erp.services.projet_summary_service as summary_module
+from erp.core.data_manager_memory import DataManagerMemory
+from erp.core.models import Article, ComposantOuvrage, DepenseReelle, Devis, LigneDevis, Projet
+from erp.services.projet_summary_service import ProjetSummaryService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = ProjetSummaryService(ttl=60)
+    monkeypatch.setattr(summary_module, '_projet_summary_service', service)
+    return service
+
+
+@pytest.fixture
+def dm(tmp_path):
+    dm = DataManagerMemory(data_dir=tmp_path)
+    dm.add_article(Article(id=1, reference='BA13', designation='Plaque', unite='m²', prix_unitaire=8.5,
+                           type_article='materiau', fournisseur_id=0))
+    ligne = LigneDevis(type='ouvrage', ouvrage_id=1, designation='Cloison', quantite=10.0, unite='m²',
+                       prix_unitaire=40.0,
+                       composants=[ComposantOuvrage(article_id=1, quantite=1.05, designation='Plaque BA13',
+                                                    unite='m²', prix_unitaire=8.5)])
+    dm.add_devis(Devis(numero='DEV-1', date='2025-01-01', client_id=1, objet='Cloisons', lignes=[ligne]))
+    dm.add_projet(Projet(id=1, numero='PROJ-1', devis_numeros=['DEV-1'], client_id=1, date_creation='2025-01-02',
+                         depenses_reelles=[DepenseReelle(id=1, type_depense='materiau', designation='Plaque BA13',
+                                                         quantite=12, unite='m²', prix_unitaire=8.5,
+                                                         date='2025-01-03', article_id=1)]))
+    return dm
+
+
+class TestProjetSummaryService:
+    """Totaux des cards et détail à l'ouverture"""
+
+    def test_summary_matches_ecarts(self, service, dm):
+        projet = dm.get_projet_by_id(1)
+        summary = service.get_summary(projet, dm)
+        ecarts = projet.get_ecarts(dm)['total_ht']
+        assert summary['prev_total_ht'] == pytest.approx(ecarts['prev'])
+        assert summary['reel_total_ht'] == pytest.approx(ecarts['reel'])
+        assert summary['ecart_pct'] == pytest.approx(ecarts['ecart_pct'])
+
+    def test_details_computed_once(self, service, dm, monkeypatch):
+        calls = []
+        compute = summary_module.compute_projet_details
+        monkeypatch.setattr(summary_module, 'compute_projet_details',
+                            lambda projet, dm: calls.append(projet.id) or compute(projet, dm))
+        projet = dm.get_projet_by_id(1)
+        details = service.get_details(projet, dm)
+        assert service.get_details(projet, dm) is details
+        assert calls == [1]
+        assert details['prev']['materiaux'][0]['quantite'] == pytest.approx(10.5)
+        assert details['ecarts']['par_type']['materiaux']['reel'] == pytest.approx(102.0)
+
+    def test_devis_update_invalidates_attached_projet(self, service, dm):
+        projet = dm.get_projet_by_id(1)
+        before = service.get_summary(projet, dm)['prev_total_ht']
+        devis = dm.get_devis_by_numero('DEV-1')
+        devis.lignes[0].quantite = 20.0
+        dm.update_devis(devis)
+        assert service.get_summary(projet, dm)['prev_total_ht'] == pytest.approx(before * 2)
+
+    def test_projet_update_invalidates(self, service, dm):
+        projet = dm.get_projet_by_id(1)
+        service.get_details(projet, dm)
+        projet.depenses_reelles = []
+        dm.update_projet(projet)
+        assert service.get_summary(projet, dm)['reel_total_ht'] == 0
+        assert service.get_details(projet, dm)['reel']['materiaux'] == []
+
+    def test_article_update_clears_everything(self, service, dm):
+        projet = dm.get_projet_by_id(1)
+        service.get_details(projet, dm)
+        article = dm.get_article_by_id(1)
+        article.type_article = 'main_oeuvre'
+        dm.update_article(article)
+        details = service.get_details(projet, dm)
+        assert details['prev']['materiaux'] == []
+        assert len(details['prev']['main_oeuvre']) == 1
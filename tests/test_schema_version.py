@@ -0,0 +1,69 @@
+"""
+Tests du démarrage rapide : création des tables conditionnée à la version du schéma
+
+Exécuter: pytest tests/test_schema_version.py -v
+"""
+import sys
+import pytest
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from erp.core.database import Base, DatabaseManager, schema_fingerprint
+from erp.core.db_models import SchemaVersionModel
+
+
+@pytest.fixture
+def manager():
+    db = DatabaseManager()
+    db.engine = create_engine('sqlite://', poolclass=StaticPool)
+    db.session_factory = sessionmaker(bind=db.engine)
+    db.Session = scoped_session(db.session_factory)
+    db.statements = []
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: db.statements.append(statement))
+    yield db
+    db.close()
+
+
+class TestEnsureSchema:
+    """create_all n'est exécuté que si le schéma a changé"""
+
+    def test_first_start_creates_tables(self, manager):
+        assert manager.ensure_schema() is True
+        assert any(s.strip().startswith('CREATE TABLE') for s in manager.statements)
+        with manager.get_session() as session:
+            assert session.get(SchemaVersionModel, 1).fingerprint == schema_fingerprint(Base.metadata)
+
+    def test_matching_version_skips_create_all(self, manager):
+        manager.ensure_schema()
+        manager.statements.clear()
+
+        assert manager.ensure_schema() is False
+        assert len(manager.statements) == 1
+        assert 'schema_version' in manager.statements[0]
+
+    def test_changed_schema_recreates(self, manager):
+        manager.ensure_schema()
+        with manager.get_session() as session:
+            session.get(SchemaVersionModel, 1).fingerprint = 'ancienne-version'
+        assert manager.ensure_schema() is True
+
+
+class TestFingerprint:
+    """L'empreinte suit le schéma déclaré"""
+
+    def test_stable(self):
+        assert schema_fingerprint(Base.metadata) == schema_fingerprint(Base.metadata)
+
+    def test_changes_with_columns(self):
+        first, second = MetaData(), MetaData()
+        Table('t', first, Column('id', Integer, primary_key=True))
+        Table('t', second, Column('id', Integer, primary_key=True), Column('n', Integer))
+        assert schema_fingerprint(first) != schema_fingerprint(second)
@@ -0,0 +1,86 @@
+"""
+Tests des stockages de sessions (mémoire et base de données)
+
+Exécuter: pytest tests/test_session_store.py -v
+"""
+import sys
+import pytest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from erp.core.auth import SessionManager
+from erp.core.session_store import MemorySessionStore, SqlSessionStore
+
+
+NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemorySessionStore()
+    return SqlSessionStore.sqlite(str(tmp_path / 'sessions.db'))
+
+
+class TestSessionStore:
+    """Comportement commun aux deux backends"""
+
+    def test_put_get_delete(self, store):
+        store.put('session', 'abc', 'user-1', NOW + timedelta(hours=1))
+        assert store.get('session', 'abc', now=NOW) == 'user-1'
+        assert store.get('reset', 'abc', now=NOW) is None
+
+        store.delete('session', 'abc')
+        assert store.get('session', 'abc', now=NOW) is None
+
+    def test_expired_token_is_rejected(self, store):
+        store.put('session', 'abc', 'user-1', NOW - timedelta(seconds=1))
+        assert store.get('session', 'abc', now=NOW) is None
+
+    def test_purge_only_expired(self, store):
+        store.put('session', 'old', 'user-1', NOW - timedelta(hours=1))
+        store.put('reset', 'old-reset', 'user-1', NOW - timedelta(minutes=1))
+        store.put('session', 'new', 'user-2', NOW + timedelta(hours=1))
+
+        assert store.purge_expired(now=NOW) == 2
+        assert store.get('session', 'new', now=NOW) == 'user-2'
+
+
+class TestMemoryStoreHeap:
+    """Tests de la purge par tas d'expiration"""
+
+    def test_deleted_and_renewed_entries_are_skipped(self):
+        store = MemorySessionStore()
+        store.put('session', 'a', 'user-1', NOW - timedelta(hours=2))
+        store.delete('session', 'a')
+        store.put('session', 'b', 'user-2', NOW - timedelta(hours=1))
+        store.put('session', 'b', 'user-2', NOW + timedelta(hours=1))  # Session prolongée
+
+        assert store.purge_expired(now=NOW) == 0
+        assert len(store) == 1
+        assert store.get('session', 'b', now=NOW) == 'user-2'
+
+
+class TestSharedSessions:
+    """Les sessions en base sont partagées et survivent au redémarrage"""
+
+    def test_session_visible_from_another_manager(self, tmp_path):
+        path = str(tmp_path / 'sessions.db')
+        first = SessionManager(SqlSessionStore.sqlite(path))
+        session_id = first.create_session('user-1')
+        token = first.create_reset_token('user-1')
+
+        # Nouveau processus / redémarrage : nouvelle connexion au même stockage
+        second = SessionManager(SqlSessionStore.sqlite(path))
+        assert second.get_user_id(session_id) == 'user-1'
+        assert second.get_user_id_from_reset_token(token) == 'user-1'
+
+        second.delete_session(session_id)
+        assert first.get_user_id(session_id) is None
+
+    def test_empty_session_id(self):
+        assert SessionManager(MemorySessionStore()).get_user_id('') is None
@@ -0,0 +1,135 @@
+"""
+Tests du cache des réglages (organisation) et de ses notifications
+
+Exécuter: pytest tests/test_settings_service.py -v
+"""
+import json
+import socket
+import sys
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine
+
+import erp.core.tenant as tenant_module
+from erp.core.models import Organisation
+from erp.core.tenant import use_tenant
+from erp.services.settings_service import ORGANISATION, SettingsService
+
+
+@pytest.fixture
+def service():
+    return SettingsService()
+
+
+@pytest.fixture
+def loads():
+    """Chargeur de l'organisation qui compte les lectures « en base »"""
+    calls = []
+
+    def load():
+        calls.append(tenant_module.current_tenant())
+        return Organisation(nom=f'Entreprise {len(calls)}')
+    return load, calls
+
+
+class TestCache:
+    """Une seule lecture tant que l'organisation ne change pas"""
+
+    def test_read_once_and_copies(self, service, loads):
+        load, calls = loads
+        first = service.get_organisation(load)
+        first.nom = 'modifiée sans enregistrer'
+        assert service.get_organisation(load).nom == 'Entreprise 1'
+        assert calls == [None]
+
+    def test_changed_reloads_and_notifies(self, service, loads):
+        load, calls = loads
+        events = []
+        service.subscribe(lambda kind, tenant: events.append((kind, tenant)))
+        service.get_organisation(load)
+        service.changed()
+        assert service.get_organisation(load).nom == 'Entreprise 2'
+        assert events == [(ORGANISATION, None)]
+
+    def test_tenants_isolated(self, service, loads, monkeypatch):
+        monkeypatch.setattr(tenant_module, 'MULTI_TENANT', True)
+        load, calls = loads
+        with use_tenant('alpha'):
+            service.get_organisation(load)
+            service.changed()
+        with use_tenant('beta'):
+            service.get_organisation(load)
+        with use_tenant('beta'):
+            service.get_organisation(load)
+        assert calls == ['alpha', 'beta']
+
+    def test_value_read_during_invalidation_not_cached(self, service):
+        calls = []
+
+        def load():
+            calls.append(1)
+            if len(calls) == 1:
+                service.changed()  # Écriture concurrente pendant la lecture
+            return Organisation(nom=str(len(calls)))
+
+        service.get_organisation(load)
+        assert service.get_organisation(load).nom == '2'
+        assert service.get_organisation(load).nom == '2'
+
+
+class TestNotifications:
+    """Changements faits par les autres processus"""
+
+    def test_remote_notification_invalidates(self, service, loads):
+        load, calls = loads
+        service.get_organisation(load)
+        service.handle_notification(json.dumps({'kind': ORGANISATION, 'tenant': None, 'origin': 'autre'}))
+        service.get_organisation(load)
+        assert len(calls) == 2
+
+    def test_own_and_invalid_notifications_ignored(self, service, loads):
+        load, calls = loads
+        service.get_organisation(load)
+        service.handle_notification(json.dumps({'kind': ORGANISATION, 'tenant': None, 'origin': service.origin}))
+        service.handle_notification('pas du json')
+        service.get_organisation(load)
+        assert len(calls) == 1
+
+    def test_listener_only_for_postgresql(self, service):
+        assert service.start_listener(create_engine('sqlite://')) is False
+        assert service.start_listener(None) is False
+
+    def test_wait_notifications_psycopg3(self):
+        payloads = ['{"kind": "organisation"}']
+        conn = SimpleNamespace(notifies=lambda timeout, stop_after: iter(
+            [SimpleNamespace(payload=p) for p in payloads]))
+        assert SettingsService._wait_notifications(conn, 0.01) == payloads
+
+    def test_wait_notifications_psycopg2(self):
+        ours, theirs = socket.socketpair()
+
+        class Connection:
+            notifies = []
+
+            def fileno(self):
+                return ours.fileno()
+
+            def poll(self):
+                ours.recv(16)
+                self.notifies.append(SimpleNamespace(payload='{}'))
+
+        conn = Connection()
+        try:
+            assert SettingsService._wait_notifications(conn, 0.01) == []
+            theirs.send(b'x')
+            assert SettingsService._wait_notifications(conn, 1.0) == ['{}']
+            assert conn.notifies == []
+        finally:
+            ours.close()
+            theirs.close()
@@ -0,0 +1,225 @@
+"""
+Tests du traitement différé et idempotent des webhooks Stripe
+
+Exécuter: pytest tests/test_stripe_webhook_service.py -v
+"""
+import sys
+import threading
+import pytest
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from erp.core.db_models import StripeEventModel
+from erp.services.stripe_webhook_service import StripeWebhookService
+
+
+def make_event(event_id, event_type='checkout.session.completed', client_id='client@example.com'):
+    return {
+        'id': event_id,
+        'type': event_type,
+        'data': {'object': {'id': 'cs_test', 'metadata': {'client_id': client_id, 'plan': 'mensuel'}}},
+    }
+
+
+@pytest.fixture
+def get_session():
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    StripeEventModel.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    lock = threading.Lock()
+
+    @contextmanager
+    def session_scope():
+        with lock:
+            session = factory()
+            try:
+                yield session
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+
+    return session_scope
+
+
+@pytest.fixture
+def processed():
+    return []
+
+
+@pytest.fixture
+def make_service(get_session, processed):
+    services = []
+
+    def make(handler=None, **kwargs):
+        def default_handler(session):
+            processed.append(session['metadata']['client_id'])
+            return True, None
+        kwargs.setdefault('retry_delay', 0.01)
+        svc = StripeWebhookService(get_session, {'checkout.session.completed': handler or default_handler}, **kwargs)
+        services.append(svc)
+        return svc
+
+    yield make
+    for svc in services:
+        svc.shutdown()
+
+
+def status_of(get_session, event_id):
+    with get_session() as session:
+        row = session.get(StripeEventModel, event_id)
+        return row.status, row.attempts
+
+
+class TestWebhookEvents:
+    """Enregistrement, idempotence et traitement"""
+
+    def test_event_processed_in_background(self, make_service, get_session, processed):
+        svc = make_service()
+        assert svc.record_event(make_event('evt_1')) is True
+        assert svc.flush(5)
+        assert processed == ['client@example.com']
+        assert status_of(get_session, 'evt_1') == ('done', 1)
+
+    def test_duplicate_delivery_is_noop(self, make_service, processed):
+        svc = make_service()
+        svc.record_event(make_event('evt_1'))
+        svc.flush(5)
+        assert svc.record_event(make_event('evt_1')) is False
+        svc.flush(5)
+        assert processed == ['client@example.com']
+
+    def test_unhandled_event_type_is_ignored(self, make_service, get_session, processed):
+        svc = make_service()
+        svc.record_event(make_event('evt_2', event_type='invoice.paid'))
+        svc.flush(5)
+        assert status_of(get_session, 'evt_2') == ('ignored', 0)
+        assert processed == []
+
+    def test_failure_retried_then_succeeds(self, make_service, get_session):
+        calls = []
+
+        def flaky(session):
+            calls.append(1)
+            return (len(calls) >= 3), 'base des abonnements injoignable'
+
+        svc = make_service(flaky)
+        svc.record_event(make_event('evt_3'))
+        for _ in range(200):
+            svc.flush(5)
+            if status_of(get_session, 'evt_3')[0] != 'pending':
+                break
+            threading.Event().wait(0.01)
+        assert status_of(get_session, 'evt_3') == ('done', 3)
+
+    def test_gives_up_after_max_attempts(self, make_service, get_session):
+        svc = make_service(lambda session: (False, 'erreur'), max_attempts=2)
+        svc.record_event(make_event('evt_4'))
+        for _ in range(200):
+            svc.flush(5)
+            if status_of(get_session, 'evt_4')[0] != 'pending':
+                break
+            threading.Event().wait(0.01)
+        assert status_of(get_session, 'evt_4') == ('failed', 2)
+
+    def test_pending_events_resumed_at_start(self, make_service, get_session, processed):
+        first = make_service()
+        first.start = lambda: None  # thread non démarré : événement acquitté mais non traité
+        first.record_event(make_event('evt_5'))
+        assert status_of(get_session, 'evt_5') == ('pending', 0)
+
+        second = make_service()
+        second.start()
+        second.flush(5)
+        assert processed == ['client@example.com']
+        assert status_of(get_session, 'evt_5') == ('done', 1)
+
+
+class TestTenants:
+    """Le journal des événements est celui du schéma public, quel que soit l'hôte du webhook"""
+
+    def test_event_received_for_tenant_is_processed(self, tmp_path, processed, monkeypatch):
+        import erp.core.tenant as tenant_module
+        monkeypatch.setattr(tenant_module, 'MULTI_TENANT', True)
+        factories = {}
+        for name in (None, 'x'):
+            engine = create_engine(f"sqlite:///{tmp_path / ((name or 'public') + '.db')}",
+                                   connect_args={'check_same_thread': False})
+            StripeEventModel.__table__.create(engine)
+            factories[name] = sessionmaker(bind=engine)
+
+        @contextmanager
+        def session_scope():
+            # Comme la base réelle : la session pointe vers le schéma du tenant courant
+            session = factories[tenant_module.current_tenant()]()
+            try:
+                yield session
+                session.commit()
+            finally:
+                session.close()
+
+        def handler(session):
+            processed.append(session['metadata']['client_id'])
+            return True, None
+
+        svc = StripeWebhookService(session_scope, {'checkout.session.completed': handler})
+        try:
+            with tenant_module.use_tenant('x'):
+                assert svc.record_event(make_event('evt_x')) is True
+            assert svc.flush(5)
+        finally:
+            svc.shutdown()
+        assert processed == ['client@example.com']
+        assert status_of(session_scope, 'evt_x') == ('done', 1)
+
+
+class TestClaim:
+    """Un événement n'est traité qu'une fois, même planifié par deux processus"""
+
+    def test_concurrent_processing_runs_handler_once(self, make_service, get_session, processed):
+        first = make_service()
+        first.start = lambda: None
+        first.record_event(make_event('evt_6'))
+        second = make_service()
+
+        # La reprise au démarrage et le webhook en direct planifient le même événement
+        first._process('evt_6')
+        second._process('evt_6')
+        assert processed == ['client@example.com']
+        assert status_of(get_session, 'evt_6') == ('done', 1)
+
+    def test_claim_held_by_other_process_is_skipped(self, make_service, get_session, processed):
+        svc = make_service()
+        svc.start = lambda: None
+        svc.record_event(make_event('evt_7'))
+        assert svc._claim('evt_7')
+        assert not svc._claim('evt_7')
+        svc._process('evt_7')
+        assert processed == []
+        assert status_of(get_session, 'evt_7') == ('processing', 0)
+
+    def test_abandoned_claim_resumed_at_start(self, make_service, get_session, processed):
+        svc = make_service(claim_timeout=60)
+        svc.start = lambda: None
+        svc.record_event(make_event('evt_8'))
+        with get_session() as session:
+            row = session.get(StripeEventModel, 'evt_8')
+            row.status = 'processing'
+            row.processed_at = datetime.now() - timedelta(minutes=5)
+
+        other = make_service(claim_timeout=60)
+        other.start()
+        other.flush(5)
+        assert processed == ['client@example.com']
+        assert status_of(get_session, 'evt_8') == ('done', 1)
@@ -0,0 +1,167 @@
+"""
+Tests du cache des vérifications d'abonnement (rafraîchissement en arrière-plan)
+
+La base distante est remplacée par une fonction de requête contrôlée par le test.
+
+Exécuter: pytest tests/test_subscription_service.py -v
+"""
+import sys
+import threading
+import pytest
+import psycopg2
+from pathlib import Path
+from types import SimpleNamespace
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import erp.services.subscription_service as ss
+
+
+class FakeRemote:
+    """Base distante simulée : compte les requêtes, peut bloquer ou échouer"""
+
+    def __init__(self, status=(True, None)):
+        self.status = status
+        self.calls = 0
+        self.error = None
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, client_id):
+        self.calls += 1
+        self.gate.wait(5)
+        if self.error:
+            raise self.error
+        return self.status
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(ss, 'time', SimpleNamespace(monotonic=lambda: now.value))
+    monkeypatch.setattr(ss, 'SUBSCRIPTION_CACHE_TTL', 300)
+    monkeypatch.setattr(ss, 'SUBSCRIPTION_CACHE_MAX_STALE', 3600)
+    monkeypatch.setattr(ss, 'SUBSCRIPTION_CHECK_TIMEOUT', 0.2)
+    return now
+
+
+@pytest.fixture
+def service():
+    svc = ss.SubscriptionService()
+    svc.remote = FakeRemote()
+    svc._query_subscription_status = svc.remote
+    yield svc
+    svc.remote.gate.set()
+    svc.shutdown()
+
+
+def wait_idle(svc):
+    """Attend la fin des rafraîchissements en cours"""
+    for future in list(svc._refreshing.values()):
+        future.result(5)
+
+
+class TestSubscriptionCache:
+    """Statut servi depuis le cache"""
+
+    def test_fresh_status_is_cached(self, service, clock):
+        assert service.check_subscription('c1') == (True, None)
+        assert service.check_subscription('c1') == (True, None)
+        assert service.remote.calls == 1
+
+    def test_stale_status_served_while_refreshing(self, service, clock):
+        service.check_subscription('c1')
+        service.remote.status = (False, "Votre compte est suspendu.")
+        service.remote.gate.clear()
+        clock.value += 301
+
+        # Le dernier statut est rendu immédiatement, la requête continue en arrière-plan
+        assert service.check_subscription('c1') == (True, None)
+        assert service.check_subscription('c1') == (True, None)
+        service.remote.gate.set()
+        wait_idle(service)
+
+        assert service.remote.calls == 2
+        assert service.check_subscription('c1')[0] is False
+
+    def test_too_old_status_is_rechecked(self, service, clock):
+        service.check_subscription('c1')
+        clock.value += 3601
+        service.remote.status = (False, "Aucun abonnement actif.")
+        assert service.check_subscription('c1')[0] is False
+
+    def test_invalidate(self, service, clock):
+        service.check_subscription('c1')
+        service.invalidate_subscription('c1')
+        service.check_subscription('c1')
+        assert service.remote.calls == 2
+
+
+class TestSubscriptionFailures:
+    """Comportement quand la base distante est lente ou indisponible"""
+
+    def test_slow_remote_fails_open_then_caches(self, service, clock):
+        service.remote.status = (False, "Votre compte est suspendu.")
+        service.remote.gate.clear()
+        assert service.check_subscription('c1') == (True, None)
+
+        service.remote.gate.set()
+        wait_idle(service)
+        assert service.check_subscription('c1')[0] is False
+        assert service.remote.calls == 1
+
+    def test_error_keeps_last_known_status(self, service, clock):
+        service.remote.status = (False, "Votre compte est suspendu.")
+        service.check_subscription('c1')
+        service.remote.error = psycopg2.OperationalError('connexion refusée')
+        clock.value += 301
+
+        assert service.check_subscription('c1')[0] is False
+        wait_idle(service)
+        clock.value += 3601
+        assert service.check_subscription('c1')[0] is False
+
+    def test_error_without_status_fails_open(self, service, clock):
+        service.remote.error = psycopg2.OperationalError('connexion refusée')
+        assert service.check_subscription('c1') == (True, None)
+        assert 'c1' not in service._status_cache
+
+    def test_missing_client_id(self, service, clock, monkeypatch):
+        monkeypatch.delenv('CLIENT_ID', raising=False)
+        assert service.check_subscription()[0] is False
+        assert service.remote.calls == 0
+
+
+class TestPoolStats:
+    """Connexions comptées à l'emprunt et au retour, sans attributs internes du pool"""
+
+    class FakePool:
+        def __init__(self):
+            self.idle = []
+
+        def getconn(self):
+            return self.idle.pop() if self.idle else SimpleNamespace(closed=0, rollback=lambda: None)
+
+        def putconn(self, conn, close=False):
+            if not close:
+                self.idle.append(conn)
+
+        def closeall(self):
+            self.idle.clear()
+
+    def test_in_use_and_idle(self, service):
+        service._pool = self.FakePool()
+        assert service.pool_stats() == {'in_use': 0, 'idle': 0}
+        with service.connection():
+            with service.connection():
+                assert service.pool_stats() == {'in_use': 2, 'idle': 0}
+        assert service.pool_stats() == {'in_use': 0, 'idle': 2}
+
+    def test_broken_connection_not_counted_idle(self, service):
+        service._pool = self.FakePool()
+        with pytest.raises(psycopg2.OperationalError):
+            with service.connection():
+                raise psycopg2.OperationalError('connexion perdue')
+        assert service.pool_stats() == {'in_use': 0, 'idle': 0}
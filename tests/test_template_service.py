@@ -0,0 +1,161 @@
+"""
+Tests du stockage en base des modèles de devis et de son cache
+
+Exécuter: pytest tests/test_template_service.py -v
+"""
+import sys
+import json
+import pytest
+from contextlib import contextmanager
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from erp.core.db_models import DevisTemplateModel
+from erp.services.template_service import TemplateService
+
+
+BLOCKS = [{'type': 'titre', 'x': 300, 'y': 20, 'width': 200, 'height': 50}]
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Base SQLite avec la seule table des modèles et un compteur de requêtes"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'templates.db'}")
+    DevisTemplateModel.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    queries = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: queries.append(args[2]))
+
+    @contextmanager
+    def get_session():
+        session = factory()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    get_session.queries = queries
+    return get_session
+
+
+def make_service(database, tmp_path, check_interval=3600):
+    return TemplateService(session_factory=database, legacy_file=tmp_path / 'devis_templates.json',
+                           check_interval=check_interval)
+
+
+class TestTemplateStore:
+    """Tests des écritures unitaires et du versionnement"""
+
+    def test_save_and_list(self, database, tmp_path):
+        svc = make_service(database, tmp_path)
+        saved = svc.save_template('Standard', BLOCKS, '2025-01-01T10:00:00Z')
+
+        assert saved['version'] == 1
+        assert svc.list_templates()['Standard']['blocks'] == BLOCKS
+
+    def test_update_increments_version_of_one_row(self, database, tmp_path):
+        svc = make_service(database, tmp_path)
+        svc.save_template('A', BLOCKS)
+        svc.save_template('B', BLOCKS)
+        assert svc.save_template('A', BLOCKS + BLOCKS)['version'] == 2
+
+        with database() as session:
+            versions = {row.nom: row.version for row in session.query(DevisTemplateModel)}
+        assert versions == {'A': 2, 'B': 1}
+
+    def test_delete(self, database, tmp_path):
+        svc = make_service(database, tmp_path)
+        svc.save_template('A', BLOCKS)
+        assert svc.delete_template('A') is True
+        assert svc.delete_template('A') is False
+        assert svc.list_templates() == {}
+
+
+class TestTemplateCache:
+    """Tests du cache et de son invalidation"""
+
+    def test_listing_is_served_from_memory(self, database, tmp_path):
+        svc = make_service(database, tmp_path)
+        svc.save_template('A', BLOCKS)
+        database.queries.clear()
+
+        for _ in range(5):
+            svc.list_templates()
+        assert database.queries == []
+
+    def test_changes_from_other_instance_are_detected(self, database, tmp_path):
+        local = make_service(database, tmp_path, check_interval=0)
+        remote = make_service(database, tmp_path)
+        local.save_template('A', BLOCKS)
+
+        remote.save_template('B', BLOCKS)
+        assert set(local.list_templates()) == {'A', 'B'}
+
+        remote.save_template('A', [])
+        assert local.get_template('A')['blocks'] == []
+
+    def test_legacy_file_imported_once(self, database, tmp_path):
+        legacy = tmp_path / 'devis_templates.json'
+        legacy.write_text(json.dumps({'Ancien': {'name': 'Ancien', 'blocks': BLOCKS, 'timestamp': ''}}),
+                          encoding='utf-8')
+        svc = make_service(database, tmp_path)
+
+        assert list(svc.list_templates()) == ['Ancien']
+        assert not legacy.exists()
+        assert (tmp_path / 'devis_templates.json.migrated').exists()
+
+    def test_legacy_file_not_imported_for_a_tenant(self, database, tmp_path, monkeypatch):
+        from erp.core import tenant as tenant_module
+        monkeypatch.setattr(tenant_module, 'MULTI_TENANT', True)
+        legacy = tmp_path / 'devis_templates.json'
+        legacy.write_text(json.dumps({'Ancien': {'name': 'Ancien', 'blocks': BLOCKS, 'timestamp': ''}}),
+                          encoding='utf-8')
+        svc = make_service(database, tmp_path)
+
+        with tenant_module.use_tenant('alpha'):
+            assert svc.list_templates() == {}
+        assert legacy.exists()
+
+
+class TestTenants:
+    """Un cache par tenant : les modèles d'un tenant ne sont jamais servis à un autre"""
+
+    def test_templates_isolated_between_tenants(self, tmp_path, monkeypatch):
+        from erp.core import tenant as tenant_module
+        monkeypatch.setattr(tenant_module, 'MULTI_TENANT', True)
+        factories = {}
+        for name in ('alpha', 'beta'):
+            engine = create_engine(f"sqlite:///{tmp_path / (name + '.db')}")
+            DevisTemplateModel.__table__.create(engine)
+            factories[name] = sessionmaker(bind=engine)
+
+        @contextmanager
+        def get_session():
+            # Comme la base réelle : la session pointe vers les données du tenant courant
+            session = factories[tenant_module.current_tenant()]()
+            try:
+                yield session
+                session.commit()
+            finally:
+                session.close()
+
+        svc = make_service(get_session, tmp_path)
+        with tenant_module.use_tenant('alpha'):
+            svc.save_template('Alpha', BLOCKS)
+            assert list(svc.list_templates()) == ['Alpha']
+        with tenant_module.use_tenant('beta'):
+            assert svc.list_templates() == {}
+            assert svc.get_template('Alpha') is None
+            svc.save_template('Beta', BLOCKS)
+        with tenant_module.use_tenant('alpha'):
+            assert list(svc.list_templates()) == ['Alpha']
@@ -0,0 +1,162 @@
+"""
+Tests du mode multi-tenant : résolution du tenant et routage par schéma
+
+La base PostgreSQL est remplacée par SQLite, où chaque schéma de tenant est
+une base en mémoire attachée (ATTACH DATABASE ... AS tenant_<id>).
+
+Exécuter: pytest tests/test_tenant.py -v
+"""
+import sys
+import json
+import pytest
+from pathlib import Path
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import erp.core.tenant as tenant_module
+from erp.core.auth import SessionManager
+from erp.core.database import DatabaseManager
+from erp.core.db_models import OrganisationModel
+from erp.core.session_store import MemorySessionStore
+from erp.core.tenant import TenantRegistry, current_tenant, get_client_id, use_tenant
+
+TENANTS = {
+    'dupont': {'client_id': 'contact@dupont.fr', 'hosts': ['erp.dupont.fr']},
+    'martin': {'client_id': 'martin@btp.fr'},
+}
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    path = tmp_path / 'tenants.json'
+    path.write_text(json.dumps(TENANTS), encoding='utf-8')
+    registry = TenantRegistry(str(path))
+    monkeypatch.setattr(tenant_module, '_tenant_registry', registry)
+    monkeypatch.setattr(tenant_module, 'MULTI_TENANT', True)
+    return registry
+
+
+@pytest.fixture
+def manager(registry):
+    db = DatabaseManager()
+    db.engine = create_engine('sqlite://', poolclass=StaticPool)
+
+    @event.listens_for(db.engine, 'connect')
+    def attach_schemas(dbapi_conn, record):
+        for tenant_id in TENANTS:
+            dbapi_conn.execute(f"ATTACH DATABASE ':memory:' AS tenant_{tenant_id}")
+
+    db.session_factory = sessionmaker(bind=db.engine)
+    db.Session = scoped_session(db.session_factory)
+    db.ensure_schema()
+    yield db
+    db.close()
+
+
+class TestRegistry:
+    """Déclaration des tenants et résolution par nom d'hôte"""
+
+    def test_resolve_declared_host(self, registry):
+        assert registry.resolve_host('erp.dupont.fr') == 'dupont'
+        assert registry.resolve_host('ERP.DUPONT.FR:8080') == 'dupont'
+
+    def test_resolve_first_label(self, registry):
+        assert registry.resolve_host('martin.erp-btp.fr') == 'martin'
+        assert registry.resolve_host('inconnu.erp-btp.fr') is None
+        assert registry.resolve_host(None) is None
+
+    def test_invalid_id_ignored(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps({'Dupont; DROP': {}, 'ok': {}}), encoding='utf-8')
+        assert [t.id for t in TenantRegistry(str(path)).all()] == ['ok']
+
+    def test_reloaded_when_file_changes(self, registry):
+        assert registry.get('durand') is None
+        registry.path.write_text(json.dumps(dict(TENANTS, durand={'client_id': 'd@btp.fr'})), encoding='utf-8')
+        assert registry.get('durand').client_id == 'd@btp.fr'
+
+    def test_missing_file(self, tmp_path):
+        assert TenantRegistry(str(tmp_path / 'absent.json')).all() == []
+
+
+class TestCurrentTenant:
+    """Tenant courant et CLIENT_ID"""
+
+    def test_single_tenant_mode(self, monkeypatch):
+        monkeypatch.setattr(tenant_module, 'MULTI_TENANT', False)
+        monkeypatch.setenv('CLIENT_ID', 'client-unique')
+        with use_tenant('dupont'):
+            assert current_tenant() is None
+            assert get_client_id() == 'client-unique'
+
+    def test_client_id_per_tenant(self, registry, monkeypatch):
+        monkeypatch.setenv('CLIENT_ID', 'client-unique')
+        with use_tenant('dupont'):
+            assert current_tenant() == 'dupont'
+            assert get_client_id() == 'contact@dupont.fr'
+        with use_tenant('martin'):
+            assert get_client_id() == 'martin@btp.fr'
+        assert current_tenant() is None
+
+    def test_use_tenant_none_overrides_request(self, registry):
+        from types import SimpleNamespace
+        from nicegui.storage import request_contextvar
+        request = SimpleNamespace(state=SimpleNamespace(), headers={'host': 'erp.dupont.fr'})
+        token = request_contextvar.set(request)
+        try:
+            assert current_tenant() == 'dupont'
+            with use_tenant(None):
+                assert current_tenant() is None
+        finally:
+            request_contextvar.reset(token)
+
+
+class TestSchemaRouting:
+    """Chaque tenant lit et écrit dans son schéma, via le moteur partagé"""
+
+    def test_data_isolated_per_tenant(self, manager):
+        with use_tenant('dupont'):
+            with manager.get_session() as session:
+                session.add(OrganisationModel(id=1, nom='Dupont BTP'))
+        with use_tenant('martin'):
+            with manager.get_session() as session:
+                assert session.query(OrganisationModel).count() == 0
+        with use_tenant('dupont'):
+            with manager.get_session() as session:
+                assert session.query(OrganisationModel).one().nom == 'Dupont BTP'
+        with manager.get_session() as session:
+            assert session.query(OrganisationModel).count() == 0
+
+    def test_schema_prepared_once(self, manager):
+        statements = []
+        event.listen(manager.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        for _ in range(3):
+            with use_tenant('dupont'):
+                with manager.get_session() as session:
+                    session.query(OrganisationModel).count()
+        assert sum(s.strip().startswith('CREATE TABLE') for s in statements) > 0
+        created = len(statements)
+        with use_tenant('dupont'):
+            with manager.get_session() as session:
+                session.query(OrganisationModel).count()
+        assert not any(s.strip().startswith('CREATE') for s in statements[created:])
+        assert manager.tenant_count() == 1
+
+
+class TestSessionsPerTenant:
+    """Un jeton de session n'est valable que pour son tenant"""
+
+    def test_session_not_shared(self, registry):
+        sessions = SessionManager(MemorySessionStore())
+        with use_tenant('dupont'):
+            session_id = sessions.create_session('u1')
+            assert sessions.get_user_id(session_id) == 'u1'
+        with use_tenant('martin'):
+            assert sessions.get_user_id(session_id) is None
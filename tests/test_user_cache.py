@@ -0,0 +1,122 @@
+"""
+Tests du cache des utilisateurs et de la recherche par identifiant de connexion
+
+Exécuter: pytest tests/test_user_cache.py -v
+"""
+import sys
+import pytest
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+# Ajouter le chemin racine du projet pour les imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import erp.core.data_manager_postgres as dm_module
+from erp.core.db_models import UserModel
+from erp.core.models import User
+from erp.utils.cache import MISSING, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Tests de l'expiration et de la taille bornée"""
+
+    def test_expiration(self):
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.set('a', 1)
+        assert cache.get('a') == 1
+        clock.now = 10
+        assert cache.get('a') is MISSING
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_lru_eviction(self):
+        cache = TTLCache(ttl=10, max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert cache.get('b') is MISSING
+        assert cache.get('a') == 1
+
+    def test_invalidate(self):
+        cache = TTLCache(ttl=10)
+        cache.set('a', 1)
+        cache.invalidate('a')
+        assert cache.get('a', None) is None
+
+
+@pytest.fixture
+def dm(monkeypatch):
+    """DataManagerPostgres sur une base SQLite en mémoire, avec compteur de requêtes"""
+    engine = create_engine('sqlite://')
+    UserModel.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    queries = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: queries.append(args[2]))
+
+    @contextmanager
+    def get_session():
+        session = factory()
+        try:
+            yield session
+            session.commit()
+        finally:
+            session.close()
+
+    monkeypatch.setattr(dm_module, 'db_manager', SimpleNamespace(get_session=get_session))
+    manager = object.__new__(dm_module.DataManagerPostgres)
+    manager._user_cache = TTLCache(ttl=60)
+    manager.queries = queries
+    for uid, username, email in [('u1', 'paul', 'paul@btp.fr'), ('u2', 'marie@btp.fr', 'm@btp.fr'),
+                                 ('u3', 'marie', 'marie@btp.fr')]:
+        pwd_hash, salt = User.hash_password('secret')
+        manager.add_user(User(id=uid, username=username, email=email, password_hash=pwd_hash, salt=salt,
+                              client_id=42))
+    queries.clear()
+    return manager
+
+
+class TestUserCache:
+    """Une navigation authentifiée ne coûte pas une requête par page"""
+
+    def test_get_user_by_id_cached(self, dm):
+        for _ in range(5):
+            assert dm.get_user_by_id('u1').username == 'paul'
+        assert len(dm.queries) == 1
+
+    def test_client_id_loaded(self, dm):
+        assert dm.get_user_by_id('u1').client_id == 42
+
+    def test_update_user_invalidates(self, dm):
+        user = dm.get_user_by_id('u1')
+        user.nom = 'Durand'
+        assert dm.get_user_by_id('u1').nom == ''  # Copie : le cache n'est pas modifié
+
+        dm.update_user(user)
+        assert dm.get_user_by_id('u1').nom == 'Durand'
+
+
+class TestLoginLookup:
+    """Recherche par nom d'utilisateur ou email en une requête"""
+
+    def test_by_username_or_email(self, dm):
+        assert dm.get_user_by_login('paul').id == 'u1'
+        assert dm.get_user_by_login('paul@btp.fr').id == 'u1'
+        assert dm.get_user_by_login('inconnu') is None
+        assert len(dm.queries) == 3
+
+    def test_username_has_priority(self, dm):
+        assert dm.get_user_by_login('marie@btp.fr').id == 'u2'